@@ -0,0 +1,324 @@
+# app/analytics/event_sink.py
+"""
+Gravação em segundo plano de ``explain_events``/``narrator_events``.
+
+O /ask com ``explain=true`` só enfileira as linhas (``EventSink.submit``,
+não bloqueia); uma thread daemon agrupa as linhas e grava com um INSERT
+multi-linha por tabela, numa transação, sobre o pool do PgExecutor
+(app/core/context.py). O flush acontece quando o lote atinge
+``EVENT_SINK_BATCH_SIZE`` linhas ou ``EVENT_SINK_FLUSH_INTERVAL_S`` depois
+da primeira linha pendente.
+
+A fila é limitada (``EVENT_SINK_QUEUE_SIZE`` requisições): cheia, o evento
+é descartado e contado em
+``sirios_analytics_events_dropped_total{reason="overflow"}``; lotes que
+falham na gravação contam ``reason="write_error"`` (analytics não é
+reprocessado). Se o lote falha por erro de dados (NUL, valor longo
+demais, FK: ``DataError``/``IntegrityError``), cada requisição é regravada
+sozinha e só a que tem a linha ruim é descartada; com o banco/pool fora
+(timeout, ``OperationalError``) o lote inteiro é descartado de uma vez,
+sem uma espera de pool por requisição.
+``ts`` é capturado no enfileiramento, não no flush.
+
+``EVENT_SINK_ENABLED=false`` grava de forma síncrona (scripts/diagnóstico).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.observability.metrics import emit_counter as counter
+
+try:
+    from psycopg import DataError, IntegrityError
+
+    _DATA_ERRORS: Tuple[type, ...] = (DataError, IntegrityError)
+except Exception:  # pragma: no cover - depende do ambiente
+    _DATA_ERRORS = ()
+
+LOGGER = logging.getLogger(__name__)
+
+Row = Tuple[str, Tuple[Any, ...]]
+Writer = Callable[[Sequence[Row]], None]
+
+# ordem importa: narrator_events referencia explain_events(request_id)
+_TABLES: Dict[str, Dict[str, str]] = {
+    "explain_events": {
+        "columns": (
+            "ts, request_id, question, intent, entity, route_id, features, "
+            "sql_view, sql_hash, cache_policy, latency_ms"
+        ),
+        "values": "(%s, %s, %s, %s, %s, %s, %s::jsonb, %s, %s, %s, %s)",
+        "suffix": "ON CONFLICT (request_id) DO NOTHING",
+    },
+    "narrator_events": {
+        "columns": (
+            "ts, request_id, answer_text, answer_len, answer_hash, "
+            "narrator_version, narrator_style"
+        ),
+        "values": "(%s, %s, %s, %s, %s, %s, %s)",
+        "suffix": "",
+    },
+}
+
+_STOP = object()
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except (TypeError, ValueError):
+        return default
+
+
+def _dropped(reason: str, n: int) -> None:
+    try:
+        counter("sirios_analytics_events_dropped_total", reason=reason, _value=n)
+    except Exception:
+        pass
+
+
+def explain_event_rows(
+    *,
+    request_id: str,
+    question: str,
+    intent: Optional[str],
+    entity: Optional[str],
+    result_key: Optional[str],
+    explain_details: Any,
+    elapsed_ms: int,
+    answer_text: str,
+    narrator_version: str,
+    narrator_style: str,
+) -> List[Row]:
+    """Linhas de explain_events + narrator_events de uma requisição."""
+    ts = datetime.now(timezone.utc)
+    answer_text = answer_text or ""
+    return [
+        (
+            "explain_events",
+            (
+                ts,
+                request_id,
+                question,
+                intent or "",
+                entity or "",
+                result_key or "",
+                json.dumps(explain_details),
+                result_key or "",
+                "",
+                "default",
+                elapsed_ms,
+            ),
+        ),
+        (
+            "narrator_events",
+            (
+                ts,
+                request_id,
+                answer_text,
+                len(answer_text),
+                # mesmo valor do md5() do Postgres (UTF-8)
+                hashlib.md5(answer_text.encode("utf-8")).hexdigest(),
+                narrator_version,
+                narrator_style,
+            ),
+        ),
+    ]
+
+
+def build_insert_statements(rows: Sequence[Row]) -> List[Tuple[str, List[Any]]]:
+    """Um INSERT multi-linha por tabela, na ordem de ``_TABLES``."""
+    by_table: Dict[str, List[Tuple[Any, ...]]] = {}
+    for table, values in rows:
+        if table not in _TABLES:
+            raise ValueError(f"tabela de analytics desconhecida: {table}")
+        by_table.setdefault(table, []).append(values)
+
+    statements = []
+    for table, spec in _TABLES.items():
+        batch = by_table.get(table)
+        if not batch:
+            continue
+        sql = (
+            f"INSERT INTO {table} ({spec['columns']}) VALUES "
+            + ", ".join([spec["values"]] * len(batch))
+            + (f" {spec['suffix']}" if spec["suffix"] else "")
+        )
+        params = [v for values in batch for v in values]
+        statements.append((sql, params))
+    return statements
+
+
+def _pg_writer(rows: Sequence[Row]) -> None:
+    from app.core.context import executor
+
+    with executor.connection() as conn:
+        with conn.transaction():
+            with conn.cursor() as cur:
+                for sql, params in build_insert_statements(rows):
+                    cur.execute(sql, params)
+
+
+class EventSink:
+    def __init__(
+        self,
+        writer: Optional[Writer] = None,
+        *,
+        enabled: Optional[bool] = None,
+        queue_size: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        flush_interval_s: Optional[float] = None,
+    ):
+        if enabled is None:
+            enabled = os.getenv("EVENT_SINK_ENABLED", "true").strip().lower() in (
+                "1",
+                "true",
+                "yes",
+                "on",
+            )
+        self.enabled = enabled
+        if batch_size is None:
+            batch_size = _env_int("EVENT_SINK_BATCH_SIZE", 200)
+        if flush_interval_s is None:
+            flush_interval_s = _env_float("EVENT_SINK_FLUSH_INTERVAL_S", 1.0)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval_s = max(0.01, flush_interval_s)
+        self._writer = writer or _pg_writer
+        if queue_size is None:
+            queue_size = _env_int("EVENT_SINK_QUEUE_SIZE", 10000)
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, queue_size))
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------ produtor
+
+    def submit(self, rows: Sequence[Row]) -> bool:
+        """Enfileira sem bloquear; False quando o evento foi descartado."""
+        rows = list(rows)
+        if not rows:
+            return True
+        if not self.enabled:
+            return self._write(rows)
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(rows)
+        except queue.Full:
+            _dropped("overflow", len(rows))
+            return False
+        return True
+
+    # ----------------------------------------------------------- consumidor
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="analytics-event-sink", daemon=True
+                )
+                self._thread.start()
+
+    def _write(self, rows: List[Row]) -> bool:
+        """Grava as linhas de uma requisição; falha => requisição descartada."""
+        try:
+            self._writer(rows)
+            return True
+        except Exception:
+            LOGGER.warning(
+                "Falha ao gravar %d linhas de explain/narrator events", len(rows), exc_info=True
+            )
+            self._failed(len(rows))
+            return False
+
+    @staticmethod
+    def _failed(n_rows: int) -> None:
+        _dropped("write_error", n_rows)
+        try:
+            counter("sirios_explain_events_failed_total")
+        except Exception:
+            pass
+
+    def _flush(self, units: List[List[Row]]) -> None:
+        """
+        Grava o lote numa transação. Erro de dados: regrava requisição a
+        requisição; qualquer outro erro (banco/pool fora): descarta o lote.
+        """
+        if len(units) == 1:
+            self._write(units[0])
+            return
+        rows = [row for unit in units for row in unit]
+        try:
+            self._writer(rows)
+            return
+        except _DATA_ERRORS:
+            LOGGER.warning(
+                "Erro de dados no lote de %d requisições; regravando uma a uma",
+                len(units),
+                exc_info=True,
+            )
+        except Exception:
+            LOGGER.warning(
+                "Falha ao gravar lote de %d requisições; lote descartado",
+                len(units),
+                exc_info=True,
+            )
+            self._failed(len(rows))
+            return
+        for unit in units:
+            self._write(unit)
+
+    def _run(self) -> None:
+        # cada item da fila é a unidade de um submit() (uma requisição)
+        units: List[List[Row]] = []
+        pending = 0
+        deadline: Optional[float] = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if item is _STOP:
+                if units:
+                    self._flush(units)
+                return
+            if item:
+                units.append(item)
+                pending += len(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval_s
+            if units and (pending >= self.batch_size or time.monotonic() >= deadline):
+                self._flush(units)
+                units, pending, deadline = [], 0, None
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Grava o que estiver pendente e encerra a thread (shutdown da API)."""
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            LOGGER.warning("Fila do event sink cheia no shutdown; eventos pendentes descartados")
+            return
+        thread.join(timeout)
+
+
+EVENT_SINK = EventSink()
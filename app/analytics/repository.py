@@ -391,3 +391,30 @@ def fetch_explain_summary(
         "top_slowest": top_slowest,
         "top_routes": top_routes,
     }
+
+
+def fetch_top_questions(
+    entity: str,
+    window: str = "24h",
+    limit: int = 20,
+) -> List[Tuple[str, int]]:
+    """
+    Perguntas mais frequentes roteadas para ``entity`` na janela (explain_events).
+    Usado pelo pré-aquecimento de cache (app.cache.warmer).
+    """
+    dsn = os.getenv("DATABASE_URL")
+    sql = """
+      SELECT question, COUNT(*)::bigint AS hits
+      FROM explain_events
+      WHERE ts >= now() - (%s)::interval
+        AND entity = %s
+        AND question IS NOT NULL AND question <> ''
+      GROUP BY question
+      ORDER BY hits DESC, question ASC
+      LIMIT %s
+    """
+    with psycopg.connect(dsn) as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql, [_parse_window(window), entity, int(limit)])
+            rows = cur.fetchall() or []
+    return [(str(r[0]), int(r[1])) for r in rows]
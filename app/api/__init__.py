@@ -1,4 +1,6 @@
 # app/api/__init__.py
+import asyncio
+
 from fastapi import FastAPI
 
 from app.api.ask import router as ask_router
@@ -22,6 +24,7 @@ from app.observability.runtime import (
     init_metrics,
     init_cache_metrics,
     init_planner_metrics,
+    init_rag_metrics,
     init_sql_metrics,
 )
 
@@ -34,6 +37,7 @@ def get_app() -> FastAPI:
     init_cache_metrics(cfg)
     init_planner_metrics(cfg)
     init_sql_metrics(cfg)
+    init_rag_metrics(cfg)
 
     app = FastAPI(title="Araquem API (Dev)")
     app.middleware("http")(metrics_middleware)
@@ -50,4 +54,31 @@ def get_app() -> FastAPI:
     app.include_router(ops_context_debug_router)
     app.include_router(ops_context_clear_router)
 
+    async def _close_async_backends() -> None:
+        from app.core.context import async_cache, async_executor
+        from app.analytics.event_sink import EVENT_SINK
+        from app.rag.ollama_client import aclose_async_clients, close_clients
+
+        # eventos pendentes usam o pool sync do executor: drena antes do resto
+        await asyncio.to_thread(EVENT_SINK.stop)
+        await async_executor.close()
+        await async_cache.close()
+        await aclose_async_clients()
+        close_clients()
+
+    def _start_cache_warmer() -> None:
+        from app.cache.warmer import start_background_warmer
+        from app.core.context import cache, orchestrator, policies
+
+        start_background_warmer(orchestrator, policies, cache)
+
+    def _precompile_templates() -> None:
+        from app.formatter.rows import precompile_entity_templates
+
+        precompile_entity_templates()
+
+    app.add_event_handler("startup", _precompile_templates)
+    app.add_event_handler("startup", _start_cache_warmer)
+    app.add_event_handler("shutdown", _close_async_backends)
+
     return app
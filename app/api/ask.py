@@ -1,32 +1,45 @@
 # app/api/ask.py
+import asyncio
 import json
 import logging
 import os
 import time
 from datetime import datetime, timezone
 from decimal import Decimal
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, AsyncIterator, Callable
 
-import psycopg
 from fastapi import APIRouter, Query
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 
+from app.analytics.event_sink import EVENT_SINK, explain_event_rows
 from app.analytics.explain import explain as _explain_analytics
 from app.cache.rt_cache import (
     is_cacheable_payload,
+    make_cache_tags,
     make_plan_cache_key,
 )
+from app.cache.swr import stale_ttl_seconds
+from app.common.effects import Steps, effect, run_async, run_sync
 from app.common.http import json_sanitize, make_request_id
-from app.core.context import cache, orchestrator, planner, policies, context_manager
+from app.core.context import (
+    async_cache,
+    cache,
+    context_manager,
+    orchestrator,
+    planner,
+    policies,
+)
 from app.observability.metrics import (
     emit_counter as counter,
     emit_histogram as histogram,
     emit_gauge as gauge,
 )
+from app.planner.ticker_index import ticker_scan_scope
 from app.quota.ask_quota import (
     build_client_key,
     enforce_ask_quota,
+    enforce_ask_quota_async,
     get_blocked_message,
     load_ask_quota_policy,
     normalize_user_type,
@@ -48,6 +61,13 @@ from app.narrator.narrator import Narrator  # arquivo novo (drop-in)
 
 LOGGER = logging.getLogger(__name__)
 
+# /ask servido pelo handler asyncio (default) ou pelo handler sync (fallback).
+_ASK_ASYNC_ENABLED = os.getenv("ASK_ASYNC_ENABLED", "true").strip().lower() in (
+    "1",
+    "true",
+    "yes",
+    "on",
+)
 
 _NARR: Optional[Narrator] = Narrator()
 
@@ -191,23 +211,136 @@ def _build_quota_blocked_response(
     }
 
 
-@router.post("/ask")
+async def _enforce_quota_async(_redis_client: Any, *args: Any, **kwargs: Any):
+    # mesmo contrato de enforce_ask_quota, porém no cliente redis.asyncio
+    return await enforce_ask_quota_async(async_cache.raw, *args, **kwargs)
+
+
+def _explain_event_rows(
+    request_id: str,
+    question: str,
+    intent: Optional[str],
+    entity: Optional[str],
+    result_key: Optional[str],
+    explain_details: Any,
+    elapsed_ms: int,
+    presenter_result: Any,
+) -> List[Any]:
+    narrator_meta = presenter_result.narrator_meta or {}
+    return explain_event_rows(
+        request_id=request_id,
+        question=question,
+        intent=intent,
+        entity=entity,
+        result_key=result_key,
+        explain_details=explain_details,
+        elapsed_ms=elapsed_ms,
+        answer_text=presenter_result.answer or "",
+        narrator_version=narrator_meta.get("version")
+        or os.getenv("NARRATOR_VERSION", "20251117-narrator-v1"),
+        narrator_style=narrator_meta.get("style") or "executivo",
+    )
+
+
 def ask(
     payload: AskPayload,
     explain: bool = Query(default=False),
 ):
+    """Handler síncrono: fallback para scripts/testes e ASK_ASYNC_ENABLED=false."""
+    with ticker_scan_scope():
+        return run_sync(_ask_steps(payload, explain))
+
+
+async def ask_async(
+    payload: AskPayload,
+    explain: bool = Query(default=False),
+):
+    """
+    Handler asyncio: quota, caches, SQL, embeddings de RAG e explain events
+    rodam em clientes nativos; planner e presenter/narrator vão ao threadpool.
+    """
+    with ticker_scan_scope():
+        return await run_async(_ask_steps(payload, explain))
+
+
+async def ask_stream(
+    payload: AskPayload,
+    explain: bool = Query(default=False),
+):
+    """
+    /ask em Server-Sent Events. Eventos, em ordem:
+
+    - ``answer``: baseline determinístico (template/presenter) + rows, logo
+      após o SQL — antes de qualquer chamada ao LLM;
+    - ``token`` (0..n): fragmentos do Narrator via streaming do Ollama;
+    - ``final``: o mesmo corpo do POST /ask. ``final.answer`` é a resposta
+      autoritativa (guards do Narrator aplicados ao texto completo) e substitui
+      o que foi montado com ``answer``/``token``;
+    - ``error``: falha inesperada no pipeline.
+
+    Quota/gate/unroutable não têm baseline: só emitem ``final``.
+    """
+    loop = asyncio.get_running_loop()
+    queue: "asyncio.Queue[tuple[Optional[str], Any]]" = asyncio.Queue()
+
+    def _emit(event: Optional[str], data: Any) -> None:
+        # o presenter/narrator rodam no threadpool
+        loop.call_soon_threadsafe(queue.put_nowait, (event, data))
+
+    async def _run() -> None:
+        try:
+            with ticker_scan_scope():
+                response = await run_async(_ask_steps(payload, explain, emit=_emit))
+            _emit("final", json.loads(response.body))
+        except Exception:
+            LOGGER.exception("Falha no /ask/stream")
+            _emit("error", {"code": "internal_error", "retryable": True})
+        finally:
+            _emit(None, None)
+
+    async def _events() -> AsyncIterator[str]:
+        task = asyncio.create_task(_run())
+        try:
+            while True:
+                event, data = await queue.get()
+                if event is None:
+                    break
+                yield _sse(event, data)
+        finally:
+            if not task.done():
+                task.cancel()
+
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _sse(event: str, data: Any) -> str:
+    body = json.dumps(json_sanitize(data), ensure_ascii=False)
+    return f"event: {event}\ndata: {body}\n\n"
+
+
+def _ask_steps(
+    payload: AskPayload,
+    explain: bool,
+    emit: Optional[Callable[[Optional[str], Any], None]] = None,
+) -> Steps[JSONResponse]:
     t0 = time.perf_counter()
     request_id = make_request_id()
 
     quota_policy = load_ask_quota_policy()
     user_type = normalize_user_type(payload.type_user)
     client_key = build_client_key(user_type, payload.client_id, payload.conversation_id)
-    quota_decision = enforce_ask_quota(
+    quota_decision = yield effect(
+        enforce_ask_quota,
         cache.raw,
         user_type,
         client_key,
         now=datetime.now(timezone.utc),
         policy=quota_policy,
+        afn=_enforce_quota_async,
     )
     if not quota_decision.bypassed:
         if quota_decision.allowed:
@@ -235,7 +368,8 @@ def ask(
             return JSONResponse(json_sanitize(body_blocked))
 
     t_plan0 = time.perf_counter()
-    plan = planner.explain(payload.question)
+    # sem explain=true o planner roda em modo roteamento (árvore de explain sob demanda)
+    plan = yield effect(planner.explain, payload.question, detail=explain)
     t_plan_dt = time.perf_counter() - t_plan0
 
     if explain:
@@ -255,7 +389,8 @@ def ask(
     # CONTEXTO CONVERSACIONAL (M12) — registro do turno do usuário
     # ------------------------------------------------------------------
     try:
-        context_manager.append_turn(
+        yield effect(
+            context_manager.append_turn,
             client_id=payload.client_id,
             conversation_id=payload.conversation_id,
             role="user",
@@ -329,7 +464,8 @@ def ask(
 
         # Registro do turno do "assistant" (resposta unroutable)
         try:
-            context_manager.append_turn(
+            yield effect(
+                context_manager.append_turn,
                 client_id=payload.client_id,
                 conversation_id=payload.conversation_id,
                 role="assistant",
@@ -371,7 +507,8 @@ def ask(
     identifiers = orchestrator.extract_identifiers(payload.question) or {}
     last_reference_resolution: Optional[Dict[str, Any]] = None
     try:
-        last_reference_resolution = context_manager.resolve_last_reference(
+        last_reference_resolution = yield effect(
+            context_manager.resolve_last_reference,
             client_id=payload.client_id,
             conversation_id=payload.conversation_id,
             entity=entity,
@@ -416,16 +553,6 @@ def ask(
 
     scope_for_plan = plan_bundle.get("scope") or str((policy or {}).get("scope", ""))
 
-    def _fetch():
-        return orchestrator.route_question(
-            payload.question,
-            client_id=payload.client_id,
-            conversation_id=payload.conversation_id,
-            plan=plan_bundle.get("planner_plan"),
-            resolved_identifiers=plan_bundle.get("identifiers"),
-            agg_params_override=plan_agg_params,
-            prepared_plan=plan_bundle,
-        )
     # --------------------------------------------------------------------------
     # CACHE FLOW (cache-first → fetch → write)
     # --------------------------------------------------------------------------
@@ -444,13 +571,25 @@ def ask(
 
     cached_value = None
     cache_get_outcome: Optional[str] = None
+    cache_stale = False
+    cache_stale_ttl = stale_ttl_seconds(policy) if policy_allows_cache else 0
     if policy_allows_cache:
         scope = str(policy.get("scope", "pub"))
         build_id = os.getenv("BUILD_ID", "dev")
         cache_key = make_plan_cache_key(build_id, scope, entity, plan_hash)
         cache_read_attempted = True
         try:
-            cached_value = cache.get_json(cache_key)
+            if cache_stale_ttl:
+                cached_value, cache_stale = yield effect(
+                    cache.get_json_swr,
+                    cache_key,
+                    cache_stale_ttl,
+                    afn=async_cache.get_json_swr,
+                )
+            else:
+                cached_value = yield effect(
+                    cache.get_json, cache_key, afn=async_cache.get_json
+                )
             cache_get_outcome = "miss"
             # Requer meta.result_key com rows não-vazios para evitar hit em payload quebrado
             results_block = (
@@ -513,8 +652,30 @@ def ask(
             cache_get_outcome = "miss"
         else:
             orchestration_raw = orchestration_candidate
+            if cache_stale:
+                # serve o payload stale e revalida (mesma chave do plan-cache)
+                orchestrator.schedule_cache_refresh(
+                    payload.question,
+                    key=cache_key,
+                    entity=entity,
+                    layer="response",
+                    client_id=payload.client_id,
+                    conversation_id=payload.conversation_id,
+                    plan=plan_bundle.get("planner_plan"),
+                    resolved_identifiers=plan_bundle.get("identifiers"),
+                    agg_params_override=plan_agg_params,
+                    prepared_plan=plan_bundle,
+                )
     if not cache_hit:
-        orchestration_raw_live = _fetch()
+        orchestration_raw_live = yield from orchestrator.route_question_steps(
+            payload.question,
+            client_id=payload.client_id,
+            conversation_id=payload.conversation_id,
+            plan=plan_bundle.get("planner_plan"),
+            resolved_identifiers=plan_bundle.get("identifiers"),
+            agg_params_override=plan_agg_params,
+            prepared_plan=plan_bundle,
+        )
         orchestration_raw = _normalize_orchestration(orchestration_raw_live)
     else:
         orchestration_raw_live = None
@@ -577,7 +738,8 @@ def ask(
 
         # registro no contexto (assistant)
         try:
-            context_manager.append_turn(
+            yield effect(
+                context_manager.append_turn,
                 client_id=payload.client_id,
                 conversation_id=payload.conversation_id,
                 role="assistant",
@@ -648,7 +810,20 @@ def ask(
     )
     if should_cache_response:
         try:
-            cache.set_json(cache_key, orchestration, ttl_seconds=cache_ttl_to_use)
+            yield effect(
+                cache.set_json,
+                cache_key,
+                orchestration,
+                ttl_seconds=cache_ttl_to_use,
+                stale_ttl_seconds=cache_stale_ttl,
+                tags=make_cache_tags(
+                    os.getenv("BUILD_ID", "dev"),
+                    str(policy.get("scope", "pub")),
+                    entity,
+                    identifiers,
+                ),
+                afn=async_cache.set_json,
+            )
             counter("sirios_cache_ops_total", op="set", outcome="ok")
         except Exception:
             counter("sirios_cache_ops_total", op="set", outcome="error")
@@ -665,7 +840,23 @@ def ask(
     # -------------------------------
     # Camada de apresentação (Presenter)
     # -------------------------------
-    presenter_result = present(
+    stream_hooks: Dict[str, Any] = {}
+    if emit is not None:
+        stream_hooks = {
+            "on_baseline": lambda text: emit(
+                "answer",
+                {
+                    "answer": text,
+                    "result_key": result_key,
+                    "rows": rows,
+                    "elapsed_ms": int((time.perf_counter() - t0) * 1000),
+                },
+            ),
+            "on_token": lambda chunk: emit("token", {"text": chunk}),
+        }
+
+    presenter_result = yield effect(
+        present,
         question=payload.question,
         plan=plan,
         orchestrator_results=results,
@@ -677,6 +868,7 @@ def ask(
         conversation_id=payload.conversation_id,
         nickname=payload.nickname,
         explain=explain,
+        **stream_hooks,
     )
 
     explain_analytics_payload = None
@@ -696,65 +888,26 @@ def ask(
             metrics=metrics_snapshot,
         )
 
+        # só enfileira: a gravação (em lote, no pool) roda fora do request;
+        # com o sink desligado a gravação é síncrona e vai para o threadpool
         try:
-            with psycopg.connect(os.getenv("DATABASE_URL")) as conn:
-                with conn.cursor() as cur:
-                    # 1) Log de roteamento / explain
-                    cur.execute(
-                        """
-                        INSERT INTO explain_events (
-                            request_id, question, intent, entity,
-                            route_id, features, sql_view, sql_hash,
-                            cache_policy, latency_ms
-                        ) VALUES (%s, %s, %s, %s, %s, %s::jsonb, %s, %s, %s, %s)
-                        ON CONFLICT (request_id) DO NOTHING;
-                        """,
-                        (
-                            request_id,
-                            payload.question,
-                            intent or "",
-                            entity or "",
-                            result_key or "",
-                            json.dumps(explain_analytics_payload["details"]),
-                            result_key or "",
-                            "",
-                            "default",
-                            elapsed_ms,
-                        ),
-                    )
-                    # 2) Log do Narrator (resposta final)
-                    narrator_meta = presenter_result.narrator_meta or {}
-                    narrator_style = narrator_meta.get("style") or "executivo"
-                    narrator_version = narrator_meta.get("version") or os.getenv(
-                        "NARRATOR_VERSION", "20251117-narrator-v1"
-                    )
-                    answer_text = presenter_result.answer or ""
-
-                    cur.execute(
-                        """
-                        INSERT INTO narrator_events (
-                            request_id,
-                            answer_text,
-                            answer_len,
-                            answer_hash,
-                            narrator_version,
-                            narrator_style
-                        )
-                        VALUES (%s, %s, %s, md5(%s), %s, %s)
-                        """,
-                        (
-                            request_id,
-                            answer_text,
-                            len(answer_text),
-                            answer_text,
-                            narrator_version,
-                            narrator_style,
-                        ),
-                    )
-                    conn.commit()
+            event_rows = _explain_event_rows(
+                request_id,
+                payload.question,
+                intent,
+                entity,
+                result_key,
+                explain_analytics_payload["details"],
+                elapsed_ms,
+                presenter_result,
+            )
+            if EVENT_SINK.enabled:
+                EVENT_SINK.submit(event_rows)
+            else:
+                yield effect(EVENT_SINK.submit, event_rows)
         except Exception:
             LOGGER.error(
-                "Falha ao registrar explain/narrator events no banco", exc_info=True
+                "Falha ao enfileirar explain/narrator events", exc_info=True
             )
             counter("sirios_explain_events_failed_total")
 
@@ -767,6 +920,7 @@ def ask(
 
     cache_meta = {
         "hit": bool(cache_hit),
+        "stale": bool(cache_hit and cache_stale),
         "key": cache_meta_key,
         "ttl": cache_meta_ttl,
         "layer": cache_layer,
@@ -808,7 +962,8 @@ def ask(
     # CONTEXTO CONVERSACIONAL — registro do turno do "assistant"
     # ------------------------------------------------------------------
     try:
-        context_manager.append_turn(
+        yield effect(
+            context_manager.append_turn,
             client_id=payload.client_id,
             conversation_id=payload.conversation_id,
             role="assistant",
@@ -854,7 +1009,8 @@ def ask(
                 seen.add(tk)
 
         if deduped:
-            context_manager.update_last_reference(
+            yield effect(
+                context_manager.update_last_reference,
                 client_id=payload.client_id,
                 conversation_id=payload.conversation_id,
                 ticker=deduped[0],
@@ -886,3 +1042,10 @@ def ask(
         }
 
     return JSONResponse(json_sanitize(body))
+
+
+router.add_api_route(
+    "/ask", ask_async if _ASK_ASYNC_ENABLED else ask, methods=["POST"]
+)
+
+router.add_api_route("/ask/stream", ask_stream, methods=["POST"])
@@ -16,11 +16,23 @@ class BustPayload(BaseModel):
     identifiers: Dict[str, Any] = Field(default_factory=dict)
 
 
-@router.post("/ops/cache/bust")
-def cache_bust(payload: BustPayload, x_ops_token: Optional[str] = Header(default=None)):
+class TagBustPayload(BaseModel):
+    kind: str  # entity | ticker | scope | cfg
+    value: str
+
+
+def _forbidden(x_ops_token: Optional[str]) -> Optional[JSONResponse]:
     token_env = os.getenv("CACHE_OPS_TOKEN", "")
     if not token_env or (x_ops_token or "") != token_env:
         return JSONResponse({"error": "forbidden"}, status_code=403)
+    return None
+
+
+@router.post("/ops/cache/bust")
+def cache_bust(payload: BustPayload, x_ops_token: Optional[str] = Header(default=None)):
+    denied = _forbidden(x_ops_token)
+    if denied is not None:
+        return denied
 
     entity = payload.entity
     identifiers = payload.identifiers or {}
@@ -35,5 +47,34 @@ def cache_bust(payload: BustPayload, x_ops_token: Optional[str] = Header(default
     from app.cache.rt_cache import make_cache_key
 
     key = make_cache_key(build_id, scope, entity, identifiers)
-    deleted = cache.delete(key)
+    # apaga no Redis e invalida o L1 de todos os processos (pub/sub)
+    deleted = cache.bust(key)
     return {"deleted": int(deleted), "key": key}
+
+
+@router.post("/ops/cache/bust/tag")
+def cache_bust_tag(
+    payload: TagBustPayload, x_ops_token: Optional[str] = Header(default=None)
+):
+    """Invalida todas as chaves (plan-cache, métricas, read-through) de uma tag."""
+    denied = _forbidden(x_ops_token)
+    if denied is not None:
+        return denied
+
+    from app.cache.rt_cache import TAG_KINDS, make_tag_key
+
+    kind = (payload.kind or "").strip().lower()
+    value = (payload.value or "").strip()
+    if kind not in TAG_KINDS or not value:
+        return JSONResponse(
+            {"error": f"invalid tag; kind must be one of {list(TAG_KINDS)}"},
+            status_code=400,
+        )
+    if kind == "entity" and not policies.get(value):
+        return JSONResponse(
+            {"error": "invalid entity or missing policy"}, status_code=400
+        )
+
+    tag = make_tag_key(os.getenv("BUILD_ID", "dev"), kind, value)
+    deleted = cache.invalidate_tag(tag)
+    return {"deleted": int(deleted), "tag": tag}
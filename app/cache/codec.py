@@ -0,0 +1,201 @@
+# app/cache/codec.py
+"""
+Codec dos payloads do RedisCache (plan-cache, cache de métricas, /ask).
+
+Formato gravado:
+
+- JSON puro (sem marcador) quando o payload é menor que
+  ``CACHE_CODEC_COMPRESS_MIN_BYTES`` e o serializador é JSON — idêntico ao
+  formato legado, legível no redis-cli;
+- ``MAGIC + <serializador> + <compressão> + corpo`` nos demais casos.
+  ``MAGIC`` começa com NUL, que nunca abre um texto JSON: chaves antigas
+  (texto JSON) continuam sendo lidas sem migração.
+
+Configuração (env):
+
+- ``CACHE_CODEC``: ``auto`` (orjson se instalado, senão json) | ``json`` |
+  ``orjson`` | ``msgpack``;
+- ``CACHE_CODEC_COMPRESSION``: ``zlib`` | ``zstd`` | ``none``;
+- ``CACHE_CODEC_COMPRESS_MIN_BYTES``: limiar para comprimir (default 1024).
+
+orjson/msgpack/zstandard são opcionais: sem o pacote, o codec cai para
+json/zlib ao gravar; ler um payload zstd/msgpack sem o pacote é erro.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import zlib
+from typing import Any, Optional, Union
+
+try:  # dependência opcional
+    import orjson  # type: ignore
+except Exception:  # pragma: no cover - depende do ambiente
+    orjson = None  # type: ignore
+
+try:  # dependência opcional
+    import msgpack  # type: ignore
+except Exception:  # pragma: no cover - depende do ambiente
+    msgpack = None  # type: ignore
+
+try:  # dependência opcional
+    import zstandard  # type: ignore
+except Exception:  # pragma: no cover - depende do ambiente
+    zstandard = None  # type: ignore
+
+LOGGER = logging.getLogger(__name__)
+
+MAGIC = b"\x00\xa7"
+_HEADER_LEN = len(MAGIC) + 2
+
+# byte 1 do cabeçalho: serializador; byte 2: compressão
+_FMT_JSON = b"j"
+_FMT_MSGPACK = b"m"
+_COMP_NONE = b"-"
+_COMP_ZLIB = b"z"
+_COMP_ZSTD = b"s"
+
+if orjson is not None:
+    # datetime/dataclass via default=str, como o json.dumps legado
+    _ORJSON_OPTS = (
+        orjson.OPT_NON_STR_KEYS
+        | orjson.OPT_PASSTHROUGH_DATETIME
+        | orjson.OPT_PASSTHROUGH_DATACLASS
+    )
+
+
+class CacheCodec:
+    def __init__(
+        self,
+        serializer: str = "auto",
+        compression: str = "zlib",
+        min_compress_bytes: int = 1024,
+        level: Optional[int] = None,
+    ):
+        serializer = (serializer or "auto").strip().lower()
+        if serializer == "auto":
+            serializer = "orjson" if orjson is not None else "json"
+        if serializer == "orjson" and orjson is None:
+            LOGGER.warning("CACHE_CODEC=orjson sem o pacote orjson; usando json")
+            serializer = "json"
+        if serializer == "msgpack" and msgpack is None:
+            LOGGER.warning("CACHE_CODEC=msgpack sem o pacote msgpack; usando json")
+            serializer = "json"
+        if serializer not in {"json", "orjson", "msgpack"}:
+            raise ValueError(f"CACHE_CODEC inválido: {serializer}")
+
+        compression = (compression or "none").strip().lower()
+        if compression == "zstd" and zstandard is None:
+            LOGGER.warning("CACHE_CODEC_COMPRESSION=zstd sem o pacote zstandard; usando zlib")
+            compression = "zlib"
+        if compression not in {"zlib", "zstd", "none"}:
+            raise ValueError(f"CACHE_CODEC_COMPRESSION inválido: {compression}")
+
+        self.serializer = serializer
+        self.compression = compression
+        self.min_compress_bytes = max(int(min_compress_bytes), 0)
+        self.level = level
+        self._zstd_c = (
+            zstandard.ZstdCompressor(level=level or 3) if compression == "zstd" else None
+        )
+
+    # ------------------------------------------------------------- encode
+
+    def _serialize(self, value: Any) -> "tuple[bytes, bytes]":
+        if self.serializer == "msgpack":
+            return _FMT_MSGPACK, msgpack.packb(value, default=str, use_bin_type=True)
+        if self.serializer == "orjson":
+            try:
+                return _FMT_JSON, orjson.dumps(value, default=str, option=_ORJSON_OPTS)
+            except TypeError:
+                # inteiros > 64 bits, chaves exóticas: cai para o json padrão
+                pass
+        return _FMT_JSON, json.dumps(value, ensure_ascii=False, default=str).encode("utf-8")
+
+    def encode(self, value: Any) -> "tuple[bytes, int]":
+        """(bytes gravados, tamanho serializado antes da compressão)."""
+        fmt, body = self._serialize(value)
+        raw_size = len(body)
+        comp = _COMP_NONE
+        if self.compression != "none" and raw_size >= self.min_compress_bytes:
+            if self.compression == "zstd":
+                packed = self._zstd_c.compress(body)
+                comp_candidate = _COMP_ZSTD
+            else:
+                packed = zlib.compress(body, self.level if self.level is not None else 6)
+                comp_candidate = _COMP_ZLIB
+            if len(packed) + _HEADER_LEN < raw_size:
+                body, comp = packed, comp_candidate
+        if fmt == _FMT_JSON and comp == _COMP_NONE:
+            return body, raw_size
+        return MAGIC + fmt + comp + body, raw_size
+
+    # ------------------------------------------------------------- decode
+
+    def decode(self, data: Optional[Union[str, bytes]]) -> Optional[Any]:
+        if data is None:
+            return None
+        if isinstance(data, str):
+            return json.loads(data)
+        if not data.startswith(MAGIC):
+            # JSON puro (legado ou payload pequeno)
+            return _loads_json(data)
+
+        fmt = data[2:3]
+        comp = data[3:4]
+        body = data[_HEADER_LEN:]
+        if comp == _COMP_ZLIB:
+            body = zlib.decompress(body)
+        elif comp == _COMP_ZSTD:
+            if zstandard is None:
+                raise ValueError("payload zstd sem o pacote zstandard instalado")
+            body = zstandard.ZstdDecompressor().decompress(body)
+        elif comp != _COMP_NONE:
+            raise ValueError(f"compressão desconhecida no payload de cache: {comp!r}")
+
+        if fmt == _FMT_JSON:
+            return _loads_json(body)
+        if fmt == _FMT_MSGPACK:
+            if msgpack is None:
+                raise ValueError("payload msgpack sem o pacote msgpack instalado")
+            return msgpack.unpackb(body, raw=False, strict_map_key=False)
+        raise ValueError(f"serializador desconhecido no payload de cache: {fmt!r}")
+
+
+def _loads_json(body: bytes) -> Any:
+    if orjson is not None:
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            # json.dumps legado grava NaN/Infinity, que o orjson rejeita
+            pass
+    return json.loads(body)
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except (TypeError, ValueError):
+        return default
+
+
+_codec: Optional[CacheCodec] = None
+
+
+def get_codec() -> CacheCodec:
+    global _codec
+    if _codec is None:
+        _codec = CacheCodec(
+            serializer=os.getenv("CACHE_CODEC", "auto"),
+            compression=os.getenv("CACHE_CODEC_COMPRESSION", "zlib"),
+            min_compress_bytes=_env_int("CACHE_CODEC_COMPRESS_MIN_BYTES", 1024),
+        )
+    return _codec
+
+
+def set_codec(codec: Optional[CacheCodec]) -> None:
+    """Troca o codec do processo (``None`` => relê do ambiente no próximo uso)."""
+    global _codec
+    _codec = codec
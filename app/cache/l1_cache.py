@@ -0,0 +1,226 @@
+# app/cache/l1_cache.py
+"""
+Cache L1 em processo (LRU + TTL) na frente do RedisCache.
+
+Guarda o payload como gravado no Redis (bytes do app.cache.codec, não o
+objeto): cada hit decodifica uma cópia nova, como o caminho Redis — chamadores
+podem mutar o payload. ``max_bytes`` conta o tamanho comprimido.
+
+Regras:
+- só entram chaves aceitas por ``admit(key)`` (entidades públicas com política
+  em data/policies/cache.yaml; ver ``rt_cache.public_entity_admitter``);
+- o TTL de cada entrada é o TTL restante no Redis, limitado por
+  ``CACHE_L1_MAX_TTL_SECONDS``;
+- o L1 só serve/aceita entradas enquanto a assinatura do canal de invalidação
+  (Redis pub/sub, publicado pelo /ops/cache/bust) estiver ativa; se a conexão
+  cair, o L1 é esvaziado e a assinatura é refeita em segundo plano.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Tuple, Union
+
+from app.observability.instrumentation import counter
+
+LOGGER = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "araquem:cache:l1:invalidate"
+# mensagem que esvazia o L1 inteiro (em vez de uma chave)
+INVALIDATE_ALL = "*"
+
+_RESUBSCRIBE_BACKOFF_SECONDS = 30.0
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    raw = os.getenv(name)
+    if raw is None:
+        return default
+    return raw.strip().lower() in {"1", "true", "yes", "on"}
+
+
+def _metric(outcome: str) -> None:
+    try:
+        counter("sirios_cache_l1_total", outcome=outcome)
+    except Exception:
+        pass
+
+
+class L1Cache:
+    def __init__(
+        self,
+        *,
+        admit: Callable[[str], bool],
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        max_ttl_seconds: Optional[int] = None,
+        channel: str = INVALIDATION_CHANNEL,
+    ):
+        self._admit = admit
+        self.max_entries = (
+            max_entries if max_entries is not None else _env_int("CACHE_L1_MAX_ENTRIES", 1024)
+        )
+        self.max_bytes = (
+            max_bytes if max_bytes is not None else _env_int("CACHE_L1_MAX_BYTES", 64 * 1024 * 1024)
+        )
+        self.max_ttl_seconds = (
+            max_ttl_seconds
+            if max_ttl_seconds is not None
+            else _env_int("CACHE_L1_MAX_TTL_SECONDS", 300)
+        )
+        self.channel = channel
+        # key -> (payload codificado, expires_at monotonic)
+        self._entries: "OrderedDict[str, Tuple[Union[str, bytes], float]]" = OrderedDict()
+        self._bytes = 0
+        # incrementado a cada invalidação: leituras do Redis iniciadas antes
+        # de uma invalidação não repovoam o L1 com o valor antigo
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+        self._client: Any = None
+        self._listener: Optional[threading.Thread] = None
+        self._subscribed = False
+        self._retry_at = 0.0
+
+    # ------------------------------------------------------------------ admissão
+
+    def admits(self, key: str) -> bool:
+        if self.max_entries <= 0 or self.max_ttl_seconds <= 0:
+            return False
+        try:
+            return bool(self._admit(key))
+        except Exception:
+            return False
+
+    # ---------------------------------------------------------------- invalidação
+
+    def bind(self, client: Any) -> None:
+        """Cliente Redis síncrono usado para assinar o canal de invalidação."""
+        self._client = client
+
+    def active(self) -> bool:
+        """True quando a invalidação está assinada; dispara (re)assinatura se preciso."""
+        if self._subscribed:
+            return True
+        if self._client is None:
+            return False
+        with self._lock:
+            if self._listener is None and time.monotonic() >= self._retry_at:
+                self._listener = threading.Thread(
+                    target=self._listen, name="cache-l1-invalidation", daemon=True
+                )
+                self._listener.start()
+        return False
+
+    def _listen(self) -> None:
+        pubsub = None
+        try:
+            pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(self.channel)
+            self._subscribed = True
+            for message in pubsub.listen():
+                if not isinstance(message, dict) or message.get("type") != "message":
+                    continue
+                data = message.get("data")
+                if isinstance(data, bytes):
+                    data = data.decode("utf-8", "replace")
+                if data == INVALIDATE_ALL:
+                    self.clear()
+                elif isinstance(data, str) and data:
+                    self.invalidate(data)
+        except Exception:
+            LOGGER.warning(
+                "Assinatura de invalidação do cache L1 interrompida; L1 desativado",
+                exc_info=True,
+            )
+        finally:
+            self._subscribed = False
+            self.clear()
+            with self._lock:
+                self._listener = None
+                self._retry_at = time.monotonic() + _RESUBSCRIBE_BACKOFF_SECONDS
+            if pubsub is not None:
+                try:
+                    pubsub.close()
+                except Exception:
+                    pass
+
+    # -------------------------------------------------------------------- acesso
+
+    def get(self, key: str) -> Optional[Union[str, bytes]]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                hit = None
+            elif entry[1] <= now:
+                self._drop(key)
+                hit = None
+            else:
+                self._entries.move_to_end(key)
+                hit = entry[0]
+        _metric("hit" if hit is not None else "miss")
+        return hit
+
+    @property
+    def epoch(self) -> int:
+        return self._epoch
+
+    def put(
+        self, key: str, raw: Union[str, bytes], ttl_seconds: float, *, epoch: Optional[int] = None
+    ) -> None:
+        ttl = min(float(ttl_seconds or 0), float(self.max_ttl_seconds))
+        size = len(raw)
+        if ttl <= 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            if epoch is not None and epoch != self._epoch:
+                return
+            self._drop(key)
+            self._entries[key] = (raw, time.monotonic() + ttl)
+            self._bytes += size
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+            ):
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                _metric("evict")
+        _metric("store")
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            self._epoch += 1
+            dropped = self._drop(key)
+        if dropped:
+            _metric("invalidate")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _drop(self, key: str) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self._bytes -= len(entry[0])
+        return True
+
+
+def l1_enabled() -> bool:
+    return _env_flag("CACHE_L1_ENABLED", True)
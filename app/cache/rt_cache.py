@@ -1,17 +1,24 @@
 # app/cache/rt_cache.py
+import asyncio
 import logging
 import os, json, hashlib, time, datetime as dt
 from uuid import uuid4
 from decimal import Decimal
 from functools import lru_cache
-from typing import Any, Dict, Iterable, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from pathlib import Path
 
 import redis
+import redis.asyncio as aioredis
+from redis.client import NEVER_DECODE
 import yaml
 
 from app.utils.filecache import load_yaml_cached
 
+from app.cache.codec import get_codec
+from app.cache.l1_cache import INVALIDATE_ALL, L1Cache
+from app.cache.single_flight import KeyNotifier
+from app.cache.swr import is_stale, record_stale_serve, schedule_refresh, stale_ttl_seconds
 from app.observability.instrumentation import counter, histogram
 
 LOGGER = logging.getLogger(__name__)
@@ -117,12 +124,138 @@ class CachePolicies:
         self._private_cache[entity] = bool(private_flag)
         return self._private_cache[entity]
 
+    def entities(self) -> Iterable[str]:
+        return list(self._policies.keys())
+
+    def refresh_at(self, entity: str) -> Optional[dt.time]:
+        """Horário diário (``refresh_at: HH:MM``) em que a fonte da entidade é recarregada."""
+        policy = self.get(entity)
+        raw = policy.get("refresh_at") if isinstance(policy, dict) else None
+        if isinstance(raw, bool) or raw is None:
+            return None
+        if isinstance(raw, int):
+            # YAML 1.1 lê HH:MM sem aspas como sexagesimal (minutos do dia)
+            hours, minutes = divmod(raw, 60)
+        else:
+            text = str(raw).strip().lower()
+            if not text or text == "none":
+                return None
+            try:
+                hours_s, minutes_s = text.split(":", 1)
+                hours, minutes = int(hours_s), int(minutes_s)
+            except ValueError:
+                LOGGER.warning("refresh_at inválido para %s: %r", entity, raw)
+                return None
+        if not (0 <= hours < 24 and 0 <= minutes < 60):
+            LOGGER.warning("refresh_at fora do intervalo para %s: %r", entity, raw)
+            return None
+        return dt.time(hours, minutes)
+
+
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+# payloads podem ser binários (codec); o cliente usa decode_responses=True
+_NO_DECODE = {NEVER_DECODE: []}
+
+
+def _key_entity(key: str) -> str:
+    parts = key.split(":", 5)
+    if len(parts) >= 6 and parts[0] == "araquem":
+        return parts[4]
+    return "other"
+
+
+def _queue_tagged_set(pipe: Any, key: str, raw: bytes, ex: int, tags: Iterable[str]) -> None:
+    pipe.set(key, raw, ex=ex)
+    now = time.time()
+    for tag in tags:
+        # score = expiração da chave; membros vencidos saem a cada escrita,
+        # então tags quentes (scope/cfg) ficam do tamanho das chaves vivas
+        pipe.zadd(tag, {key: now + ex})
+        pipe.zremrangebyscore(tag, "-inf", now)
+        # o índice vive ao menos tanto quanto a chave mais longa que referencia
+        pipe.expire(tag, ex, nx=True)
+        pipe.expire(tag, ex, gt=True)
+
+
+def _tag_kind(tag: str) -> str:
+    parts = tag.split(":", 4)
+    return parts[3] if len(parts) >= 5 and parts[1] == "tag" else "other"
+
+
+def _record_payload_bytes(key: str, stored: bytes, serialized_size: int) -> None:
+    try:
+        entity = _key_entity(key)
+        histogram("sirios_cache_payload_bytes", serialized_size, entity=entity, form="serialized")
+        histogram("sirios_cache_payload_bytes", len(stored), entity=entity, form="stored")
+    except Exception:
+        pass
+
+
+def _wait_params(max_wait_ms: Any, step_ms: Any) -> Tuple[int, int]:
+    try:
+        remaining_ms = int(max_wait_ms)
+    except (TypeError, ValueError):
+        remaining_ms = 0
+    try:
+        step_ms_int = int(step_ms)
+    except (TypeError, ValueError):
+        step_ms_int = 0
+    return remaining_ms, step_ms_int
+
+
+def public_entity_admitter(policies: "CachePolicies"):
+    """
+    Admissão do L1: só chaves ``araquem:<build>:<cfg>:<scope>:<entity>:...`` de
+    entidades com política de cache, escopo público e sem ``private: true``.
+    """
+
+    def admit(key: str) -> bool:
+        parts = key.split(":", 5)
+        if len(parts) < 6 or parts[0] != "araquem":
+            return False
+        scope, entity = parts[3], parts[4]
+        if scope == "prv" or not policies.get(entity):
+            return False
+        return not policies.is_private_entity(entity)
+
+    return admit
+
 
 class RedisCache:
-    def __init__(self, url: Optional[str] = None):
+    def __init__(self, url: Optional[str] = None, l1: Optional[L1Cache] = None):
         self._url = url or os.getenv("REDIS_URL", "redis://localhost:6379/0")
         self._cli = redis.from_url(self._url, decode_responses=True)
         self._lock_token = uuid4().hex
+        self._notifier = KeyNotifier(self._cli)
+        self._l1: Optional[L1Cache] = None
+        if l1 is not None:
+            self.enable_l1(l1)
+
+    @property
+    def notifier(self) -> KeyNotifier:
+        return self._notifier
+
+    def enable_l1(self, l1: L1Cache) -> None:
+        """Ativa o L1 em processo; a assinatura de invalidação usa este cliente."""
+        l1.bind(self._cli)
+        self._l1 = l1
+
+    @property
+    def l1(self) -> Optional[L1Cache]:
+        return self._l1
+
+    def _l1_for(self, key: str) -> Optional[L1Cache]:
+        l1 = self._l1
+        if l1 is not None and l1.admits(key) and l1.active():
+            return l1
+        return None
 
     @property
     def lock_token(self) -> str:
@@ -140,34 +273,117 @@ class RedisCache:
             return False
 
     def get_json(self, key: str) -> Optional[Any]:
+        return self.get_json_swr(key)[0]
+
+    def get_json_swr(
+        self, key: str, stale_seconds: int = 0
+    ) -> Tuple[Optional[Any], bool]:
+        """(valor, stale): stale quando o TTL restante entrou na janela ``stale_seconds``."""
+        l1 = self._l1_for(key)
+        if l1 is not None:
+            raw = l1.get(key)
+            if raw is not None:
+                return get_codec().decode(raw), False
         t0 = time.perf_counter()
         try:
-            s = self._cli.get(key)
+            stale = False
+            if l1 is not None or stale_seconds > 0:
+                epoch = l1.epoch if l1 is not None else 0
+                # GET + PTTL numa ida: frescor (SWR) e TTL do L1 vêm do Redis
+                pipe = self._cli.pipeline(transaction=False)
+                pipe.execute_command("GET", key, **_NO_DECODE)
+                pipe.pttl(key)
+                s, pttl_ms = pipe.execute()
+                stale = s is not None and is_stale(pttl_ms, stale_seconds)
+                if l1 is not None and s is not None and not stale and isinstance(pttl_ms, int):
+                    # só a parte fresca do TTL vai para o L1
+                    fresh_ms = pttl_ms - stale_seconds * 1000
+                    if fresh_ms > 0:
+                        l1.put(key, s, fresh_ms / 1000.0, epoch=epoch)
+            else:
+                s = self._cli.execute_command("GET", key, **_NO_DECODE)
             dt_ = time.perf_counter() - t0
             histogram("sirios_cache_latency_seconds", dt_, op="get")
             outcome = "hit" if s is not None else "miss"
             counter("sirios_cache_ops_total", op="get", outcome=outcome)
-            return None if s is None else json.loads(s)
+            return get_codec().decode(s), stale
         except Exception:
             counter("sirios_cache_ops_total", op="get", outcome="error")
             raise
 
-    def set_json(self, key: str, value: Any, ttl_seconds: int) -> None:
+    def set_json(
+        self,
+        key: str,
+        value: Any,
+        ttl_seconds: int,
+        stale_ttl_seconds: int = 0,
+        tags: Optional[Iterable[str]] = None,
+    ) -> None:
+        """
+        Grava com TTL soft ``ttl_seconds``; a chave vive ``+ stale_ttl_seconds`` (SWR).
+        ``tags`` (``make_cache_tags``): índices de invalidação gravados na mesma ida.
+        """
         t0 = time.perf_counter()
         try:
-            # serialização segura (str() para tipos não nativos JSON)
-            s = json.dumps(value, ensure_ascii=False, default=str)
-            self._cli.set(key, s, ex=ttl_seconds)
+            raw, serialized_size = get_codec().encode(value)
+            ex = ttl_seconds + max(stale_ttl_seconds or 0, 0)
+            if tags:
+                pipe = self._cli.pipeline(transaction=False)
+                _queue_tagged_set(pipe, key, raw, ex, tags)
+                pipe.execute()
+            else:
+                self._cli.set(key, raw, ex=ex)
             dt_ = time.perf_counter() - t0
             histogram("sirios_cache_latency_seconds", dt_, op="set")
             counter("sirios_cache_ops_total", op="set", outcome="ok")
         except Exception:
             counter("sirios_cache_ops_total", op="set", outcome="error")
             raise
+        _record_payload_bytes(key, raw, serialized_size)
+        l1 = self._l1_for(key)
+        if l1 is not None and ttl_seconds:
+            l1.put(key, raw, ttl_seconds)
 
     def delete(self, key: str) -> int:
+        if self._l1 is not None:
+            self._l1.invalidate(key)
         return self._cli.delete(key)
 
+    def bust(self, key: str) -> int:
+        """Apaga a chave e avisa os L1 de todos os processos (pub/sub)."""
+        deleted = self.delete(key)
+        if self._l1 is not None:
+            try:
+                self._cli.publish(self._l1.channel, key)
+            except Exception:
+                LOGGER.warning("Falha ao publicar invalidação do cache L1", exc_info=True)
+        return deleted
+
+    def invalidate_tag(self, tag: str, batch_size: int = 500) -> int:
+        """
+        Apaga todas as chaves indexadas em ``tag`` — O(membros), sem SCAN — e
+        esvazia os L1 de todos os processos. Retorna quantas chaves existiam.
+        """
+        deleted = 0
+        while True:
+            # ZPOPMIN em lotes: consome o índice enquanto apaga (sem ZRANGE gigante)
+            members = self._cli.zpopmin(tag, batch_size)
+            if not members:
+                break
+            deleted += int(self._cli.delete(*[member for member, _ in members]) or 0)
+        if self._l1 is not None:
+            self._l1.clear()
+            try:
+                self._cli.publish(self._l1.channel, INVALIDATE_ALL)
+            except Exception:
+                LOGGER.warning("Falha ao publicar invalidação do cache L1", exc_info=True)
+        try:
+            counter("sirios_cache_tag_invalidations_total", kind=_tag_kind(tag))
+            counter("sirios_cache_tag_invalidated_keys_total", kind=_tag_kind(tag), _value=deleted)
+        except Exception:
+            pass
+        return deleted
+
     def acquire_lock(self, key: str, ttl_ms: int) -> bool:
         try:
             ttl_ms_int = int(ttl_ms)
@@ -184,39 +400,224 @@ class RedisCache:
 
     def release_lock(self, key: str, value: str) -> None:
         try:
-            script = """
-            if redis.call("get", KEYS[1]) == ARGV[1] then
-                return redis.call("del", KEYS[1])
-            end
-            return 0
-            """
-            self._cli.eval(script, 1, key, value)
+            self._cli.eval(_RELEASE_LOCK_SCRIPT, 1, key, value)
         except Exception:
             # best-effort
             pass
 
+    def notify_key(self, key: str) -> None:
+        """Acorda os seguidores (todos os processos) que esperam ``key``."""
+        try:
+            self._cli.publish(self._notifier.channel(key), "1")
+        except Exception:
+            LOGGER.warning("Falha ao publicar conclusão de single-flight", exc_info=True)
+
     def wait_for_key(self, key: str, max_wait_ms: int, step_ms: int) -> Optional[Any]:
+        remaining_ms, step_ms_int = _wait_params(max_wait_ms, step_ms)
+        if remaining_ms <= 0 or step_ms_int <= 0:
+            return None
+
+        waiter = self._notifier.register(key)
+        if waiter is not None:
+            try:
+                # releitura após registrar: o líder pode ter terminado antes
+                val = self.get_json(key)
+                if val is None and waiter.event.wait(remaining_ms / 1000.0):
+                    val = self.get_json(key)
+                return val
+            finally:
+                self._notifier.unregister(key, waiter)
+
+        deadline = time.perf_counter() + (remaining_ms / 1000.0)
+        while time.perf_counter() < deadline:
+            val = self.get_json(key)
+            if val is not None:
+                return val
+            time.sleep(step_ms_int / 1000.0)
+        return None
+
+
+class AsyncRedisCache:
+    """
+    Espelho asyncio do RedisCache (redis.asyncio), usado pelo caminho async do /ask.
+
+    Mesmo formato de payload, mesmas métricas e, quando ``lock_token`` é
+    compartilhado com o cliente sync, os mesmos locks de single-flight.
+    """
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        lock_token: Optional[str] = None,
+        l1: Optional[L1Cache] = None,
+        notifier: Optional[KeyNotifier] = None,
+    ):
+        self._url = url or os.getenv("REDIS_URL", "redis://localhost:6379/0")
+        self._cli = aioredis.from_url(self._url, decode_responses=True)
+        self._lock_token = lock_token or uuid4().hex
+        # assinatura de single-flight do RedisCache sync (uma por processo)
+        self._notifier = notifier
+        # L1 compartilhado com o RedisCache sync (dono da assinatura de invalidação)
+        self._l1 = l1
+
+    def _l1_for(self, key: str) -> Optional[L1Cache]:
+        l1 = self._l1
+        if l1 is not None and l1.admits(key) and l1.active():
+            return l1
+        return None
+
+    @property
+    def lock_token(self) -> str:
+        return self._lock_token
+
+    @property
+    def raw(self):
+        return self._cli
+
+    async def ping(self) -> bool:
         try:
-            remaining_ms = int(max_wait_ms)
-        except (TypeError, ValueError):
-            remaining_ms = 0
+            return bool(await self._cli.ping())
+        except Exception:
+            return False
+
+    async def get_json(self, key: str) -> Optional[Any]:
+        return (await self.get_json_swr(key))[0]
+
+    async def get_json_swr(
+        self, key: str, stale_seconds: int = 0
+    ) -> Tuple[Optional[Any], bool]:
+        l1 = self._l1_for(key)
+        if l1 is not None:
+            raw = l1.get(key)
+            if raw is not None:
+                return get_codec().decode(raw), False
+        t0 = time.perf_counter()
+        try:
+            stale = False
+            if l1 is not None or stale_seconds > 0:
+                epoch = l1.epoch if l1 is not None else 0
+                pipe = self._cli.pipeline(transaction=False)
+                pipe.execute_command("GET", key, **_NO_DECODE)
+                pipe.pttl(key)
+                s, pttl_ms = await pipe.execute()
+                stale = s is not None and is_stale(pttl_ms, stale_seconds)
+                if l1 is not None and s is not None and not stale and isinstance(pttl_ms, int):
+                    fresh_ms = pttl_ms - stale_seconds * 1000
+                    if fresh_ms > 0:
+                        l1.put(key, s, fresh_ms / 1000.0, epoch=epoch)
+            else:
+                s = await self._cli.execute_command("GET", key, **_NO_DECODE)
+            histogram("sirios_cache_latency_seconds", time.perf_counter() - t0, op="get")
+            outcome = "hit" if s is not None else "miss"
+            counter("sirios_cache_ops_total", op="get", outcome=outcome)
+            return get_codec().decode(s), stale
+        except Exception:
+            counter("sirios_cache_ops_total", op="get", outcome="error")
+            raise
+
+    async def set_json(
+        self,
+        key: str,
+        value: Any,
+        ttl_seconds: int,
+        stale_ttl_seconds: int = 0,
+        tags: Optional[Iterable[str]] = None,
+    ) -> None:
+        t0 = time.perf_counter()
+        try:
+            raw, serialized_size = get_codec().encode(value)
+            ex = ttl_seconds + max(stale_ttl_seconds or 0, 0)
+            if tags:
+                pipe = self._cli.pipeline(transaction=False)
+                _queue_tagged_set(pipe, key, raw, ex, tags)
+                await pipe.execute()
+            else:
+                await self._cli.set(key, raw, ex=ex)
+            histogram("sirios_cache_latency_seconds", time.perf_counter() - t0, op="set")
+            counter("sirios_cache_ops_total", op="set", outcome="ok")
+        except Exception:
+            counter("sirios_cache_ops_total", op="set", outcome="error")
+            raise
+        _record_payload_bytes(key, raw, serialized_size)
+        l1 = self._l1_for(key)
+        if l1 is not None and ttl_seconds:
+            l1.put(key, raw, ttl_seconds)
 
+    async def delete(self, key: str) -> int:
+        if self._l1 is not None:
+            self._l1.invalidate(key)
+        return await self._cli.delete(key)
+
+    async def acquire_lock(self, key: str, ttl_ms: int) -> bool:
         try:
-            step_ms_int = int(step_ms)
+            ttl_ms_int = int(ttl_ms)
         except (TypeError, ValueError):
-            step_ms_int = 0
+            ttl_ms_int = 0
+
+        if ttl_ms_int <= 0:
+            return False
+
+        try:
+            return bool(
+                await self._cli.set(key, self._lock_token, nx=True, px=ttl_ms_int)
+            )
+        except Exception:
+            return False
+
+    async def release_lock(self, key: str, value: str) -> None:
+        try:
+            await self._cli.eval(_RELEASE_LOCK_SCRIPT, 1, key, value)
+        except Exception:
+            # best-effort
+            pass
 
+    async def notify_key(self, key: str) -> None:
+        if self._notifier is None:
+            return
+        try:
+            await self._cli.publish(self._notifier.channel(key), "1")
+        except Exception:
+            LOGGER.warning("Falha ao publicar conclusão de single-flight", exc_info=True)
+
+    async def wait_for_key(
+        self, key: str, max_wait_ms: int, step_ms: int
+    ) -> Optional[Any]:
+        remaining_ms, step_ms_int = _wait_params(max_wait_ms, step_ms)
         if remaining_ms <= 0 or step_ms_int <= 0:
             return None
 
+        waiter = (
+            self._notifier.register(key, loop=asyncio.get_running_loop())
+            if self._notifier is not None
+            else None
+        )
+        if waiter is not None:
+            try:
+                val = await self.get_json(key)
+                if val is None:
+                    try:
+                        await asyncio.wait_for(waiter.future, remaining_ms / 1000.0)
+                    except asyncio.TimeoutError:
+                        return None
+                    val = await self.get_json(key)
+                return val
+            finally:
+                self._notifier.unregister(key, waiter)
+
         deadline = time.perf_counter() + (remaining_ms / 1000.0)
         while time.perf_counter() < deadline:
-            val = self.get_json(key)
+            val = await self.get_json(key)
             if val is not None:
                 return val
-            time.sleep(step_ms_int / 1000.0)
+            await asyncio.sleep(step_ms_int / 1000.0)
         return None
 
+    async def close(self) -> None:
+        try:
+            await self._cli.aclose()
+        except Exception:
+            pass
+
 
 def _stable_hash(obj: Any) -> str:
     """Gera hash estável para dicionários/params."""
@@ -443,6 +844,50 @@ def make_plan_cache_key(
     return f"{base}:{namespace}:{plan_hash}" if namespace else f"{base}:{plan_hash}"
 
 
+def make_narration_cache_key(build_id: str, scope: str, entity: str, fingerprint: str) -> str:
+    """Texto do LLM do Narrator: ``araquem:<build>:<cfg>:<scope>:<entity>:narr:<fingerprint>``."""
+    cfg_version = get_config_version()
+    return f"araquem:{build_id}:{cfg_version}:{scope}:{entity}:narr:{fingerprint}"
+
+
+TAG_KINDS = ("entity", "ticker", "scope", "cfg")
+
+
+def make_tag_key(build_id: str, kind: str, value: str) -> str:
+    """Índice (Redis ZSET, score = expiração da chave): ``araquem:tag:<build>:<kind>:<value>``."""
+    if kind not in TAG_KINDS:
+        raise ValueError(f"tag desconhecida: {kind}")
+    value_norm = str(value).strip()
+    if kind == "ticker":
+        value_norm = value_norm.upper()
+    return f"araquem:tag:{build_id}:{kind}:{value_norm}"
+
+
+def make_cache_tags(
+    build_id: str,
+    scope: str,
+    entity: str,
+    identifiers: Optional[Dict[str, Any]] = None,
+) -> List[str]:
+    """Tags gravadas junto de cada chave: entidade, escopo, versão de config e tickers."""
+    tags = [
+        make_tag_key(build_id, "entity", entity),
+        make_tag_key(build_id, "scope", scope),
+        make_tag_key(build_id, "cfg", get_config_version()),
+    ]
+    identifiers = identifiers or {}
+    tickers: List[str] = []
+    ticker = identifiers.get("ticker")
+    if isinstance(ticker, str) and ticker.strip():
+        tickers.append(ticker)
+    multi = identifiers.get("tickers")
+    if isinstance(multi, (list, tuple)):
+        tickers.extend(t for t in multi if isinstance(t, str) and t.strip())
+    for t in dict.fromkeys(t.strip().upper() for t in tickers):
+        tags.append(make_tag_key(build_id, "ticker", t))
+    return tags
+
+
 def _mk_hit_guard(key: str) -> str:
     return f"{key}:hit_once"
 
@@ -548,23 +993,11 @@ def read_through(
     build_id = os.getenv("BUILD_ID", "dev")
     key = make_cache_key(build_id, scope, entity, identifiers or {})
 
-    # --- LIMPEZA DE CHAVES LEGADAS (antes de ler) ---
-    try:
-        scan_tmpl = policy.get("legacy_cleanup_scan")
-        if scan_tmpl:
-            # render simples com identifiers (faltantes viram vazio)
-            pat = scan_tmpl.format(
-                **{k: identifiers.get(k, "") for k in identifiers.keys()}
-            )
-            # se ainda sobrar marcador, evita apagar demais
-            if "{" not in pat and "}" not in pat and pat:
-                for k_legacy in cache.raw.scan_iter(pat):
-                    if k_legacy != key:
-                        cache.delete(k_legacy)
-    except Exception:
-        pass
-
-    val = cache.get_json(key)
+    stale_ttl = stale_ttl_seconds(policy) if isinstance(ttl, int) and ttl > 0 else 0
+    if stale_ttl:
+        val, stale = cache.get_json_swr(key, stale_ttl)
+    else:
+        val, stale = cache.get_json(key), False
     if val is not None:
         # métricas de HIT por entidade (deduplicadas em ~1s)
         try:
@@ -574,6 +1007,24 @@ def read_through(
         except Exception:
             pass
 
+        if stale:
+            # serve o payload antigo já e revalida uma vez em segundo plano
+            record_stale_serve("read_through", entity)
+
+            def _refresh() -> None:
+                fresh = fetch_fn()
+                if not _is_empty_payload(fresh):
+                    cache.set_json(
+                        key,
+                        fresh,
+                        ttl_seconds=ttl,
+                        stale_ttl_seconds=stale_ttl,
+                        tags=make_cache_tags(build_id, scope, entity, identifiers),
+                    )
+
+            schedule_refresh(cache, key, _refresh, layer="read_through")
+            return {"cached": True, "stale": True, "key": key, "value": val, "ttl": ttl}
+
         return {"cached": True, "key": key, "value": val, "ttl": ttl}
 
     val = fetch_fn()
@@ -591,5 +1042,11 @@ def read_through(
 
     ttl_to_use = ttl if isinstance(ttl, int) else 0
 
-    cache.set_json(key, val, ttl_seconds=ttl_to_use)
+    cache.set_json(
+        key,
+        val,
+        ttl_seconds=ttl_to_use,
+        stale_ttl_seconds=stale_ttl,
+        tags=make_cache_tags(build_id, scope, entity, identifiers),
+    )
     return {"cached": False, "key": key, "value": val, "ttl": ttl_to_use}
@@ -0,0 +1,205 @@
+# app/cache/single_flight.py
+"""
+Single-flight do plan-cache sem polling.
+
+Dois níveis:
+
+- ``LocalFlights``: no mesmo processo, a primeira requisição para uma chave
+  vira líder e as duplicadas esperam um ``concurrent.futures.Future`` (serve
+  threads e asyncio) — nem chegam ao Redis. O líder entrega o payload já
+  serializado; cada seguidor recebe sua própria cópia (``json.loads``).
+- ``KeyNotifier``: entre processos, seguidores que perderam o lock do Redis
+  registram um waiter e o líder publica em ``araquem:sf:<chave>`` ao gravar o
+  cache. Uma única assinatura por padrão (``PSUBSCRIBE araquem:sf:*``) por
+  processo acorda os waiters locais imediatamente.
+
+Sem assinatura ativa (Redis sem pub/sub, testes), ``RedisCache.wait_for_key``
+volta ao polling antigo.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Any, Dict, List, Optional, Tuple
+
+LOGGER = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "araquem:sf:"
+
+_RESUBSCRIBE_BACKOFF_SECONDS = 30.0
+
+
+class LocalFlights:
+    def __init__(self) -> None:
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def begin(self, key: str) -> Tuple[bool, Future]:
+        """(é_líder, future). Só o líder deve chamar ``finish``."""
+        with self._lock:
+            fut = self._inflight.get(key)
+            if fut is not None:
+                return False, fut
+            fut = Future()
+            self._inflight[key] = fut
+            return True, fut
+
+    def finish(self, key: str, payload: Optional[Any]) -> None:
+        """Libera os seguidores; ``payload=None`` => cada um segue sozinho."""
+        with self._lock:
+            fut = self._inflight.pop(key, None)
+        if fut is None or fut.done():
+            return
+        raw = None
+        if payload is not None:
+            try:
+                raw = json.dumps(payload, ensure_ascii=False, default=str)
+            except Exception:
+                raw = None
+        fut.set_result(raw)
+
+    @staticmethod
+    def wait(fut: Future, timeout_ms: int) -> Optional[Any]:
+        try:
+            raw = fut.result(timeout=max(timeout_ms, 0) / 1000.0)
+        except FutureTimeout:
+            return None
+        return None if raw is None else json.loads(raw)
+
+    @staticmethod
+    async def await_(fut: Future, timeout_ms: int) -> Optional[Any]:
+        try:
+            raw = await asyncio.wait_for(
+                asyncio.shield(asyncio.wrap_future(fut)), max(timeout_ms, 0) / 1000.0
+            )
+        except asyncio.TimeoutError:
+            return None
+        return None if raw is None else json.loads(raw)
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+
+class _Waiter:
+    __slots__ = ("event", "loop", "future")
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.loop = loop
+        self.event: Optional[threading.Event] = None if loop else threading.Event()
+        self.future: Optional[asyncio.Future] = loop.create_future() if loop else None
+
+    def wake(self) -> None:
+        if self.event is not None:
+            self.event.set()
+            return
+        if self.loop is not None and self.future is not None:
+
+            def _set() -> None:
+                if not self.future.done():
+                    self.future.set_result(True)
+
+            try:
+                self.loop.call_soon_threadsafe(_set)
+            except RuntimeError:
+                pass  # loop encerrado
+
+
+class KeyNotifier:
+    def __init__(self, client: Any = None, prefix: str = CHANNEL_PREFIX):
+        self._client = client
+        self.prefix = prefix
+        self._waiters: Dict[str, List[_Waiter]] = {}
+        self._lock = threading.Lock()
+        self._listener: Optional[threading.Thread] = None
+        self._subscribed = False
+        self._retry_at = 0.0
+
+    def channel(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    def active(self) -> bool:
+        """True com a assinatura ativa; dispara (re)assinatura em segundo plano."""
+        if self._subscribed:
+            return True
+        if self._client is None:
+            return False
+        with self._lock:
+            if self._listener is None and time.monotonic() >= self._retry_at:
+                self._listener = threading.Thread(
+                    target=self._listen, name="cache-single-flight", daemon=True
+                )
+                self._listener.start()
+        return False
+
+    def register(self, key: str, loop: Optional[asyncio.AbstractEventLoop] = None) -> Optional[_Waiter]:
+        if not self.active():
+            return None
+        waiter = _Waiter(loop)
+        with self._lock:
+            self._waiters.setdefault(key, []).append(waiter)
+        return waiter
+
+    def unregister(self, key: str, waiter: _Waiter) -> None:
+        with self._lock:
+            waiters = self._waiters.get(key)
+            if not waiters:
+                return
+            try:
+                waiters.remove(waiter)
+            except ValueError:
+                pass
+            if not waiters:
+                self._waiters.pop(key, None)
+
+    def _wake(self, key: str) -> None:
+        with self._lock:
+            waiters = list(self._waiters.get(key) or [])
+        for waiter in waiters:
+            waiter.wake()
+
+    def _wake_all(self) -> None:
+        with self._lock:
+            waiters = [w for ws in self._waiters.values() for w in ws]
+        for waiter in waiters:
+            waiter.wake()
+
+    def _listen(self) -> None:
+        pubsub = None
+        try:
+            pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+            pubsub.psubscribe(f"{self.prefix}*")
+            self._subscribed = True
+            for message in pubsub.listen():
+                if not isinstance(message, dict) or message.get("type") != "pmessage":
+                    continue
+                channel = message.get("channel")
+                if isinstance(channel, bytes):
+                    channel = channel.decode("utf-8", "replace")
+                if isinstance(channel, str) and channel.startswith(self.prefix):
+                    self._wake(channel[len(self.prefix):])
+        except Exception:
+            LOGGER.warning(
+                "Assinatura de single-flight interrompida; voltando ao polling",
+                exc_info=True,
+            )
+        finally:
+            self._subscribed = False
+            # waiters pendentes acordam e fazem a última leitura
+            self._wake_all()
+            with self._lock:
+                self._listener = None
+                self._retry_at = time.monotonic() + _RESUBSCRIBE_BACKOFF_SECONDS
+            if pubsub is not None:
+                try:
+                    pubsub.close()
+                except Exception:
+                    pass
+
+
+# coalescência local compartilhada pelo Orchestrator (uma por processo)
+LOCAL_FLIGHTS = LocalFlights()
@@ -0,0 +1,138 @@
+# app/cache/swr.py
+"""
+Stale-while-revalidate para as políticas de cache (data/policies/cache.yaml).
+
+Por entidade:
+
+- ``ttl_seconds``: TTL "soft" — até aqui o payload é fresco;
+- ``stale_ttl_seconds`` (opcional, default 0): janela extra em que o payload
+  ainda é servido, marcado como stale, enquanto UMA revalidação roda em
+  segundo plano. A chave no Redis expira em ``ttl + stale`` (TTL "hard").
+
+O estado é derivado do PTTL da chave (sem envelope no payload): restante
+``<= stale_ttl_seconds`` => stale. Com ``stale_ttl_seconds: 0`` nada muda.
+
+A revalidação é deduplicada no processo (chave pendente) e entre processos
+(lock ``<chave>:refresh`` no Redis, adquirido dentro do job).
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Set
+
+from app.observability.instrumentation import counter, histogram
+
+LOGGER = logging.getLogger(__name__)
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+_pending: Set[str] = set()
+
+
+def stale_ttl_seconds(policy: Optional[Dict[str, Any]]) -> int:
+    if not isinstance(policy, dict):
+        return 0
+    try:
+        return max(int(policy.get("stale_ttl_seconds") or 0), 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def is_stale(pttl_ms: Any, stale_seconds: int) -> bool:
+    """Chave viva cujo TTL restante já entrou na janela stale."""
+    if stale_seconds <= 0 or not isinstance(pttl_ms, int) or pttl_ms <= 0:
+        return False
+    return pttl_ms <= stale_seconds * 1000
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                try:
+                    workers = int(os.getenv("CACHE_SWR_REFRESH_WORKERS", "2"))
+                except ValueError:
+                    workers = 2
+                _pool = ThreadPoolExecutor(
+                    max_workers=max(workers, 1), thread_name_prefix="cache-swr"
+                )
+    return _pool
+
+
+def record_stale_serve(layer: str, entity: Optional[str]) -> None:
+    try:
+        counter("sirios_cache_stale_served_total", layer=layer, entity=str(entity or ""))
+    except Exception:
+        pass
+
+
+def schedule_refresh(
+    cache: Any,
+    key: str,
+    refresh: Callable[[], Any],
+    *,
+    layer: str,
+) -> bool:
+    """
+    Agenda ``refresh()`` (que deve regravar ``key``) em segundo plano.
+
+    Retorna False quando já há uma revalidação pendente para a chave neste
+    processo. O lock ``<key>:refresh`` (TTL ``CACHE_SWR_REFRESH_LOCK_TTL_MS``)
+    garante uma revalidação por vez entre processos.
+    """
+    refresh_key = f"{key}:refresh"
+    with _pool_lock:
+        if refresh_key in _pending:
+            return False
+        _pending.add(refresh_key)
+
+    try:
+        lock_ttl_ms = int(os.getenv("CACHE_SWR_REFRESH_LOCK_TTL_MS", "30000"))
+    except ValueError:
+        lock_ttl_ms = 30000
+
+    def _job() -> None:
+        outcome = "ok"
+        t0 = time.perf_counter()
+        acquired = False
+        try:
+            acquired = bool(cache.acquire_lock(refresh_key, lock_ttl_ms))
+            if not acquired:
+                outcome = "skipped"
+                return
+            refresh()
+        except Exception:
+            outcome = "error"
+            LOGGER.warning("Falha na revalidação de cache (%s)", layer, exc_info=True)
+        finally:
+            if acquired:
+                try:
+                    cache.release_lock(refresh_key, cache.lock_token)
+                except Exception:
+                    pass
+            with _pool_lock:
+                _pending.discard(refresh_key)
+            try:
+                histogram(
+                    "sirios_cache_refresh_seconds",
+                    time.perf_counter() - t0,
+                    layer=layer,
+                    outcome=outcome,
+                )
+            except Exception:
+                pass
+
+    try:
+        _executor().submit(_job)
+    except Exception:
+        with _pool_lock:
+            _pending.discard(refresh_key)
+        LOGGER.warning("Falha ao agendar revalidação de cache", exc_info=True)
+        return False
+    return True
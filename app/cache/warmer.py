@@ -0,0 +1,283 @@
+# app/cache/warmer.py
+"""
+Pré-aquecimento de cache dirigido por ``refresh_at`` (data/policies/cache.yaml).
+
+Para cada entidade pública com ``refresh_at: HH:MM``, depois do horário de
+carga (+ ``warmer.delay_minutes``) o warmer reexecuta as perguntas mais
+frequentes da entidade na janela recente (``explain_events``) — ou, sem
+tráfego, as perguntas geradas de ``warmer.question_templates`` x
+``warmer.tickers`` — via ``Orchestrator.route_question(cache_refresh=True)``.
+Isso passa por ``build_select_for_entity`` + executor + ``format_rows`` e
+regrava plan-cache e cache de métricas com as mesmas chaves do tráfego real.
+
+Cada slot (entidade, dia) roda uma vez por processo e, entre processos, uma
+vez no total (lock ``araquem:warmer:<build>:<entidade>:<data>`` no Redis).
+
+Entradas: ``python scripts/cache/warm.py`` (sob demanda) ou
+``start_background_warmer()`` (thread, com ``CACHE_WARMER_ENABLED=true``).
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from zoneinfo import ZoneInfo
+
+from app.observability.instrumentation import counter
+
+LOGGER = logging.getLogger(__name__)
+
+# a chave do slot inclui a data: travar por um dia cobre reinícios/deploys
+_SLOT_LOCK_TTL_MS = 24 * 3600 * 1000
+
+TopQuestionsFn = Callable[[str, str, int], Sequence[Tuple[str, int]]]
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    raw = os.getenv(name)
+    if raw is None:
+        return default
+    return raw.strip().lower() in {"1", "true", "yes", "on"}
+
+
+def _metric(entity: str, outcome: str) -> None:
+    try:
+        counter("sirios_cache_warm_total", entity=entity, outcome=outcome)
+    except Exception:
+        pass
+
+
+@dataclass(frozen=True)
+class WarmerConfig:
+    timezone: str = "America/Sao_Paulo"
+    delay_minutes: int = 15
+    window: str = "24h"
+    top_n: int = 20
+    tickers: Tuple[str, ...] = ()
+    question_templates: Dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def from_policies(cls, policies: Any) -> "WarmerConfig":
+        data = getattr(policies, "data", None) or {}
+        raw = data.get("warmer") if isinstance(data, dict) else None
+        if not isinstance(raw, dict):
+            return cls()
+
+        tickers_raw = raw.get("tickers")
+        if tickers_raw == "ticker_index":
+            from app.planner.ticker_index import get_ticker_index
+
+            tickers: Tuple[str, ...] = tuple(get_ticker_index().tickers)
+        elif isinstance(tickers_raw, list):
+            tickers = tuple(str(t).strip().upper() for t in tickers_raw if str(t).strip())
+        else:
+            tickers = ()
+
+        templates_raw = raw.get("question_templates")
+        templates = (
+            {str(k): str(v) for k, v in templates_raw.items() if v}
+            if isinstance(templates_raw, dict)
+            else {}
+        )
+        return cls(
+            timezone=str(raw.get("timezone") or cls.timezone),
+            delay_minutes=int(raw.get("delay_minutes", cls.delay_minutes) or 0),
+            window=str(raw.get("window") or cls.window),
+            top_n=int(raw.get("top_n", cls.top_n) or 0),
+            tickers=tickers,
+            question_templates=templates,
+        )
+
+
+def _default_top_questions(entity: str, window: str, limit: int) -> Sequence[Tuple[str, int]]:
+    from app.analytics.repository import fetch_top_questions
+
+    return fetch_top_questions(entity, window=window, limit=limit)
+
+
+class CacheWarmer:
+    def __init__(
+        self,
+        orchestrator: Any,
+        policies: Any,
+        cache: Any = None,
+        *,
+        config: Optional[WarmerConfig] = None,
+        top_questions: Optional[TopQuestionsFn] = None,
+    ):
+        self._orchestrator = orchestrator
+        self._policies = policies
+        self._cache = cache
+        self.config = config or WarmerConfig.from_policies(policies)
+        self._top_questions = top_questions or _default_top_questions
+        self._tz = ZoneInfo(self.config.timezone)
+        # entidade -> último slot aquecido neste processo
+        self._last_slot: Dict[str, dt.datetime] = {}
+
+    # ------------------------------------------------------------- agenda
+
+    def entities(self) -> List[str]:
+        """Entidades públicas com ``refresh_at`` configurado."""
+        out = []
+        for entity in self._policies.entities():
+            if self._policies.is_private_entity(entity):
+                continue
+            if self._policies.refresh_at(entity) is None:
+                continue
+            out.append(entity)
+        return sorted(out)
+
+    def slot(self, entity: str, now: dt.datetime) -> Optional[dt.datetime]:
+        """Último instante de aquecimento (refresh_at + delay) já alcançado em ``now``."""
+        refresh_at = self._policies.refresh_at(entity)
+        if refresh_at is None:
+            return None
+        local_now = now.astimezone(self._tz)
+        slot = dt.datetime.combine(local_now.date(), refresh_at, tzinfo=self._tz)
+        slot += dt.timedelta(minutes=self.config.delay_minutes)
+        if slot > local_now:
+            slot -= dt.timedelta(days=1)
+        return slot
+
+    def due(self, now: dt.datetime) -> List[Tuple[str, dt.datetime]]:
+        out = []
+        for entity in self.entities():
+            slot = self.slot(entity, now)
+            if slot is None:
+                continue
+            last = self._last_slot.get(entity)
+            if last is None or last < slot:
+                out.append((entity, slot))
+        return out
+
+    # ------------------------------------------------------------ perguntas
+
+    def questions_for(self, entity: str) -> List[str]:
+        limit = max(self.config.top_n, 0)
+        if limit == 0:
+            return []
+        questions: List[str] = []
+        try:
+            for question, _hits in self._top_questions(entity, self.config.window, limit):
+                if question and question not in questions:
+                    questions.append(question)
+        except Exception:
+            LOGGER.warning(
+                "Falha ao ler perguntas recentes para pré-aquecimento (%s)",
+                entity,
+                exc_info=True,
+            )
+        template = self.config.question_templates.get(entity)
+        if template and len(questions) < limit:
+            for ticker in self.config.tickers:
+                question = template.format(ticker=ticker)
+                if question not in questions:
+                    questions.append(question)
+                if len(questions) >= limit:
+                    break
+        return questions[:limit]
+
+    # ------------------------------------------------------------ execução
+
+    def warm_entity(self, entity: str) -> Dict[str, int]:
+        stats = {"ok": 0, "skipped": 0, "mismatch": 0, "error": 0}
+        for question in self.questions_for(entity):
+            try:
+                payload = self._orchestrator.route_question(question, cache_refresh=True)
+            except Exception:
+                LOGGER.warning(
+                    "Falha ao pré-aquecer cache (%s)", entity, exc_info=True
+                )
+                outcome = "error"
+            else:
+                meta = payload.get("meta") if isinstance(payload, dict) else None
+                meta = meta if isinstance(meta, dict) else {}
+                compute = meta.get("compute") or {}
+                if meta.get("entity") != entity:
+                    # o planner roteou a pergunta para outra entidade
+                    outcome = "mismatch"
+                elif compute.get("plan_cache_written"):
+                    outcome = "ok"
+                else:
+                    outcome = "skipped"
+            stats[outcome] += 1
+            _metric(entity, outcome)
+        return stats
+
+    def _claim(self, entity: str, slot: dt.datetime) -> bool:
+        if self._cache is None:
+            return True
+        build_id = os.getenv("BUILD_ID", "dev")
+        key = f"araquem:warmer:{build_id}:{entity}:{slot.date().isoformat()}"
+        try:
+            return bool(self._cache.acquire_lock(key, _SLOT_LOCK_TTL_MS))
+        except Exception:
+            LOGGER.warning("Falha ao adquirir lock do warmer (%s)", entity, exc_info=True)
+            return False
+
+    def run_once(
+        self,
+        now: Optional[dt.datetime] = None,
+        *,
+        entities: Optional[Sequence[str]] = None,
+        force: bool = False,
+    ) -> Dict[str, Dict[str, int]]:
+        """
+        Aquece as entidades vencidas em ``now`` (ou ``entities``, se dado).
+        ``force`` ignora agenda e lock de slot (uso manual via script).
+        """
+        now = now or dt.datetime.now(dt.timezone.utc)
+        if entities is not None:
+            targets = [(e, self.slot(e, now) or now) for e in entities]
+        else:
+            targets = self.due(now)
+
+        report: Dict[str, Dict[str, int]] = {}
+        for entity, slot in targets:
+            if not force and not self._claim(entity, slot):
+                self._last_slot[entity] = slot
+                continue
+            report[entity] = self.warm_entity(entity)
+            self._last_slot[entity] = slot
+            LOGGER.info("Cache pré-aquecido para %s: %s", entity, report[entity])
+        return report
+
+    def run_forever(self, stop: threading.Event, interval_seconds: float = 60.0) -> None:
+        while not stop.wait(interval_seconds):
+            try:
+                self.run_once()
+            except Exception:
+                LOGGER.warning("Ciclo do warmer falhou", exc_info=True)
+
+
+def warmer_enabled() -> bool:
+    return _env_flag("CACHE_WARMER_ENABLED", False)
+
+
+def start_background_warmer(
+    orchestrator: Any,
+    policies: Any,
+    cache: Any = None,
+    *,
+    stop: Optional[threading.Event] = None,
+) -> Optional[threading.Thread]:
+    """Sobe o warmer numa thread daemon quando ``CACHE_WARMER_ENABLED=true``."""
+    if not warmer_enabled():
+        return None
+    try:
+        interval = float(os.getenv("CACHE_WARMER_INTERVAL_SECONDS", "60"))
+    except ValueError:
+        interval = 60.0
+    warmer = CacheWarmer(orchestrator, policies, cache)
+    thread = threading.Thread(
+        target=warmer.run_forever,
+        args=(stop or threading.Event(), interval),
+        name="cache-warmer",
+        daemon=True,
+    )
+    thread.start()
+    return thread
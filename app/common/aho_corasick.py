@@ -0,0 +1,89 @@
+# app/common/aho_corasick.py
+"""
+Autômato Aho–Corasick em Python puro.
+
+Compilado uma vez para um conjunto de padrões (strings); cada busca percorre o
+texto uma única vez e devolve todas as ocorrências de todos os padrões,
+inclusive sobrepostas. Usado pelo Planner (frases/anti-tokens da ontologia)
+e pela extração de tickers.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+
+class AhoCorasick:
+    __slots__ = ("patterns", "_ids", "_goto", "_fail", "_out")
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[int, ...]] = [()]
+
+        for pattern in patterns:
+            if not pattern or pattern in self._ids:
+                continue
+            self._ids[pattern] = len(self.patterns)
+            self.patterns.append(pattern)
+            self._insert(pattern, self._ids[pattern])
+        self._build_links()
+
+    def pattern_id(self, pattern: str) -> int:
+        """Id do padrão (KeyError se não compilado)."""
+        return self._ids[pattern]
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def _insert(self, pattern: str, pid: int) -> None:
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            state = nxt
+        self._out[state] = self._out[state] + (pid,)
+
+    def _build_links(self) -> None:
+        queue: deque[int] = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, int]]:
+        """Gera ``(start, end, pattern_id)`` para cada ocorrência (end exclusivo)."""
+        goto, fail, out, patterns = self._goto, self._fail, self._out, self.patterns
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for pid in out[state]:
+                yield i + 1 - len(patterns[pid]), i + 1, pid
+
+    def find_ids(self, text: str) -> Set[int]:
+        """Conjunto de ids de padrões presentes em ``text`` (substring)."""
+        goto, fail, out = self._goto, self._fail, self._out
+        found: Set[int] = set()
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
@@ -0,0 +1,90 @@
+# app/common/effects.py
+"""
+Execução dual (sync/async) de pipelines escritos como geradores.
+
+Um pipeline é um gerador que, a cada operação de I/O, faz ``yield`` de um
+``Effect`` e recebe de volta o resultado (ou a exceção, relançada no ponto do
+``yield``). A lógica de negócio fica escrita uma única vez; quem decide como o
+I/O roda é o driver:
+
+- ``run_sync``: chama ``fn`` diretamente (scripts, testes, handler sync);
+- ``run_async``: aguarda ``afn`` quando existe um cliente nativo asyncio e, na
+  ausência dele, desloca ``fn`` para o threadpool sem bloquear o event loop.
+"""
+
+from __future__ import annotations
+
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Generator,
+    NamedTuple,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+from starlette.concurrency import run_in_threadpool
+
+T = TypeVar("T")
+
+
+class Effect(NamedTuple):
+    fn: Callable[..., Any]
+    args: Tuple[Any, ...]
+    kwargs: Dict[str, Any]
+    afn: Optional[Callable[..., Awaitable[Any]]] = None
+
+
+Steps = Generator[Effect, Any, T]
+
+
+def effect(
+    fn: Callable[..., Any],
+    *args: Any,
+    afn: Optional[Callable[..., Awaitable[Any]]] = None,
+    **kwargs: Any,
+) -> Effect:
+    """Descreve uma chamada de I/O; ``afn`` recebe os mesmos argumentos de ``fn``."""
+    return Effect(fn, args, kwargs, afn)
+
+
+def run_sync(steps: Steps[T]) -> T:
+    value: Any = None
+    error: Optional[BaseException] = None
+    try:
+        while True:
+            try:
+                eff = steps.throw(error) if error is not None else steps.send(value)
+            except StopIteration as stop:
+                return stop.value
+            value, error = None, None
+            try:
+                value = eff.fn(*eff.args, **eff.kwargs)
+            except Exception as exc:
+                error = exc
+    finally:
+        steps.close()
+
+
+async def run_async(steps: Steps[T]) -> T:
+    value: Any = None
+    error: Optional[BaseException] = None
+    try:
+        while True:
+            try:
+                eff = steps.throw(error) if error is not None else steps.send(value)
+            except StopIteration as stop:
+                return stop.value
+            value, error = None, None
+            try:
+                if eff.afn is not None:
+                    value = await eff.afn(*eff.args, **eff.kwargs)
+                else:
+                    value = await run_in_threadpool(eff.fn, *eff.args, **eff.kwargs)
+            except Exception as exc:
+                error = exc
+    finally:
+        steps.close()
@@ -13,15 +13,18 @@ Importante:
     - Este módulo, por enquanto, NÃO está plugado em lugar nenhum.
       Ou seja, não altera o comportamento atual do Araquem.
     - Backend default é in-memory, apenas para desenvolvimento/testes.
-      Backends reais (ex.: Redis) podem ser adicionados depois,
-      implementando o protocolo ContextBackend.
+      Com ``context.backend: redis`` (ou ``CONTEXT_BACKEND=redis``) turns,
+      contador de turns e last_reference ficam no Redis
+      (RedisContextBackend), compartilhados entre workers/pods.
 """
 
 from __future__ import annotations
 
+import json
 import logging
+import os
 import time
-from dataclasses import asdict, dataclass
+from dataclasses import asdict, dataclass, replace
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Protocol, Literal, Tuple
 
@@ -74,6 +77,8 @@ DEFAULT_NARRATOR_POLICY: Dict[str, Any] = {
 DEFAULT_POLICY: Dict[str, Any] = {
     # Liga/desliga memória conversacional globalmente
     "enabled": False,
+    # Onde guardar o contexto: "memory" (por processo) | "redis" (compartilhado)
+    "backend": "memory",
     # Quantidade máxima de turns recentes a manter por conversa
     "max_turns": 4,
     # TTL em segundos para considerar um turn ainda válido
@@ -189,11 +194,13 @@ class ContextBackend(Protocol):
     """
     Protocolo de backend para armazenamento de contexto.
 
-    Implementações possíveis:
-        - In-memory (desenvolvimento / testes)
-        - Redis
-        - Postgres
-        - etc.
+    Além dos turns, o backend guarda o estado por conversa usado pela
+    herança de ticker: contador lógico de turns e last_reference (geral e
+    por bucket).
+
+    Implementações:
+        - InMemoryBackend (desenvolvimento / testes)
+        - RedisContextBackend (multi-worker)
     """
 
     def load(self, client_id: str, conversation_id: str) -> List[ConversationTurn]: ...
@@ -205,6 +212,49 @@ class ContextBackend(Protocol):
         turns: List[ConversationTurn],
     ) -> None: ...
 
+    def append(
+        self,
+        client_id: str,
+        conversation_id: str,
+        turn: ConversationTurn,
+        *,
+        max_turns: int,
+        ttl_seconds: int,
+    ) -> None:
+        """Acrescenta o turn, aplica os cortes e incrementa o contador."""
+        ...
+
+    def turn_index(self, client_id: str, conversation_id: str) -> int: ...
+
+    def set_last_reference(
+        self,
+        client_id: str,
+        conversation_id: str,
+        bucket_key: str,
+        last_ref: "LastReference",
+        *,
+        ttl_seconds: int,
+    ) -> None:
+        """Grava a referência com ``turn_index`` = contador atual (lido na mesma operação)."""
+        ...
+
+    def last_reference_state(
+        self, client_id: str, conversation_id: str, bucket_key: str
+    ) -> Tuple[int, Optional["LastReference"], Optional["LastReference"]]:
+        """(contador de turns, referência do bucket, última referência geral)."""
+        ...
+
+
+def _trim_turns(
+    turns: List[ConversationTurn], *, max_turns: int, ttl_seconds: int
+) -> List[ConversationTurn]:
+    if ttl_seconds > 0:
+        now = time.time()
+        turns = [t for t in turns if (now - t.created_at) <= ttl_seconds]
+    if max_turns > 0 and len(turns) > max_turns:
+        turns = turns[-max_turns:]
+    return turns
+
 
 class InMemoryBackend:
     """
@@ -217,6 +267,9 @@ class InMemoryBackend:
 
     def __init__(self) -> None:
         self._store: Dict[str, List[ConversationTurn]] = {}
+        self._turn_counters: Dict[str, int] = {}
+        self._last_reference: Dict[str, LastReference] = {}
+        self._last_reference_by_bucket: Dict[str, Dict[str, LastReference]] = {}
 
     @staticmethod
     def _key(client_id: str, conversation_id: str) -> str:
@@ -235,6 +288,230 @@ class InMemoryBackend:
         key = self._key(client_id, conversation_id)
         self._store[key] = list(turns)
 
+    def append(
+        self,
+        client_id: str,
+        conversation_id: str,
+        turn: ConversationTurn,
+        *,
+        max_turns: int,
+        ttl_seconds: int,
+    ) -> None:
+        key = self._key(client_id, conversation_id)
+        self._turn_counters[key] = self._turn_counters.get(key, 0) + 1
+        turns = self.load(client_id, conversation_id)
+        turns.append(turn)
+        self._store[key] = _trim_turns(turns, max_turns=max_turns, ttl_seconds=ttl_seconds)
+
+    def turn_index(self, client_id: str, conversation_id: str) -> int:
+        return int(self._turn_counters.get(self._key(client_id, conversation_id), 0))
+
+    def set_last_reference(
+        self,
+        client_id: str,
+        conversation_id: str,
+        bucket_key: str,
+        last_ref: "LastReference",
+        *,
+        ttl_seconds: int,
+    ) -> None:
+        key = self._key(client_id, conversation_id)
+        last_ref = replace(last_ref, turn_index=int(self._turn_counters.get(key, 0)))
+        self._last_reference[key] = last_ref
+        self._last_reference_by_bucket.setdefault(key, {})[bucket_key] = last_ref
+
+    def last_reference_state(
+        self, client_id: str, conversation_id: str, bucket_key: str
+    ) -> Tuple[int, Optional["LastReference"], Optional["LastReference"]]:
+        key = self._key(client_id, conversation_id)
+        by_bucket = self._last_reference_by_bucket.get(key) or {}
+        return (
+            int(self._turn_counters.get(key, 0)),
+            by_bucket.get(bucket_key),
+            self._last_reference.get(key),
+        )
+
+
+# HGET do contador + HSET da referência numa ida só (EVALSHA), atômico em
+# relação aos HINCRBY de append() de outros workers
+_SET_LAST_REFERENCE_LUA = """
+local ref = cjson.decode(ARGV[1])
+ref['turn_index'] = tonumber(redis.call('HGET', KEYS[1], 'turns') or '0')
+local raw = cjson.encode(ref)
+redis.call('HSET', KEYS[1], 'ref', raw, ARGV[2], raw)
+local ttl = tonumber(ARGV[3])
+if ttl > 0 then
+    redis.call('EXPIRE', KEYS[1], ttl)
+end
+return ref['turn_index']
+"""
+
+
+class RedisContextBackend:
+    """
+    Backend Redis: contexto compartilhado entre workers/pods.
+
+    Chaves por conversa (prefixo ``CONTEXT_REDIS_PREFIX``, default
+    ``araquem:ctx``):
+        - ``<prefixo>:<client>:<conversa>:turns``: lista com o turn mais
+          recente na cabeça (LPUSH + LTRIM em ``max_turns``);
+        - ``<prefixo>:<client>:<conversa>:state``: hash com ``turns``
+          (contador lógico), ``ref`` (última referência) e ``ref:<bucket>``.
+
+    Ambas expiram com ``ttl_seconds`` da política, renovado a cada escrita:
+    memória limitada mesmo sem limpeza explícita. Cada escrita é um único
+    round trip: ``append`` é um pipeline MULTI/EXEC e ``set_last_reference``
+    um script Lua que carimba o contador atual na referência; leituras de
+    last_reference são um HMGET.
+
+    Falhas de Redis não derrubam o /ask: leituras devolvem contexto vazio e
+    escritas são descartadas (com warning).
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        *,
+        ttl_seconds: int = DEFAULT_POLICY["ttl_seconds"],
+        prefix: Optional[str] = None,
+    ) -> None:
+        self._cli = client
+        self._ttl_seconds = int(ttl_seconds)
+        self._prefix = prefix or os.getenv("CONTEXT_REDIS_PREFIX", "araquem:ctx")
+        self._set_ref = client.register_script(_SET_LAST_REFERENCE_LUA)
+
+    def _keys(self, client_id: str, conversation_id: str) -> Tuple[str, str]:
+        base = f"{self._prefix}:{client_id}:{conversation_id}"
+        return f"{base}:turns", f"{base}:state"
+
+    @staticmethod
+    def _dump_turn(turn: ConversationTurn) -> str:
+        return json.dumps(asdict(turn), ensure_ascii=False, default=str)
+
+    @staticmethod
+    def _load_turn(raw: Any) -> Optional[ConversationTurn]:
+        try:
+            data = json.loads(raw)
+            return ConversationTurn(
+                role=data["role"],
+                content=data.get("content") or "",
+                created_at=float(data.get("created_at") or 0.0),
+                meta=data.get("meta"),
+            )
+        except Exception:
+            return None
+
+    @staticmethod
+    def _load_ref(raw: Any) -> Optional["LastReference"]:
+        if not raw:
+            return None
+        try:
+            data = json.loads(raw)
+            return LastReference(
+                tickers=[str(t) for t in data.get("tickers") or []],
+                entity=data.get("entity"),
+                intent=data.get("intent"),
+                updated_at=float(data.get("updated_at") or 0.0),
+                turn_index=int(data.get("turn_index") or 0),
+                bucket=data.get("bucket"),
+            )
+        except Exception:
+            return None
+
+    def _expire(self, pipe: Any, *keys: str, ttl_seconds: Optional[int] = None) -> None:
+        ttl = self._ttl_seconds if ttl_seconds is None else int(ttl_seconds)
+        if ttl > 0:
+            for key in keys:
+                pipe.expire(key, ttl)
+
+    def load(self, client_id: str, conversation_id: str) -> List[ConversationTurn]:
+        turns_key, _ = self._keys(client_id, conversation_id)
+        try:
+            raw = self._cli.lrange(turns_key, 0, -1) or []
+        except Exception:
+            LOGGER.warning("Falha ao ler contexto no Redis", exc_info=True)
+            return []
+        turns = [self._load_turn(item) for item in reversed(raw)]
+        return [t for t in turns if t is not None]
+
+    def save(
+        self,
+        client_id: str,
+        conversation_id: str,
+        turns: List[ConversationTurn],
+    ) -> None:
+        turns_key, _ = self._keys(client_id, conversation_id)
+        try:
+            pipe = self._cli.pipeline(transaction=True)
+            pipe.delete(turns_key)
+            if turns:
+                # LPUSH em ordem cronológica deixa o mais recente na cabeça
+                pipe.lpush(turns_key, *[self._dump_turn(t) for t in turns])
+                self._expire(pipe, turns_key)
+            pipe.execute()
+        except Exception:
+            LOGGER.warning("Falha ao gravar contexto no Redis", exc_info=True)
+
+    def append(
+        self,
+        client_id: str,
+        conversation_id: str,
+        turn: ConversationTurn,
+        *,
+        max_turns: int,
+        ttl_seconds: int,
+    ) -> None:
+        turns_key, state_key = self._keys(client_id, conversation_id)
+        try:
+            pipe = self._cli.pipeline(transaction=True)
+            pipe.lpush(turns_key, self._dump_turn(turn))
+            if max_turns > 0:
+                pipe.ltrim(turns_key, 0, max_turns - 1)
+            pipe.hincrby(state_key, "turns", 1)
+            self._expire(pipe, turns_key, state_key, ttl_seconds=ttl_seconds)
+            pipe.execute()
+        except Exception:
+            LOGGER.warning("Falha ao registrar turn de contexto no Redis", exc_info=True)
+
+    def turn_index(self, client_id: str, conversation_id: str) -> int:
+        _, state_key = self._keys(client_id, conversation_id)
+        try:
+            return int(self._cli.hget(state_key, "turns") or 0)
+        except Exception:
+            LOGGER.warning("Falha ao ler contador de turns no Redis", exc_info=True)
+            return 0
+
+    def set_last_reference(
+        self,
+        client_id: str,
+        conversation_id: str,
+        bucket_key: str,
+        last_ref: "LastReference",
+        *,
+        ttl_seconds: int,
+    ) -> None:
+        _, state_key = self._keys(client_id, conversation_id)
+        raw = json.dumps(asdict(last_ref), ensure_ascii=False)
+        try:
+            self._set_ref(
+                keys=[state_key], args=[raw, f"ref:{bucket_key}", int(ttl_seconds)]
+            )
+        except Exception:
+            LOGGER.warning("Falha ao gravar last_reference no Redis", exc_info=True)
+
+    def last_reference_state(
+        self, client_id: str, conversation_id: str, bucket_key: str
+    ) -> Tuple[int, Optional["LastReference"], Optional["LastReference"]]:
+        _, state_key = self._keys(client_id, conversation_id)
+        try:
+            counter, by_bucket, legacy = self._cli.hmget(
+                state_key, ["turns", f"ref:{bucket_key}", "ref"]
+            )
+        except Exception:
+            LOGGER.warning("Falha ao ler last_reference no Redis", exc_info=True)
+            return 0, None, None
+        return int(counter or 0), self._load_ref(by_bucket), self._load_ref(legacy)
+
 
 class ContextManager:
     """
@@ -244,23 +521,38 @@ class ContextManager:
         cm = ContextManager()  # backend default in-memory
         history = cm.load_recent(client_id, conversation_id)
         cm.append_turn(client_id, conversation_id, role="user", content=question)
+
+    ``redis_client`` só é usado quando a política (``context.backend``) ou
+    ``CONTEXT_BACKEND`` pedem ``redis`` e nenhum ``backend`` foi passado.
     """
 
     def __init__(
         self,
         backend: Optional[ContextBackend] = None,
         policy: Optional[Dict[str, Any]] = None,
+        redis_client: Any = None,
     ) -> None:
-        self._backend: ContextBackend = backend or InMemoryBackend()
-        self._last_reference: Dict[str, LastReference] = {}
-        self._last_reference_by_bucket: Dict[str, Dict[str, LastReference]] = {}
-        self._turn_counters: Dict[str, int] = {}
         if policy is not None:
             self._policy = policy
             self._policy_status = "ok"
             self._policy_error = None
         else:
             self._policy, self._policy_status, self._policy_error = _load_policy()
+        self._backend: ContextBackend = backend or self._default_backend(redis_client)
+
+    def _default_backend(self, redis_client: Any) -> ContextBackend:
+        kind = (
+            os.getenv("CONTEXT_BACKEND") or str(self._policy.get("backend") or "memory")
+        ).strip().lower()
+        if kind == "redis":
+            if redis_client is not None:
+                return RedisContextBackend(redis_client, ttl_seconds=self._ttl_seconds())
+            LOGGER.warning(
+                "context.backend=redis sem cliente Redis; usando InMemoryBackend"
+            )
+        elif kind != "memory":
+            LOGGER.warning("context.backend desconhecido (%s); usando InMemoryBackend", kind)
+        return InMemoryBackend()
 
     # -------------------------
     # Propriedades / helpers
@@ -441,20 +733,10 @@ class ContextManager:
 
         return turns
 
-    def _conversation_key(self, client_id: str, conversation_id: str) -> str:
-        return f"{client_id}:{conversation_id}"
-
-    def _increment_turn_counter(self, client_id: str, conversation_id: str) -> int:
-        key = self._conversation_key(client_id, conversation_id)
-        current = self._turn_counters.get(key, 0) + 1
-        self._turn_counters[key] = current
-        return current
-
     def current_turn_index(self, client_id: str, conversation_id: str) -> int:
         """Retorna o contador lógico de turns já registrados para a conversa."""
 
-        key = self._conversation_key(client_id, conversation_id)
-        return int(self._turn_counters.get(key, 0))
+        return self._backend.turn_index(client_id, conversation_id)
 
     def max_chars(self) -> int:
         """
@@ -489,23 +771,14 @@ class ContextManager:
         ts = created_at if created_at is not None else time.time()
         turn = ConversationTurn(role=role, content=content, created_at=ts, meta=meta)
 
-        self._increment_turn_counter(client_id, conversation_id)
-
-        turns = self._backend.load(client_id, conversation_id)
-        turns.append(turn)
-
-        # Reaplica política de corte antes de salvar
-        now = time.time()
-        ttl = self._ttl_seconds()
-        max_turns = self._max_turns()
-
-        if ttl > 0:
-            turns = [t for t in turns if (now - t.created_at) <= ttl]
-
-        if max_turns > 0 and len(turns) > max_turns:
-            turns = turns[-max_turns:]
-
-        self._backend.save(client_id, conversation_id, turns)
+        # o backend incrementa o contador e reaplica a política de corte
+        self._backend.append(
+            client_id,
+            conversation_id,
+            turn,
+            max_turns=self._max_turns(),
+            ttl_seconds=self._ttl_seconds(),
+        )
 
     def update_last_reference(
         self,
@@ -541,22 +814,24 @@ class ContextManager:
         if entity and not self.last_reference_allows_entity(entity):
             return
 
-        key = self._conversation_key(client_id, conversation_id)
         now = time.time()
-        turn_index = self._turn_counters.get(key, 0)
         bucket_key = str(bucket) if bucket is not None else ""
+        # turn_index é carimbado pelo backend com o contador atual
         last_ref = LastReference(
             tickers=tickers_list,
             entity=entity,
             intent=intent,
             updated_at=now,
-            turn_index=turn_index,
+            turn_index=0,
             bucket=bucket,
         )
-        self._last_reference[key] = last_ref
-        if key not in self._last_reference_by_bucket:
-            self._last_reference_by_bucket[key] = {}
-        self._last_reference_by_bucket[key][bucket_key] = last_ref
+        self._backend.set_last_reference(
+            client_id,
+            conversation_id,
+            bucket_key,
+            last_ref,
+            ttl_seconds=self._ttl_seconds(),
+        )
 
     def get_last_reference(
         self, client_id: str, conversation_id: str, bucket: Optional[str] = None
@@ -582,13 +857,11 @@ class ContextManager:
         if not policy.get("enable_last_ticker"):
             return None, "last_reference_disabled"
 
-        key = self._conversation_key(client_id, conversation_id)
         bucket_key = str(bucket) if bucket is not None else ""
-        last_ref = None
-        if key in self._last_reference_by_bucket:
-            last_ref = self._last_reference_by_bucket[key].get(bucket_key)
+        current_turn, last_ref, legacy_ref = self._backend.last_reference_state(
+            client_id, conversation_id, bucket_key
+        )
         if not isinstance(last_ref, LastReference) and bucket is None:
-            legacy_ref = self._last_reference.get(key)
             if isinstance(legacy_ref, LastReference):
                 last_ref = legacy_ref
         if not isinstance(last_ref, LastReference):
@@ -606,7 +879,6 @@ class ContextManager:
         except (TypeError, ValueError):
             max_age_turns = policy.get("max_age_turns") or 0
         if max_age_turns > 0:
-            current_turn = self._turn_counters.get(key, 0)
             if (current_turn - last_ref.turn_index) > max_age_turns:
                 return None, "expired"
 
@@ -1,11 +1,19 @@
 # app/core/context.py
 import os
 
-from app.cache.rt_cache import RedisCache, CachePolicies, read_through
-from app.executor.pg import PgExecutor
+from app.cache.l1_cache import L1Cache, l1_enabled
+from app.cache.rt_cache import (
+    AsyncRedisCache,
+    CachePolicies,
+    RedisCache,
+    public_entity_admitter,
+    read_through,
+)
+from app.executor.pg import AsyncPgExecutor, PgExecutor
 from app.observability.runtime import bootstrap, load_config
 from app.orchestrator.routing import Orchestrator
 from app.planner.planner import Planner
+from app.rag.embed_cache import QUERY_EMBED_CACHE
 
 # NOVO: Context Manager canônico
 from app.context.context_manager import ContextManager
@@ -17,35 +25,59 @@ bootstrap(service_name="api", cfg=cfg)
 # ----------------------------
 # BACKENDS CORE DO ARAQUEM
 # ----------------------------
-cache = RedisCache(os.getenv("REDIS_URL", "redis://redis:6379/0"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
 policies = CachePolicies()
+# L1 em processo (só entidades públicas; invalidado via pub/sub no /ops/cache/bust)
+l1_cache = L1Cache(admit=public_entity_admitter(policies)) if l1_enabled() else None
+cache = RedisCache(REDIS_URL, l1=l1_cache)
 planner = Planner(ONTO_PATH)
 executor = PgExecutor()
 orchestrator = Orchestrator(planner, executor, cache=cache, cache_policies=policies)
 
+# ----------------------------
+# BACKENDS ASYNCIO (/ask async)
+# ----------------------------
+# Conexões são abertas sob demanda dentro do event loop; o lock_token é
+# compartilhado para que sync e async participem do mesmo single-flight.
+async_cache = AsyncRedisCache(
+    REDIS_URL, lock_token=cache.lock_token, l1=l1_cache, notifier=cache.notifier
+)
+async_executor = AsyncPgExecutor()
+orchestrator.set_async_backends(cache=async_cache, executor=async_executor)
+
+# Nível Redis do cache de embeddings de consulta (L1 em memória sempre ativo)
+QUERY_EMBED_CACHE.set_backends(cache=cache, async_cache=async_cache)
+
 # ----------------------------
 # CONTEXTO CONVERSACIONAL (M12+)
 # ----------------------------
 # Instanciado agora, mas só tem efeito quando:
 #   data/policies/context.yaml → context.enabled = true
 #
-# Backend padrão é in-memory (sem risco, sem persistência)
+# Backend padrão é in-memory (sem risco, sem persistência); com
+# context.backend: redis (ou CONTEXT_BACKEND=redis) usa o mesmo Redis do cache,
+# compartilhando o contexto entre workers.
 #
-context_manager = ContextManager()  # policy carregada de data/policies/context.yaml
+context_manager = ContextManager(redis_client=cache.raw)  # policy de data/policies/context.yaml
 
 __all__ = [
     "cache",
+    "l1_cache",
     "policies",
     "planner",
     "executor",
+    "async_cache",
+    "async_executor",
     "orchestrator",
     "context_manager",
     "cfg",
     "ONTO_PATH",
     "RedisCache",
+    "AsyncRedisCache",
     "CachePolicies",
     "read_through",
     "Planner",
     "PgExecutor",
+    "AsyncPgExecutor",
     "Orchestrator",
 ]
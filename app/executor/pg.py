@@ -1,40 +1,216 @@
 # app/executor/pg.py
 
+import asyncio
+import logging
 import os
+import threading
 import time
-from typing import List, Dict, Any, Optional
+from contextlib import asynccontextmanager, contextmanager
+from typing import List, Dict, Any, AsyncIterator, Iterator, Optional, Union
 import psycopg
+from psycopg_pool import AsyncConnectionPool, ConnectionPool, PoolTimeout
 
 from app.observability.runtime import load_config, sql_sanitize
 from app.observability.instrumentation import (
     set_trace_attribute,
     trace as start_trace,
 )
-from app.observability.metrics import emit_counter, emit_histogram
+from app.observability.metrics import emit_counter, emit_gauge, emit_histogram
+
+LOGGER = logging.getLogger(__name__)
+
+
+def _env_bool(var_name: str, default: bool) -> bool:
+    raw = os.getenv(var_name)
+    if raw is None:
+        return default
+    return raw.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_int(var_name: str, default: int) -> int:
+    try:
+        return int(os.getenv(var_name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_float(var_name: str, default: float) -> float:
+    try:
+        return float(os.getenv(var_name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def load_pool_settings() -> Dict[str, Any]:
+    """
+    Parâmetros do pool de conexões (todos via env, com defaults conservadores).
+
+    PG_POOL_ENABLED=false desliga o pool e volta ao connect-por-query (scripts).
+    """
+    min_size = max(0, _env_int("PG_POOL_MIN_SIZE", 1))
+    max_size = max(1, _env_int("PG_POOL_MAX_SIZE", 10))
+    return {
+        "enabled": _env_bool("PG_POOL_ENABLED", True),
+        "min_size": min(min_size, max_size),
+        "max_size": max_size,
+        "timeout_s": max(0.1, _env_float("PG_POOL_TIMEOUT_S", 5.0)),
+        "max_lifetime_s": max(60.0, _env_float("PG_POOL_MAX_LIFETIME_S", 1800.0)),
+        "max_idle_s": max(10.0, _env_float("PG_POOL_MAX_IDLE_S", 300.0)),
+        "connect_timeout_s": max(1, _env_int("PG_CONNECT_TIMEOUT_S", 5)),
+    }
+
+
+def _pool_kwargs(cfg: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "min_size": int(cfg["min_size"]),
+        "max_size": int(cfg["max_size"]),
+        "timeout": float(cfg["timeout_s"]),
+        "max_lifetime": float(cfg["max_lifetime_s"]),
+        "max_idle": float(cfg["max_idle_s"]),
+        "kwargs": {
+            "autocommit": True,
+            "connect_timeout": int(cfg["connect_timeout_s"]),
+        },
+    }
+
+
+def _emit_pool_stats(
+    pool: Union[ConnectionPool, AsyncConnectionPool], max_size: Any
+) -> None:
+    try:
+        stats = pool.get_stats()
+    except Exception:
+        return
+    size = float(stats.get("pool_size", 0))
+    available = float(stats.get("pool_available", 0))
+    waiting = float(stats.get("requests_waiting", 0))
+    max_size_f = float(max_size or 1)
+    emit_gauge("sirios_sql_pool_connections", size, state="open")
+    emit_gauge("sirios_sql_pool_connections", available, state="idle")
+    emit_gauge("sirios_sql_pool_connections", waiting, state="waiting")
+    emit_gauge("sirios_sql_pool_saturation", (size - available) / max_size_f)
+
+
+def _record_pool_timeout(pool: Any, cfg: Dict[str, Any], waited_s: float) -> None:
+    emit_histogram("sirios_sql_pool_wait_seconds", waited_s)
+    emit_counter("sirios_sql_pool_timeouts_total")
+    _emit_pool_stats(pool, cfg.get("max_size"))
+    LOGGER.warning(
+        "Timeout aguardando conexão do pool Postgres (%.2fs)", cfg["timeout_s"]
+    )
+
+
+def _statement_for_trace(sql: str) -> str:
+    _cfg = load_config()
+    return sql_sanitize(
+        sql,
+        max_len=_cfg["services"]["executor"]["tracing"]
+        .get("statement", {})
+        .get("max_len", 512),
+    )
+
+
+def _record_query(entity: Any, dbname: Any, elapsed_s: float, rows_total: int) -> None:
+    # Latência da query
+    emit_histogram(
+        "sirios_sql_query_duration_seconds",
+        elapsed_s,
+        entity=str(entity),
+        db_name=str(dbname),
+    )
+    # Linhas retornadas (usa _value suportado pela facade)
+    emit_counter(
+        "sirios_sql_rows_returned_total",
+        entity=str(entity),
+        _value=rows_total,
+    )
+
+
+def _record_query_error(entity: Any, exc: psycopg.Error) -> None:
+    code = getattr(exc, "pgcode", "unknown")
+    emit_counter("sirios_sql_errors_total", entity=str(entity), error_code=str(code))
 
 
 class PgExecutor:
     """
     Executor Postgres read-only. Usa DATABASE_URL do ambiente.
+
+    As conexões vêm de um pool (psycopg_pool) criado sob demanda no primeiro
+    query; conexões são validadas no checkout e recicladas por max_lifetime.
     """
 
-    def __init__(self, dsn: Optional[str] = None):
+    def __init__(
+        self,
+        dsn: Optional[str] = None,
+        pool_settings: Optional[Dict[str, Any]] = None,
+    ):
         self._dsn = dsn or os.getenv("DATABASE_URL")
+        self._pool_settings = pool_settings or load_pool_settings()
+        self._pool: Optional[ConnectionPool] = None
+        self._pool_lock = threading.Lock()
         # Métricas agora são reportadas via facade (sem bind de handles).
 
+    @property
+    def pool(self) -> Optional[ConnectionPool]:
+        return self._pool
+
+    def _get_pool(self) -> Optional[ConnectionPool]:
+        if not self._pool_settings.get("enabled"):
+            return None
+        if self._pool is not None:
+            return self._pool
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ConnectionPool(
+                    self._dsn or "",
+                    **_pool_kwargs(self._pool_settings),
+                    check=ConnectionPool.check_connection,
+                    name="araquem-executor",
+                    open=False,
+                )
+                self._pool.open(wait=False)
+        return self._pool
+
+    def close(self) -> None:
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.close()
+
+    @contextmanager
+    def connection(self) -> Iterator[psycopg.Connection]:
+        """Checkout de conexão (pool quando habilitado; connect direto no fallback)."""
+        pool = self._get_pool()
+        if pool is None:
+            with psycopg.connect(
+                self._dsn,
+                autocommit=True,
+                connect_timeout=int(self._pool_settings.get("connect_timeout_s", 5)),
+            ) as conn:
+                yield conn
+            return
+
+        t0 = time.perf_counter()
+        acquired = False
+        try:
+            with pool.connection(timeout=float(self._pool_settings["timeout_s"])) as conn:
+                acquired = True
+                emit_histogram("sirios_sql_pool_wait_seconds", time.perf_counter() - t0)
+                _emit_pool_stats(pool, self._pool_settings.get("max_size"))
+                yield conn
+        except PoolTimeout:
+            if acquired:
+                raise
+            _record_pool_timeout(pool, self._pool_settings, time.perf_counter() - t0)
+            raise
+
     def query(self, sql: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
-        _cfg = load_config()
-        with psycopg.connect(self._dsn, autocommit=True) as conn:
+        with self.connection() as conn:
             dbname = getattr(getattr(conn, "info", None), "dbname", "db")
             entity = (params or {}).get("entity", "unknown")
             t0 = time.perf_counter()
             try:
-                stmt = sql_sanitize(
-                    sql,
-                    max_len=_cfg["services"]["executor"]["tracing"]
-                    .get("statement", {})
-                    .get("max_len", 512),
-                )
+                stmt = _statement_for_trace(sql)
                 with start_trace(
                     "executor.sql.execute",
                     component="executor",
@@ -47,25 +223,99 @@ class PgExecutor:
                     with conn.cursor(row_factory=psycopg.rows.dict_row) as cur:
                         cur.execute(sql, params or {})
                         rows = cur.fetchall()
-                dt = time.perf_counter() - t0
-                # Latência da query
-                emit_histogram(
-                    "sirios_sql_query_duration_seconds",
-                    dt,
-                    entity=str(entity),
-                    db_name=str(dbname),
-                )
-                # Linhas retornadas (usa _value suportado pela facade)
-                emit_counter(
-                    "sirios_sql_rows_returned_total",
-                    entity=str(entity),
-                    _value=len(rows),
+                _record_query(entity, dbname, time.perf_counter() - t0, len(rows))
+                return rows
+            except psycopg.Error as e:
+                _record_query_error(entity, e)
+                raise
+
+
+class AsyncPgExecutor:
+    """
+    Executor Postgres read-only para o caminho asyncio (psycopg AsyncConnectionPool).
+
+    Mesmas settings (PG_POOL_*), métricas e spans do PgExecutor; o pool é
+    criado no primeiro uso, dentro do event loop que vai servi-lo.
+    """
+
+    def __init__(
+        self,
+        dsn: Optional[str] = None,
+        pool_settings: Optional[Dict[str, Any]] = None,
+    ):
+        self._dsn = dsn or os.getenv("DATABASE_URL")
+        self._pool_settings = pool_settings or load_pool_settings()
+        self._pool: Optional[AsyncConnectionPool] = None
+        self._pool_lock: Optional[asyncio.Lock] = None
+
+    @property
+    def pool(self) -> Optional[AsyncConnectionPool]:
+        return self._pool
+
+    async def _get_pool(self) -> AsyncConnectionPool:
+        if self._pool is not None:
+            return self._pool
+        if self._pool_lock is None:
+            self._pool_lock = asyncio.Lock()
+        async with self._pool_lock:
+            if self._pool is None:
+                pool = AsyncConnectionPool(
+                    self._dsn or "",
+                    **_pool_kwargs(self._pool_settings),
+                    check=AsyncConnectionPool.check_connection,
+                    name="araquem-executor-async",
+                    open=False,
                 )
+                await pool.open(wait=False)
+                self._pool = pool
+        return self._pool
 
+    async def close(self) -> None:
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            await pool.close()
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[psycopg.AsyncConnection]:
+        """Checkout de conexão do pool async (sempre pooled; o fallback é o PgExecutor)."""
+        pool = await self._get_pool()
+        t0 = time.perf_counter()
+        acquired = False
+        try:
+            async with pool.connection(
+                timeout=float(self._pool_settings["timeout_s"])
+            ) as conn:
+                acquired = True
+                emit_histogram("sirios_sql_pool_wait_seconds", time.perf_counter() - t0)
+                _emit_pool_stats(pool, self._pool_settings.get("max_size"))
+                yield conn
+        except PoolTimeout:
+            if acquired:
+                raise
+            _record_pool_timeout(pool, self._pool_settings, time.perf_counter() - t0)
+            raise
+
+    async def query(self, sql: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        async with self.connection() as conn:
+            dbname = getattr(getattr(conn, "info", None), "dbname", "db")
+            entity = (params or {}).get("entity", "unknown")
+            t0 = time.perf_counter()
+            try:
+                stmt = _statement_for_trace(sql)
+                with start_trace(
+                    "executor.sql.execute",
+                    component="executor",
+                    operation="sql.execute",
+                ) as span:
+                    set_trace_attribute(span, "db.system", "postgresql")
+                    set_trace_attribute(span, "db.name", dbname)
+                    set_trace_attribute(span, "db.sql.table", entity)
+                    set_trace_attribute(span, "db.statement", stmt)
+                    async with conn.cursor(row_factory=psycopg.rows.dict_row) as cur:
+                        await cur.execute(sql, params or {})
+                        rows = await cur.fetchall()
+                _record_query(entity, dbname, time.perf_counter() - t0, len(rows))
                 return rows
             except psycopg.Error as e:
-                code = getattr(e, "pgcode", "unknown")
-                emit_counter(
-                    "sirios_sql_errors_total", entity=str(entity), error_code=str(code)
-                )
+                _record_query_error(entity, e)
                 raise
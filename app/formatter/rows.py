@@ -4,11 +4,13 @@ import logging
 import os
 import sys
 from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from functools import lru_cache
 import datetime as dt
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Callable
+import threading
+from typing import List, Dict, Any, Optional, Callable, Tuple
 
-from jinja2 import Environment, StrictUndefined
+from jinja2 import Environment, StrictUndefined, Template
 
 from app.utils.filecache import load_yaml_cached
 from app.utils.concepts_loader import load_concept_item
@@ -125,6 +127,8 @@ _CURRENCY_PRECISION = (
     if isinstance(_CURRENCY_CFG, dict) and _CURRENCY_CFG.get("precision") is not None
     else 2
 )
+_CURRENCY_THOUSANDS = bool(_CURRENCY_CFG.get("thousands", True))
+_CURRENCY_PREFIX = f"{_CURRENCY_SYMBOL}{' ' if _CURRENCY_SPACE else ''}"
 
 _PERCENT_CFG = _FORMAT_POLICY.get("percent") if isinstance(_FORMAT_POLICY, dict) else {}
 _PERCENT_MULTIPLY_BY_100 = (
@@ -137,6 +141,8 @@ _PERCENT_PRECISION = (
     if isinstance(_PERCENT_CFG, dict) and _PERCENT_CFG.get("precision") is not None
     else 2
 )
+_PERCENT_THOUSANDS = bool(_PERCENT_CFG.get("thousands", False))
+_PERCENT_SUFFIX = "%" if not bool(_PERCENT_CFG.get("space", False)) else " %"
 
 _NUMBER_CFG = _FORMAT_POLICY.get("number") if isinstance(_FORMAT_POLICY, dict) else {}
 _NUMBER_PRECISION = (
@@ -248,6 +254,11 @@ _JINJA_ENV = Environment(
 )
 
 
+# troca simultânea "," -> milhar e "." -> decimal (equivale às três substituições via "_")
+_BR_SEPARATORS = str.maketrans({",": _THOUSANDS_SEPARATOR, ".": _DECIMAL_SEPARATOR})
+_QUANTS: Dict[int, Decimal] = {}
+
+
 def _to_decimal(value: Any) -> Optional[Decimal]:
     if value is None:
         return None
@@ -270,15 +281,15 @@ def _format_decimal_br(
     thousands: bool = True,
     trim_trailing_zeros: bool = False,
 ) -> str:
-    quant = Decimal(1).scaleb(-places)
+    quant = _QUANTS.get(places)
+    if quant is None:
+        quant = _QUANTS.setdefault(places, Decimal(1).scaleb(-places))
     quantized = value.quantize(quant, rounding=ROUND_HALF_UP) if places else value
     if thousands:
         formatted = f"{quantized:,.{places}f}"
     else:
         formatted = f"{quantized:.{places}f}"
-    formatted = formatted.replace(",", "_")
-    formatted = formatted.replace(".", _DECIMAL_SEPARATOR)
-    formatted = formatted.replace("_", _THOUSANDS_SEPARATOR)
+    formatted = formatted.translate(_BR_SEPARATORS)
     if trim_trailing_zeros and _DECIMAL_SEPARATOR in formatted:
         formatted = formatted.rstrip("0").rstrip(_DECIMAL_SEPARATOR)
     return formatted
@@ -299,10 +310,9 @@ def _format_percentage(value: Any) -> Any:
     formatted = _format_decimal_br(
         decimal_value,
         _PERCENT_PRECISION,
-        thousands=bool(_PERCENT_CFG.get("thousands", False)),
+        thousands=_PERCENT_THOUSANDS,
     )
-    suffix = "%" if not bool(_PERCENT_CFG.get("space", False)) else " %"
-    return f"{formatted}{suffix}"
+    return f"{formatted}{_PERCENT_SUFFIX}"
 
 
 def _format_percentage_no_mul(value: Any) -> Any:
@@ -317,10 +327,9 @@ def _format_percentage_no_mul(value: Any) -> Any:
     formatted = _format_decimal_br(
         decimal_value,
         _PERCENT_PRECISION,
-        thousands=bool(_PERCENT_CFG.get("thousands", False)),
+        thousands=_PERCENT_THOUSANDS,
     )
-    suffix = "%" if not bool(_PERCENT_CFG.get("space", False)) else " %"
-    return f"{formatted}{suffix}"
+    return f"{formatted}{_PERCENT_SUFFIX}"
 
 
 def _format_currency(value: Any) -> Any:
@@ -330,11 +339,10 @@ def _format_currency(value: Any) -> Any:
     formatted = _format_decimal_br(
         decimal_value.copy_abs(),
         _CURRENCY_PRECISION,
-        thousands=bool(_CURRENCY_CFG.get("thousands", True)),
+        thousands=_CURRENCY_THOUSANDS,
     )
-    space = " " if _CURRENCY_SPACE else ""
     sign = "-" if decimal_value < 0 else ""
-    return f"{sign}{_CURRENCY_SYMBOL}{space}{formatted}"
+    return f"{sign}{_CURRENCY_PREFIX}{formatted}"
 
 
 def _format_number(value: Any) -> Any:
@@ -607,6 +615,72 @@ def get_entity_presentation_kind(entity: str) -> Optional[str]:
     return None
 
 
+# (entity, kind) -> (caminho resolvido, mtime_ns, template compilado)
+_TEMPLATE_REGISTRY: Dict[Tuple[str, str], Tuple[Path, int, Template]] = {}
+_TEMPLATE_REGISTRY_LOCK = threading.Lock()
+
+
+def _get_entity_template(entity: str, kind: str) -> Optional[Template]:
+    """
+    Template ``responses/<kind>.md.j2`` da entidade, compilado uma vez.
+
+    Hit custa um ``stat``: se o mtime mudou (edição em dev), recompila.
+    Caminho fora de data/entities ou inexistente => None.
+    """
+    cache_key = (entity, kind)
+    entry = _TEMPLATE_REGISTRY.get(cache_key)
+    if entry is not None:
+        path, mtime_ns, template = entry
+        try:
+            if path.stat().st_mtime_ns == mtime_ns:
+                return template
+        except OSError:
+            pass
+
+    template_path = _ENTITY_ROOT / entity / "responses" / f"{kind}.md.j2"
+    try:
+        template_path_resolved = template_path.resolve(strict=False)
+    except Exception:
+        return None
+
+    if not str(template_path_resolved).startswith(str(_ENTITY_ROOT.resolve())):
+        return None
+
+    try:
+        mtime_ns = template_path_resolved.stat().st_mtime_ns
+        source = template_path_resolved.read_text(encoding="utf-8")
+        template = _JINJA_ENV.from_string(source)
+    except Exception:
+        with _TEMPLATE_REGISTRY_LOCK:
+            _TEMPLATE_REGISTRY.pop(cache_key, None)
+        return None
+
+    with _TEMPLATE_REGISTRY_LOCK:
+        _TEMPLATE_REGISTRY[cache_key] = (template_path_resolved, mtime_ns, template)
+    return template
+
+
+def precompile_entity_templates() -> Dict[str, str]:
+    """
+    Compila os templates de resposta de todas as entidades em data/entities
+    (chamado na subida da API). Retorna ``{entity: kind}`` dos compilados.
+    """
+    compiled: Dict[str, str] = {}
+    if not _ENTITY_ROOT.is_dir():
+        return compiled
+    for entity_dir in sorted(p for p in _ENTITY_ROOT.iterdir() if p.is_dir()):
+        entity = entity_dir.name
+        kind = get_entity_presentation_kind(entity)
+        if kind and _get_entity_template(entity, kind) is not None:
+            compiled[entity] = kind
+    return compiled
+
+
+def clear_template_registry() -> None:
+    with _TEMPLATE_REGISTRY_LOCK:
+        _TEMPLATE_REGISTRY.clear()
+
+
 def render_rows_template(
     entity: str,
     rows: List[Dict[str, Any]],
@@ -635,18 +709,9 @@ def render_rows_template(
         return ""
     kind = kind.strip()
 
-    template_path = _ENTITY_ROOT / entity / "responses" / f"{kind}.md.j2"
-
-    # 3) Caminho do template
-    try:
-        template_path_resolved = template_path.resolve(strict=False)
-    except Exception as exc:
-        return ""
-
-    if not str(template_path_resolved).startswith(str(_ENTITY_ROOT.resolve())):
-        return ""
-
-    if not template_path_resolved.exists():
+    # 3) Template compilado (registro por entidade/kind, revalidado por mtime)
+    template = _get_entity_template(entity, kind)
+    if template is None:
         return ""
 
     fields_cfg = presentation.get("fields") if isinstance(presentation, dict) else {}
@@ -685,9 +750,6 @@ def render_rows_template(
     }
 
     try:
-        template = _JINJA_ENV.from_string(
-            template_path_resolved.read_text(encoding="utf-8")
-        )
         rendered = template.render(**context)
     except Exception as exc:
         return ""
@@ -695,11 +757,28 @@ def render_rows_template(
     return (rendered or "").strip()
 
 
-def format_rows(rows: List[Dict[str, Any]], columns: List[str]) -> List[Dict[str, Any]]:
+# colunas pedidas (ordem preservada, sem repetição) -> [(coluna, formatter|None)]
+ColumnPlan = Tuple[Tuple[str, Optional[Callable[[Any], Any]]], ...]
+
+
+@lru_cache(maxsize=512)
+def _compile_column_plan(columns: Tuple[str, ...]) -> ColumnPlan:
     """
-    Formatação mínima: mantém apenas as colunas pedidas e preserva tipos simples.
-    (Datas/decimais podem ser normalizados aqui quando necessário.)
+    Resolve o formatter de cada coluna uma única vez por conjunto de colunas.
+
+    A detecção depende só do nome da coluna (placeholders + sufixos legados),
+    então o plano é reaproveitado por todas as consultas da entidade.
     """
+    seen: Dict[str, None] = {}
+    for col in columns:
+        seen.setdefault(col, None)
+    return tuple((col, _detect_formatter(col)) for col in seen)
+
+
+def _format_rows_debug(
+    rows: List[Dict[str, Any]], columns: List[str]
+) -> List[Dict[str, Any]]:
+    """Caminho célula a célula com logs de diagnóstico (FORMAT_DEBUG=1)."""
     out: List[Dict[str, Any]] = []
     for r in rows:
         item = {c: r.get(c) for c in columns}
@@ -711,10 +790,7 @@ def format_rows(rows: List[Dict[str, Any]], columns: List[str]) -> List[Dict[str
             if col_value is None:
                 continue
             formatter = _detect_formatter(col_name)
-            if _FORMAT_DEBUG_ENABLED and col_name in {
-                "benchmark_value",
-                "portfolio_amount",
-            }:
+            if col_name in {"benchmark_value", "portfolio_amount"}:
                 placeholder_filter = _FIELD_TO_FILTER.get(col_name.lower())
                 LOGGER.info(
                     "[format_debug] before format col=%s value=%r type=%s placeholder_filter=%s formatter_found=%s",
@@ -726,10 +802,7 @@ def format_rows(rows: List[Dict[str, Any]], columns: List[str]) -> List[Dict[str
                 )
             if formatter:
                 item[col_name] = formatter(col_value)
-                if _FORMAT_DEBUG_ENABLED and col_name in {
-                    "benchmark_value",
-                    "portfolio_amount",
-                }:
+                if col_name in {"benchmark_value", "portfolio_amount"}:
                     LOGGER.info(
                         "[format_debug] after format col=%s value=%r",
                         col_name,
@@ -737,3 +810,36 @@ def format_rows(rows: List[Dict[str, Any]], columns: List[str]) -> List[Dict[str
                     )
         out.append(item)
     return out
+
+
+def format_rows(rows: List[Dict[str, Any]], columns: List[str]) -> List[Dict[str, Any]]:
+    """
+    Formatação mínima: mantém apenas as colunas pedidas e preserva tipos simples.
+    (Datas/decimais podem ser normalizados aqui quando necessário.)
+
+    Usa o plano de colunas compilado (``_compile_column_plan``) e aplica cada
+    formatter coluna a coluna, sem redetectar por célula.
+    """
+    if _FORMAT_DEBUG_ENABLED:
+        return _format_rows_debug(rows, columns)
+
+    plan = _compile_column_plan(tuple(columns))
+    names = [col for col, _ in plan]
+    out: List[Dict[str, Any]] = [{c: r.get(c) for c in names} for r in rows]
+
+    if "value" in names:
+        # métricas compute-on-read: formatação por metric_key vem antes do formatter da coluna
+        for r, item in zip(rows, out):
+            meta = r.get("meta")
+            metric_key = meta.get("metric_key") if isinstance(meta, dict) else None
+            if metric_key:
+                item["value"] = format_metric_value(metric_key, item["value"])
+
+    for col, formatter in plan:
+        if formatter is None:
+            continue
+        for item in out:
+            value = item[col]
+            if value is not None:
+                item[col] = formatter(value)
+    return out
@@ -0,0 +1,169 @@
+# app/narrator/cache.py
+"""
+Cache do texto gerado pelo LLM do Narrator.
+
+Rankings e overviews populares produzem os mesmos fatos por horas; com a
+mesma entrada o LLM devolve (essencialmente) o mesmo texto. A chave é um
+fingerprint estável de:
+
+- entidade, intent, modelo e ``prompt_version()`` (app/narrator/prompts.py);
+- fatos compactados (``_compact_facts_payload`` sem truncar linhas/colunas),
+  baseline ``rendered_text``, valor canônico/métrica foco e, quando o prompt
+  usa RAG, o contexto enviado.
+
+A pergunta em si não entra: perguntas diferentes sobre os mesmos fatos
+reaproveitam a narração. Por isso o modo conceitual (texto depende da
+pergunta) nunca é cacheado.
+
+Guarda-se o texto bruto do LLM; os guards (rewrite-only,
+``_policy_violation_reason``) rodam de novo a cada hit. Só entra no cache
+texto que passou nos guards.
+
+TTL: ``llm_cache_ttl_seconds`` (data/policies/narrator.yaml, 0 desliga),
+limitado pelo ``ttl_seconds`` da entidade em data/policies/cache.yaml.
+Entidades privadas, sem política ou fora de ``read_through`` não são
+cacheadas.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Dict, Optional
+
+from app.cache.rt_cache import make_cache_tags, make_narration_cache_key
+from app.narrator.prompts import prompt_version
+from app.observability.metrics import emit_counter as counter
+
+LOGGER = logging.getLogger(__name__)
+
+
+def _metric(entity: str, outcome: str) -> None:
+    try:
+        counter("sirios_narrator_cache_total", entity=entity, outcome=outcome)
+    except Exception:
+        pass
+
+
+def narration_fingerprint(
+    *,
+    entity: str,
+    intent: str,
+    model: str,
+    facts: Dict[str, Any],
+    rag: Optional[Dict[str, Any]] = None,
+    rewrite_only: bool = False,
+) -> str:
+    # import tardio: narrator.py importa este módulo
+    from app.narrator.narrator import _compact_facts_payload
+
+    facts = facts if isinstance(facts, dict) else {}
+    basis = {
+        "entity": entity,
+        "intent": intent,
+        "model": model,
+        "prompt": prompt_version(),
+        "rewrite_only": bool(rewrite_only),
+        "facts": _compact_facts_payload(facts, None, max_rows=0, max_columns=0),
+        "rendered_text": facts.get("rendered_text"),
+        "canonical": facts.get("llm_canonical_value"),
+        "focus": facts.get("llm_focus_metric_key"),
+        "requested_metrics": facts.get("requested_metrics"),
+        "aggregates": facts.get("aggregates"),
+        "rag": rag,
+    }
+    raw = json.dumps(basis, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+class NarrationCache:
+    """Cache de narrações sobre o RedisCache/CachePolicies do processo."""
+
+    def __init__(self, cache: Any = None, policies: Any = None):
+        self._cache = cache
+        self._policies = policies
+
+    def _backends(self) -> tuple[Any, Any]:
+        if self._cache is None or self._policies is None:
+            from app.core.context import cache, policies
+
+            self._cache = self._cache or cache
+            self._policies = self._policies or policies
+        return self._cache, self._policies
+
+    def ttl_seconds(self, entity: str, narrator_policy: Dict[str, Any]) -> int:
+        try:
+            narr_ttl = int((narrator_policy or {}).get("llm_cache_ttl_seconds") or 0)
+        except (TypeError, ValueError):
+            narr_ttl = 0
+        if narr_ttl <= 0 or not entity:
+            return 0
+
+        _, policies = self._backends()
+        policy = policies.get(entity) if policies is not None else None
+        if not isinstance(policy, dict):
+            return 0
+        if str(policy.get("strategy") or "read_through").lower() != "read_through":
+            return 0
+        if policies.is_private_entity(entity):
+            return 0
+        try:
+            entity_ttl = int(policy.get("ttl_seconds") or 0)
+        except (TypeError, ValueError):
+            entity_ttl = 0
+        if entity_ttl <= 0:
+            return 0
+        return min(narr_ttl, entity_ttl)
+
+    def _scope(self, entity: str) -> str:
+        _, policies = self._backends()
+        policy = policies.get(entity) if policies is not None else None
+        return str((policy or {}).get("scope", "pub"))
+
+    def key(self, entity: str, fingerprint: str) -> str:
+        build_id = os.getenv("BUILD_ID", "dev")
+        return make_narration_cache_key(build_id, self._scope(entity), entity, fingerprint)
+
+    def get(self, key: str, *, entity: str) -> Optional[str]:
+        cache, _ = self._backends()
+        try:
+            value = cache.get_json(key)
+        except Exception:
+            LOGGER.warning("Falha ao ler cache de narração", exc_info=True)
+            _metric(entity, "error")
+            return None
+        text = value.get("text") if isinstance(value, dict) else None
+        if isinstance(text, str) and text.strip():
+            _metric(entity, "hit")
+            return text
+        _metric(entity, "miss")
+        return None
+
+    def put(
+        self,
+        key: str,
+        text: str,
+        ttl_seconds: int,
+        *,
+        entity: str,
+        model: str,
+        identifiers: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        if ttl_seconds <= 0 or not (text or "").strip():
+            return
+        cache, _ = self._backends()
+        try:
+            cache.set_json(
+                key,
+                {"text": text, "model": model, "prompt_version": prompt_version()},
+                ttl_seconds=ttl_seconds,
+                tags=make_cache_tags(
+                    os.getenv("BUILD_ID", "dev"), self._scope(entity), entity, identifiers
+                ),
+            )
+            _metric(entity, "store")
+        except Exception:
+            LOGGER.warning("Falha ao gravar cache de narração", exc_info=True)
+            _metric(entity, "error")
@@ -8,9 +8,10 @@ import threading
 import time
 from decimal import Decimal
 from pathlib import Path
-from typing import Any, Dict, Iterable, Optional
+from typing import Any, Callable, Dict, Iterable, Optional
 from contextlib import contextmanager
 
+from app.narrator.cache import NarrationCache, narration_fingerprint
 from app.narrator.canonical import extract_canonical_value
 from app.narrator.formatter import build_narrator_text
 from app.narrator.prompts import (
@@ -22,6 +23,7 @@ from app.observability.metrics import (
     emit_counter as counter,
     emit_histogram as histogram,
 )
+from app.observability.log_events import log_event
 from app.utils.filecache import load_yaml_cached
 import yaml
 
@@ -795,6 +797,8 @@ class Narrator:
         self.max_output_tokens = int(self.policy.get("max_output_tokens", 0) or 0)
 
         self.client = OllamaClient() if OllamaClient else None
+        # Cache do texto do LLM (llm_cache_ttl_seconds na policy; None desliga)
+        self.llm_cache: NarrationCache | None = NarrationCache()
 
     def _shadow_cfg(self) -> Dict[str, Any]:
         return self.shadow_policy if isinstance(self.shadow_policy, dict) else {}
@@ -981,9 +985,46 @@ class Narrator:
 
     # ---------------------------------------------------------------------
 
+    def _generate_streaming(
+        self,
+        prompt: str,
+        model: str,
+        on_token: Callable[[str], None],
+        entity_label: str,
+    ) -> str:
+        """
+        Gera via ``OllamaClient.generate_stream`` repassando cada fragmento a
+        ``on_token``; devolve o texto completo para os guards de sempre.
+        """
+        parts: list[str] = []
+        t0 = time.perf_counter()
+        for chunk in self.client.generate_stream(prompt, model=model):
+            if not parts:
+                histogram(
+                    "sirios_narrator_stream_first_token_seconds",
+                    time.perf_counter() - t0,
+                    entity=entity_label,
+                )
+            parts.append(chunk)
+            try:
+                on_token(chunk)
+            except Exception:
+                LOGGER.debug("Falha ao repassar token do Narrator", exc_info=True)
+        return "".join(parts)
+
     def render(
-        self, question: str, facts: Dict[str, Any], meta: Dict[str, Any]
+        self,
+        question: str,
+        facts: Dict[str, Any],
+        meta: Dict[str, Any],
+        on_token: Optional[Callable[[str], None]] = None,
     ) -> Dict[str, Any]:
+        """
+        ``on_token`` (opcional, /ask/stream): recebe os fragmentos do LLM à
+        medida que chegam. O texto final continua passando pelos guards
+        (rewrite-only, ``_policy_violation_reason``) e pode divergir do que
+        foi transmitido; em shadow nada é transmitido.
+        """
         t0_global = time.perf_counter()
         raw_meta = meta or {}
         raw_facts = facts or {}
@@ -1189,18 +1230,24 @@ class Narrator:
                 )
                 rag_ctx_for_prompt = shrunk if shrunk is not None else None
 
-        LOGGER.info(
-            "narrator_render entity=%s intent=%s rows_count=%s template_id=%s "
-            "enabled=%s shadow=%s model=%s rag_enabled=%s chunks=%s",
-            entity,
-            intent,
-            len(effective_facts.get("rows") or []),
-            template_id or "",
-            effective_enabled,
-            effective_shadow,
-            effective_model,
-            rag_enabled,
-            rag_chunks_count,
+        log_event(
+            LOGGER,
+            "narrator.render",
+            lambda: (
+                "narrator_render entity=%s intent=%s rows_count=%s template_id=%s "
+                "enabled=%s shadow=%s model=%s rag_enabled=%s chunks=%s"
+                % (
+                    entity,
+                    intent,
+                    len(effective_facts.get("rows") or []),
+                    template_id or "",
+                    effective_enabled,
+                    effective_shadow,
+                    effective_model,
+                    rag_enabled,
+                    rag_chunks_count,
+                )
+            ),
         )
 
         # 1) renderizador especializado
@@ -1438,8 +1485,41 @@ class Narrator:
 
         entity_label = str(entity or "")
         bucket_label = str(bucket or "")
+        model_to_use = effective_model or self.model or "sirios-narrator:latest"
+        if not isinstance(model_to_use, str) or not model_to_use.strip():
+            model_to_use = "sirios-narrator:latest"
+
+        # Cache de narração: mesmos fatos/prompt/modelo => mesmo texto do LLM
+        llm_cache_key: str | None = None
+        llm_cache_ttl = 0
+        cached_response: str | None = None
+        if self.llm_cache is not None and not concept_mode:
+            try:
+                llm_cache_ttl = self.llm_cache.ttl_seconds(entity, effective_policy)
+                if llm_cache_ttl > 0:
+                    llm_cache_key = self.llm_cache.key(
+                        entity,
+                        narration_fingerprint(
+                            entity=entity,
+                            intent=intent,
+                            model=model_to_use,
+                            facts=prompt_facts,
+                            rag=rag_ctx_sanitised if use_rag_in_prompt else None,
+                            rewrite_only=rewrite_only,
+                        ),
+                    )
+                    cached_response = self.llm_cache.get(llm_cache_key, entity=entity_label)
+            except Exception:
+                LOGGER.warning("Falha no cache de narração", exc_info=True)
+                llm_cache_key = None
+        narrator_meta["cache"] = {
+            "hit": cached_response is not None,
+            "key": llm_cache_key,
+            "ttl": llm_cache_ttl or None,
+        }
+
         with _narrator_llm_slot(timeout_s=0) as acquired:
-            if not acquired:
+            if not acquired and cached_response is None:
                 latency_s = time.perf_counter() - t0
                 counter(
                     "services_narrator_llm_requests_total",
@@ -1471,14 +1551,28 @@ class Narrator:
                     narrator_meta["policy_timeout_seconds"] = timeout_s
 
                 try:
-                    model_to_use = (
-                        effective_model or self.model or "sirios-narrator:latest"
-                    )
-                    if not isinstance(model_to_use, str) or not model_to_use.strip():
-                        model_to_use = "sirios-narrator:latest"
-                    response = self.client.generate(
-                        prompt, model=model_to_use, stream=False
-                    )
+                    if cached_response is not None:
+                        response = cached_response
+                        if on_token is not None and not effective_shadow:
+                            try:
+                                on_token(cached_response)
+                            except Exception:
+                                LOGGER.debug(
+                                    "Falha ao repassar narração em cache", exc_info=True
+                                )
+                    elif (
+                        on_token is not None
+                        and not effective_shadow
+                        and hasattr(self.client, "generate_stream")
+                    ):
+                        narrator_meta["streamed"] = True
+                        response = self._generate_streaming(
+                            prompt, model_to_use, on_token, entity_label
+                        )
+                    else:
+                        response = self.client.generate(
+                            prompt, model=model_to_use, stream=False
+                        )
                 finally:
                     if applied:
                         # restaura timeout anterior para não contaminar outros call sites
@@ -1578,6 +1672,27 @@ class Narrator:
                     baseline_text, text, policy_guards
                 )
 
+                if (
+                    llm_cache_key
+                    and cached_response is None
+                    and candidate
+                    and policy_violation is None
+                    and (llm_intro_used or not rewrite_only)
+                ):
+                    facts_identifiers = effective_facts.get("identifiers")
+                    self.llm_cache.put(
+                        llm_cache_key,
+                        (response or "").strip(),
+                        llm_cache_ttl,
+                        entity=entity_label,
+                        model=model_to_use,
+                        identifiers=(
+                            facts_identifiers
+                            if isinstance(facts_identifiers, dict)
+                            else {"ticker": effective_facts.get("ticker")}
+                        ),
+                    )
+
             except Exception as exc:  # pragma: no cover - caminho excepcional
                 error_label = "llm_error"
                 if isinstance(exc, TimeoutError) or "timeout" in str(exc).lower():
@@ -1596,16 +1711,22 @@ class Narrator:
         narrator_meta["llm_intro_used"] = llm_intro_used
         narrator_meta["llm_intro_tokens"] = llm_intro_tokens
 
-        LOGGER.info(
-            "NARRATOR_FINAL_TEXT entity=%s intent=%s model=%s "
-            "used_llm=%s latency_ms=%.2f error=%s text_preview=%s",
-            entity,
-            intent,
-            effective_model,
-            llm_intro_used,
-            elapsed_ms,
-            error,
-            (text[:120] + "..." if isinstance(text, str) and len(text) > 120 else text),
+        log_event(
+            LOGGER,
+            "narrator.final_text",
+            lambda: (
+                "NARRATOR_FINAL_TEXT entity=%s intent=%s model=%s "
+                "used_llm=%s latency_ms=%.2f error=%s text_preview=%s"
+                % (
+                    entity,
+                    intent,
+                    effective_model,
+                    llm_intro_used,
+                    elapsed_ms,
+                    error,
+                    (text[:120] + "..." if isinstance(text, str) and len(text) > 120 else text),
+                )
+            ),
         )
 
         if policy_violation:
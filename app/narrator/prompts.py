@@ -1,8 +1,10 @@
 # app/narrator/prompts.py
 from __future__ import annotations
 
+import hashlib
 import json
 import re
+from functools import lru_cache
 from typing import Any, Dict, List
 from textwrap import dedent
 
@@ -145,6 +147,25 @@ costuma ser avaliado em conjunto com outras métricas e em diferentes períodos.
 }
 
 
+# Revisão do contrato de prompt (build_prompt/build_global_prompt). Incremente ao
+# mudar a montagem do prompt em código; mudanças em SYSTEM_PROMPT/PROMPT_TEMPLATES
+# já entram no digest de prompt_version().
+PROMPT_REVISION = 1
+
+
+@lru_cache(maxsize=1)
+def prompt_version() -> str:
+    """Versão do prompt usada na chave do cache de narração."""
+    digest = hashlib.sha256(
+        json.dumps(
+            {"system": SYSTEM_PROMPT, "templates": PROMPT_TEMPLATES},
+            ensure_ascii=False,
+            sort_keys=True,
+        ).encode("utf-8")
+    ).hexdigest()
+    return f"r{PROMPT_REVISION}-{digest[:12]}"
+
+
 def _truncate_snippet(text: str, max_chars: int = RAG_SNIPPET_MAX_CHARS) -> str:
     """Shortens long snippets to keep the prompt focused."""
     if not isinstance(text, str):
@@ -0,0 +1,123 @@
+# app/observability/log_events.py
+"""
+Eventos de log estruturados com caminho rápido (planner, orchestrator, narrator).
+
+``log_event(logger, "planner.normalize_tokenize", lambda: {...})`` só monta o
+payload quando o evento é de fato emitido:
+
+1. ``logger.isEnabledFor(level)`` — com INFO desligado nada é alocado;
+2. amostragem por evento (``logging.events`` em data/ops/observability.yaml);
+3. só então ``build()`` é chamado e o resultado vai para ``logger.log``.
+
+``build`` normalmente devolve um dict (planner); o narrator devolve a linha
+``chave=valor`` já formatada, preservando o formato histórico do log.
+
+Falhas ao montar o payload nunca propagam (mesma semântica dos antigos
+``try: _LOG.info({...}) except Exception: pass``).
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import random
+import threading
+from typing import Any, Callable, Dict, Mapping, Optional
+
+LOGGER = logging.getLogger(__name__)
+
+_DEFAULT_CONFIG_PATH = "data/ops/observability.yaml"
+
+_lock = threading.Lock()
+_sampling: Optional["EventSampling"] = None
+
+
+class EventSampling:
+    """Taxas de amostragem por evento (0.0–1.0); ``default`` para os demais."""
+
+    __slots__ = ("default", "rates")
+
+    def __init__(self, default: float = 1.0, rates: Optional[Mapping[str, float]] = None):
+        self.default = _clamp(default)
+        self.rates: Dict[str, float] = {
+            str(k): _clamp(v) for k, v in (rates or {}).items()
+        }
+
+    def rate(self, event: str) -> float:
+        rate = self.rates.get(event)
+        if rate is not None:
+            return rate
+        # "planner.*" vale para todos os eventos do componente
+        component = event.split(".", 1)[0]
+        rate = self.rates.get(f"{component}.*")
+        return self.default if rate is None else rate
+
+
+def _clamp(value: Any) -> float:
+    try:
+        rate = float(value)
+    except (TypeError, ValueError):
+        return 1.0
+    return min(1.0, max(0.0, rate))
+
+
+def load_event_sampling(path: Optional[str] = None) -> EventSampling:
+    """Lê ``logging.events`` da configuração de observabilidade (tolerante a falhas)."""
+    config_path = path or os.environ.get("OBSERVABILITY_CONFIG") or _DEFAULT_CONFIG_PATH
+    try:
+        # import tardio: app.utils.filecache importa app.rag (ciclo com o planner)
+        from app.utils.filecache import load_yaml_cached
+
+        cfg = load_yaml_cached(config_path) or {}
+        events_cfg = (cfg.get("logging") or {}).get("events") or {}
+        return EventSampling(
+            default=events_cfg.get("default_sample_rate", 1.0),
+            rates=events_cfg.get("sample_rates") or {},
+        )
+    except Exception:
+        LOGGER.warning(
+            "Falha ao carregar amostragem de eventos de log; usando 1.0", exc_info=True
+        )
+        return EventSampling()
+
+
+def get_event_sampling() -> EventSampling:
+    global _sampling
+    sampling = _sampling
+    if sampling is None:
+        with _lock:
+            if _sampling is None:
+                _sampling = load_event_sampling()
+            sampling = _sampling
+    return sampling
+
+
+def set_event_sampling(sampling: Optional[EventSampling]) -> None:
+    """Substitui (ou, com None, força recarga) da amostragem — usado em testes/reload."""
+    global _sampling
+    with _lock:
+        _sampling = sampling
+
+
+def log_event(
+    logger: logging.Logger,
+    event: str,
+    build: Callable[[], Any],
+    *,
+    level: int = logging.INFO,
+) -> bool:
+    """
+    Emite ``build()`` em ``logger`` se o nível estiver habilitado e o evento for
+    amostrado. Retorna True quando o evento foi emitido.
+    """
+    if not logger.isEnabledFor(level):
+        return False
+    rate = get_event_sampling().rate(event)
+    if rate <= 0.0 or (rate < 1.0 and random.random() >= rate):
+        return False
+    try:
+        payload = build()
+    except Exception:
+        return False
+    logger.log(level, payload)
+    return True
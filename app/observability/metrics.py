@@ -49,6 +49,15 @@ NARRATOR_METRICS_SCHEMA: Dict[str, Dict[str, Any]] = {
         "type": "histogram",
         "labels": {"bucket", "entity"},
     },
+    "sirios_narrator_cache_total": {
+        "type": "counter",
+        "labels": {"entity", "outcome"},
+    },  # outcome=hit|miss|store|error
+    # /ask/stream: prompt enviado -> primeiro fragmento do LLM
+    "sirios_narrator_stream_first_token_seconds": {
+        "type": "histogram",
+        "labels": {"entity"},
+    },
 }
 
 # Catálogo canônico: nome -> {type, labels}
@@ -108,12 +117,53 @@ _METRICS_SCHEMA: Dict[str, Dict[str, Any]] = {
     "cache_misses_total": {"type": "counter", "labels": {"entity"}},
     "metrics_cache_hits_total": {"type": "counter", "labels": {"entity"}},
     "metrics_cache_misses_total": {"type": "counter", "labels": {"entity"}},
+    "sirios_rag_embed_cache_total": {
+        "type": "counter",
+        "labels": {"tier", "outcome"},
+    },  # tier=l1|redis, outcome=hit|miss|error
+    "sirios_cache_l1_total": {
+        "type": "counter",
+        "labels": {"outcome"},
+    },  # outcome=hit|miss|store|evict|invalidate
+    "sirios_cache_stale_served_total": {
+        "type": "counter",
+        "labels": {"layer", "entity"},
+    },  # layer=read_through|plan_cache|metrics_cache|response
+    "sirios_cache_refresh_seconds": {
+        "type": "histogram",
+        "labels": {"layer", "outcome"},
+    },  # outcome=ok|skipped|error
+    "sirios_cache_warm_total": {
+        "type": "counter",
+        "labels": {"entity", "outcome"},
+    },  # outcome=ok|skipped|mismatch|error
+    "sirios_cache_payload_bytes": {
+        "type": "histogram",
+        "labels": {"entity", "form"},
+    },  # form=serialized|stored (após compressão)
+    "sirios_cache_tag_invalidations_total": {"type": "counter", "labels": {"kind"}},
+    "sirios_cache_tag_invalidated_keys_total": {"type": "counter", "labels": {"kind"}},
+    # Ollama (app/rag/ollama_client.py): endpoint=embed|embeddings|generate
+    "sirios_ollama_request_seconds": {
+        "type": "histogram",
+        "labels": {"endpoint", "outcome"},
+    },  # outcome=ok|error
+    "sirios_ollama_retries_total": {"type": "counter", "labels": {"endpoint"}},
+    # Executor (pool de conexões Postgres)
+    "sirios_sql_pool_wait_seconds": {"type": "histogram", "labels": set()},
+    "sirios_sql_pool_timeouts_total": {"type": "counter", "labels": set()},
+    "sirios_sql_pool_connections": {"type": "gauge", "labels": {"state"}},
+    "sirios_sql_pool_saturation": {"type": "gauge", "labels": set()},
     # Ask quota
     "ask_requests_total": {"type": "counter", "labels": {"user_type"}},
     "ask_blocked_total": {"type": "counter", "labels": {"reason", "user_type"}},
     "ask_quota_remaining": {"type": "gauge", "labels": {"user_type"}},
     # Explain persistence
     "sirios_explain_events_failed_total": {"type": "counter", "labels": set()},
+    "sirios_analytics_events_dropped_total": {
+        "type": "counter",
+        "labels": {"reason"},
+    },  # reason=overflow|write_error (app/analytics/event_sink.py)
     # Narrator
     **NARRATOR_METRICS_SCHEMA,
 }
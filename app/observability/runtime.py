@@ -218,8 +218,23 @@ _METRIC_SCHEMAS = {
     "sirios_sql_query_duration_seconds": ("histogram", ("entity", "db_name")),
     "sirios_sql_rows_returned_total": ("counter", ("entity",)),
     "sirios_sql_errors_total": ("counter", ("entity", "error_code")),
+    "sirios_sql_pool_wait_seconds": ("histogram", ()),
+    "sirios_sql_pool_timeouts_total": ("counter", ()),
+    "sirios_sql_pool_connections": ("gauge", ("state",)),
+    "sirios_sql_pool_saturation": ("gauge", ()),
+    "sirios_analytics_events_dropped_total": ("counter", ("reason",)),
     "sirios_rag_search_total": ("counter", ("outcome",)),
+    "sirios_rag_embed_cache_total": ("counter", ("tier", "outcome")),
+    "sirios_cache_l1_total": ("counter", ("outcome",)),
+    "sirios_cache_stale_served_total": ("counter", ("layer", "entity")),
+    "sirios_cache_refresh_seconds": ("histogram", ("layer", "outcome")),
+    "sirios_cache_warm_total": ("counter", ("entity", "outcome")),
+    "sirios_cache_payload_bytes": ("histogram", ("entity", "form")),
+    "sirios_cache_tag_invalidations_total": ("counter", ("kind",)),
+    "sirios_cache_tag_invalidated_keys_total": ("counter", ("kind",)),
     "sirios_rag_topscore": ("histogram", ()),
+    "sirios_ollama_request_seconds": ("histogram", ("endpoint", "outcome")),
+    "sirios_ollama_retries_total": ("counter", ("endpoint",)),
     # ---------- M7.3 (RAG Context Explain) ----------
     "planner_rag_hits_total": ("counter", ("intent", "entity")),
     "planner_rag_context_used_total": ("counter", ("intent", "entity")),
@@ -445,6 +460,23 @@ def init_cache_metrics(cfg: dict, registry=None):
     if ccf.get("cache_latency_seconds", {}).get("enabled", True):
         buckets = ccf["cache_latency_seconds"]["buckets"]
         _get_histogram("sirios_cache_latency_seconds", ("op",), buckets=buckets)
+    if ccf.get("rag_embed_cache_total", {}).get("enabled", True):
+        _get_counter("sirios_rag_embed_cache_total", ("tier", "outcome"))
+    if ccf.get("cache_l1_total", {}).get("enabled", True):
+        _get_counter("sirios_cache_l1_total", ("outcome",))
+    if ccf.get("cache_stale_served_total", {}).get("enabled", True):
+        _get_counter("sirios_cache_stale_served_total", ("layer", "entity"))
+    if ccf.get("cache_refresh_seconds", {}).get("enabled", True):
+        buckets = ccf.get("cache_refresh_seconds", {}).get("buckets")
+        _get_histogram("sirios_cache_refresh_seconds", ("layer", "outcome"), buckets=buckets)
+    if ccf.get("cache_warm_total", {}).get("enabled", True):
+        _get_counter("sirios_cache_warm_total", ("entity", "outcome"))
+    if ccf.get("cache_payload_bytes", {}).get("enabled", True):
+        buckets = ccf.get("cache_payload_bytes", {}).get("buckets")
+        _get_histogram("sirios_cache_payload_bytes", ("entity", "form"), buckets=buckets)
+    if ccf.get("cache_tag_invalidations_total", {}).get("enabled", True):
+        _get_counter("sirios_cache_tag_invalidations_total", ("kind",))
+        _get_counter("sirios_cache_tag_invalidated_keys_total", ("kind",))
     return {"ops": True, "latency": True}
 
 
@@ -573,6 +605,28 @@ def init_sql_metrics(cfg: dict, registry=None):
         _get_counter("sirios_sql_rows_returned_total", ("entity",))
     if ecfg.get("sql_errors_total", {}).get("enabled", True):
         _get_counter("sirios_sql_errors_total", ("entity", "error_code"))
+    if ecfg.get("sql_pool_wait_seconds", {}).get("enabled", True):
+        buckets = ecfg.get("sql_pool_wait_seconds", {}).get("buckets")
+        _get_histogram("sirios_sql_pool_wait_seconds", (), buckets=buckets)
+    if ecfg.get("sql_pool_timeouts_total", {}).get("enabled", True):
+        _get_counter("sirios_sql_pool_timeouts_total", ())
+    if ecfg.get("sql_pool_connections", {}).get("enabled", True):
+        _get_gauge("sirios_sql_pool_connections", ("state",))
+        _get_gauge("sirios_sql_pool_saturation", ())
+    if ecfg.get("analytics_events_dropped_total", {}).get("enabled", True):
+        _get_counter("sirios_analytics_events_dropped_total", ("reason",))
+    return {"ok": True}
+
+
+def init_rag_metrics(cfg: dict, registry=None):
+    rcfg = (cfg.get("services", {}).get("rag", {}) or {}).get("metrics", {}) or {}
+    if rcfg.get("ollama_request_seconds", {}).get("enabled", True):
+        buckets = rcfg.get("ollama_request_seconds", {}).get("buckets")
+        _get_histogram(
+            "sirios_ollama_request_seconds", ("endpoint", "outcome"), buckets=buckets
+        )
+    if rcfg.get("ollama_retries_total", {}).get("enabled", True):
+        _get_counter("sirios_ollama_retries_total", ("endpoint",))
     return {"ok": True}
 
 
@@ -13,11 +13,14 @@ from app.cache.rt_cache import (
     build_plan_hash,
     is_cacheable_payload,
     make_cache_key,
+    make_cache_tags,
     make_plan_cache_key,
 )
+from app.cache.single_flight import LOCAL_FLIGHTS
+from app.cache.swr import record_stale_serve, schedule_refresh, stale_ttl_seconds
 from app.planner import planner as planner_module
 from app.planner.planner import Planner
-from app.planner.ticker_index import extract_tickers_from_text
+from app.planner.ticker_index import extract_tickers_from_text, ticker_scan_scope
 from app.builder.sql_builder import build_select_for_entity
 from app.executor.pg import PgExecutor
 from app.formatter.rows import format_rows
@@ -34,11 +37,14 @@ from app.analytics.explain import explain as _explain_analytics
 from app.planner.param_inference import infer_params  # novo: inferência compute-on-read
 from app.utils.filecache import load_yaml_cached
 from app.rag.context_builder import build_context as build_rag_context
+from app.rag.context_builder import build_context_async as build_rag_context_async
+from app.common.effects import Effect, Steps, effect, run_async, run_sync
 
 LOGGER = logging.getLogger(__name__)
 
 if TYPE_CHECKING:
-    from app.cache.rt_cache import CachePolicies, RedisCache
+    from app.cache.rt_cache import AsyncRedisCache, CachePolicies, RedisCache
+    from app.executor.pg import AsyncPgExecutor
 
 _PUNCT_RE = re.compile(r"[^\w\s]", flags=re.UNICODE)
 _ENTITY_ROOT = Path("data/entities")
@@ -204,6 +210,8 @@ class Orchestrator:
         self._exec = executor
         self._cache: Optional["RedisCache"] = None
         self._cache_policies: Optional["CachePolicies"] = None
+        self._async_cache: Optional["AsyncRedisCache"] = None
+        self._async_exec: Optional["AsyncPgExecutor"] = None
         self.set_cache_backend(cache, cache_policies)
 
     def set_cache_backend(
@@ -214,6 +222,25 @@ class Orchestrator:
         self._cache = cache
         self._cache_policies = policies
 
+    def set_async_backends(
+        self,
+        cache: Optional["AsyncRedisCache"] = None,
+        executor: Optional["AsyncPgExecutor"] = None,
+    ) -> None:
+        """Clientes asyncio usados por route_question_async (ausentes => threadpool)."""
+        self._async_cache = cache
+        self._async_exec = executor
+
+    def _cache_call(self, method: str, *args: Any, **kwargs: Any) -> Effect:
+        afn = (
+            getattr(self._async_cache, method) if self._async_cache is not None else None
+        )
+        return effect(getattr(self._cache, method), *args, afn=afn, **kwargs)
+
+    def _sql_call(self, sql: str, params: Dict[str, Any]) -> Effect:
+        afn = self._async_exec.query if self._async_exec is not None else None
+        return effect(self._exec.query, sql, params, afn=afn)
+
     def extract_identifiers(self, question: str) -> Dict[str, Any]:
         tickers = _extract_ticker_identifiers(question)
         # Contrato canônico:
@@ -327,13 +354,16 @@ class Orchestrator:
             "window_norm": window_norm,
             **window_info,
         }
-        key = make_cache_key(
-            os.getenv("BUILD_ID", "dev"),
-            scope,
-            entity,
-            cache_identifiers,
-        )
-        return {"key": key, "ttl": ttl, "entity": entity, "context": context}
+        build_id = os.getenv("BUILD_ID", "dev")
+        key = make_cache_key(build_id, scope, entity, cache_identifiers)
+        return {
+            "key": key,
+            "ttl": ttl,
+            "stale_ttl": stale_ttl_seconds(policy),
+            "tags": make_cache_tags(build_id, scope, entity, {"ticker": ticker}),
+            "entity": entity,
+            "context": context,
+        }
 
     def prepare_plan(
         self,
@@ -528,22 +558,89 @@ class Orchestrator:
         return False
 
     def route_question(
+        self, question: str, explain: bool = False, **kwargs: Any
+    ) -> Dict[str, Any]:
+        """Caminho síncrono (scripts/testes/handler sync); mesma lógica do async."""
+        with ticker_scan_scope():
+            return run_sync(self.route_question_steps(question, explain, **kwargs))
+
+    async def route_question_async(
+        self, question: str, explain: bool = False, **kwargs: Any
+    ) -> Dict[str, Any]:
+        """Caminho asyncio: Redis/Postgres/Ollama nativos quando configurados."""
+        with ticker_scan_scope():
+            return await run_async(self.route_question_steps(question, explain, **kwargs))
+
+    def schedule_cache_refresh(
+        self,
+        question: str,
+        *,
+        key: str,
+        entity: Optional[str],
+        layer: str,
+        **route_kwargs: Any,
+    ) -> bool:
+        """
+        Stale-while-revalidate: conta o serve stale e agenda UMA revalidação
+        em segundo plano (``route_question(cache_refresh=True)``), que regrava
+        plan-cache e cache de métricas.
+        """
+        record_stale_serve(layer, entity)
+        if self._cache is None:
+            return False
+
+        def _refresh() -> None:
+            self.route_question(question, cache_refresh=True, **route_kwargs)
+
+        return schedule_refresh(self._cache, key, _refresh, layer=layer)
+
+    def route_question_steps(
+        self, question: str, explain: bool = False, **kwargs: Any
+    ) -> Steps[Dict[str, Any]]:
+        """
+        Pipeline de roteamento como gerador de efeitos (ver app.common.effects).
+
+        Todo I/O (cache, SQL, RAG) passa por ``yield``; a lógica é única para os
+        drivers sync e async. Quando esta requisição é a líder local do
+        single-flight do plan-cache, libera as duplicadas ao terminar (inclusive
+        em erro).
+        """
+        flight: Dict[str, Any] = {}
+        payload: Optional[Dict[str, Any]] = None
+        try:
+            payload = yield from self._route_question_steps(
+                question, explain, flight=flight, **kwargs
+            )
+            return payload
+        finally:
+            flight_key = flight.get("key")
+            if flight_key:
+                LOCAL_FLIGHTS.finish(
+                    flight_key, payload if flight.get("shareable") else None
+                )
+
+    def _route_question_steps(
         self,
         question: str,
         explain: bool = False,
         *,
+        flight: Dict[str, Any],
         client_id: Optional[str] = None,
         conversation_id: Optional[str] = None,
         plan: Optional[Dict[str, Any]] = None,
         resolved_identifiers: Optional[Dict[str, Any]] = None,
         agg_params_override: Optional[Dict[str, Any]] = None,
         prepared_plan: Optional[Dict[str, Any]] = None,
-    ) -> Dict[str, Any]:
+        cache_refresh: bool = False,
+    ) -> Steps[Dict[str, Any]]:
+        # cache_refresh: revalidação SWR em segundo plano — ignora leituras de
+        # cache/single-flight e sempre regrava os caches
         t0 = time.perf_counter()
-        prepared = (
-            prepared_plan
-            if isinstance(prepared_plan, dict)
-            else self.prepare_plan(
+        if isinstance(prepared_plan, dict):
+            prepared = prepared_plan
+        else:
+            prepared = yield effect(
+                self.prepare_plan,
                 question,
                 client_id=client_id,
                 conversation_id=conversation_id,
@@ -551,11 +648,14 @@ class Orchestrator:
                 resolved_identifiers=resolved_identifiers,
                 agg_params_override=agg_params_override,
             )
-        )
 
-        plan_resolved = prepared.get("planner_plan") or (
-            plan if isinstance(plan, dict) else self._planner.explain(question)
-        )
+        plan_resolved = prepared.get("planner_plan")
+        if not plan_resolved:
+            plan_resolved = (
+                plan
+                if isinstance(plan, dict)
+                else (yield effect(self._planner.explain, question))
+            )
         chosen = plan_resolved.get("chosen") or {}
         intent = chosen.get("intent")
         entity = chosen.get("entity")
@@ -732,6 +832,7 @@ class Orchestrator:
         plan_cache_hit = False
         plan_cache_written = False
         plan_cache_ttl: Optional[int] = None
+        plan_cache_stale_ttl = 0
         plan_cache_enabled = False
         plan_lock_key: Optional[str] = None
         plan_lock_acquired: bool = False
@@ -747,6 +848,15 @@ class Orchestrator:
                 namespace = f"client:{client_id}"
             else:
                 namespace = None
+        # argumentos da revalidação SWR (mesma rota, sem ler cache)
+        refresh_kwargs = {
+            "client_id": client_id,
+            "conversation_id": conversation_id,
+            "plan": plan_resolved,
+            "resolved_identifiers": resolved_identifiers,
+            "agg_params_override": agg_params_override,
+            "prepared_plan": prepared,
+        }
 
         if (
             self._cache is not None
@@ -760,8 +870,19 @@ class Orchestrator:
             except (TypeError, ValueError):
                 plan_cache_ttl = 0
 
+            plan_cache_stale_ttl = stale_ttl_seconds(plan_cache_policy)
+
             if plan_cache_ttl and plan_cache_ttl > 0:
-                if not is_private_entity or namespace:
+                if cache_refresh and (not is_private_entity or namespace):
+                    plan_cache_enabled = True
+                    plan_cache_key = make_plan_cache_key(
+                        os.getenv("BUILD_ID", "dev"),
+                        scope,
+                        entity,
+                        plan_hash,
+                        namespace=namespace,
+                    )
+                elif not is_private_entity or namespace:
                     plan_cache_enabled = True
                     build_id = os.getenv("BUILD_ID", "dev")
                     plan_cache_key = make_plan_cache_key(
@@ -771,14 +892,59 @@ class Orchestrator:
                         plan_hash,
                         namespace=namespace,
                     )
+                    max_wait_ms = _env_int("CACHE_SINGLEFLIGHT_MAX_WAIT_MS", 2000)
+                    # single-flight local: duplicadas em voo esperam a líder do
+                    # processo sem tocar no Redis
+                    flight_leader, flight_future = LOCAL_FLIGHTS.begin(plan_cache_key)
+                    if flight_leader:
+                        flight["key"] = plan_cache_key
+                    else:
+                        shared_payload = yield effect(
+                            LOCAL_FLIGHTS.wait,
+                            flight_future,
+                            max_wait_ms,
+                            afn=LOCAL_FLIGHTS.await_,
+                        )
+                        if isinstance(shared_payload, dict):
+                            meta_payload = shared_payload.get("meta") or {}
+                            compute_meta = meta_payload.get("compute") or {}
+                            compute_meta.update(
+                                {
+                                    "plan_cache_hit": True,
+                                    "plan_cache_written": False,
+                                    "plan_cache_key": plan_cache_key,
+                                    "plan_cache_coalesced": True,
+                                }
+                            )
+                            meta_payload["compute"] = compute_meta
+                            shared_payload["meta"] = meta_payload
+                            return shared_payload
+
+                    plan_cache_stale = False
                     try:
-                        cached_plan_payload = self._cache.get_json(plan_cache_key)
+                        if plan_cache_stale_ttl:
+                            cached_plan_payload, plan_cache_stale = yield self._cache_call(
+                                "get_json_swr", plan_cache_key, plan_cache_stale_ttl
+                            )
+                        else:
+                            cached_plan_payload = yield self._cache_call(
+                                "get_json", plan_cache_key
+                            )
                     except Exception:
                         LOGGER.warning("Falha ao consultar cache de plano", exc_info=True)
                         cached_plan_payload = None
 
                     if isinstance(cached_plan_payload, dict):
+                        flight["shareable"] = True
                         plan_cache_hit = True
+                        if plan_cache_stale:
+                            self.schedule_cache_refresh(
+                                question,
+                                key=plan_cache_key,
+                                entity=entity,
+                                layer="plan_cache",
+                                **refresh_kwargs,
+                            )
                         meta_payload = cached_plan_payload.get("meta") or {}
                         compute_meta = meta_payload.get("compute") or {}
                         compute_meta.update(
@@ -786,6 +952,7 @@ class Orchestrator:
                                 "plan_cache_hit": True,
                                 "plan_cache_written": False,
                                 "plan_cache_key": plan_cache_key,
+                                "plan_cache_stale": plan_cache_stale,
                             }
                         )
                         meta_payload["compute"] = compute_meta
@@ -794,17 +961,22 @@ class Orchestrator:
 
                     lock_key = f"{plan_cache_key}:lock"
                     lock_ttl_ms = _env_int("CACHE_SINGLEFLIGHT_LOCK_TTL_MS", 15000)
-                    lock_acquired = self._cache.acquire_lock(lock_key, lock_ttl_ms)
+                    lock_acquired = yield self._cache_call(
+                        "acquire_lock", lock_key, lock_ttl_ms
+                    )
                     if lock_acquired:
                         plan_lock_key = lock_key
                         plan_lock_acquired = True
                     if not lock_acquired:
-                        waited_payload = self._cache.wait_for_key(
+                        # acorda no publish da líder (pub/sub); polling só sem assinatura
+                        waited_payload = yield self._cache_call(
+                            "wait_for_key",
                             plan_cache_key,
-                            _env_int("CACHE_SINGLEFLIGHT_MAX_WAIT_MS", 2000),
+                            max_wait_ms,
                             _env_int("CACHE_SINGLEFLIGHT_STEP_MS", 100),
                         )
                         if isinstance(waited_payload, dict):
+                            flight["shareable"] = True
                             meta_payload = waited_payload.get("meta") or {}
                             compute_meta = meta_payload.get("compute") or {}
                             compute_meta.update(
@@ -829,11 +1001,20 @@ class Orchestrator:
         cached_rows_formatted = None
         cached_result_key = None
         cache_lookup_error = False
+        metrics_cache_stale_ttl = 0
         if cache_ctx and not skip_sql:
             metrics_cache_key = cache_ctx.get("key")
             metrics_cache_ttl = cache_ctx.get("ttl")
+            metrics_cache_stale_ttl = int(cache_ctx.get("stale_ttl") or 0)
+        if cache_ctx and not skip_sql and not cache_refresh:
+            metrics_cache_stale = False
             try:
-                cached_payload = self._cache.get_json(metrics_cache_key)
+                if metrics_cache_stale_ttl:
+                    cached_payload, metrics_cache_stale = yield self._cache_call(
+                        "get_json_swr", metrics_cache_key, metrics_cache_stale_ttl
+                    )
+                else:
+                    cached_payload = yield self._cache_call("get_json", metrics_cache_key)
             except Exception:
                 LOGGER.warning("Falha ao consultar cache de métricas", exc_info=True)
                 cache_lookup_error = True
@@ -845,6 +1026,14 @@ class Orchestrator:
                     cached_rows_formatted, list
                 ):
                     metrics_cache_hit = True
+                    if metrics_cache_stale:
+                        self.schedule_cache_refresh(
+                            question,
+                            key=metrics_cache_key,
+                            entity=entity,
+                            layer="metrics_cache",
+                            **refresh_kwargs,
+                        )
                 else:
                     cached_rows_formatted = None
                     cached_result_key = None
@@ -922,7 +1111,7 @@ class Orchestrator:
                         if isinstance(params, dict):
                             params = {**params, "entity": entity}
 
-                        rows_raw.extend(self._exec.query(sql, params))
+                        rows_raw.extend((yield self._sql_call(sql, params)))
                         result_key = result_key or rk
                         return_columns = return_columns or columns
                     set_trace_attribute(span, "cache.hit", False)
@@ -939,7 +1128,7 @@ class Orchestrator:
                             "entity": entity,
                         }  # etiqueta para métricas SQL
 
-                    rows_raw = self._exec.query(sql, params)
+                    rows_raw = yield self._sql_call(sql, params)
                     set_trace_attribute(span, "cache.hit", False)
                     set_trace_attribute(span, "sql.skipped", False)
 
@@ -967,10 +1156,13 @@ class Orchestrator:
                     and result_key
                 ):
                     try:
-                        self._cache.set_json(
+                        yield self._cache_call(
+                            "set_json",
                             metrics_cache_key,
                             {"result_key": result_key, "rows": rows_formatted},
                             ttl_seconds=metrics_cache_ttl,
+                            stale_ttl_seconds=metrics_cache_stale_ttl,
+                            tags=cache_ctx.get("tags"),
                         )
                     except Exception:
                         LOGGER.warning(
@@ -1055,10 +1247,12 @@ class Orchestrator:
         # orchestrator. O build_rag_context aplica as políticas
         # (rag.yaml) e só aciona embeddings quando habilitado.
         try:
-            meta["rag"] = build_rag_context(
+            meta["rag"] = yield effect(
+                build_rag_context,
                 question=question,
                 intent=str(intent or ""),
                 entity=str(entity or ""),
+                afn=build_rag_context_async,
             )
         except Exception as exc:
             LOGGER.warning("Erro ao montar contexto de RAG", exc_info=True)
@@ -1090,14 +1284,31 @@ class Orchestrator:
             and is_cacheable_payload(payload)
         ):
             try:
-                self._cache.set_json(plan_cache_key, payload, ttl_seconds=plan_cache_ttl)
+                yield self._cache_call(
+                    "set_json",
+                    plan_cache_key,
+                    payload,
+                    ttl_seconds=plan_cache_ttl,
+                    stale_ttl_seconds=plan_cache_stale_ttl,
+                    tags=make_cache_tags(
+                        os.getenv("BUILD_ID", "dev"), scope, entity, identifiers
+                    ),
+                )
                 plan_cache_written = True
+                flight["shareable"] = True
             except Exception:
                 LOGGER.warning("Falha ao gravar payload no plan-cache", exc_info=True)
 
         if plan_lock_acquired and plan_lock_key:
             try:
-                self._cache.release_lock(plan_lock_key, self._cache.lock_token)
+                yield self._cache_call(
+                    "release_lock", plan_lock_key, self._cache.lock_token
+                )
+            except Exception:
+                pass
+            try:
+                # seguidores de outros processos acordam (gravado ou não)
+                yield self._cache_call("notify_key", plan_cache_key)
             except Exception:
                 pass
 
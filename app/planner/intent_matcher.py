@@ -0,0 +1,196 @@
+# app/planner/intent_matcher.py
+"""
+Matcher de intents pré-compilado a partir da ontologia (entity.yaml).
+
+Compilado uma vez em ``Planner.__init__``/``reload()``:
+
+- índice invertido token → (intent, include|exclude, posição);
+- um autômato Aho–Corasick com todas as frases sem placeholder (já
+  normalizadas) e os anti-tokens;
+- templates de frases com ``<ticker>``/``(sem ticker)`` já normalizados e
+  tokenizados.
+
+Uma passada sobre a pergunta produz os hits de include/exclude de todas as
+intents, na mesma ordem (e com as mesmas repetições) que o laço original do
+``Planner.explain`` — o score resultante é idêntico.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.common.aho_corasick import AhoCorasick
+
+TICKER = "<ticker>"
+NO_TICKER = "(sem ticker)"
+
+_INCLUDE = 0
+_EXCLUDE = 1
+
+# (intent_idx, include|exclude, posição na lista original)
+_Posting = Tuple[int, int, int]
+
+
+@dataclass(frozen=True)
+class _Template:
+    needs_ticker: bool
+    forbids_ticker: bool
+    tokens: Tuple[str, ...]
+
+
+@dataclass
+class IntentHits:
+    token_includes: List[str]
+    token_excludes: List[str]
+    phrase_includes: List[str]
+    phrase_excludes: List[str]
+
+
+def _tokens_match_in_order(
+    positions: Dict[str, List[int]], template_tokens: Tuple[str, ...]
+) -> bool:
+    pos = 0
+    for token in template_tokens:
+        idxs = positions.get(token)
+        if not idxs:
+            return False
+        j = bisect_left(idxs, pos)
+        if j == len(idxs):
+            return False
+        pos = idxs[j] + 1
+    return True
+
+
+class IntentMatcher:
+    def __init__(self, onto: Any, normalize: Any, tokenize: Any):
+        """
+        ``normalize(text, steps)``/``tokenize(text, split)`` são as mesmas funções
+        usadas pelo Planner na pergunta (garante equivalência de normalização).
+        """
+        self.onto = onto
+        self.intents = list(onto.intents)
+        steps = onto.normalize
+        split = onto.token_split
+
+        self._token_postings: Dict[str, List[_Posting]] = {}
+        self._ticker_postings: List[_Posting] = []
+        self._no_ticker_postings: List[_Posting] = []
+        phrase_postings: Dict[str, List[_Posting]] = {}
+        self._templates: List[Tuple[_Posting, _Template]] = []
+
+        for idx, it in enumerate(self.intents):
+            for kind, tokens in (
+                (_INCLUDE, it.tokens_include),
+                (_EXCLUDE, it.tokens_exclude),
+            ):
+                for pos, tok in enumerate(tokens or []):
+                    posting = (idx, kind, pos)
+                    if tok == TICKER:
+                        self._ticker_postings.append(posting)
+                    elif tok == NO_TICKER:
+                        self._no_ticker_postings.append(posting)
+                    else:
+                        self._token_postings.setdefault(tok, []).append(posting)
+
+            for kind, phrases in (
+                (_INCLUDE, it.phrases_include),
+                (_EXCLUDE, it.phrases_exclude),
+            ):
+                for pos, raw in enumerate(phrases or []):
+                    if not raw:
+                        continue
+                    posting = (idx, kind, pos)
+                    needs_ticker = TICKER in raw
+                    forbids_ticker = NO_TICKER in raw
+                    if not needs_ticker and not forbids_ticker:
+                        normalized = normalize(raw, steps)
+                        if normalized:
+                            phrase_postings.setdefault(normalized, []).append(posting)
+                        continue
+                    template = raw.replace(TICKER, " ").replace(NO_TICKER, " ")
+                    template_tokens = tuple(tokenize(normalize(template, steps), split))
+                    self._templates.append(
+                        (posting, _Template(needs_ticker, forbids_ticker, template_tokens))
+                    )
+
+        anti_groups = [
+            [c for c in (toks or []) if isinstance(c, str) and c]
+            for toks in (onto.anti_tokens or {}).values()
+        ]
+        self._automaton = AhoCorasick(
+            list(phrase_postings) + [c for group in anti_groups for c in group]
+        )
+        self._phrase_postings: Dict[int, List[_Posting]] = {
+            self._automaton.pattern_id(p): postings
+            for p, postings in phrase_postings.items()
+        }
+        self._anti_groups: List[frozenset] = [
+            frozenset(self._automaton.pattern_id(c) for c in group)
+            for group in anti_groups
+        ]
+
+    def match(
+        self, norm: str, tokens: List[str], has_ticker: bool
+    ) -> Tuple[List[IntentHits], int]:
+        """
+        Retorna (hits por intent, na ordem de ``onto.intents``; nº de grupos de
+        anti-tokens presentes em ``norm``).
+        """
+        n = len(self.intents)
+        # buckets[idx][kind] -> posições; kind 0/1 tokens, 2/3 frases
+        buckets: List[Optional[List[List[int]]]] = [None] * n
+
+        def _add(postings: List[_Posting], offset: int) -> None:
+            for idx, kind, pos in postings:
+                slot = buckets[idx]
+                if slot is None:
+                    slot = buckets[idx] = [[], [], [], []]
+                slot[offset + kind].append(pos)
+
+        for tok in set(tokens):
+            postings = self._token_postings.get(tok)
+            if postings:
+                _add(postings, 0)
+        _add(self._ticker_postings if has_ticker else self._no_ticker_postings, 0)
+
+        found = self._automaton.find_ids(norm)
+        for pid in found:
+            postings = self._phrase_postings.get(pid)
+            if postings:
+                _add(postings, 2)
+
+        if self._templates:
+            positions: Dict[str, List[int]] = {}
+            for i, tok in enumerate(tokens):
+                positions.setdefault(tok, []).append(i)
+            memo: Dict[_Template, bool] = {}
+            for posting, tpl in self._templates:
+                if tpl.needs_ticker and not has_ticker:
+                    continue
+                if tpl.forbids_ticker and has_ticker:
+                    continue
+                ok = memo.get(tpl)
+                if ok is None:
+                    ok = memo[tpl] = _tokens_match_in_order(positions, tpl.tokens)
+                if ok:
+                    _add([posting], 2)
+
+        anti_hits = sum(1 for group in self._anti_groups if group & found)
+
+        out: List[IntentHits] = []
+        for idx, it in enumerate(self.intents):
+            slot = buckets[idx]
+            if slot is None:
+                out.append(IntentHits([], [], [], []))
+                continue
+            out.append(
+                IntentHits(
+                    [it.tokens_include[p] for p in sorted(slot[0])],
+                    [it.tokens_exclude[p] for p in sorted(slot[1])],
+                    [it.phrases_include[p] for p in sorted(slot[2])],
+                    [it.phrases_exclude[p] for p in sorted(slot[3])],
+                )
+            )
+        return out, anti_hits
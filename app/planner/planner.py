@@ -4,23 +4,39 @@ from typing import Dict, Any, List, Optional
 import re, unicodedata
 import logging
 import os
+import random
 import time
 from pathlib import Path
 from functools import lru_cache
 
+from .intent_matcher import IntentMatcher
 from .ontology_loader import load_ontology
 from .ticker_index import resolve_ticker_from_text
 
 # RAG: leitor de índice e hints
 from app.rag.hints import entity_hints_from_rag
+from app.rag.embed_cache import CachedEmbedder
 from app.rag.ollama_client import OllamaClient
 from app.utils.filecache import cached_embedding_store, load_yaml_cached
 from app.observability.instrumentation import counter, histogram
+from app.observability.log_events import log_event
 
 PUNCT_RE = re.compile(r"[^\w\s]", flags=re.UNICODE)
 _LOG = logging.getLogger("planner.explain")
 
 
+def _env_rate(name: str) -> float:
+    try:
+        return min(1.0, max(0.0, float(os.getenv(name, "0") or 0.0)))
+    except ValueError:
+        return 0.0
+
+
+# Fração das chamadas em modo roteamento (detail=False) que ainda constroem a
+# árvore completa de explain (shadow logging / métricas M7.3).
+_EXPLAIN_SHADOW_RATE = _env_rate("PLANNER_EXPLAIN_SHADOW_RATE")
+
+
 @lru_cache(maxsize=1)
 def _load_entity_ontology(path: str = "data/ontology/entity.yaml") -> Dict[str, Any]:
     """
@@ -368,6 +384,13 @@ def _load_context_policy(path: str = "data/policies/context.yaml") -> Dict[str,
         }
 
 
+class _DiscardList(list):
+    """decision_path do modo roteamento: descarta os nós (não é exposta)."""
+
+    def append(self, item: Any) -> None:
+        pass
+
+
 def _strip_accents(s: str) -> str:
     return "".join(
         c for c in unicodedata.normalize("NFD", s) if unicodedata.category(c) != "Mn"
@@ -391,66 +414,6 @@ def _tokenize(text: str, split_pat: str) -> List[str]:
     return [p for p in parts if p and not p.isspace()]
 
 
-def _phrase_present(text: str, phrase: str) -> bool:
-    return phrase in text
-
-
-def _normalize_phrase(phrase: str, steps: List[str]) -> str:
-    return _normalize(phrase, steps)
-
-
-def _tokens_match_in_order(text_tokens: List[str], template_tokens: List[str]) -> bool:
-    if not template_tokens:
-        return True
-
-    pos = 0
-    for token in template_tokens:
-        try:
-            next_index = text_tokens.index(token, pos)
-        except ValueError:
-            return False
-        pos = next_index + 1
-    return True
-
-
-def _phrase_matches_with_placeholders(
-    norm_text: str,
-    raw_phrase: str,
-    *,
-    has_ticker: bool,
-    normalize_steps: List[str],
-    token_split: str,
-    text_tokens: List[str],
-) -> bool:
-    if not raw_phrase:
-        return False
-
-    contains_ticker = "<ticker>" in raw_phrase
-    contains_no_ticker = "(sem ticker)" in raw_phrase
-
-    if not contains_ticker and not contains_no_ticker:
-        normalized_phrase = _normalize_phrase(raw_phrase, normalize_steps)
-        return bool(normalized_phrase) and normalized_phrase in norm_text
-
-    if contains_ticker and not has_ticker:
-        return False
-    if contains_no_ticker and has_ticker:
-        return False
-
-    template = raw_phrase.replace("<ticker>", " ").replace("(sem ticker)", " ")
-    normalized_template = _normalize_phrase(template, normalize_steps)
-    template_tokens = _tokenize(normalized_template, token_split)
-
-    if not template_tokens and (contains_ticker or contains_no_ticker):
-        return True
-
-    return _tokens_match_in_order(text_tokens, template_tokens)
-
-
-def _any_in(text: str, candidates: List[str]) -> bool:
-    return any(c for c in candidates if c and c in text)
-
-
 def _entities_for_bucket(ontology: Any, bucket: str) -> List[str]:
     """Retorna entidades elegíveis para o bucket, sem lógica de negócio inline."""
 
@@ -479,11 +442,30 @@ class Planner:
     def __init__(self, ontology_path: str):
         self.ontology_path = ontology_path
         self.onto = load_ontology(ontology_path)
+        self._matcher = IntentMatcher(self.onto, _normalize, _tokenize)
 
     def reload(self):
         self.onto = load_ontology(self.ontology_path)
-
-    def explain(self, question: str):
+        self._matcher = IntentMatcher(self.onto, _normalize, _tokenize)
+
+    def _intent_matcher(self) -> IntentMatcher:
+        # ontologia trocada por fora (scripts/testes): recompila sob demanda
+        if self._matcher.onto is not self.onto:
+            self._matcher = IntentMatcher(self.onto, _normalize, _tokenize)
+        return self._matcher
+
+    def explain(self, question: str, detail: bool = True):
+        """
+        Planeja a rota da pergunta.
+
+        ``detail=False`` é o modo de roteamento (/ask sem explain): calcula só o
+        necessário para a rota e o gate de thresholds; sinais por token/frase,
+        decision_path, snippets do RAG e logs top-10 ficam de fora
+        (``explain.mode == "routing"``). ``chosen``, scores e gate são idênticos
+        aos do modo completo.
+        """
+        if not detail and _EXPLAIN_SHADOW_RATE > 0.0:
+            detail = random.random() < _EXPLAIN_SHADOW_RATE
         norm = _normalize(question, self.onto.normalize)
         tokens = _tokenize(norm, self.onto.token_split)
         tokens_set = set(tokens)
@@ -495,9 +477,11 @@ class Planner:
         all_intents = list(self.onto.intents)
         candidate_intents = all_intents
 
-        try:
-            _LOG.info(
-                {
+        if detail:
+            log_event(
+                _LOG,
+                "planner.normalize_tokenize",
+                lambda: {
                     "planner_phase": "normalize_tokenize",
                     "raw_question": question,
                     "normalized": norm,
@@ -507,10 +491,8 @@ class Planner:
                     "tokens_set_sample": list(sorted(tokens_set))[:30],
                     "resolved_ticker": resolved_ticker,
                     "has_ticker": has_ticker,
-                }
+                },
             )
-        except Exception:
-            pass
 
         # pesos vêm 100% da ontologia validada (sem defaults embutidos no código)
         token_weight = float(self.onto.weights["token"])
@@ -518,14 +500,6 @@ class Planner:
 
         intent_scores: Dict[str, float] = {}
         details = {}
-        decision_path: List[Dict[str, Any]] = [
-            {
-                "stage": "tokenize",
-                "type": "normalization",
-                "value": norm,
-                "result": tokens[:],
-            }
-        ]
         bucket_decision = {"stage": "bucketize", "type": "planner_bucket", "bucket": ""}
         bucket_gate_decision = {
             "stage": "bucket_derived_post_choice",
@@ -533,8 +507,18 @@ class Planner:
             "bucket": "",
             "applied": False,
         }
-        decision_path.append(bucket_decision)
-        decision_path.append(bucket_gate_decision)
+        decision_path: List[Dict[str, Any]] = _DiscardList()
+        if detail:
+            decision_path = [
+                {
+                    "stage": "tokenize",
+                    "type": "normalization",
+                    "value": norm,
+                    "result": tokens[:],
+                },
+                bucket_decision,
+                bucket_gate_decision,
+            ]
         token_score_items: List[Dict[str, Any]] = []
         phrase_score_items: List[Dict[str, Any]] = []
         anti_hits_items: List[Dict[str, Any]] = []
@@ -543,60 +527,30 @@ class Planner:
         # bucket_entities precisa existir antes do scoring-base (explain/details).
         # Neste estágio ainda não sabemos o bucket vencedor; bucket="" => universo = todas as entidades.
         bucket_entities = set(_entities_for_bucket(self.onto, bucket))
-        # --- scoring base (como já havia) ---
-        for it in candidate_intents:
+        # --- scoring base (matcher pré-compilado; mesmo resultado do laço original) ---
+        matcher = self._intent_matcher()
+        intent_hits, anti_groups_hit = matcher.match(norm, tokens, has_ticker)
+        for it, hits in zip(matcher.intents, intent_hits):
             score = 0.0
-            include_hits = [
-                t
-                for t in it.tokens_include
-                if (t == "<ticker>" and has_ticker)
-                or (t == "(sem ticker)" and not has_ticker)
-                or (t not in {"<ticker>", "(sem ticker)"} and (t in tokens_set))
-            ]
-
-            exclude_hits = [
-                t
-                for t in it.tokens_exclude
-                if (t == "<ticker>" and has_ticker)
-                or (t == "(sem ticker)" and not has_ticker)
-                or (t not in {"<ticker>", "(sem ticker)"} and (t in tokens_set))
-            ]
+            include_hits = hits.token_includes
+            exclude_hits = hits.token_excludes
             score += token_weight * len(include_hits)
             score -= token_weight * len(exclude_hits)
 
-            phrase_incl_hits = [
-                p
-                for p in it.phrases_include
-                if _phrase_matches_with_placeholders(
-                    norm,
-                    p,
-                    has_ticker=has_ticker,
-                    normalize_steps=self.onto.normalize,
-                    token_split=self.onto.token_split,
-                    text_tokens=tokens,
-                )
-            ]
-            phrase_excl_hits = [
-                p
-                for p in it.phrases_exclude
-                if _phrase_matches_with_placeholders(
-                    norm,
-                    p,
-                    has_ticker=has_ticker,
-                    normalize_steps=self.onto.normalize,
-                    token_split=self.onto.token_split,
-                    text_tokens=tokens,
-                )
-            ]
+            phrase_incl_hits = hits.phrase_includes
+            phrase_excl_hits = hits.phrase_excludes
             score += phrase_weight * len(phrase_incl_hits)
             score -= phrase_weight * len(phrase_excl_hits)
 
             anti_penalty = 0.0
-            for _, toks in (self.onto.anti_tokens or {}).items():
-                if _any_in(norm, toks):
-                    anti_penalty += 0.5 * token_weight
+            for _ in range(anti_groups_hit):
+                anti_penalty += 0.5 * token_weight
             score -= anti_penalty
 
+            intent_scores[it.name] = score
+            if not detail:
+                continue
+
             for tk in include_hits:
                 token_score_items.append(
                     {"token": tk, "weight": token_weight, "hits": 1, "intent": it.name}
@@ -632,7 +586,6 @@ class Planner:
                     }
                 )
 
-            intent_scores[it.name] = score
             details[it.name] = {
                 "token_includes": include_hits,
                 "token_excludes": exclude_hits,
@@ -653,19 +606,18 @@ class Planner:
                 }
             )
 
-        try:
-            ordered_base_breakdown = sorted(
-                intent_base_breakdown, key=lambda item: item["score"], reverse=True
-            )
-            _LOG.info(
-                {
+        if detail:
+            log_event(
+                _LOG,
+                "planner.intent_base_scoring",
+                lambda: {
                     "planner_phase": "intent_base_scoring",
                     "raw_question": question,
-                    "top_intents": ordered_base_breakdown[:10],
-                }
+                    "top_intents": sorted(
+                        intent_base_breakdown, key=lambda item: item["score"], reverse=True
+                    )[:10],
+                },
             )
-        except Exception:
-            pass
 
         # --- configurações RAG ---
         cfg = _load_thresholds()
@@ -703,7 +655,7 @@ class Planner:
             try:
                 rag_t0 = time.perf_counter()
                 store = cached_embedding_store(rag_index_path)
-                embedder = OllamaClient()
+                embedder = CachedEmbedder(OllamaClient())
                 qvec = embedder.embed([question])[0]
                 results = (
                     store.search_by_vector(qvec, k=rag_k, min_score=rag_min_score) or []
@@ -1097,18 +1049,18 @@ class Planner:
         bucket_decision["bucket"] = bucket
         bucket_gate_decision["bucket"] = bucket
 
-        try:
-            _LOG.info(
-                {
+        if detail:
+            log_event(
+                _LOG,
+                "planner.bucket_resolve",
+                lambda: {
                     "planner_phase": "bucket_resolve",
                     "raw_question": question,
                     "bucket": bucket,
                     "bucket_entities_count": len(bucket_entities),
                     "bucket_entities_sample": list(sorted(bucket_entities))[:50],
-                }
+                },
             )
-        except Exception:
-            pass
 
         if rag_fusion_applied:
             decision_path.append(
@@ -1176,39 +1128,40 @@ class Planner:
                 }
             )
 
-        try:
-            ordered_final_intents = sorted(
-                combined_intents, key=lambda item: item["combined"], reverse=True
-            )
-            _LOG.info(
-                {
+        if detail:
+            log_event(
+                _LOG,
+                "planner.intent_final_scoring",
+                lambda: {
                     "planner_phase": "intent_final_scoring",
                     "raw_question": question,
                     "rag_enabled": rag_enabled,
                     "rag_used": rag_used,
                     "fusion_weight": effective_weight,
                     "fusion_mode": re_rank_mode,
-                    "top_intents": ordered_final_intents[:10],
-                }
+                    "top_intents": sorted(
+                        combined_intents, key=lambda item: item["combined"], reverse=True
+                    )[:10],
+                },
             )
-        except Exception:
-            pass
 
         # --- sumarização de pesos (como já havia) ---
-        token_sum = float(sum(item["weight"] for item in token_score_items))
-        phrase_sum = float(sum(item["weight"] for item in phrase_score_items))
-        anti_sum = float(sum(item.get("penalty", 0.0) for item in anti_hits_items))
-        weights_summary = {
-            "token_sum": token_sum,
-            "phrase_sum": phrase_sum,
-            "anti_sum": anti_sum,
-            "total": token_sum + phrase_sum - anti_sum,
-        }
+        weights_summary: Optional[Dict[str, float]] = None
+        if detail:
+            token_sum = float(sum(item["weight"] for item in token_score_items))
+            phrase_sum = float(sum(item["weight"] for item in phrase_score_items))
+            anti_sum = float(sum(item.get("penalty", 0.0) for item in anti_hits_items))
+            weights_summary = {
+                "token_sum": token_sum,
+                "phrase_sum": phrase_sum,
+                "anti_sum": anti_sum,
+                "total": token_sum + phrase_sum - anti_sum,
+            }
 
         # --- RAG Context Explain (somente explicativo; não altera roteamento) ---
         rag_context = None
         rag_latency_ms = None
-        if rag_enabled and rag_used and rag_raw_results:
+        if detail and rag_enabled and rag_used and rag_raw_results:
             # tokens "include" do intent vencedor (da ontologia) para barreira semântica
             winner_tokens = []
             for it in self.onto.intents:
@@ -1286,16 +1239,6 @@ class Planner:
 
         # --- explain (mantém + adiciona bloco RAG e combined) ---
         meta_explain: Dict[str, Any] = {
-            "signals": {
-                "token_scores": token_score_items,
-                "phrase_scores": phrase_score_items,
-                "anti_hits": anti_hits_items,
-                "normalizations": [
-                    {"step": s, "applied": True} for s in self.onto.normalize
-                ],
-                "weights_summary": weights_summary,
-            },
-            "decision_path": decision_path,
             "scoring": {
                 "intent": (
                     [{"name": chosen_intent, "score": chosen_score, "winner": True}]
@@ -1312,6 +1255,22 @@ class Planner:
                 "intent_top2_gap_final": gap_final_global,
             },
         }
+        if detail:
+            meta_explain = {
+                "signals": {
+                    "token_scores": token_score_items,
+                    "phrase_scores": phrase_score_items,
+                    "anti_hits": anti_hits_items,
+                    "normalizations": [
+                        {"step": s, "applied": True} for s in self.onto.normalize
+                    ],
+                    "weights_summary": weights_summary,
+                },
+                "decision_path": decision_path,
+                **meta_explain,
+            }
+        else:
+            meta_explain["mode"] = "routing"
         if top_entity_name:
             meta_explain["scoring"]["entity_top_telemetry"] = {
                 "name": top_entity_name,
@@ -1427,20 +1386,19 @@ class Planner:
                 pass
 
         # --- log estruturado leve ---
-        try:
-            _LOG.info(
-                {
-                    "planner_phase": "explain",
-                    "decision_depth": len(decision_path),
-                    "signal_weights": weights_summary,
-                    "intent_top": chosen_intent,
-                    "intent_score": float(chosen_score),
-                    "entity_top": chosen_entity,
-                    "rag_enabled": rag_enabled,
-                }
-            )
-        except Exception:
-            pass
+        log_event(
+            _LOG,
+            "planner.explain",
+            lambda: {
+                "planner_phase": "explain",
+                "decision_depth": len(decision_path),
+                "signal_weights": weights_summary,
+                "intent_top": chosen_intent,
+                "intent_score": float(chosen_score),
+                "entity_top": chosen_entity,
+                "rag_enabled": rag_enabled,
+            },
+        )
 
         # imediatamente antes do return:
         min_score = float(thresholds_result["min_score"])
@@ -1464,26 +1422,25 @@ class Planner:
             "final" if gate_source_is_final else "base"
         )
 
-        try:
-            _LOG.info(
-                {
-                    "planner_phase": "gate_decision",
-                    "raw_question": question,
-                    "min_score": min_score,
-                    "min_gap": min_gap,
-                    "gap": gap_used,
-                    "apply_on": ("final" if gate_source_is_final else "base"),
-                    "score_for_gate": score_for_gate,
-                    "accepted": accepted,
-                    "reason": gate_reason,
-                    "gate_source": ("final" if gate_source_is_final else "base"),
-                    "rag_enabled": rag_enabled,
-                    "re_rank_enabled": re_rank_enabled,
-                    "rag_used": rag_used,
-                }
-            )
-        except Exception:
-            pass
+        log_event(
+            _LOG,
+            "planner.gate_decision",
+            lambda: {
+                "planner_phase": "gate_decision",
+                "raw_question": question,
+                "min_score": min_score,
+                "min_gap": min_gap,
+                "gap": gap_used,
+                "apply_on": ("final" if gate_source_is_final else "base"),
+                "score_for_gate": score_for_gate,
+                "accepted": accepted,
+                "reason": gate_reason,
+                "gate_source": ("final" if gate_source_is_final else "base"),
+                "rag_enabled": rag_enabled,
+                "re_rank_enabled": re_rank_enabled,
+                "rag_used": rag_used,
+            },
+        )
 
         # --------- Métricas M7.4: re-rank aplicado e gaps before/after ----------
         try:
@@ -1,15 +1,18 @@
 # app/planner/ticker_index.py
 from __future__ import annotations
 
-import re
 import unicodedata
-from typing import Dict, List, Optional, Set
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 import logging
 
+from app.common.aho_corasick import AhoCorasick
+from app.observability.log_events import log_event
 from app.utils.filecache import load_yaml_cached
 
 _DEFAULT_PATH = "data/ontology/ticker_index.yaml"
-_WORD_RE = re.compile(r"\w+", flags=re.UNICODE)
 _LOG = logging.getLogger("planner.ticker_index")
 
 
@@ -26,13 +29,38 @@ def _normalize_token(token: str) -> str:
     return normalized
 
 
-def _tokens_from_text(text: str) -> List[str]:
-    tokens: List[str] = []
-    for match in _WORD_RE.finditer(text or ""):
-        token = _normalize_token(match.group(0))
-        if token:
-            tokens.append(token)
-    return tokens
+def _is_word_char(ch: str) -> bool:
+    # mesma classe de ``\w`` (re, str Unicode)
+    return ch == "_" or ch.isalnum()
+
+
+@dataclass(frozen=True)
+class TickerMatch:
+    token: str
+    resolved: str
+    strategy: str
+    start: int
+    end: int
+
+
+@dataclass(frozen=True)
+class TickerScan:
+    """Resultado de uma varredura da pergunta (tickers na ordem do texto)."""
+
+    matches: Tuple[TickerMatch, ...]
+
+    @property
+    def first(self) -> Optional[str]:
+        return self.matches[0].resolved if self.matches else None
+
+    def unique(self) -> List[str]:
+        seen: Set[str] = set()
+        out: List[str] = []
+        for m in self.matches:
+            if m.resolved not in seen:
+                seen.add(m.resolved)
+                out.append(m.resolved)
+        return out
 
 
 class TickerIndex:
@@ -85,6 +113,44 @@ class TickerIndex:
                 if len(values) == 1
             }
 
+        # padrão normalizado -> (ticker canônico, estratégia); exact tem prioridade
+        targets: Dict[str, Tuple[str, str]] = {}
+        if self._enable_prefix4:
+            for prefix, ticker in self._by_prefix4.items():
+                targets[prefix] = (ticker, "prefix4")
+        if self._enable_exact:
+            for ticker in self._canonical:
+                targets[ticker] = (ticker, "exact")
+        self._matcher = AhoCorasick(sorted(targets))
+        self._targets: List[Tuple[str, str]] = [
+            targets[pattern] for pattern in self._matcher.patterns
+        ]
+
+    @property
+    def tickers(self) -> List[str]:
+        """Lista canônica (ordenada) de tickers do índice."""
+        return sorted(self._canonical)
+
+    def scan(self, text: str) -> TickerScan:
+        """
+        Uma passada Aho–Corasick sobre o texto normalizado: só conta ocorrências
+        que são um token ``\w+`` inteiro — mesmo resultado de ``resolve`` por
+        token, sem tokenizar nem logar por token.
+        """
+        norm = _normalize_token(text or "")
+        matches: List[TickerMatch] = []
+        if not norm or not len(self._matcher):
+            return TickerScan(())
+        size = len(norm)
+        for start, end, pid in self._matcher.iter_matches(norm):
+            if start > 0 and _is_word_char(norm[start - 1]):
+                continue
+            if end < size and _is_word_char(norm[end]):
+                continue
+            resolved, strategy = self._targets[pid]
+            matches.append(TickerMatch(norm[start:end], resolved, strategy, start, end))
+        return TickerScan(tuple(matches))
+
     def resolve(self, token: str) -> Optional[str]:
         token_norm = _normalize_token(token)
         if not token_norm:
@@ -98,18 +164,17 @@ class TickerIndex:
             resolved = self._by_prefix4.get(token_norm)
             strategy = "prefix4" if resolved else None
         if resolved:
-            try:
-                _LOG.info(
-                    {
-                        "planner_phase": "ticker_resolve",
-                        "token": token,
-                        "token_norm": token_norm,
-                        "resolved": resolved,
-                        "strategy": strategy,
-                    }
-                )
-            except Exception:
-                pass
+            log_event(
+                _LOG,
+                "planner.ticker_resolve",
+                lambda: {
+                    "planner_phase": "ticker_resolve",
+                    "token": token,
+                    "token_norm": token_norm,
+                    "resolved": resolved,
+                    "strategy": strategy,
+                },
+            )
         return resolved
 
 
@@ -125,59 +190,53 @@ def get_ticker_index(path: str = _DEFAULT_PATH) -> TickerIndex:
     return index
 
 
-def resolve_ticker_from_text(question: str) -> Optional[str]:
-    ticker_index = get_ticker_index()
-    tokens = _tokens_from_text(question)
-    for token in tokens:
-        resolved = ticker_index.resolve(token)
-        if resolved:
-            try:
-                _LOG.info(
-                    {
-                        "planner_phase": "ticker_from_text",
-                        "raw_question": question,
-                        "token": token,
-                        "resolved": resolved,
-                        "tokens_count": len(tokens),
-                    }
-                )
-            except Exception:
-                pass
-            return resolved
+# memo por request: pergunta -> TickerScan (planner, param_inference e
+# orchestrator consultam a mesma pergunta várias vezes no mesmo /ask)
+_SCAN_MEMO: ContextVar[Optional[Dict[str, TickerScan]]] = ContextVar(
+    "ticker_scan_memo", default=None
+)
+
+
+@contextmanager
+def ticker_scan_scope() -> Iterator[None]:
+    """Abre o escopo de memo da varredura de tickers (reentrante)."""
+    if _SCAN_MEMO.get() is not None:
+        yield
+        return
+    token = _SCAN_MEMO.set({})
     try:
-        _LOG.info(
-            {
-                "planner_phase": "ticker_from_text",
-                "raw_question": question,
-                "token": None,
-                "resolved": None,
-                "tokens_count": len(tokens),
-            }
-        )
-    except Exception:
-        pass
-    return None
+        yield
+    finally:
+        _SCAN_MEMO.reset(token)
+
+
+def scan_tickers(question: str) -> TickerScan:
+    memo = _SCAN_MEMO.get()
+    if memo is not None:
+        cached = memo.get(question)
+        if cached is not None:
+            return cached
+    scan = get_ticker_index().scan(question)
+    log_event(
+        _LOG,
+        "planner.ticker_scan",
+        lambda: {
+            "planner_phase": "ticker_scan",
+            "raw_question": question,
+            "matches": [
+                {"token": m.token, "resolved": m.resolved, "strategy": m.strategy}
+                for m in scan.matches
+            ],
+        },
+    )
+    if memo is not None:
+        memo[question] = scan
+    return scan
+
+
+def resolve_ticker_from_text(question: str) -> Optional[str]:
+    return scan_tickers(question).first
 
 
 def extract_tickers_from_text(question: str) -> List[str]:
-    ticker_index = get_ticker_index()
-    seen = set()
-    results: List[str] = []
-    tokens = _tokens_from_text(question)
-    for token in tokens:
-        resolved = ticker_index.resolve(token)
-        if resolved and resolved not in seen:
-            results.append(resolved)
-            seen.add(resolved)
-    try:
-        _LOG.info(
-            {
-                "planner_phase": "ticker_extract_multi",
-                "raw_question": question,
-                "tokens": tokens,
-                "resolved": results,
-            }
-        )
-    except Exception:
-        pass
-    return results
+    return scan_tickers(question).unique()
@@ -5,7 +5,7 @@ import logging
 import os
 import time
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
 
 from pydantic import BaseModel, Field
 
@@ -322,6 +322,8 @@ def present(
     conversation_id: Optional[str] = None,
     nickname: Optional[str] = None,
     explain: bool = False,
+    on_baseline: Optional[Callable[[str], None]] = None,
+    on_token: Optional[Callable[[str], None]] = None,
 ) -> PresentResult:
     """
     Camada de apresentação do Araquem (pós-formatter).
@@ -332,6 +334,9 @@ def present(
     - Acionar o Narrator (se habilitado)
     - Decidir qual texto final será retornado
     - Devolver PresentResult com answer, legacy_answer, template, narrator_meta, facts
+
+    Streaming (/ask/stream): ``on_baseline`` recebe o baseline determinístico
+    antes do Narrator; ``on_token`` é repassado ao ``Narrator.render``.
     """
     intent = plan["chosen"]["intent"]
     entity = plan["chosen"]["entity"]
@@ -456,6 +461,12 @@ def present(
 
     legacy_answer = baseline_answer
 
+    if on_baseline is not None:
+        try:
+            on_baseline(baseline_answer)
+        except Exception:
+            LOGGER.warning("Falha ao emitir baseline determinístico", exc_info=True)
+
     narrator_info: Dict[str, Any] = {
         "enabled": bool(effective_narrator_policy.get("llm_enabled")),
         "shadow": bool(effective_narrator_policy.get("shadow")),
@@ -515,7 +526,12 @@ def present(
                 facts_wire.pop("identifiers", None)
                 facts_wire.pop("aggregates", None)
 
-            out = narrator.render(question, facts_wire, meta_for_narrator)
+            if on_token is not None:
+                out = narrator.render(
+                    question, facts_wire, meta_for_narrator, on_token=on_token
+                )
+            else:
+                out = narrator.render(question, facts_wire, meta_for_narrator)
 
             dt_ms = (time.perf_counter() - t0) * 1000.0
 
@@ -4,9 +4,10 @@ import logging
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
 import redis
+import redis.asyncio as aioredis
 
 from app.utils.filecache import load_yaml_cached
 
@@ -109,6 +110,38 @@ def _get_limit(policy: Dict[str, Any], user_type: str) -> int:
     return _parse_int(defaults.get(user_type), DEFAULT_POLICY["defaults"][user_type])
 
 
+def _quota_transition(
+    data: Dict[str, Any], limit: int
+) -> Tuple[QuotaDecision, Optional[Dict[str, int]], str]:
+    """
+    Decide a transição da quota a partir do hash atual.
+
+    Retorna (decisão, mapping inicial a gravar quando o hash não existe, campo a
+    decrementar/incrementar). Compartilhado pelos caminhos sync e async.
+    """
+    if data:
+        requests_total = _parse_int(data.get("requests_total"), limit)
+        quota_remaining = _parse_int(data.get("quota_remaining"), limit)
+        blocked_total = _parse_int(data.get("blocked_total"), 0)
+    else:
+        requests_total = limit
+        quota_remaining = limit
+        blocked_total = 0
+
+    initial = None
+    if not data:
+        initial = {
+            "requests_total": requests_total,
+            "quota_remaining": max(0, quota_remaining),
+            "blocked_total": blocked_total,
+        }
+
+    if quota_remaining <= 0:
+        return QuotaDecision(allowed=False, remaining=0), initial, "blocked_total"
+    decision = QuotaDecision(allowed=True, remaining=max(0, quota_remaining - 1))
+    return decision, initial, "quota_remaining"
+
+
 def _update_quota(
     redis_client: redis.Redis,
     key: str,
@@ -121,43 +154,13 @@ def _update_quota(
         try:
             pipe.watch(key)
             data = pipe.hgetall(key) or {}
-            if data:
-                requests_total = _parse_int(data.get("requests_total"), limit)
-                quota_remaining = _parse_int(data.get("quota_remaining"), limit)
-                blocked_total = _parse_int(data.get("blocked_total"), 0)
-            else:
-                requests_total = limit
-                quota_remaining = limit
-                blocked_total = 0
-
-            if quota_remaining <= 0:
-                pipe.multi()
-                if not data:
-                    pipe.hset(
-                        key,
-                        mapping={
-                            "requests_total": requests_total,
-                            "quota_remaining": max(0, quota_remaining),
-                            "blocked_total": blocked_total,
-                        },
-                    )
-                pipe.hincrby(key, "blocked_total", 1)
-                pipe.execute()
-                return QuotaDecision(allowed=False, remaining=0)
-
+            decision, initial, field = _quota_transition(data, limit)
             pipe.multi()
-            if not data:
-                pipe.hset(
-                    key,
-                    mapping={
-                        "requests_total": requests_total,
-                        "quota_remaining": quota_remaining,
-                        "blocked_total": blocked_total,
-                    },
-                )
-            pipe.hincrby(key, "quota_remaining", -1)
+            if initial is not None:
+                pipe.hset(key, mapping=initial)
+            pipe.hincrby(key, field, 1 if field == "blocked_total" else -1)
             pipe.execute()
-            return QuotaDecision(allowed=True, remaining=max(0, quota_remaining - 1))
+            return decision
         except redis.WatchError:
             continue
         finally:
@@ -170,6 +173,37 @@ def _update_quota(
     return QuotaDecision(allowed=True, remaining=None)
 
 
+async def _update_quota_async(
+    redis_client: aioredis.Redis,
+    key: str,
+    limit: int,
+    max_retries: int = 5,
+) -> QuotaDecision:
+    attempts = max(1, max_retries)
+    for _ in range(attempts):
+        pipe = redis_client.pipeline()
+        try:
+            await pipe.watch(key)
+            data = await pipe.hgetall(key) or {}
+            decision, initial, field = _quota_transition(data, limit)
+            pipe.multi()
+            if initial is not None:
+                pipe.hset(key, mapping=initial)
+            pipe.hincrby(key, field, 1 if field == "blocked_total" else -1)
+            await pipe.execute()
+            return decision
+        except redis.WatchError:
+            continue
+        finally:
+            try:
+                await pipe.reset()
+            except Exception:
+                pass
+
+    LOGGER.warning("Falha ao aplicar quota após %s tentativas", attempts)
+    return QuotaDecision(allowed=True, remaining=None)
+
+
 def enforce_ask_quota(
     redis_client: redis.Redis,
     user_type: str,
@@ -190,3 +224,28 @@ def enforce_ask_quota(
     except Exception:
         LOGGER.warning("Falha ao aplicar quota no Redis", exc_info=True)
         return QuotaDecision(allowed=True, remaining=None)
+
+
+async def enforce_ask_quota_async(
+    redis_client: aioredis.Redis,
+    user_type: str,
+    client_key: str,
+    now: Optional[datetime] = None,
+    policy: Optional[Dict[str, Any]] = None,
+    max_retries: int = 5,
+) -> QuotaDecision:
+    """Variante asyncio de ``enforce_ask_quota`` (mesma política e mesmo hash)."""
+    policy_data = policy or load_ask_quota_policy()
+    if not policy_data.get("enabled", False):
+        return QuotaDecision(allowed=True, remaining=None, bypassed=True)
+
+    normalized_type = normalize_user_type(user_type)
+    limit = _get_limit(policy_data, normalized_type)
+    key = build_quota_key(normalized_type, client_key, now=now)
+    try:
+        return await _update_quota_async(
+            redis_client, key, limit, max_retries=max_retries
+        )
+    except Exception:
+        LOGGER.warning("Falha ao aplicar quota no Redis", exc_info=True)
+        return QuotaDecision(allowed=True, remaining=None)
@@ -0,0 +1,293 @@
+# app/rag/ann.py
+"""
+Backends de busca vetorial do EmbeddingStore.
+
+- ``exact``: produto matriz-vetor + argpartition (padrão; sempre disponível);
+- ``ivf``: IVF em NumPy (k-means esférico + listas invertidas, sonda ``nprobe``);
+- ``hnsw``: hnswlib, quando instalado (dependência opcional).
+
+Os índices ANN são construídos offline por scripts/embeddings/embeddings_build.py
+ao lado do embeddings.jsonl e amarrados ao manifest hash; a escolha vem de
+``rag.index`` em data/policies/rag.yaml. Qualquer artefato ausente/desatualizado
+cai no backend exato.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+try:  # dependência opcional
+    import hnswlib  # type: ignore
+except Exception:  # pragma: no cover - depende do ambiente
+    hnswlib = None  # type: ignore
+
+LOGGER = logging.getLogger(__name__)
+
+_RAG_POLICY_PATH = os.getenv("RAG_POLICY_PATH", "data/policies/rag.yaml")
+
+BACKENDS = ("exact", "ivf", "hnsw")
+
+DEFAULT_ANN_SETTINGS: Dict[str, Any] = {
+    "backend": "exact",
+    "min_rows": 10000,
+    "ivf": {"nlist": None, "nprobe": 8, "iterations": 15, "seed": 13},
+    "hnsw": {"M": 16, "ef_construction": 200, "ef_search": 64},
+}
+
+
+def load_ann_settings(policy: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Lê ``rag.index`` do rag.yaml, completando com os defaults."""
+    if policy is None:
+        # import tardio: app.utils.filecache importa o index_reader
+        from app.utils.filecache import load_yaml_cached
+
+        policy = load_yaml_cached(_RAG_POLICY_PATH) or {}
+    rag = policy.get("rag") if isinstance(policy.get("rag"), dict) else policy
+    raw = rag.get("index") if isinstance(rag, dict) else None
+    raw = raw if isinstance(raw, dict) else {}
+
+    settings = {
+        "backend": str(raw.get("backend") or DEFAULT_ANN_SETTINGS["backend"]).lower(),
+        "min_rows": int(raw.get("min_rows", DEFAULT_ANN_SETTINGS["min_rows"]) or 0),
+    }
+    if settings["backend"] not in BACKENDS:
+        LOGGER.warning(
+            "rag.index.backend inválido (%s); usando exact", settings["backend"]
+        )
+        settings["backend"] = "exact"
+    for name in ("ivf", "hnsw"):
+        block = raw.get(name) if isinstance(raw.get(name), dict) else {}
+        settings[name] = {**DEFAULT_ANN_SETTINGS[name], **block}
+    return settings
+
+
+def ann_paths(jsonl_path: Path) -> Dict[str, Path]:
+    stem = jsonl_path.with_suffix("")
+    return {
+        "meta": Path(f"{stem}.ann.json"),
+        "ivf": Path(f"{stem}.ivf.npz"),
+        "hnsw": Path(f"{stem}.hnsw.bin"),
+    }
+
+
+def _top_k_sorted(ids: np.ndarray, scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Top-k por score desc; empates preservam a ordem de ``ids`` (ordem do índice)."""
+    n = scores.shape[0]
+    k = min(k, n)
+    if k <= 0:
+        return ids[:0], scores[:0]
+    if k < n:
+        part = np.argpartition(-scores, k - 1)[:k]
+        part.sort()
+    else:
+        part = np.arange(n)
+    order = part[np.argsort(-scores[part], kind="stable")]
+    return ids[order], scores[order]
+
+
+class ExactBackend:
+    name = "exact"
+
+    def __init__(self, matrix: np.ndarray):
+        self.matrix = matrix
+
+    def search(self, q: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        scores = self.matrix @ q
+        return _top_k_sorted(np.arange(scores.shape[0]), scores, k)
+
+
+class IVFBackend:
+    """IVF-Flat em NumPy: sonda as ``nprobe`` listas mais próximas e pontua exato."""
+
+    name = "ivf"
+
+    def __init__(
+        self,
+        matrix: np.ndarray,
+        centroids: np.ndarray,
+        list_offsets: np.ndarray,
+        list_ids: np.ndarray,
+        nprobe: int,
+    ):
+        self.matrix = matrix
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.list_ids = list_ids
+        self.nprobe = max(1, min(int(nprobe), centroids.shape[0]))
+
+    def search(self, q: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        centroid_scores = self.centroids @ q
+        probe = np.argpartition(-centroid_scores, self.nprobe - 1)[: self.nprobe]
+        candidates = np.concatenate(
+            [
+                self.list_ids[self.list_offsets[c] : self.list_offsets[c + 1]]
+                for c in probe
+            ]
+        )
+        candidates.sort()
+        scores = self.matrix[candidates] @ q
+        return _top_k_sorted(candidates, scores, k)
+
+
+class HnswBackend:
+    name = "hnsw"
+
+    def __init__(self, index: Any, ef_search: int):
+        self.index = index
+        self.ef_search = int(ef_search)
+
+    def search(self, q: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        k = min(k, self.index.get_current_count())
+        if k <= 0:
+            return np.arange(0), np.zeros(0, dtype=np.float32)
+        self.index.set_ef(max(self.ef_search, k))
+        labels, distances = self.index.knn_query(q, k=k)
+        # espaço "ip" em vetores normalizados: distância = 1 - cosseno
+        return labels[0].astype(np.int64), (1.0 - distances[0]).astype(np.float32)
+
+
+def _spherical_kmeans(
+    matrix: np.ndarray, nlist: int, iterations: int, seed: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    n = matrix.shape[0]
+    centroids = np.array(matrix[rng.choice(n, size=nlist, replace=False)], dtype=np.float32)
+    assign = np.zeros(n, dtype=np.int64)
+    for _ in range(max(1, iterations)):
+        assign = _assign(matrix, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, matrix)
+        counts = np.bincount(assign, minlength=nlist)
+        empty = np.flatnonzero(counts == 0)
+        if empty.size:
+            # re-semeia clusters vazios com pontos aleatórios
+            sums[empty] = matrix[rng.choice(n, size=empty.size, replace=False)]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        np.divide(sums, norms, out=sums, where=norms > 0)
+        centroids = sums
+    return centroids, _assign(matrix, centroids)
+
+
+def _assign(matrix: np.ndarray, centroids: np.ndarray, batch: int = 65536) -> np.ndarray:
+    out = np.empty(matrix.shape[0], dtype=np.int64)
+    for start in range(0, matrix.shape[0], batch):
+        block = np.asarray(matrix[start : start + batch])
+        out[start : start + batch] = np.argmax(block @ centroids.T, axis=1)
+    return out
+
+
+def build_ann_index(
+    jsonl_path: str | Path,
+    matrix: np.ndarray,
+    manifest_hash: str,
+    settings: Dict[str, Any],
+) -> Dict[str, Any]:
+    """
+    Constrói offline o índice ANN configurado (chamado pelo embeddings_build).
+
+    ``matrix`` é a matriz normalizada do sidecar (mesma ordem de linhas).
+    """
+    path = Path(jsonl_path)
+    paths = ann_paths(path)
+    backend = settings.get("backend", "exact")
+    n = int(matrix.shape[0])
+    meta: Dict[str, Any] = {
+        "backend": backend,
+        "manifest_hash": manifest_hash,
+        "count": n,
+        "dim": int(matrix.shape[1]) if matrix.ndim == 2 else 0,
+    }
+
+    if backend == "exact" or n < int(settings.get("min_rows") or 0) or n == 0:
+        meta["backend"] = "exact"
+    elif backend == "ivf":
+        cfg = settings["ivf"]
+        nlist = int(cfg.get("nlist") or max(1, int(np.sqrt(n))))
+        nlist = max(1, min(nlist, n))
+        centroids, assign = _spherical_kmeans(
+            matrix, nlist, int(cfg.get("iterations", 15)), int(cfg.get("seed", 13))
+        )
+        list_ids = np.argsort(assign, kind="stable").astype(np.int64)
+        list_offsets = np.concatenate(
+            [[0], np.cumsum(np.bincount(assign, minlength=nlist))]
+        ).astype(np.int64)
+        tmp = paths["ivf"].with_name(paths["ivf"].name + ".tmp")
+        with tmp.open("wb") as fw:
+            np.savez(fw, centroids=centroids, list_offsets=list_offsets, list_ids=list_ids)
+        os.replace(tmp, paths["ivf"])
+        meta["ivf"] = {"nlist": nlist}
+    elif backend == "hnsw":
+        if hnswlib is None:
+            raise RuntimeError("rag.index.backend=hnsw requer o pacote hnswlib")
+        cfg = settings["hnsw"]
+        index = hnswlib.Index(space="ip", dim=meta["dim"])
+        index.init_index(
+            max_elements=n,
+            ef_construction=int(cfg.get("ef_construction", 200)),
+            M=int(cfg.get("M", 16)),
+        )
+        index.add_items(np.asarray(matrix), np.arange(n))
+        tmp = paths["hnsw"].with_name(paths["hnsw"].name + ".tmp")
+        index.save_index(str(tmp))
+        os.replace(tmp, paths["hnsw"])
+        meta["hnsw"] = {"M": int(cfg.get("M", 16))}
+
+    tmp_meta = paths["meta"].with_name(paths["meta"].name + ".tmp")
+    tmp_meta.write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    os.replace(tmp_meta, paths["meta"])
+    return meta
+
+
+def load_backend(
+    jsonl_path: Path,
+    matrix: np.ndarray,
+    manifest_hash: str,
+    settings: Optional[Dict[str, Any]] = None,
+) -> Any:
+    """Backend selecionado no rag.yaml, ou ExactBackend quando não há artefato válido."""
+    settings = settings or load_ann_settings()
+    wanted = settings.get("backend", "exact")
+    exact = ExactBackend(matrix)
+    if wanted == "exact":
+        return exact
+
+    paths = ann_paths(Path(jsonl_path))
+    try:
+        meta = json.loads(paths["meta"].read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        LOGGER.info("Índice ANN ausente para %s; usando busca exata", jsonl_path)
+        return exact
+    if (
+        meta.get("backend") != wanted
+        or meta.get("manifest_hash") != manifest_hash
+        or int(meta.get("count", -1)) != int(matrix.shape[0])
+    ):
+        LOGGER.info("Índice ANN desatualizado para %s; usando busca exata", jsonl_path)
+        return exact
+
+    try:
+        if wanted == "ivf":
+            with np.load(paths["ivf"]) as data:
+                return IVFBackend(
+                    matrix,
+                    data["centroids"],
+                    data["list_offsets"],
+                    data["list_ids"],
+                    int(settings["ivf"].get("nprobe", 8)),
+                )
+        if wanted == "hnsw":
+            if hnswlib is None:
+                LOGGER.warning("hnswlib não instalado; usando busca exata")
+                return exact
+            index = hnswlib.Index(space="ip", dim=int(meta["dim"]))
+            index.load_index(str(paths["hnsw"]), max_elements=int(meta["count"]))
+            return HnswBackend(index, int(settings["hnsw"].get("ef_search", 64)))
+    except Exception:
+        LOGGER.warning("Falha ao carregar índice ANN em %s", jsonl_path, exc_info=True)
+    return exact
@@ -7,7 +7,9 @@ from typing import Any, Dict, List, Optional
 from pathlib import Path
 
 from app.rag.index_reader import EmbeddingStore
-from app.rag.ollama_client import OllamaClient
+from app.common.effects import Steps, effect, run_async, run_sync
+from app.rag.embed_cache import CachedEmbedder
+from app.rag.ollama_client import AsyncOllamaClient, OllamaClient
 from app.utils.filecache import cached_embedding_store, load_yaml_cached
 
 LOGGER = logging.getLogger(__name__)
@@ -206,6 +208,53 @@ def build_context(
     has_ticker: bool = False,
     policy: Optional[Dict[str, Any]] = None,
 ) -> Dict[str, Any]:
+    return run_sync(
+        _build_context_steps(
+            question,
+            intent,
+            entity,
+            max_tokens=max_tokens,
+            compute_mode=compute_mode,
+            has_ticker=has_ticker,
+            policy=policy,
+        )
+    )
+
+
+async def build_context_async(
+    question: str,
+    intent: str,
+    entity: str,
+    *,
+    max_tokens: Optional[int] = None,
+    compute_mode: Optional[str] = None,
+    has_ticker: bool = False,
+    policy: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Mesmo contrato de ``build_context``; o embedding da pergunta usa httpx async."""
+    return await run_async(
+        _build_context_steps(
+            question,
+            intent,
+            entity,
+            max_tokens=max_tokens,
+            compute_mode=compute_mode,
+            has_ticker=has_ticker,
+            policy=policy,
+        )
+    )
+
+
+def _build_context_steps(
+    question: str,
+    intent: str,
+    entity: str,
+    *,
+    max_tokens: Optional[int] = None,
+    compute_mode: Optional[str] = None,
+    has_ticker: bool = False,
+    policy: Optional[Dict[str, Any]] = None,
+) -> Steps[Dict[str, Any]]:
     """Monta o contexto de RAG para uma pergunta.
 
     Esta função é determinística e NÃO chama LLM.
@@ -273,8 +322,8 @@ def build_context(
             raise FileNotFoundError(f"RAG index não encontrado em {_RAG_INDEX_PATH}")
 
         store: EmbeddingStore = cached_embedding_store(_RAG_INDEX_PATH)
-        embedder = OllamaClient()
-        vectors = embedder.embed([question])
+        embedder = CachedEmbedder(OllamaClient(), AsyncOllamaClient())
+        vectors = yield effect(embedder.embed, [question], afn=embedder.aembed)
         qvec: List[float] = (
             vectors[0] if vectors and isinstance(vectors[0], list) else []
         )
@@ -0,0 +1,313 @@
+# app/rag/embed_cache.py
+"""
+Cache de embeddings de consulta (pergunta → vetor) na frente do OllamaClient.
+
+Dois níveis, chaveados por (modelo, texto normalizado):
+
+- L1: LRU em memória do processo (``RAG_EMBED_CACHE_SIZE`` entradas; 0 desliga);
+- L2: Redis opcional via ``RedisCache``/``AsyncRedisCache`` (configurado em
+  app/core/context.py; TTL em ``RAG_EMBED_CACHE_TTL``; 0 desliga).
+
+A "geração" do cache é (modelo, manifest hash do store). Quando
+``OLLAMA_EMBED_MODEL`` ou o manifest mudam, o L1 é esvaziado e as chaves
+Redis passam a ser outras (as antigas expiram pelo TTL).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.hotreload import get_manifest_hash
+from app.observability.instrumentation import counter
+
+LOGGER = logging.getLogger(__name__)
+
+_RAG_INDEX_PATH = os.getenv(
+    "RAG_INDEX_PATH", "data/embeddings/store/embeddings.jsonl"
+)
+_KEY_PREFIX = "rag:qemb"
+_WS_RE = re.compile(r"\s+")
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except (TypeError, ValueError):
+        return default
+
+
+def normalize_query(text: str) -> str:
+    """NFKC + casefold + espaços colapsados: variações triviais dividem a entrada."""
+    norm = unicodedata.normalize("NFKC", str(text or ""))
+    return _WS_RE.sub(" ", norm).strip().casefold()
+
+
+class _ManifestHash:
+    """Manifest hash do store, recalculado só quando o mtime do manifest muda."""
+
+    def __init__(self, index_path: str):
+        self._path = str(Path(index_path).parent / "manifest.json")
+        self._mtime: Optional[float] = None
+        self._value = "missing"
+        self._lock = threading.Lock()
+
+    def get(self) -> str:
+        try:
+            mtime: Optional[float] = os.stat(self._path).st_mtime
+        except OSError:
+            mtime = None
+        with self._lock:
+            if mtime is None:
+                self._mtime, self._value = None, "missing"
+            elif mtime != self._mtime:
+                self._value = get_manifest_hash(self._path)
+                self._mtime = mtime
+            return self._value
+
+
+class QueryEmbeddingCache:
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[int] = None,
+        index_path: Optional[str] = None,
+    ):
+        self.max_entries = (
+            _env_int("RAG_EMBED_CACHE_SIZE", 2048) if max_entries is None else max_entries
+        )
+        self.ttl_seconds = (
+            _env_int("RAG_EMBED_CACHE_TTL", 86400) if ttl_seconds is None else ttl_seconds
+        )
+        self._manifest = _ManifestHash(index_path or _RAG_INDEX_PATH)
+        self._lru: "OrderedDict[Tuple[str, str], List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation: Optional[Tuple[str, str]] = None
+        self._redis: Any = None
+        self._async_redis: Any = None
+
+    def set_backends(self, cache: Any = None, async_cache: Any = None) -> None:
+        """Liga o nível Redis (sync e/ou async); ``None`` mantém só o L1."""
+        self._redis = cache
+        self._async_redis = async_cache
+
+    def clear(self) -> None:
+        with self._lock:
+            self._lru.clear()
+            self._generation = None
+
+    # ---------- chaves / geração ----------
+
+    def _generation_for(self, model: str) -> Tuple[str, str]:
+        generation = (model, self._manifest.get())
+        with self._lock:
+            if generation != self._generation:
+                if self._generation is not None:
+                    LOGGER.info(
+                        "Cache de embeddings invalidado (modelo/manifest): %s -> %s",
+                        self._generation,
+                        generation,
+                    )
+                self._lru.clear()
+                self._generation = generation
+        return generation
+
+    @staticmethod
+    def _redis_key(generation: Tuple[str, str], text: str) -> str:
+        raw = "\x1f".join((generation[0], generation[1], text))
+        return f"{_KEY_PREFIX}:{hashlib.sha256(raw.encode('utf-8')).hexdigest()}"
+
+    # ---------- L1 ----------
+
+    def _l1_get(self, key: Tuple[str, str]) -> Optional[List[float]]:
+        if self.max_entries <= 0:
+            return None
+        with self._lock:
+            vec = self._lru.get(key)
+            if vec is not None:
+                self._lru.move_to_end(key)
+        counter("sirios_rag_embed_cache_total", tier="l1", outcome="hit" if vec else "miss")
+        return vec
+
+    def _l1_put(self, key: Tuple[str, str], vec: List[float]) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._lru[key] = vec
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+
+    # ---------- L2 (Redis) ----------
+
+    def _l2_enabled(self, backend: Any) -> bool:
+        return backend is not None and self.ttl_seconds > 0
+
+    @staticmethod
+    def _valid(vec: Any) -> bool:
+        return isinstance(vec, list) and len(vec) > 0
+
+    def _l2_result(self, value: Any) -> Optional[List[float]]:
+        vec = value if self._valid(value) else None
+        counter(
+            "sirios_rag_embed_cache_total", tier="redis", outcome="hit" if vec else "miss"
+        )
+        return vec
+
+    def _l2_error(self, op: str) -> None:
+        counter("sirios_rag_embed_cache_total", tier="redis", outcome="error")
+        LOGGER.debug("Falha no %s do cache Redis de embeddings", op, exc_info=True)
+
+    # ---------- API ----------
+
+    def lookup(
+        self, model: str, texts: List[str]
+    ) -> Tuple[Tuple[str, str], List[str], Dict[int, List[float]]]:
+        """Resolve no L1; devolve (geração, textos normalizados, {idx: vetor})."""
+        generation = self._generation_for(model)
+        normalized = [normalize_query(t) for t in texts]
+        found: Dict[int, List[float]] = {}
+        for i, text in enumerate(normalized):
+            vec = self._l1_get((model, text))
+            if vec is not None:
+                found[i] = vec
+        return generation, normalized, found
+
+    def get_many(self, model: str, texts: List[str]) -> Tuple[Any, List[str], Dict[int, List[float]]]:
+        generation, normalized, found = self.lookup(model, texts)
+        if self._l2_enabled(self._redis):
+            for i, text in enumerate(normalized):
+                if i in found:
+                    continue
+                try:
+                    vec = self._l2_result(
+                        self._redis.get_json(self._redis_key(generation, text))
+                    )
+                except Exception:
+                    self._l2_error("get")
+                    continue
+                if vec is not None:
+                    found[i] = vec
+                    self._l1_put((model, text), vec)
+        return generation, normalized, found
+
+    async def aget_many(
+        self, model: str, texts: List[str]
+    ) -> Tuple[Any, List[str], Dict[int, List[float]]]:
+        generation, normalized, found = self.lookup(model, texts)
+        if self._l2_enabled(self._async_redis):
+            for i, text in enumerate(normalized):
+                if i in found:
+                    continue
+                try:
+                    vec = self._l2_result(
+                        await self._async_redis.get_json(self._redis_key(generation, text))
+                    )
+                except Exception:
+                    self._l2_error("get")
+                    continue
+                if vec is not None:
+                    found[i] = vec
+                    self._l1_put((model, text), vec)
+        return generation, normalized, found
+
+    def put_many(self, generation: Any, items: List[Tuple[str, List[float]]]) -> None:
+        model = generation[0]
+        for text, vec in items:
+            if not self._valid(vec):
+                continue
+            self._l1_put((model, text), vec)
+            if self._l2_enabled(self._redis):
+                try:
+                    self._redis.set_json(
+                        self._redis_key(generation, text), vec, self.ttl_seconds
+                    )
+                except Exception:
+                    self._l2_error("set")
+
+    async def aput_many(self, generation: Any, items: List[Tuple[str, List[float]]]) -> None:
+        model = generation[0]
+        for text, vec in items:
+            if not self._valid(vec):
+                continue
+            self._l1_put((model, text), vec)
+            if self._l2_enabled(self._async_redis):
+                try:
+                    await self._async_redis.set_json(
+                        self._redis_key(generation, text), vec, self.ttl_seconds
+                    )
+                except Exception:
+                    self._l2_error("set")
+
+
+QUERY_EMBED_CACHE = QueryEmbeddingCache()
+
+
+def _dedupe_misses(
+    texts: List[str], normalized: List[str], found: Dict[int, List[float]]
+) -> Tuple[List[str], List[str]]:
+    """Textos originais (um por chave normalizada) que ainda precisam ir ao modelo."""
+    seen: Dict[str, str] = {}
+    for i, text in enumerate(normalized):
+        if i not in found and text not in seen:
+            seen[text] = texts[i]
+    return list(seen.values()), list(seen.keys())
+
+
+def _merge(
+    normalized: List[str],
+    found: Dict[int, List[float]],
+    keys: List[str],
+    vectors: List[List[float]],
+) -> List[List[float]]:
+    fresh = dict(zip(keys, vectors))
+    return [found[i] if i in found else fresh[text] for i, text in enumerate(normalized)]
+
+
+class CachedEmbedder:
+    """
+    Embedder com o mesmo contrato do OllamaClient (``embed``/``aembed``, 1:1),
+    consultando o QueryEmbeddingCache antes de chamar o modelo.
+
+    Clientes sem ``model`` declarado (ex.: dublês de teste) passam direto.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        async_client: Any = None,
+        cache: Optional[QueryEmbeddingCache] = None,
+    ):
+        self.client = client
+        self.async_client = async_client
+        self.cache = cache or QUERY_EMBED_CACHE
+        self.model = getattr(client, "model", None)
+
+    def _cacheable(self, texts: List[str]) -> bool:
+        return isinstance(self.model, str) and bool(self.model) and bool(texts)
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        if not self._cacheable(texts):
+            return self.client.embed(texts)
+        generation, normalized, found = self.cache.get_many(self.model, texts)
+        misses, keys = _dedupe_misses(texts, normalized, found)
+        vectors = self.client.embed(misses) if misses else []
+        self.cache.put_many(generation, list(zip(keys, vectors)))
+        return _merge(normalized, found, keys, vectors)
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        client = self.async_client or self.client
+        if not self._cacheable(texts):
+            return await client.aembed(texts)
+        generation, normalized, found = await self.cache.aget_many(self.model, texts)
+        misses, keys = _dedupe_misses(texts, normalized, found)
+        vectors = await client.aembed(misses) if misses else []
+        await self.cache.aput_many(generation, list(zip(keys, vectors)))
+        return _merge(normalized, found, keys, vectors)
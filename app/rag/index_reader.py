@@ -2,14 +2,26 @@
 from __future__ import annotations
 
 import json
+import logging
 import math
+import os
+from collections import Counter
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
 
 from app.core.hotreload import get_manifest_hash
+from app.rag.ann import ExactBackend, load_backend
+
+LOGGER = logging.getLogger(__name__)
 
+_EMB_CACHE = {"key": None, "rows": None, "mtime": None, "index": None}
 
-_EMB_CACHE = {"key": None, "rows": None, "mtime": None}
+# Sidecar binário gerado por scripts/embeddings/embeddings_build.py ao lado do
+# embeddings.jsonl: matriz float32 pré-normalizada (.npy, lida via mmap) +
+# tabela (offset, length) de cada linha no JSONL + metadados com o manifest hash.
+SIDECAR_FORMAT = 1
 
 
 def _has_vec(row: Dict[str, Any]) -> bool:
@@ -21,11 +33,211 @@ def _has_vec(row: Dict[str, Any]) -> bool:
     )
 
 
-def _cos(a: List[float], b: List[float]) -> float:
-    dot = sum(x * y for x, y in zip(a, b))
-    na = math.sqrt(sum(x * x for x in a))
-    nb = math.sqrt(sum(x * x for x in b))
-    return (dot / (na * nb)) if (na > 0 and nb > 0) else 0.0
+def sidecar_paths(jsonl_path: Path) -> Dict[str, Path]:
+    stem = jsonl_path.with_suffix("")
+    return {
+        "vectors": Path(f"{stem}.vectors.npy"),
+        "offsets": Path(f"{stem}.offsets.npy"),
+        "meta": Path(f"{stem}.sidecar.json"),
+    }
+
+
+def _matrix_dim(rows: List[Dict[str, Any]]) -> int:
+    dims = Counter(len(r["embedding"]) for r in rows)
+    return dims.most_common(1)[0][0] if dims else 0
+
+
+def _normalized_matrix(vectors: List[List[float]], dim: int) -> np.ndarray:
+    matrix = np.asarray(vectors, dtype=np.float32).reshape(len(vectors), dim)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+
+def _read_jsonl(path: Path) -> List[Dict[str, Any]]:
+    rows: List[Dict[str, Any]] = []
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            rows.append(json.loads(line))
+    return rows
+
+
+class _VectorIndex:
+    """
+    Matriz float32 pré-normalizada (uma linha por chunk com vetor).
+
+    Construída uma vez por (path, manifest hash); a seleção dos candidatos
+    fica com o backend (exato ou ANN, ver app.rag.ann) e só os k vencedores
+    são materializados. A matriz pode vir do JSONL (em memória) ou do
+    sidecar (np.memmap).
+    """
+
+    def __init__(
+        self,
+        matrix: np.ndarray,
+        fetch_row: Callable[[int], Dict[str, Any]],
+        load_rows: Callable[[], List[Dict[str, Any]]],
+    ):
+        self.matrix = matrix
+        self.dim = int(matrix.shape[1]) if matrix.ndim == 2 else 0
+        self._fetch_row = fetch_row
+        self._load_rows = load_rows
+        self._rows: Optional[List[Dict[str, Any]]] = None
+        self.backend: Any = ExactBackend(matrix)
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict[str, Any]]) -> "_VectorIndex":
+        vec_rows = [r for r in rows if _has_vec(r)]
+        dim = _matrix_dim(vec_rows)
+        matrix_rows = [r for r in vec_rows if len(r["embedding"]) == dim]
+        if len(matrix_rows) != len(vec_rows):
+            LOGGER.warning(
+                "Embeddings com dimensão divergente ignorados na busca: %s de %s (dim=%s)",
+                len(vec_rows) - len(matrix_rows),
+                len(vec_rows),
+                dim,
+            )
+        matrix = _normalized_matrix([r["embedding"] for r in matrix_rows], dim)
+        index = cls(matrix, matrix_rows.__getitem__, lambda: rows)
+        index._rows = rows
+        return index
+
+    @property
+    def rows(self) -> List[Dict[str, Any]]:
+        """Todas as linhas do JSONL (no modo sidecar, carregadas sob demanda)."""
+        if self._rows is None:
+            self._rows = self._load_rows()
+        return self._rows
+
+    @property
+    def rows_loaded(self) -> Optional[List[Dict[str, Any]]]:
+        return self._rows
+
+    def top_k(
+        self, qvec: List[float], k: int, min_score: Optional[float]
+    ) -> List[Dict[str, Any]]:
+        n = self.matrix.shape[0]
+        k = min(int(k), n)
+        if k <= 0:
+            return []
+        q = np.asarray(qvec, dtype=np.float32)
+        if q.shape != (self.dim,):
+            LOGGER.warning(
+                "Vetor de consulta com dimensão %s incompatível com o índice (dim=%s)",
+                q.shape[0] if q.ndim == 1 else q.shape,
+                self.dim,
+            )
+            return []
+        qnorm = float(np.linalg.norm(q))
+        if qnorm > 0:
+            ids, scores = self.backend.search(q / qnorm, k)
+        else:
+            ids, scores = np.arange(k), np.zeros(k, dtype=np.float32)
+
+        ranked: List[Dict[str, Any]] = []
+        for i, raw_score in zip(ids, scores):
+            score = float(raw_score)
+            if min_score is not None and score < min_score:
+                break
+            ranked.append(dict(score=score, **self._fetch_row(int(i))))
+        return ranked
+
+
+class _JsonlRowReader:
+    """Lê uma linha do JSONL por (offset, length) via pread (thread-safe, sem seek)."""
+
+    def __init__(self, path: Path, offsets: np.ndarray):
+        self._fd = os.open(str(path), os.O_RDONLY)
+        self._offsets = offsets
+
+    def __call__(self, i: int) -> Dict[str, Any]:
+        start, length = self._offsets[i]
+        return json.loads(os.pread(self._fd, int(length), int(start)))
+
+    def __del__(self) -> None:
+        try:
+            os.close(self._fd)
+        except Exception:
+            pass
+
+
+def write_vector_sidecar(jsonl_path: str | Path, manifest_hash: str) -> Dict[str, Any]:
+    """
+    Gera o sidecar binário do ``embeddings.jsonl`` (chamado pelo embeddings_build).
+
+    Os metadados são gravados por último (rename atômico), então leitores só
+    enxergam um sidecar completo e amarrado ao manifest hash informado.
+    """
+    path = Path(jsonl_path)
+    spans: List[Tuple[int, int]] = []
+    vec_rows: List[Dict[str, Any]] = []
+    offset = 0
+    with path.open("rb") as f:
+        for raw in f:
+            length = len(raw)
+            if raw.strip():
+                row = json.loads(raw)
+                if _has_vec(row):
+                    vec_rows.append(row)
+                    spans.append((offset, length))
+            offset += length
+
+    dim = _matrix_dim(vec_rows)
+    kept = [i for i, r in enumerate(vec_rows) if len(r["embedding"]) == dim]
+    vectors = [vec_rows[i]["embedding"] for i in kept]
+    matrix = _normalized_matrix(vectors, dim)
+    offsets = np.asarray([spans[i] for i in kept], dtype=np.int64).reshape(len(kept), 2)
+
+    paths = sidecar_paths(path)
+    for name, array in (("vectors", matrix), ("offsets", offsets)):
+        tmp = paths[name].with_name(paths[name].name + ".tmp")
+        with tmp.open("wb") as fw:
+            np.save(fw, array)
+        os.replace(tmp, paths[name])
+
+    meta = {
+        "format": SIDECAR_FORMAT,
+        "manifest_hash": manifest_hash,
+        "jsonl_size": offset,
+        "count": len(kept),
+        "dim": dim,
+        "dtype": "float32",
+        "normalized": True,
+    }
+    tmp_meta = paths["meta"].with_name(paths["meta"].name + ".tmp")
+    tmp_meta.write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    os.replace(tmp_meta, paths["meta"])
+    return meta
+
+
+def _load_sidecar(path: Path, manifest_hash: str) -> Optional[_VectorIndex]:
+    paths = sidecar_paths(path)
+    if not paths["meta"].exists():
+        return None
+    try:
+        meta = json.loads(paths["meta"].read_text(encoding="utf-8"))
+        if (
+            meta.get("format") != SIDECAR_FORMAT
+            or meta.get("manifest_hash") != manifest_hash
+            or int(meta.get("jsonl_size", -1)) != path.stat().st_size
+        ):
+            LOGGER.info("Sidecar de embeddings desatualizado em %s; usando JSONL", path)
+            return None
+        matrix = np.load(paths["vectors"], mmap_mode="r")
+        offsets = np.load(paths["offsets"])
+        if matrix.shape != (int(meta["count"]), int(meta["dim"])) or offsets.shape != (
+            matrix.shape[0],
+            2,
+        ):
+            LOGGER.warning("Sidecar de embeddings inconsistente em %s; usando JSONL", path)
+            return None
+    except Exception:
+        LOGGER.warning("Falha ao abrir sidecar de embeddings em %s", path, exc_info=True)
+        return None
+
+    return _VectorIndex(
+        matrix, _JsonlRowReader(path, offsets), lambda: _read_jsonl(path)
+    )
 
 
 class EmbeddingStore:
@@ -44,12 +256,12 @@ class EmbeddingStore:
         except OSError:
             current_mtime = None
 
-        cached_rows = _EMB_CACHE.get("rows")
+        cached_index = _EMB_CACHE.get("index")
         cached_key = _EMB_CACHE.get("key")
         cached_mtime = _EMB_CACHE.get("mtime")
 
         if (
-            cached_rows is not None
+            cached_index is not None
             and cached_key == cache_key
             and (
                 current_mtime is None
@@ -57,31 +269,26 @@ class EmbeddingStore:
                 or math.isclose(cached_mtime, current_mtime)
             )
         ):
-            self._rows = cached_rows
+            self._index = cached_index
         else:
-            rows: List[Dict[str, Any]] = []
-            with self.path.open("r", encoding="utf-8") as f:
-                for line in f:
-                    rows.append(json.loads(line))
+            index = _load_sidecar(self.path, manifest_hash)
+            if index is None:
+                index = _VectorIndex.from_rows(_read_jsonl(self.path))
+            index.backend = load_backend(self.path, index.matrix, manifest_hash)
             _EMB_CACHE["key"] = cache_key
-            _EMB_CACHE["rows"] = rows
+            _EMB_CACHE["rows"] = index.rows_loaded
             _EMB_CACHE["mtime"] = current_mtime
-            self._rows = rows
+            _EMB_CACHE["index"] = index
+            self._index = index
 
     def rows_with_vectors(self) -> List[Dict[str, Any]]:
         """Retorna somente linhas com vetor não-vazio (sanity)."""
-        return [r for r in self._rows if _has_vec(r)]
+        return [r for r in self._index.rows if _has_vec(r)]
 
     def search_by_vector(
         self, qvec: List[float], k: int = 5, min_score: float | None = None
     ) -> List[Dict[str, Any]]:
-        rows = self.rows_with_vectors()  # <-- filtra vazios
-        scored = [(_cos(qvec, r["embedding"]), r) for r in rows]
-        scored.sort(key=lambda t: t[0], reverse=True)
-        ranked = [dict(score=s, **r) for s, r in scored]
-        if min_score is not None:
-            ranked = [r for r in ranked if float(r.get("score", 0.0)) >= min_score]
-        return ranked[:k]
+        return self._index.top_k(qvec, k, min_score)
 
     def search_by_text(self, text: str, embedder, k: int = 5) -> List[Dict[str, Any]]:
         """
@@ -1,12 +1,107 @@
 # app/rag/ollama_client.py
+"""
+Clientes HTTP do Ollama (embeddings e geração).
+
+O transporte é um ``httpx.Client``/``httpx.AsyncClient`` por base_url,
+compartilhado pelo processo: conexões keep-alive reaproveitadas entre
+chamadas do planner, do narrator e do indexer (sem um TCP connect por
+requisição). Tamanho do pool em ``OLLAMA_POOL_SIZE`` (default 16).
+
+Retries usam backoff exponencial com jitter (``backoff_s * 2**tentativa``,
+multiplicado por um fator em [0.5, 1.5) e limitado por
+``OLLAMA_BACKOFF_MAX_S``), para que clientes que falharam juntos não
+voltem juntos. Cada requisição alimenta
+``sirios_ollama_request_seconds{endpoint,outcome}``; cada nova tentativa,
+``sirios_ollama_retries_total{endpoint}``.
+"""
+
 from __future__ import annotations
 
+import asyncio
 import json
 import os
+import random
+import threading
 import time
-import urllib.error
-import urllib.request
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List
+
+import httpx
+
+from app.observability.metrics import emit_counter, emit_histogram
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except (TypeError, ValueError):
+        return default
+
+
+def _pool_limits() -> httpx.Limits:
+    size = max(1, _env_int("OLLAMA_POOL_SIZE", 16))
+    return httpx.Limits(max_connections=size, max_keepalive_connections=size)
+
+
+def _endpoint(path: str) -> str:
+    return path.rsplit("/", 1)[-1] or path
+
+
+def _observe(path: str, started: float, outcome: str) -> None:
+    try:
+        emit_histogram(
+            "sirios_ollama_request_seconds",
+            time.perf_counter() - started,
+            endpoint=_endpoint(path),
+            outcome=outcome,
+        )
+    except Exception:
+        pass
+
+
+def _count_retry(path: str) -> None:
+    try:
+        emit_counter("sirios_ollama_retries_total", endpoint=_endpoint(path))
+    except Exception:
+        pass
+
+
+# Um httpx.Client por base_url (keep-alive reaproveitado entre chamadas/threads).
+_SYNC_HTTP: Dict[str, httpx.Client] = {}
+_SYNC_HTTP_LOCK = threading.Lock()
+
+
+def _http(base_url: str, timeout: float) -> httpx.Client:
+    client = _SYNC_HTTP.get(base_url)
+    if client is None or client.is_closed:
+        with _SYNC_HTTP_LOCK:
+            client = _SYNC_HTTP.get(base_url)
+            if client is None or client.is_closed:
+                client = httpx.Client(
+                    base_url=base_url,
+                    timeout=timeout,
+                    limits=_pool_limits(),
+                    headers={"Content-Type": "application/json", "Accept": "application/json"},
+                )
+                _SYNC_HTTP[base_url] = client
+    return client
+
+
+def close_clients() -> None:
+    with _SYNC_HTTP_LOCK:
+        clients = list(_SYNC_HTTP.values())
+        _SYNC_HTTP.clear()
+    for client in clients:
+        try:
+            client.close()
+        except Exception:
+            pass
 
 
 class OllamaClient:
@@ -30,29 +125,37 @@ class OllamaClient:
         self.retries = int(retries)
         self.backoff_s = float(backoff_s)
 
+    def _backoff(self, attempt: int, path: str) -> None:
+        """Espera antes de tentar de novo; ``attempt`` = retries já feitos."""
+        _count_retry(path)
+        time.sleep(self._backoff_delay(attempt))
+
+    def _backoff_delay(self, attempt: int) -> float:
+        cap = _env_float("OLLAMA_BACKOFF_MAX_S", 8.0)
+        base = min(cap, self.backoff_s * (2**attempt))
+        return base * (0.5 + random.random())
+
     def _post(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
-        url = f"{self.base_url}{path}"
-        body = json.dumps(payload).encode("utf-8")
-        req = urllib.request.Request(
-            url,
-            data=body,
-            headers={"Content-Type": "application/json", "Accept": "application/json"},
-            method="POST",
-        )
+        client = _http(self.base_url, self.timeout)
+        started = time.perf_counter()
         try:
-            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
-                data = json.loads(resp.read().decode("utf-8"))
-                if not isinstance(data, dict):
-                    return {"error": f"invalid-json: {type(data)}"}
-                return data
-        except urllib.error.HTTPError as e:
-            try:
-                err = json.loads(e.read().decode("utf-8"))
-            except Exception:
-                err = {"error": f"http {e.code}"}
-            return {"error": err}
+            resp = client.post(path, json=payload, timeout=self.timeout)
         except Exception as e:
+            _observe(path, started, "error")
             return {"error": repr(e)}
+        try:
+            data = resp.json()
+        except Exception:
+            _observe(path, started, "error")
+            return {"error": f"http {resp.status_code}"}
+        if resp.status_code >= 400:
+            _observe(path, started, "error")
+            return {"error": data}
+        if not isinstance(data, dict):
+            _observe(path, started, "error")
+            return {"error": f"invalid-json: {type(data)}"}
+        _observe(path, started, "ok")
+        return data
 
     def _extract_vector(self, data: Dict[str, Any]) -> list[float]:
         """
@@ -82,16 +185,13 @@ class OllamaClient:
         last_resp: Dict[str, Any] | None = None
 
         for attempt in range(self.retries + 1):
+            if attempt:
+                self._backoff(attempt - 1, "/api/embed")
             payload = {"model": self.model, "input": texts}
             data = self._post("/api/embed", payload)
             last_resp = data
 
-            if "error" in data:
-                time.sleep(self.backoff_s)
-                continue
-
-            if not isinstance(data, dict):
-                time.sleep(self.backoff_s)
+            if "error" in data or not isinstance(data, dict):
                 continue
 
             arr = data.get("embeddings")
@@ -100,8 +200,6 @@ class OllamaClient:
                 if all(isinstance(v, list) and len(v) > 0 for v in arr):
                     return arr
 
-            time.sleep(self.backoff_s)
-
         meta = {
             "model": self.model,
             "base_url": self.base_url,
@@ -116,6 +214,16 @@ class OllamaClient:
             f"Ollama embeddings em lote vazios/inconsistentes: {json.dumps(meta, ensure_ascii=False)}"
         )
 
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """
+        Lote em /api/embed (com os retries do cliente), sem o fallback item a
+        item de ``embed``: a falha do lote sobe para quem chama (indexer, que
+        divide e reenfileira o lote por conta própria).
+        """
+        if not texts:
+            return []
+        return self._embed_batch(texts)
+
     def embed(self, texts: List[str]) -> List[List[float]]:
         """
         Garante 1:1 (len(vectors) == len(texts)).
@@ -142,11 +250,12 @@ class OllamaClient:
         for idx, t in enumerate(texts):
             last_resp: Dict[str, Any] | None = None
             for attempt in range(self.retries + 1):
+                if attempt:
+                    self._backoff(attempt - 1, "/api/embeddings")
                 payload = {"model": self.model, "prompt": t}
                 data = self._post("/api/embeddings", payload)
                 last_resp = data
                 if "error" in data:
-                    time.sleep(self.backoff_s)
                     continue
                 # tenta extrair vetor unitário...
                 vec = self._extract_vector(data)
@@ -159,8 +268,6 @@ class OllamaClient:
                     if arr and isinstance(arr[0], list) and len(arr[0]) > 0:
                         out.append(arr[0])
                         break
-
-                time.sleep(self.backoff_s)
             else:
                 # Falhou após retries
                 meta = {
@@ -194,8 +301,70 @@ class OllamaClient:
         Chama /api/generate do Ollama para respostas de linguagem.
         Não afeta call sites atuais (método opcional).
         """
+        payload = self._generate_payload(prompt, model, stream, options)
+        data = self._post("/api/generate", payload)
+        if "error" in data:
+            raise RuntimeError(f"Ollama generate error: {data['error']}")
+        # API do Ollama quando stream=False retorna 'response'
+        return str(data.get("response", "")) or ""
+
+    def generate_stream(
+        self,
+        prompt: str,
+        model: str | None = None,
+        **options: Any,
+    ) -> Iterator[str]:
+        """
+        /api/generate com ``stream=True``: devolve os fragmentos de texto à medida
+        que o Ollama os emite (NDJSON, um objeto por linha, até ``done: true``).
+        Erros de transporte/HTTP sobem como exceção, como em ``generate``.
+        """
+        payload = self._generate_payload(prompt, model, True, options)
+        client = _http(self.base_url, self.timeout)
+        path = "/api/generate"
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            with client.stream(
+                "POST",
+                path,
+                json=payload,
+                headers={"Accept": "application/x-ndjson"},
+                timeout=self.timeout,
+            ) as resp:
+                if resp.status_code >= 400:
+                    raise RuntimeError(f"Ollama generate error: http {resp.status_code}")
+                for line in resp.iter_lines():
+                    line = line.strip()
+                    if not line:
+                        continue
+                    data = json.loads(line)
+                    if not isinstance(data, dict):
+                        continue
+                    if "error" in data:
+                        raise RuntimeError(f"Ollama generate error: {data['error']}")
+                    chunk = data.get("response")
+                    if chunk:
+                        yield str(chunk)
+                    if data.get("done"):
+                        break
+            outcome = "ok"
+        finally:
+            _observe(path, started, outcome)
+
+    def _generate_payload(
+        self,
+        prompt: str,
+        model: str | None,
+        stream: bool,
+        options: Dict[str, Any],
+    ) -> Dict[str, Any]:
         gen_model = model or os.getenv("LLM_MODEL", "qwen2.5:7b")
-        payload = {"model": gen_model, "prompt": prompt, "stream": bool(stream)}
+        payload: Dict[str, Any] = {
+            "model": gen_model,
+            "prompt": prompt,
+            "stream": bool(stream),
+        }
         llm_options: Dict[str, Any] = {}
         if options:
             if options.get("temperature") is not None:
@@ -204,8 +373,126 @@ class OllamaClient:
                 llm_options["num_predict"] = options.get("max_tokens")
             if llm_options:
                 payload["options"] = llm_options
-        data = self._post("/api/generate", payload)
+        return payload
+
+
+# Um httpx.AsyncClient por base_url (keep-alive reaproveitado entre requests).
+_ASYNC_HTTP: Dict[str, httpx.AsyncClient] = {}
+
+
+def _async_http(base_url: str, timeout: float) -> httpx.AsyncClient:
+    client = _ASYNC_HTTP.get(base_url)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=timeout,
+            limits=_pool_limits(),
+            headers={"Content-Type": "application/json", "Accept": "application/json"},
+        )
+        _ASYNC_HTTP[base_url] = client
+    return client
+
+
+async def aclose_async_clients() -> None:
+    clients = list(_ASYNC_HTTP.values())
+    _ASYNC_HTTP.clear()
+    for client in clients:
+        try:
+            await client.aclose()
+        except Exception:
+            pass
+
+
+class AsyncOllamaClient(OllamaClient):
+    """
+    Variante asyncio (httpx) do OllamaClient para o caminho async do /ask.
+
+    Mesmas envs, mesmos contratos de embed/generate e mesma política de retry;
+    o socket fica em um AsyncClient compartilhado por base_url.
+    """
+
+    async def _apost(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        client = _async_http(self.base_url, self.timeout)
+        started = time.perf_counter()
+        try:
+            resp = await client.post(path, json=payload, timeout=self.timeout)
+        except Exception as e:
+            _observe(path, started, "error")
+            return {"error": repr(e)}
+        try:
+            data = resp.json()
+        except Exception:
+            _observe(path, started, "error")
+            return {"error": f"http {resp.status_code}"}
+        if resp.status_code >= 400:
+            _observe(path, started, "error")
+            return {"error": data}
+        if not isinstance(data, dict):
+            _observe(path, started, "error")
+            return {"error": f"invalid-json: {type(data)}"}
+        _observe(path, started, "ok")
+        return data
+
+    async def _abackoff(self, attempt: int, path: str) -> None:
+        _count_retry(path)
+        await asyncio.sleep(self._backoff_delay(attempt))
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        """Mesmo contrato de ``embed``: 1:1, batch em /api/embed com fallback unitário."""
+        if not texts:
+            return []
+
+        if len(texts) > 1:
+            for attempt in range(self.retries + 1):
+                if attempt:
+                    await self._abackoff(attempt - 1, "/api/embed")
+                data = await self._apost(
+                    "/api/embed", {"model": self.model, "input": texts}
+                )
+                arr = data.get("embeddings") if "error" not in data else None
+                if (
+                    isinstance(arr, list)
+                    and len(arr) == len(texts)
+                    and all(isinstance(v, list) and len(v) > 0 for v in arr)
+                ):
+                    return arr
+
+        out: List[List[float]] = []
+        for t in texts:
+            last_resp: Dict[str, Any] | None = None
+            for attempt in range(self.retries + 1):
+                if attempt:
+                    await self._abackoff(attempt - 1, "/api/embeddings")
+                data = await self._apost(
+                    "/api/embeddings", {"model": self.model, "prompt": t}
+                )
+                last_resp = data
+                vec = self._extract_vector(data) if "error" not in data else []
+                if isinstance(vec, list) and len(vec) > 0:
+                    out.append(vec)
+                    break
+            else:
+                meta = {
+                    "model": self.model,
+                    "base_url": self.base_url,
+                    "requested": 1,
+                    "ok": 0,
+                    "failed_indexes": [0],
+                    "raw_first": last_resp,
+                }
+                raise RuntimeError(
+                    f"Ollama embeddings vazios/inconsistentes: {json.dumps(meta, ensure_ascii=False)}"
+                )
+        return out
+
+    async def agenerate(
+        self,
+        prompt: str,
+        model: str | None = None,
+        **options: Any,
+    ) -> str:
+        payload = self._generate_payload(prompt, model, False, options)
+        data = await self._apost("/api/generate", payload)
         if "error" in data:
             raise RuntimeError(f"Ollama generate error: {data['error']}")
-        # API do Ollama quando stream=False retorna 'response'
         return str(data.get("response", "")) or ""
@@ -0,0 +1,53 @@
+"""Pré-aquece plan-cache e cache de métricas a partir das políticas de cache.
+
+Uso:
+
+    # entidades com refresh_at vencido (respeita o lock de slot no Redis)
+    python scripts/cache/warm.py
+
+    # entidades específicas, agora (ignora agenda e lock)
+    python scripts/cache/warm.py --entity fiis_quota_prices --entity fiis_overview --force
+
+    # só lista as perguntas que seriam reexecutadas
+    python scripts/cache/warm.py --entity fiis_quota_prices --dry-run
+"""
+
+import argparse
+import json
+from dataclasses import replace
+
+from app.cache.warmer import CacheWarmer
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entity", action="append", help="entidade (repetível)")
+    parser.add_argument("--top-n", type=int, help="sobrescreve warmer.top_n")
+    parser.add_argument("--window", help="sobrescreve warmer.window (ex.: 24h, 7d)")
+    parser.add_argument("--force", action="store_true", help="ignora agenda e lock de slot")
+    parser.add_argument("--dry-run", action="store_true", help="só lista as perguntas")
+    args = parser.parse_args()
+
+    from app.core.context import cache, orchestrator, policies
+
+    warmer = CacheWarmer(orchestrator, policies, cache)
+    overrides = {}
+    if args.top_n is not None:
+        overrides["top_n"] = args.top_n
+    if args.window:
+        overrides["window"] = args.window
+    if overrides:
+        warmer.config = replace(warmer.config, **overrides)
+
+    if args.dry_run:
+        entities = args.entity or warmer.entities()
+        plan = {entity: warmer.questions_for(entity) for entity in entities}
+        print(json.dumps(plan, ensure_ascii=False, indent=2))
+        return
+
+    report = warmer.run_once(entities=args.entity, force=args.force)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script: ann_recall_bench.py
+Purpose: Medir recall@k e latência do backend ANN (rag.index) contra a busca exata.
+Compliance: Guardrails Araquem v2.1.1
+
+Consultas: por padrão, linhas amostradas do próprio store (com ruído gaussiano,
+sem rede); com --eval, as perguntas do rag_eval_set.json via OllamaClient.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+from app.rag.ann import ExactBackend
+from app.rag.index_reader import EmbeddingStore
+from scripts.embeddings.rag_retrieval_eval import load_eval_set, recall_at_k
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="ANN vs exact recall benchmark")
+    parser.add_argument(
+        "--index",
+        default="data/embeddings/store/embeddings.jsonl",
+        help="Embeddings store JSONL",
+    )
+    parser.add_argument("--k", type=int, default=10, help="Top-K for retrieval")
+    parser.add_argument("--queries", type=int, default=200, help="Sampled queries")
+    parser.add_argument("--noise", type=float, default=0.05, help="Query noise (std)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--eval", help="Use rag_eval_set.json questions (needs Ollama)")
+    return parser.parse_args()
+
+
+def _percentile(values: List[float], q: float) -> float:
+    return float(np.percentile(values, q)) if values else 0.0
+
+
+def _unit(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+def sample_queries(matrix: np.ndarray, n: int, noise: float, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    picks = rng.choice(matrix.shape[0], size=min(n, matrix.shape[0]), replace=False)
+    base = np.asarray(matrix[picks], dtype=np.float32)
+    jitter = rng.normal(0.0, noise, size=base.shape).astype(np.float32)
+    return _unit(base + jitter)
+
+
+def eval_queries(path: str) -> np.ndarray:
+    from app.rag.ollama_client import OllamaClient
+
+    questions = [str(item.get("q") or "").strip() for item in load_eval_set(path)]
+    vectors = OllamaClient().embed([q for q in questions if q])
+    return _unit(np.asarray(vectors, dtype=np.float32))
+
+
+def bench(backend: Any, exact: ExactBackend, queries: np.ndarray, k: int) -> Dict[str, Any]:
+    recalls: List[float] = []
+    latencies: List[float] = []
+    exact_latencies: List[float] = []
+    for q in queries:
+        t0 = time.perf_counter()
+        truth, _ = exact.search(q, k)
+        exact_latencies.append((time.perf_counter() - t0) * 1000.0)
+
+        t0 = time.perf_counter()
+        got, _ = backend.search(q, k)
+        latencies.append((time.perf_counter() - t0) * 1000.0)
+
+        recalls.append(
+            recall_at_k([str(i) for i in truth], [str(i) for i in got], k)
+        )
+    return {
+        "backend": getattr(backend, "name", type(backend).__name__),
+        "queries": len(queries),
+        "k": k,
+        f"recall_at_{k}": round(sum(recalls) / max(1, len(recalls)), 6),
+        "p50_ms": round(_percentile(latencies, 50), 4),
+        "p95_ms": round(_percentile(latencies, 95), 4),
+        "exact_p50_ms": round(_percentile(exact_latencies, 50), 4),
+        "exact_p95_ms": round(_percentile(exact_latencies, 95), 4),
+    }
+
+
+def main() -> None:
+    args = parse_args()
+    path = Path(args.index)
+    store = EmbeddingStore(str(path))
+    # backend já resolvido pelo EmbeddingStore (rag.index + artefato válido)
+    matrix = store._index.matrix
+    backend = store._index.backend
+    exact = ExactBackend(matrix)
+
+    if args.eval:
+        queries = eval_queries(args.eval)
+    else:
+        queries = sample_queries(matrix, args.queries, args.noise, args.seed)
+
+    print("[ann-bench]", json.dumps(bench(backend, exact, queries, args.k)))
+
+
+if __name__ == "__main__":
+    main()
@@ -7,9 +7,13 @@ Compliance: Guardrails Araquem v2.1.1
 """
 
 from __future__ import annotations
-import os, sys, re, json, argparse, hashlib, yaml, time, logging
+import os, sys, re, json, argparse, hashlib, random, yaml, time, logging
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Iterable, List, Dict, Any
+from typing import Iterable, List, Dict, Any, Tuple
+from app.core.hotreload import get_manifest_hash
+from app.rag.ann import build_ann_index, load_ann_settings
+from app.rag.index_reader import sidecar_paths, write_vector_sidecar
 from app.rag.ollama_client import OllamaClient
 from datetime import datetime, timezone
 
@@ -82,7 +86,200 @@ def _sha(s: str) -> str:
     return hashlib.sha256(s.encode("utf-8")).hexdigest()
 
 
-def build_index(index_path: str, out_dir: str, client: OllamaClient) -> Dict[str, Any]:
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except (TypeError, ValueError):
+        return default
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[k]
+
+
+def _embed_call(
+    client: OllamaClient, texts: List[str], retries: int, backoff_s: float
+) -> Tuple[List[List[float]], float, int]:
+    """
+    Um POST de lote (``embed_batch``, sem fallback item a item) com retry
+    próprio (backoff exponencial com jitter); falhas sobem para o split.
+    Retorna (vetores, latência da tentativa bem-sucedida, retries usados).
+    """
+    last: Exception | None = None
+    for attempt in range(retries + 1):
+        if attempt:
+            time.sleep(backoff_s * (2 ** (attempt - 1)) * (0.5 + random.random()))
+        t0 = time.perf_counter()
+        try:
+            embs = client.embed_batch(texts)
+            if len(embs) != len(texts) or not all(
+                isinstance(v, list) and v for v in embs
+            ):
+                raise RuntimeError(
+                    f"embed retornou {len(embs)} vetores (vazios?) para {len(texts)} textos"
+                )
+            return embs, time.perf_counter() - t0, attempt
+        except Exception as e:
+            last = e
+    raise RuntimeError(str(last))
+
+
+def _embed_concurrent(
+    client: OllamaClient,
+    texts: List[str],
+    *,
+    workers: int,
+    batch_size: int,
+    max_batch_size: int,
+    retries: int,
+    backoff_s: float,
+) -> Tuple[List[List[float]], Dict[str, Any]]:
+    """
+    Embeda ``texts`` com até ``workers`` requisições em voo.
+
+    O tamanho de lote é adaptativo: cresce ``batch_size`` a cada lote bem
+    sucedido (até ``max_batch_size``) e cai pela metade quando um lote falha;
+    o lote que falhou é dividido ao meio e reenfileirado, até o item único,
+    que então grava vetor vazio (diagnóstico posterior, como antes). Os
+    vetores voltam na ordem de ``texts``.
+    """
+    vectors: List[List[float]] = [[] for _ in texts]
+    latencies: List[float] = []
+    stats = {"batches": 0, "retries": 0, "splits": 0, "failed": 0}
+    base = max(1, batch_size)
+    ceiling = max(base, max_batch_size)
+    size = base
+    cursor = 0
+    # faixas (início, fim) de lotes divididos aguardando nova tentativa
+    requeued: List[Tuple[int, int]] = []
+    t_start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        in_flight: Dict[Future, Tuple[int, int]] = {}
+
+        def _submit() -> None:
+            nonlocal cursor
+            while len(in_flight) < max(1, workers):
+                if requeued:
+                    start, end = requeued.pop(0)
+                elif cursor < len(texts):
+                    start, end = cursor, min(cursor + size, len(texts))
+                    cursor = end
+                else:
+                    return
+                fut = pool.submit(_embed_call, client, texts[start:end], retries, backoff_s)
+                in_flight[fut] = (start, end)
+
+        _submit()
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for fut in done:
+                start, end = in_flight.pop(fut)
+                try:
+                    embs, latency, used = fut.result()
+                except Exception as e:
+                    size = max(1, size // 2)
+                    if end - start > 1:
+                        mid = (start + end) // 2
+                        requeued.extend([(start, mid), (mid, end)])
+                        stats["splits"] += 1
+                        print(
+                            f"[warn] embed lote falhou ({end - start} itens); dividindo. Detalhe: {e}"
+                        )
+                    else:
+                        # grava vetor vazio para preservar alinhamento e permitir diagnosticar depois
+                        stats["failed"] += 1
+                        print(f"[error] embed falhou no item {start}: {e}")
+                    continue
+                vectors[start:end] = embs
+                latencies.append(latency)
+                stats["batches"] += 1
+                stats["retries"] += used
+                size = min(ceiling, size + base)
+            _submit()
+
+    elapsed = time.perf_counter() - t_start
+    report = {
+        "chunks": len(texts),
+        "workers": max(1, workers),
+        "seconds": round(elapsed, 3),
+        "chunks_per_s": round(len(texts) / elapsed, 2) if elapsed > 0 else 0.0,
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 1),
+        "final_batch_size": size,
+        **stats,
+    }
+    return vectors, report
+
+
+def _load_previous_vectors(outp: Path, model: str) -> Dict[str, List[float]]:
+    """
+    Vetores do build anterior indexados pelo sha do chunk. Só valem sob o
+    mesmo ``embedding_model`` do manifest anterior; vetores vazios (falha de
+    embed) não são reaproveitados.
+    """
+    manifest_path = outp / "manifest.json"
+    out_jsonl = outp / "embeddings.jsonl"
+    if not manifest_path.exists() or not out_jsonl.exists():
+        return {}
+    try:
+        prev_manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    except Exception:
+        logger.warning("[incremental] manifest anterior ilegível; rebuild completo")
+        return {}
+    prev_model = prev_manifest.get("embedding_model")
+    if prev_model != model:
+        logger.info(
+            "[incremental] embedding_model mudou (%s → %s); rebuild completo",
+            prev_model,
+            model,
+        )
+        return {}
+
+    previous: Dict[str, List[float]] = {}
+    with out_jsonl.open("r", encoding="utf-8") as fr:
+        for line in fr:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rec = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            sha = rec.get("sha")
+            emb = rec.get("embedding")
+            if isinstance(sha, str) and isinstance(emb, list) and emb:
+                previous[sha] = emb
+    return previous
+
+
+def build_index(
+    index_path: str, out_dir: str, client: OllamaClient, incremental: bool = True
+) -> Dict[str, Any]:
+    """
+    Regera embeddings.jsonl/manifest.json (+ sidecar e ANN).
+
+    Com ``incremental`` (padrão), vetores do build anterior são reaproveitados
+    por sha do chunk quando o ``embedding_model`` não mudou: só chunks novos
+    ou alterados vão para o Ollama. O retorno traz ``reused``/``embedded``/
+    ``deleted`` (chunks do build anterior que sumiram) e, em ``embed``, o
+    relatório de vazão do pool (chunks/s, p95 por requisição).
+
+    Pool de embedding (env): ``EMBED_WORKERS`` (requisições em voo),
+    ``EMBED_BATCH_SIZE`` (lote inicial e passo de crescimento),
+    ``EMBED_BATCH_MAX``, ``EMBED_RETRIES`` e ``EMBED_BACKOFF_S``.
+    """
     idx_path = Path(index_path)
     idx = yaml.safe_load(idx_path.read_text(encoding="utf-8"))
     version = idx.get("version", 1)
@@ -108,78 +305,84 @@ def build_index(index_path: str, out_dir: str, client: OllamaClient) -> Dict[str
     }
 
     logger.info(
-        "embeddings_build: index=%s, out=%s, model=%s, chunk=%s/%s",
+        "embeddings_build: index=%s, out=%s, model=%s, chunk=%s/%s, incremental=%s",
         idx_path,
         out_dir,
         model,
         max_chars,
         overlap,
+        incremental,
     )
 
-    total_chunks = 0
-    vector_dim: int | None = None
-    B = int(os.getenv("EMBED_BATCH_SIZE", "8"))
-    with out_jsonl.open("w", encoding="utf-8") as fw:
-        for item in include:
-            doc_id = str(item.get("id") or "")
-            p = Path(item.get("path") or "")
-            tags = item.get("tags") or []
-            if not doc_id or not p.exists():
-                print(f"[skip] {doc_id or '(sem id)'} → not found: {p}")
-                continue
+    previous = _load_previous_vectors(outp, model) if incremental else {}
+    previous_shas = set(previous)
+    seen_shas: set[str] = set()
+    reused = 0
 
-            text = _read_text(p)
-            if not text.strip():
-                print(f"[skip] {doc_id} → empty")
-                continue
+    # 1) lê e fatia todos os documentos
+    docs: List[Dict[str, Any]] = []
+    for item in include:
+        doc_id = str(item.get("id") or "")
+        p = Path(item.get("path") or "")
+        tags = item.get("tags") or []
+        if not doc_id or not p.exists():
+            print(f"[skip] {doc_id or '(sem id)'} → not found: {p}")
+            continue
 
-            chunks = _chunk(text, max_chars=max_chars, overlap=overlap)
-            vectors: List[List[float]] = []
-            # embarca em lotes pequenos p/ não estourar payload (configurável via EMBED_BATCH_SIZE)
-            for i in range(0, len(chunks), B):
-                batch = chunks[i : i + B]
+        text = _read_text(p)
+        if not text.strip():
+            print(f"[skip] {doc_id} → empty")
+            continue
 
-                try:
-                    embs = client.embed(batch)
-                except RuntimeError as e:
-                    # fallback item-a-item quando batch falhar
-                    print(
-                        f"[warn] embed batch falhou ({len(batch)} itens). Fallback item-a-item. Detalhe: {e}"
-                    )
-                    embs = []
-                    for j, t in enumerate(batch):
-                        try:
-                            single = client.embed([t])
-                            if (
-                                not single
-                                or not isinstance(single, list)
-                                or not single[0]
-                            ):
-                                raise RuntimeError("single empty")
-                            embs.append(single[0])
-                        except Exception as ee:
-                            # grava vetor vazio para preservar alinhamento e permitir diagnosticar depois
-                            print(
-                                f"[error] embed falhou no item {i+j} (doc={doc_id}): {ee}"
-                            )
-                            embs.append([])
-                # se vier tamanho diferente, mantemos alinhamento, mas marcamos vazios
-                if len(embs) != len(batch):
-                    print(
-                        f"[warn] embed retornou {len(embs)} para {len(batch)}. Normalizando com vetores vazios."
-                    )
-                    while len(embs) < len(batch):
-                        embs.append([])
-                    if len(embs) > len(batch):
-                        embs = embs[: len(batch)]
-                vectors.extend(embs)
+        chunks = _chunk(text, max_chars=max_chars, overlap=overlap)
+        shas = [_sha(c) for c in chunks]
+        seen_shas.update(shas)
+        reused += sum(1 for sha in shas if sha in previous)
+        docs.append(
+            {"id": doc_id, "path": p, "tags": tags, "text": text, "chunks": chunks, "shas": shas}
+        )
+
+    # 2) só chunks sem vetor reaproveitável vão para o Ollama (um por sha),
+    #    em paralelo (EMBED_WORKERS) e com lote adaptativo
+    pending: Dict[str, str] = {}
+    for doc in docs:
+        for c, sha in zip(doc["chunks"], doc["shas"]):
+            if sha not in previous and sha not in pending:
+                pending[sha] = c
+    embedded = len(pending)
+    embed_report: Dict[str, Any] = {"chunks": 0}
+    if pending:
+        fresh, embed_report = _embed_concurrent(
+            client,
+            list(pending.values()),
+            workers=_env_int("EMBED_WORKERS", 4),
+            batch_size=_env_int("EMBED_BATCH_SIZE", 8),
+            max_batch_size=_env_int("EMBED_BATCH_MAX", 64),
+            retries=_env_int("EMBED_RETRIES", 2),
+            backoff_s=_env_float("EMBED_BACKOFF_S", 0.5),
+        )
+        for sha, emb in zip(pending, fresh):
+            if isinstance(emb, list) and emb:
+                previous[sha] = emb
+        logger.info("[embed] %s", json.dumps(embed_report, ensure_ascii=False))
+
+    # 3) grava na ordem do índice
+    total_chunks = 0
+    vector_dim: int | None = None
+    # grava em arquivo temporário: um build interrompido não destrói o anterior
+    tmp_jsonl = out_jsonl.with_name(out_jsonl.name + ".tmp")
+    with tmp_jsonl.open("w", encoding="utf-8") as fw:
+        for doc in docs:
+            doc_id, p, tags = doc["id"], doc["path"], doc["tags"]
+            chunks, shas = doc["chunks"], doc["shas"]
+            vectors = [previous.get(sha, []) for sha in shas]
 
             for emb in vectors:
                 if isinstance(emb, list) and emb and vector_dim is None:
                     vector_dim = len(emb)
 
             assert len(vectors) == len(chunks)
-            for k, (c, v) in enumerate(zip(chunks, vectors)):
+            for k, (c, sha, v) in enumerate(zip(chunks, shas, vectors)):
                 entity_name = _extract_entity_from_tags(tags)
                 # Preserva o doc_id declarado, mas prefixa quando houver entidade
                 base_doc_id = doc_id
@@ -197,7 +400,7 @@ def build_index(index_path: str, out_dir: str, client: OllamaClient) -> Dict[str
                     "entity": entity_name,  # útil p/ diagnósticos; não é obrigatório p/ o hints
                     "path": str(p),
                     "tags": tags,
-                    "sha": _sha(c),
+                    "sha": sha,
                     "text": c,
                     "embedding": v if isinstance(v, list) else [],
                 }
@@ -210,9 +413,11 @@ def build_index(index_path: str, out_dir: str, client: OllamaClient) -> Dict[str
                     "path": str(p),
                     "tags": tags,
                     "chunks": len(chunks),
-                    "sha_all": _sha(text),
+                    "sha_all": _sha(doc["text"]),
                 }
             )
+    os.replace(tmp_jsonl, out_jsonl)
+    deleted = len(previous_shas - seen_shas)
 
     manifest_path = Path(out_dir) / "manifest.json"
     refresh_epoch = int(time.time())
@@ -220,6 +425,12 @@ def build_index(index_path: str, out_dir: str, client: OllamaClient) -> Dict[str
     if vector_dim is not None:
         manifest["vector_dimension"] = vector_dim
     manifest["total_chunks"] = total_chunks
+    manifest["incremental"] = {
+        "enabled": incremental,
+        "reused": reused,
+        "embedded": embedded,
+        "deleted": deleted,
+    }
     logger.info(
         "embeddings_build: index=%s, vectors=%d, dim=%s, generated_at=%s, last_refresh_epoch=%d",
         idx_path,
@@ -228,20 +439,98 @@ def build_index(index_path: str, out_dir: str, client: OllamaClient) -> Dict[str
         manifest["generated_at"],
         refresh_epoch,
     )
+    logger.info(
+        "[incremental] reused=%d embedded=%d deleted=%d", reused, embedded, deleted
+    )
     manifest_path.write_text(
         json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8"
     )
     logger.info("[manifest] updated %s", manifest_path)
+    sidecar = build_sidecar(out_dir)
+    ann = build_ann(out_dir)
     logger.info("[done] %d chunks → %s", total_chunks, out_jsonl)
-    return {"chunks": total_chunks, "out": str(out_jsonl)}
+    return {
+        "chunks": total_chunks,
+        "out": str(out_jsonl),
+        "reused": reused,
+        "embedded": embedded,
+        "deleted": deleted,
+        "embed": embed_report,
+        "sidecar": sidecar,
+        "ann": ann,
+    }
+
+
+def build_sidecar(out_dir: str) -> Dict[str, Any]:
+    """
+    Grava o sidecar binário (matriz float32 + offsets) amarrado ao manifest hash.
+    O runtime (EmbeddingStore) faz mmap dele e dispensa o parse do JSONL.
+    """
+    out_jsonl = Path(out_dir) / "embeddings.jsonl"
+    manifest_hash = get_manifest_hash(str(Path(out_dir) / "manifest.json"))
+    meta = write_vector_sidecar(out_jsonl, manifest_hash)
+    logger.info(
+        "[sidecar] %d vetores dim=%s manifest_hash=%s",
+        meta["count"],
+        meta["dim"],
+        manifest_hash,
+    )
+    return meta
+
+
+def build_ann(out_dir: str) -> Dict[str, Any]:
+    """
+    Constrói o índice ANN selecionado em rag.yaml (rag.index.backend) sobre a
+    matriz do sidecar. Abaixo de rag.index.min_rows o runtime segue exato.
+    """
+    import numpy as np
+
+    out_jsonl = Path(out_dir) / "embeddings.jsonl"
+    manifest_hash = get_manifest_hash(str(Path(out_dir) / "manifest.json"))
+    settings = load_ann_settings()
+    matrix = np.load(sidecar_paths(out_jsonl)["vectors"], mmap_mode="r")
+    t0 = time.perf_counter()
+    meta = build_ann_index(out_jsonl, matrix, manifest_hash, settings)
+    logger.info(
+        "[ann] backend=%s (pedido=%s) %d vetores em %.2fs",
+        meta["backend"],
+        settings["backend"],
+        meta["count"],
+        time.perf_counter() - t0,
+    )
+    return meta
 
 
 if __name__ == "__main__":
     # Configura logging apenas quando rodar como script CLI
     logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(message)s")
     ap = argparse.ArgumentParser()
-    ap.add_argument("--index", required=True)
+    ap.add_argument("--index")
     ap.add_argument("--out", required=True)
+    ap.add_argument(
+        "--sidecar-only",
+        action="store_true",
+        help="Regrava apenas o sidecar binário a partir do embeddings.jsonl existente",
+    )
+    ap.add_argument(
+        "--ann-only",
+        action="store_true",
+        help="Reconstrói apenas o índice ANN (rag.index) a partir do sidecar existente",
+    )
+    ap.add_argument(
+        "--full",
+        action="store_true",
+        help="Reembeda todos os chunks, ignorando os vetores do build anterior",
+    )
     args = ap.parse_args()
-    client = OllamaClient()
-    build_index(args.index, args.out, client)
+    if args.sidecar_only:
+        build_sidecar(args.out)
+        build_ann(args.out)
+    elif args.ann_only:
+        build_ann(args.out)
+    else:
+        if not args.index:
+            ap.error("--index é obrigatório (exceto com --sidecar-only/--ann-only)")
+        # retry/backoff ficam no pool do build (EMBED_RETRIES/EMBED_BACKOFF_S)
+        client = OllamaClient(retries=0)
+        build_index(args.index, args.out, client, incremental=not args.full)
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script: bench_format_rows.py
+Purpose: Medir o CPU de format_rows com plano de colunas compilado vs detecção
+         de formatter célula a célula (comportamento anterior).
+Compliance: Guardrails Araquem v2.1.1
+
+Gera N linhas sintéticas (default 10k) com as colunas declaradas em
+data/entities/<entidade>/<entidade>.yaml; o tipo de cada valor segue o
+formatter detectado para a coluna (data, decimal ou texto).
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import json
+import statistics
+import time
+from decimal import Decimal
+from typing import Any, Callable, Dict, List
+
+from app.formatter import rows as rows_mod
+from app.utils.filecache import load_yaml_cached
+
+DEFAULT_ENTITIES = ["fiis_quota_prices", "fiis_financials_snapshot"]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="format_rows CPU benchmark")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--entity", action="append", help="entidade (repetível)")
+    return parser.parse_args()
+
+
+def entity_columns(entity: str) -> List[str]:
+    cfg = load_yaml_cached(str(rows_mod._entity_yaml_path(entity))) or {}
+    cols = cfg.get("columns") or []
+    return [c["name"] if isinstance(c, dict) else str(c) for c in cols]
+
+
+def synthetic_rows(columns: List[str], n: int) -> List[Dict[str, Any]]:
+    base = dt.date(2024, 1, 2)
+    kinds = {}
+    for col in columns:
+        fmt = rows_mod._detect_formatter(col)
+        if fmt is None:
+            kinds[col] = "text"
+        elif fmt in (rows_mod._format_date, rows_mod._format_date_br):
+            kinds[col] = "date"
+        else:
+            kinds[col] = "number"
+    out = []
+    for i in range(n):
+        row: Dict[str, Any] = {}
+        for col in columns:
+            kind = kinds[col]
+            if kind == "date":
+                row[col] = base + dt.timedelta(days=i % 3650)
+            elif kind == "number":
+                row[col] = Decimal(1000 + i) / Decimal(7)
+            else:
+                row[col] = f"HGLG11-{i % 97}"
+        out.append(row)
+    return out
+
+
+def legacy_format_rows(rows: List[Dict[str, Any]], columns: List[str]) -> List[Dict[str, Any]]:
+    # comportamento anterior: _detect_formatter por célula
+    out = []
+    for r in rows:
+        item = {c: r.get(c) for c in columns}
+        meta = r.get("meta") if isinstance(r, dict) else None
+        metric_key = meta.get("metric_key") if isinstance(meta, dict) else None
+        if metric_key and "value" in item:
+            item["value"] = rows_mod.format_metric_value(metric_key, item.get("value"))
+        for col_name, col_value in list(item.items()):
+            if col_value is None:
+                continue
+            formatter = rows_mod._detect_formatter(col_name)
+            if formatter:
+                item[col_name] = formatter(col_value)
+        out.append(item)
+    return out
+
+
+def cpu_ms(fn: Callable[[], object], rounds: int) -> List[float]:
+    samples: List[float] = []
+    for _ in range(rounds):
+        t0 = time.process_time()
+        fn()
+        samples.append((time.process_time() - t0) * 1e3)
+    return samples
+
+
+def summary(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "mean_ms": round(statistics.fmean(ordered), 1),
+        "min_ms": round(ordered[0], 1),
+    }
+
+
+def main() -> None:
+    args = parse_args()
+    report = {}
+    for entity in args.entity or DEFAULT_ENTITIES:
+        columns = entity_columns(entity)
+        rows = synthetic_rows(columns, args.rows)
+        assert legacy_format_rows(rows[:50], columns) == rows_mod.format_rows(rows[:50], columns)
+
+        legacy = summary(cpu_ms(lambda: legacy_format_rows(rows, columns), args.rounds))
+        planned = summary(cpu_ms(lambda: rows_mod.format_rows(rows, columns), args.rounds))
+        saved = legacy["mean_ms"] - planned["mean_ms"]
+        report[entity] = {
+            "columns": len(columns),
+            "per_cell": legacy,
+            "column_plan": planned,
+            "saved_pct": round(100.0 * saved / legacy["mean_ms"], 1) if legacy["mean_ms"] else 0.0,
+        }
+    print(
+        "[format-rows-bench]",
+        json.dumps({"rows": args.rows, "rounds": args.rounds, "entities": report}),
+    )
+
+
+if __name__ == "__main__":
+    main()
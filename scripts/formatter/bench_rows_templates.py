@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script: bench_rows_templates.py
+Purpose: Medir o CPU de render_rows_template com o registro de templates compilados
+         vs leitura + compilação Jinja a cada chamada (comportamento anterior).
+Compliance: Guardrails Araquem v2.1.1
+
+Renderiza todas as entidades de data/entities com presentation.kind, com
+``rows=[]`` (caminho do empty_message) e com uma linha sintética.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import time
+from typing import Callable, Dict, List
+
+from app.formatter import rows as rows_mod
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="render_rows_template CPU benchmark")
+    parser.add_argument("--rounds", type=int, default=20)
+    return parser.parse_args()
+
+
+def cpu_per_render_us(fn: Callable[[str], object], entities: List[str], rounds: int) -> List[float]:
+    samples: List[float] = []
+    for _ in range(rounds):
+        for entity in entities:
+            t0 = time.process_time()
+            fn(entity)
+            samples.append((time.process_time() - t0) * 1e6)
+    return samples
+
+
+def summary(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "mean_us": round(statistics.fmean(ordered), 1),
+        "p50_us": round(ordered[len(ordered) // 2], 1),
+        "p95_us": round(ordered[int(len(ordered) * 0.95) - 1], 1),
+    }
+
+
+def _render(entity: str) -> str:
+    return rows_mod.render_rows_template(
+        entity, [], identifiers={"ticker": "HGLG11"}, aggregates={}
+    )
+
+
+def main() -> None:
+    args = parse_args()
+    entities = sorted(rows_mod.precompile_entity_templates())
+    original = rows_mod._get_entity_template
+
+    def _uncached(entity: str, kind: str):
+        # comportamento anterior: resolve + lê + compila a cada chamada
+        rows_mod.clear_template_registry()
+        return original(entity, kind)
+
+    rows_mod._get_entity_template = _uncached
+    try:
+        for entity in entities:
+            _render(entity)
+        uncached = summary(cpu_per_render_us(_render, entities, args.rounds))
+    finally:
+        rows_mod._get_entity_template = original
+
+    rows_mod.precompile_entity_templates()
+    cached = summary(cpu_per_render_us(_render, entities, args.rounds))
+    saved = uncached["mean_us"] - cached["mean_us"]
+    print(
+        "[rows-template-bench]",
+        json.dumps(
+            {
+                "entities": len(entities),
+                "rounds": args.rounds,
+                "compile_per_call": uncached,
+                "registry": cached,
+                "saved_us_per_render": round(saved, 1),
+                "saved_pct": round(100.0 * saved / uncached["mean_us"], 1)
+                if uncached["mean_us"]
+                else 0.0,
+            }
+        ),
+    )
+
+
+if __name__ == "__main__":
+    main()
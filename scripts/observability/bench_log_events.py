@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script: bench_log_events.py
+Purpose: Medir o overhead de alocação/CPU dos logs estruturados do planner por pergunta.
+Compliance: Guardrails Araquem v2.1.1
+
+Roda Planner.explain sobre as perguntas das suítes de qualidade com os loggers
+``planner.*`` em WARNING (INFO desligado) e em INFO (eventos emitidos para um
+NullHandler), reportando CPU, pico de alocação (tracemalloc) e, por pergunta,
+quantos eventos foram chamados (= payloads que o código antigo montava sempre)
+vs quantos payloads foram de fato montados. O RAG do planner fica offline.
+"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import logging
+import statistics
+import time
+import tracemalloc
+from typing import Dict, List
+
+from app.observability import log_events
+from app.planner import planner as planner_mod
+from app.planner import ticker_index as ticker_index_mod
+
+ONTOLOGY_PATH = "data/ontology/entity.yaml"
+LOGGERS = ("planner.explain", "planner.ticker_index")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Structured logging overhead benchmark")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--payloads", default="data/ops/quality/payloads/*.json")
+    parser.add_argument("--detail", action="store_true", help="Usa explain completo (detail=True)")
+    return parser.parse_args()
+
+
+def load_questions(pattern: str) -> List[str]:
+    questions: List[str] = []
+    for path in sorted(glob.glob(pattern)):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        for item in data.get("payloads") or []:
+            if isinstance(item, dict) and item.get("question"):
+                questions.append(str(item["question"]))
+    return questions
+
+
+def set_level(level: int) -> None:
+    for name in LOGGERS:
+        logger = logging.getLogger(name)
+        logger.setLevel(level)
+        logger.propagate = False
+        if not logger.handlers:
+            logger.addHandler(logging.NullHandler())
+
+
+class EventCounter:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.built = 0
+
+    def log_event(self, logger, event, build, **kwargs) -> bool:
+        self.calls += 1
+
+        def counted_build():
+            self.built += 1
+            return build()
+
+        return log_events.log_event(logger, event, counted_build, **kwargs)
+
+
+def measure(planner, questions: List[str], rounds: int, detail: bool) -> Dict[str, float]:
+    events = EventCounter()
+    planner_mod.log_event = events.log_event
+    ticker_index_mod.log_event = events.log_event
+    cpu_us: List[float] = []
+    for _ in range(rounds):
+        for q in questions:
+            t0 = time.process_time()
+            planner.explain(q, detail=detail)
+            cpu_us.append((time.process_time() - t0) * 1e6)
+
+    peak_bytes: List[int] = []
+    tracemalloc.start()
+    try:
+        for q in questions:
+            base, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            planner.explain(q, detail=detail)
+            _, peak = tracemalloc.get_traced_memory()
+            peak_bytes.append(peak - base)
+    finally:
+        tracemalloc.stop()
+
+    total = rounds * len(questions) + len(questions)
+    return {
+        "events_per_question": round(events.calls / total, 2),
+        "payloads_built_per_question": round(events.built / total, 2),
+        "cpu_mean_us": round(statistics.fmean(cpu_us), 1),
+        "alloc_peak_mean_bytes": round(statistics.fmean(peak_bytes), 1),
+    }
+
+
+def main() -> None:
+    args = parse_args()
+
+    def _offline(_path: str):
+        raise RuntimeError("rag offline (benchmark)")
+
+    planner_mod.cached_embedding_store = _offline
+    planner = planner_mod.Planner(ONTOLOGY_PATH)
+    questions = load_questions(args.payloads)
+    for q in questions[:5]:
+        planner.explain(q)
+
+    report: Dict[str, object] = {"questions": len(questions), "detail": args.detail}
+    for label, level in (("info_disabled", logging.WARNING), ("info_enabled", logging.INFO)):
+        set_level(level)
+        report[label] = measure(planner, questions, args.rounds, args.detail)
+    print("[log-events-bench]", json.dumps(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script: bench_explain_modes.py
+Purpose: Medir o CPU por pergunta do Planner.explain completo vs modo roteamento (detail=False).
+Compliance: Guardrails Araquem v2.1.1
+
+Usa as perguntas das suítes de qualidade (data/ops/quality/payloads/*.json).
+Por padrão o RAG do planner fica offline (sem Ollama) para isolar o custo de
+CPU do planner; --with-rag mantém a busca real.
+"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import statistics
+import time
+from typing import Callable, Dict, List
+
+from app.planner import planner as planner_mod
+
+ONTOLOGY_PATH = "data/ontology/entity.yaml"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Planner explain vs routing CPU benchmark")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument(
+        "--payloads",
+        default="data/ops/quality/payloads/*.json",
+        help="Glob das suítes de perguntas",
+    )
+    parser.add_argument("--with-rag", action="store_true", help="Mantém o RAG do planner")
+    return parser.parse_args()
+
+
+def load_questions(pattern: str) -> List[str]:
+    questions: List[str] = []
+    for path in sorted(glob.glob(pattern)):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        for item in data.get("payloads") or []:
+            if isinstance(item, dict) and item.get("question"):
+                questions.append(str(item["question"]))
+    return questions
+
+
+def cpu_per_question_us(fn: Callable[[str], object], questions: List[str], rounds: int) -> List[float]:
+    samples: List[float] = []
+    for _ in range(rounds):
+        for q in questions:
+            t0 = time.process_time()
+            fn(q)
+            samples.append((time.process_time() - t0) * 1e6)
+    return samples
+
+
+def summary(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "mean_us": round(statistics.fmean(ordered), 1),
+        "p50_us": round(ordered[len(ordered) // 2], 1),
+        "p95_us": round(ordered[int(len(ordered) * 0.95) - 1], 1),
+    }
+
+
+def main() -> None:
+    args = parse_args()
+    if not args.with_rag:
+
+        def _offline(_path: str):
+            raise RuntimeError("rag offline (benchmark)")
+
+        planner_mod.cached_embedding_store = _offline
+
+    planner = planner_mod.Planner(ONTOLOGY_PATH)
+    questions = load_questions(args.payloads)
+    # aquece caches de YAML/thresholds antes de medir
+    for q in questions[:5]:
+        planner.explain(q)
+
+    full = summary(cpu_per_question_us(planner.explain, questions, args.rounds))
+    fast = summary(
+        cpu_per_question_us(lambda q: planner.explain(q, detail=False), questions, args.rounds)
+    )
+    saved = full["mean_us"] - fast["mean_us"]
+    print(
+        "[planner-bench]",
+        json.dumps(
+            {
+                "questions": len(questions),
+                "rounds": args.rounds,
+                "full": full,
+                "routing": fast,
+                "saved_us_per_question": round(saved, 1),
+                "saved_pct": round(100.0 * saved / full["mean_us"], 1) if full["mean_us"] else 0.0,
+            }
+        ),
+    )
+
+
+if __name__ == "__main__":
+    main()
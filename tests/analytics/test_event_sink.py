@@ -0,0 +1,150 @@
+import hashlib
+import threading
+import time
+
+import psycopg
+import pytest
+
+from app.analytics import event_sink as sink_mod
+from app.analytics.event_sink import EventSink, build_insert_statements, explain_event_rows
+
+
+@pytest.fixture
+def dropped(monkeypatch):
+    seen = []
+    monkeypatch.setattr(
+        sink_mod, "counter", lambda name, **labels: seen.append({"name": name, **labels})
+    )
+    return seen
+
+
+def _rows(request_id="r1", answer="Resposta"):
+    return explain_event_rows(
+        request_id=request_id,
+        question="preço do HGLG11",
+        intent="fiis_quota_prices",
+        entity="fiis_quota_prices",
+        result_key="fiis_quota_prices",
+        explain_details={"cache_hit": False},
+        elapsed_ms=12,
+        answer_text=answer,
+        narrator_version="v1",
+        narrator_style="executivo",
+    )
+
+
+class _Writer:
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+        self.flushed = threading.Event()
+
+    def __call__(self, rows):
+        self.batches.append(list(rows))
+        self.flushed.set()
+        if self.fail:
+            raise RuntimeError("db down")
+
+
+def test_rows_hash_answer_like_postgres_md5():
+    explain, narrator = _rows(answer="Olá")
+    assert explain[0] == "explain_events" and narrator[0] == "narrator_events"
+    assert explain[1][0] == narrator[1][0]  # ts capturado no enfileiramento
+    assert narrator[1][3:5] == (3, hashlib.md5("Olá".encode("utf-8")).hexdigest())
+
+
+def test_multi_row_insert_per_table_explain_first():
+    rows = list(reversed(_rows("r1") + _rows("r2")))
+    statements = build_insert_statements(rows)
+
+    assert [sql.split()[2] for sql, _ in statements] == ["explain_events", "narrator_events"]
+    explain_sql, explain_params = statements[0]
+    assert explain_sql.count("::jsonb") == 2
+    assert explain_sql.endswith("ON CONFLICT (request_id) DO NOTHING")
+    assert len(explain_params) == 22
+    assert statements[1][1].count("v1") == 2
+
+
+def test_flushes_by_size_without_blocking_submit():
+    writer = _Writer()
+    sink = EventSink(writer, enabled=True, batch_size=4, flush_interval_s=60)
+
+    assert sink.submit(_rows("r1")) is True
+    assert sink.submit(_rows("r2")) is True
+    assert writer.flushed.wait(2)
+    assert len(writer.batches) == 1 and len(writer.batches[0]) == 4
+    sink.stop()
+
+
+def test_flushes_by_interval_and_on_stop():
+    writer = _Writer()
+    sink = EventSink(writer, enabled=True, batch_size=100, flush_interval_s=0.05)
+
+    sink.submit(_rows("r1"))
+    assert writer.flushed.wait(2)
+    writer.flushed.clear()
+
+    sink.flush_interval_s = 60
+    sink.submit(_rows("r2"))
+    time.sleep(0.05)
+    sink.stop()
+    assert [len(b) for b in writer.batches] == [2, 2]
+
+
+def test_overflow_drops_and_counts(dropped):
+    release = threading.Event()
+
+    def slow_writer(rows):
+        release.wait(2)
+
+    sink = EventSink(slow_writer, enabled=True, queue_size=1, batch_size=1, flush_interval_s=60)
+    results = [sink.submit(_rows(f"r{i}")) for i in range(5)]
+    release.set()
+    sink.stop()
+
+    assert results.count(False) >= 3
+    assert {"name": "sirios_analytics_events_dropped_total", "reason": "overflow", "_value": 2} in dropped
+
+
+def test_write_errors_are_counted_not_raised(dropped):
+    sink = EventSink(_Writer(fail=True), enabled=False)
+
+    assert sink.submit(_rows()) is False
+    names = [d["name"] for d in dropped]
+    assert "sirios_analytics_events_dropped_total" in names
+    assert "sirios_explain_events_failed_total" in names
+
+
+def test_failed_batch_is_retried_per_request(dropped):
+    written = []
+
+    def writer(rows):
+        if any(values[1] == "bad" for _, values in rows):
+            raise psycopg.DataError("NUL byte")
+        written.append(sorted({values[1] for _, values in rows}))
+
+    sink = EventSink(writer, enabled=True, batch_size=6, flush_interval_s=60)
+    for request_id in ("r1", "bad", "r2"):
+        sink.submit(_rows(request_id))
+    sink.stop()
+
+    assert written == [["r1"], ["r2"]]
+    assert [d for d in dropped if d["name"] == "sirios_analytics_events_dropped_total"] == [
+        {"name": "sirios_analytics_events_dropped_total", "reason": "write_error", "_value": 2}
+    ]
+
+
+def test_connection_errors_drop_the_batch_once(dropped):
+    calls = []
+
+    def writer(rows):
+        calls.append(len(rows))
+        raise psycopg.OperationalError("pool timeout")
+
+    sink = EventSink(writer, enabled=True, batch_size=6, flush_interval_s=60)
+    for request_id in ("r1", "r2", "r3"):
+        sink.submit(_rows(request_id))
+    sink.stop()
+
+    assert calls == [6]
+    assert {"name": "sirios_analytics_events_dropped_total", "reason": "write_error", "_value": 6} in dropped
@@ -0,0 +1,55 @@
+# tests/api/ops/test_cache_bust_tag.py
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.ops import cache as ops_cache
+
+
+class _FakeCache:
+    def __init__(self):
+        self.tags = []
+
+    def invalidate_tag(self, tag):
+        self.tags.append(tag)
+        return 3
+
+
+@pytest.fixture()
+def client(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("CACHE_OPS_TOKEN", "t0k")
+    monkeypatch.setenv("BUILD_ID", "dev")
+    fake = _FakeCache()
+    monkeypatch.setattr(ops_cache, "cache", fake)
+    app = FastAPI()
+    app.include_router(ops_cache.router)
+    return TestClient(app), fake
+
+
+def test_bust_tag_invalidates_whole_tag(client) -> None:
+    http, fake = client
+    resp = http.post(
+        "/ops/cache/bust/tag",
+        json={"kind": "ticker", "value": "hglg11"},
+        headers={"X-Ops-Token": "t0k"},
+    )
+    assert resp.status_code == 200
+    assert resp.json() == {"deleted": 3, "tag": "araquem:tag:dev:ticker:HGLG11"}
+    assert fake.tags == ["araquem:tag:dev:ticker:HGLG11"]
+
+
+def test_bust_tag_validates_token_and_kind(client) -> None:
+    http, fake = client
+    assert http.post("/ops/cache/bust/tag", json={"kind": "ticker", "value": "X"}).status_code == 403
+    bad_kind = http.post(
+        "/ops/cache/bust/tag",
+        json={"kind": "plan", "value": "x"},
+        headers={"X-Ops-Token": "t0k"},
+    )
+    unknown_entity = http.post(
+        "/ops/cache/bust/tag",
+        json={"kind": "entity", "value": "nope"},
+        headers={"X-Ops-Token": "t0k"},
+    )
+    assert bad_kind.status_code == 400 and unknown_entity.status_code == 400
+    assert fake.tags == []
@@ -0,0 +1,56 @@
+import asyncio
+import json
+
+from fastapi.responses import JSONResponse
+
+from app.api import ask as ask_module
+
+
+def _payload() -> "ask_module.AskPayload":
+    return ask_module.AskPayload(
+        question="preço do HGLG11",
+        conversation_id="conv-1",
+        nickname="Tester",
+        client_id="c1",
+        type_user="anon",
+    )
+
+
+def _events(monkeypatch, steps) -> list:
+    monkeypatch.setattr(ask_module, "_ask_steps", steps)
+
+    async def _main():
+        response = await ask_module.ask_stream(_payload(), explain=False)
+        assert response.media_type == "text/event-stream"
+        return [chunk async for chunk in response.body_iterator]
+
+    events = []
+    for block in asyncio.run(_main()):
+        event_line, data_line = block.rstrip("\n").split("\n")
+        assert event_line.startswith("event: ") and data_line.startswith("data: ")
+        events.append((event_line[len("event: "):], json.loads(data_line[len("data: "):])))
+    return events
+
+
+def test_stream_emits_answer_tokens_then_final(monkeypatch) -> None:
+    def fake_steps(payload, explain, emit=None):
+        assert emit is not None
+        yield ask_module.effect(lambda: None)
+        emit("answer", {"answer": "Preço: R$ 160,00", "rows": [{"close_price": "R$ 160,00"}]})
+        emit("token", {"text": "O HGLG11 "})
+        emit("token", {"text": "fechou estável."})
+        return JSONResponse({"answer": "O HGLG11 fechou estável.\n\nPreço: R$ 160,00"})
+
+    events = _events(monkeypatch, fake_steps)
+    assert [e for e, _ in events] == ["answer", "token", "token", "final"]
+    assert events[0][1]["rows"] == [{"close_price": "R$ 160,00"}]
+    assert events[-1][1]["answer"].startswith("O HGLG11 fechou estável.")
+
+
+def test_stream_reports_pipeline_failure(monkeypatch) -> None:
+    def failing_steps(payload, explain, emit=None):
+        yield ask_module.effect(lambda: None)
+        raise RuntimeError("boom")
+
+    events = _events(monkeypatch, failing_steps)
+    assert events == [("error", {"code": "internal_error", "retryable": True})]
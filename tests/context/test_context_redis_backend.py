@@ -0,0 +1,222 @@
+import copy
+import json
+
+import pytest
+
+from app.context.context_manager import (
+    ContextManager,
+    DEFAULT_LAST_REFERENCE_POLICY,
+    DEFAULT_POLICY,
+    InMemoryBackend,
+    RedisContextBackend,
+)
+
+
+class _FakePipeline:
+    def __init__(self, redis):
+        self._redis = redis
+        self._ops = []
+
+    def __getattr__(self, name):
+        def _queue(*args, **kwargs):
+            self._ops.append((name, args, kwargs))
+            return self
+
+        return _queue
+
+    def execute(self):
+        self._redis.round_trips += 1
+        return [getattr(self._redis, name)(*a, **kw) for name, a, kw in self._ops]
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.lists = {}
+        self.hashes = {}
+        self.ttls = {}
+        self.round_trips = 0
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self)
+
+    def register_script(self, script):
+        # emula o Lua de set_last_reference: contador + HSET + EXPIRE numa ida
+        def _run(keys, args):
+            self.round_trips += 1
+            state = self.hashes.setdefault(keys[0], {})
+            ref = json.loads(args[0])
+            ref["turn_index"] = int(state.get("turns", 0))
+            raw = json.dumps(ref)
+            state.update({"ref": raw, args[1]: raw})
+            if int(args[2]) > 0:
+                self.ttls[keys[0]] = int(args[2])
+            return ref["turn_index"]
+
+        assert "cjson" in script
+        return _run
+
+    def lpush(self, key, *values):
+        items = self.lists.setdefault(key, [])
+        for value in values:
+            items.insert(0, value)
+        return len(items)
+
+    def ltrim(self, key, start, end):
+        self.lists[key] = self.lists.get(key, [])[start : end + 1]
+
+    def lrange(self, key, start, end):
+        self.round_trips += 1
+        items = self.lists.get(key, [])
+        return items[start:] if end == -1 else items[start : end + 1]
+
+    def hincrby(self, key, field, amount):
+        data = self.hashes.setdefault(key, {})
+        data[field] = str(int(data.get(field, 0)) + amount)
+        return int(data[field])
+
+    def hset(self, key, mapping):
+        self.hashes.setdefault(key, {}).update(mapping)
+
+    def hget(self, key, field):
+        self.round_trips += 1
+        return self.hashes.get(key, {}).get(field)
+
+    def hmget(self, key, fields):
+        self.round_trips += 1
+        data = self.hashes.get(key, {})
+        return [data.get(f) for f in fields]
+
+    def expire(self, key, ttl):
+        self.ttls[key] = ttl
+
+    def delete(self, key):
+        self.lists.pop(key, None)
+        self.hashes.pop(key, None)
+
+
+class _BrokenRedis:
+    def register_script(self, script):
+        # o redis-py registra localmente; a falha só aparece na chamada
+        return self.__getattr__("evalsha")
+
+    def __getattr__(self, name):
+        def _fail(*args, **kwargs):
+            raise ConnectionError("redis down")
+
+        return _fail
+
+
+@pytest.fixture
+def policy():
+    policy = copy.deepcopy(DEFAULT_POLICY)
+    policy.update({"enabled": True, "backend": "redis", "max_turns": 3, "ttl_seconds": 600})
+    policy["last_reference"] = {
+        **DEFAULT_LAST_REFERENCE_POLICY,
+        "enable_last_ticker": True,
+        "allowed_entities": ["alpha"],
+        "max_age_turns": 2,
+    }
+    return policy
+
+
+def test_append_is_one_round_trip_with_trim_and_ttl(policy):
+    redis = _FakeRedis()
+    manager = ContextManager(policy=policy, redis_client=redis)
+    assert isinstance(manager._backend, RedisContextBackend)
+
+    for i in range(5):
+        manager.append_turn("c1", "conv1", role="user", content=f"q{i}")
+
+    assert redis.round_trips == 5
+    assert len(redis.lists["araquem:ctx:c1:conv1:turns"]) == 3
+    assert redis.ttls == {
+        "araquem:ctx:c1:conv1:turns": 600,
+        "araquem:ctx:c1:conv1:state": 600,
+    }
+    assert [t.content for t in manager.load_recent("c1", "conv1")] == ["q2", "q3", "q4"]
+    assert manager.current_turn_index("c1", "conv1") == 5
+
+
+def test_set_last_reference_is_one_round_trip_stamping_turn_index(policy):
+    redis = _FakeRedis()
+    manager = ContextManager(policy=policy, redis_client=redis)
+    for i in range(3):
+        manager.append_turn("c1", "conv1", role="user", content=f"q{i}")
+
+    before = redis.round_trips
+    manager.update_last_reference("c1", "conv1", ticker="HGLG11", entity="alpha", bucket="A")
+    assert redis.round_trips == before + 1
+
+    state = redis.hashes["araquem:ctx:c1:conv1:state"]
+    assert json.loads(state["ref:A"])["turn_index"] == 3
+    assert state["ref"] == state["ref:A"]
+
+
+def test_last_reference_is_shared_between_workers(policy):
+    redis = _FakeRedis()
+    worker_a = ContextManager(policy=policy, redis_client=redis)
+    worker_b = ContextManager(policy=policy, redis_client=redis)
+
+    worker_a.append_turn("c1", "conv1", role="user", content="preço do HGLG11")
+    worker_a.update_last_reference(
+        "c1", "conv1", ticker="HGLG11", entity="alpha", intent="alpha"
+    )
+    worker_b.append_turn("c1", "conv1", role="user", content="e o dividendo?")
+
+    result = worker_b.resolve_last_reference(
+        client_id="c1", conversation_id="conv1", entity="alpha", identifiers={}
+    )
+    assert result["last_reference_used"] is True
+    assert result["identifiers_resolved"]["ticker"] == "HGLG11"
+
+    # a idade em turns também é global: três turns depois a referência expira
+    for _ in range(2):
+        worker_a.append_turn("c1", "conv1", role="user", content="outra")
+    expired = worker_b.resolve_last_reference(
+        client_id="c1", conversation_id="conv1", entity="alpha", identifiers={}
+    )
+    assert expired["last_reference_used"] is False
+
+
+def test_save_replaces_history_in_order(policy):
+    redis = _FakeRedis()
+    manager = ContextManager(policy=policy, redis_client=redis)
+    manager.append_turn("c1", "conv1", role="user", content="q0")
+    manager.append_turn("c1", "conv1", role="assistant", content="a0")
+
+    turns = manager.load_recent("c1", "conv1")
+    manager._backend.save("c1", "conv1", turns[:1])
+    assert [t.content for t in manager.load_recent("c1", "conv1")] == ["q0"]
+
+    manager._backend.save("c1", "conv1", [])
+    assert manager.load_recent("c1", "conv1") == []
+
+
+def test_redis_errors_degrade_to_empty_context(policy):
+    manager = ContextManager(policy=policy, redis_client=_BrokenRedis())
+
+    manager.append_turn("c1", "conv1", role="user", content="q0")
+    manager.update_last_reference("c1", "conv1", ticker="HGLG11", entity="alpha")
+
+    assert manager.load_recent("c1", "conv1") == []
+    assert manager.current_turn_index("c1", "conv1") == 0
+    result = manager.resolve_last_reference(
+        client_id="c1", conversation_id="conv1", entity="alpha", identifiers={}
+    )
+    assert result["last_reference_used"] is False
+
+
+def test_backend_selection(policy, monkeypatch):
+    monkeypatch.delenv("CONTEXT_BACKEND", raising=False)
+    assert isinstance(ContextManager(policy=policy)._backend, InMemoryBackend)
+
+    policy["backend"] = "memory"
+    assert isinstance(
+        ContextManager(policy=policy, redis_client=_FakeRedis())._backend, InMemoryBackend
+    )
+
+    monkeypatch.setenv("CONTEXT_BACKEND", "redis")
+    assert isinstance(
+        ContextManager(policy=policy, redis_client=_FakeRedis())._backend,
+        RedisContextBackend,
+    )
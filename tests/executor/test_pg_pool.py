@@ -0,0 +1,177 @@
+from contextlib import contextmanager
+from typing import Any, Dict, List, Tuple
+
+import pytest
+from psycopg_pool import PoolTimeout
+
+from app.executor import pg
+
+
+class _FakeCursor:
+    def __init__(self, rows):
+        self._rows = rows
+        self.executed: List[Tuple[str, Dict[str, Any]]] = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params):
+        self.executed.append((sql, params))
+
+    def fetchall(self):
+        return list(self._rows)
+
+
+class _FakeConn:
+    class info:
+        dbname = "edge_db"
+
+    def __init__(self, rows):
+        self.cursor_obj = _FakeCursor(rows)
+
+    def cursor(self, row_factory=None):
+        return self.cursor_obj
+
+
+class _FakePool:
+    instances: List["_FakePool"] = []
+
+    def __init__(self, conninfo, **kwargs):
+        self.conninfo = conninfo
+        self.kwargs = kwargs
+        self.opened = False
+        self.closed = False
+        self.checkouts = 0
+        self.timeout_next = False
+        self.conn = _FakeConn([{"ticker": "HGLG11"}])
+        _FakePool.instances.append(self)
+
+    @staticmethod
+    def check_connection(conn):
+        return None
+
+    def open(self, wait=False):
+        self.opened = True
+
+    def close(self):
+        self.closed = True
+
+    def get_stats(self):
+        return {"pool_size": 4, "pool_available": 1, "requests_waiting": 2}
+
+    @contextmanager
+    def connection(self, timeout=None):
+        if self.timeout_next:
+            raise PoolTimeout("timeout")
+        self.checkouts += 1
+        yield self.conn
+
+
+@contextmanager
+def _noop_trace(*args, **kwargs):
+    yield None
+
+
+@pytest.fixture
+def captured(monkeypatch):
+    events: Dict[str, List[Tuple[str, Any, Dict[str, Any]]]] = {
+        "histogram": [],
+        "gauge": [],
+        "counter": [],
+    }
+    monkeypatch.setattr(
+        pg, "emit_histogram", lambda n, v, **l: events["histogram"].append((n, v, l))
+    )
+    monkeypatch.setattr(
+        pg, "emit_gauge", lambda n, v, **l: events["gauge"].append((n, v, l))
+    )
+    monkeypatch.setattr(
+        pg, "emit_counter", lambda n, **l: events["counter"].append((n, None, l))
+    )
+    monkeypatch.setattr(pg, "start_trace", _noop_trace)
+    monkeypatch.setattr(pg, "set_trace_attribute", lambda *a, **k: None)
+    monkeypatch.setattr(pg, "ConnectionPool", _FakePool)
+    _FakePool.instances.clear()
+    return events
+
+
+def _settings(**overrides):
+    base = {
+        "enabled": True,
+        "min_size": 1,
+        "max_size": 8,
+        "timeout_s": 0.5,
+        "max_lifetime_s": 600.0,
+        "max_idle_s": 60.0,
+        "connect_timeout_s": 2,
+    }
+    base.update(overrides)
+    return base
+
+
+def test_pool_is_created_lazily_and_reused(captured):
+    executor = pg.PgExecutor("postgresql://x", pool_settings=_settings())
+    assert _FakePool.instances == []
+
+    executor.query("select 1", {"entity": "fiis_overview"})
+    executor.query("select 1", {"entity": "fiis_overview"})
+
+    assert len(_FakePool.instances) == 1
+    pool = _FakePool.instances[0]
+    assert pool.opened is True
+    assert pool.checkouts == 2
+    assert pool.kwargs["max_size"] == 8
+    assert pool.kwargs["max_lifetime"] == 600.0
+    assert pool.kwargs["kwargs"]["autocommit"] is True
+    assert pool.kwargs["check"] is _FakePool.check_connection
+
+    executor.close()
+    assert pool.closed is True
+
+
+def test_pool_wait_and_saturation_are_exported(captured):
+    executor = pg.PgExecutor("postgresql://x", pool_settings=_settings())
+    rows = executor.query("select 1", {"entity": "fiis_overview"})
+
+    assert rows == [{"ticker": "HGLG11"}]
+    waits = [h for h in captured["histogram"] if h[0] == "sirios_sql_pool_wait_seconds"]
+    assert len(waits) == 1 and waits[0][1] >= 0.0
+
+    gauges = {(n, l.get("state")): v for n, v, l in captured["gauge"]}
+    assert gauges[("sirios_sql_pool_connections", "open")] == 4
+    assert gauges[("sirios_sql_pool_connections", "idle")] == 1
+    assert gauges[("sirios_sql_pool_connections", "waiting")] == 2
+    assert gauges[("sirios_sql_pool_saturation", None)] == pytest.approx(3 / 8)
+
+
+def test_pool_timeout_is_counted_and_raised(captured):
+    executor = pg.PgExecutor("postgresql://x", pool_settings=_settings())
+    executor._get_pool().timeout_next = True
+
+    with pytest.raises(PoolTimeout):
+        executor.query("select 1", {"entity": "fiis_overview"})
+
+    names = [c[0] for c in captured["counter"]]
+    assert "sirios_sql_pool_timeouts_total" in names
+
+
+def test_pool_disabled_falls_back_to_direct_connect(captured, monkeypatch):
+    conns = []
+
+    @contextmanager
+    def fake_connect(dsn, **kwargs):
+        conn = _FakeConn([{"ticker": "MXRF11"}])
+        conns.append((dsn, kwargs))
+        yield conn
+
+    monkeypatch.setattr(pg.psycopg, "connect", fake_connect)
+    executor = pg.PgExecutor("postgresql://x", pool_settings=_settings(enabled=False))
+
+    assert executor.query("select 1", {"entity": "fiis_overview"}) == [
+        {"ticker": "MXRF11"}
+    ]
+    assert _FakePool.instances == []
+    assert conns and conns[0][1]["autocommit"] is True
@@ -0,0 +1,73 @@
+import datetime as dt
+from decimal import Decimal
+
+import pytest
+
+from app.formatter import rows as rows_mod
+
+
+@pytest.fixture(autouse=True)
+def _clean_plans():
+    rows_mod._compile_column_plan.cache_clear()
+    yield
+    rows_mod._compile_column_plan.cache_clear()
+
+
+def test_formatter_is_detected_once_per_column(monkeypatch) -> None:
+    calls = []
+    original = rows_mod._detect_formatter
+
+    def _spy(column_name):
+        calls.append(column_name)
+        return original(column_name)
+
+    monkeypatch.setattr(rows_mod, "_detect_formatter", _spy)
+    columns = ["ticker", "traded_at", "close_price", "daily_variation_pct"]
+    rows = [
+        {
+            "ticker": "HGLG11",
+            "traded_at": dt.date(2024, 1, 1) + dt.timedelta(days=i),
+            "close_price": Decimal("160.5") + i,
+            "daily_variation_pct": Decimal("0.0125"),
+        }
+        for i in range(500)
+    ]
+
+    rows_mod.format_rows(rows, columns)
+    rows_mod.format_rows(rows, list(columns))
+    assert sorted(calls) == sorted(columns)
+
+
+def test_plan_keeps_column_order_without_duplicates() -> None:
+    plan = rows_mod._compile_column_plan(("ticker", "created_at", "ticker"))
+    assert [col for col, _ in plan] == ["ticker", "created_at"]
+    assert plan[0][1] is None
+
+
+def test_column_plan_matches_per_cell_formatting() -> None:
+    columns = ["ticker", "close_price", "last_payment_date", "value", "missing"]
+    rows = [
+        {
+            "ticker": "MXRF11",
+            "close_price": Decimal("10.123"),
+            "last_payment_date": dt.date(2024, 5, 15),
+            "value": Decimal("0.5"),
+            "extra": "ignored",
+        },
+        {"ticker": None, "close_price": None, "value": 3, "meta": {"metric_key": "dy_avg"}},
+    ]
+
+    expected = []
+    for r in rows:
+        item = {c: r.get(c) for c in columns}
+        meta = r.get("meta") or {}
+        if meta.get("metric_key"):
+            item["value"] = rows_mod.format_metric_value(meta["metric_key"], item["value"])
+        for col, value in list(item.items()):
+            formatter = rows_mod._detect_formatter(col)
+            if value is not None and formatter:
+                item[col] = formatter(value)
+        expected.append(item)
+
+    assert rows_mod.format_rows(rows, columns) == expected
+    assert rows_mod.format_rows([], columns) == []
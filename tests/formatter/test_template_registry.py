@@ -0,0 +1,67 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from app.formatter import rows as rows_mod
+
+
+@pytest.fixture(autouse=True)
+def _clean_registry():
+    rows_mod.clear_template_registry()
+    yield
+    rows_mod.clear_template_registry()
+
+
+@pytest.fixture
+def entity_root(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    root = tmp_path / "entities"
+    (root / "demo" / "responses").mkdir(parents=True)
+    (root / "demo" / "responses" / "summary.md.j2").write_text("v1 {{ ticker }}", encoding="utf-8")
+    monkeypatch.setattr(rows_mod, "_ENTITY_ROOT", root)
+    return root
+
+
+def test_template_is_compiled_once_and_reused(entity_root, monkeypatch) -> None:
+    compiled = []
+    original = rows_mod._JINJA_ENV.from_string
+
+    def _spy(source):
+        compiled.append(source)
+        return original(source)
+
+    monkeypatch.setattr(rows_mod._JINJA_ENV, "from_string", _spy)
+    first = rows_mod._get_entity_template("demo", "summary")
+    second = rows_mod._get_entity_template("demo", "summary")
+
+    assert first is not None and first is second
+    assert compiled == ["v1 {{ ticker }}"]
+    assert first.render(ticker="HGLG11") == "v1 HGLG11"
+
+
+def test_template_is_recompiled_when_mtime_changes(entity_root) -> None:
+    path = entity_root / "demo" / "responses" / "summary.md.j2"
+    first = rows_mod._get_entity_template("demo", "summary")
+
+    path.write_text("v2 {{ ticker }}", encoding="utf-8")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    second = rows_mod._get_entity_template("demo", "summary")
+    assert second is not first
+    assert second.render(ticker="MXRF11") == "v2 MXRF11"
+
+
+def test_missing_or_escaping_template_returns_none(entity_root, tmp_path) -> None:
+    (tmp_path / "outside.md.j2").write_text("x", encoding="utf-8")
+    assert rows_mod._get_entity_template("demo", "table") is None
+    assert rows_mod._get_entity_template("demo", "../../../outside") is None
+    assert rows_mod._TEMPLATE_REGISTRY == {}
+
+
+def test_precompile_covers_entities_with_presentation_kind() -> None:
+    compiled = rows_mod.precompile_entity_templates()
+    assert compiled
+    for entity, kind in compiled.items():
+        assert rows_mod.get_entity_presentation_kind(entity) == kind
+        assert (entity, kind) in rows_mod._TEMPLATE_REGISTRY
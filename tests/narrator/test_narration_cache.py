@@ -0,0 +1,140 @@
+# tests/narrator/test_narration_cache.py
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+import pytest
+
+import app.narrator.cache as cache_mod
+import app.narrator.narrator as narrator_mod
+from app.narrator.cache import NarrationCache, narration_fingerprint
+from app.narrator.narrator import Narrator
+
+
+class _Cache:
+    def __init__(self):
+        self.data: Dict[str, Any] = {}
+        self.writes: List[Dict[str, Any]] = []
+
+    def get_json(self, key):
+        return self.data.get(key)
+
+    def set_json(self, key, value, ttl_seconds, stale_ttl_seconds=0, tags=None):
+        self.data[key] = value
+        self.writes.append({"key": key, "ttl": ttl_seconds, "tags": tags})
+
+
+class _Policies:
+    def __init__(self, policies):
+        self.policies = policies
+
+    def get(self, entity):
+        return self.policies.get(entity)
+
+    def is_private_entity(self, entity):
+        return (self.policies.get(entity) or {}).get("scope") == "prv"
+
+
+_POLICIES = {
+    "fiis_rankings": {"ttl_seconds": 300, "scope": "pub"},
+    "fiis_overview": {"ttl_seconds": 86400, "scope": "pub"},
+    "client_fiis_positions": {"ttl_seconds": 60, "scope": "prv"},
+    "fiis_news": {"ttl_seconds": 60, "strategy": "write_through"},
+}
+
+
+class _Client:
+    def __init__(self, response: str):
+        self.response = response
+        self.timeout = 25.0
+        self.calls = 0
+
+    def generate(self, *_: Any, **__: Any) -> str:
+        self.calls += 1
+        return self.response
+
+
+def _policy() -> Dict[str, Any]:
+    return {
+        "llm_enabled": True,
+        "model": "dummy-model",
+        "max_llm_rows": 5,
+        "llm_cache_ttl_seconds": 3600,
+        "policy_guards": {"rewrite_only_default": True},
+    }
+
+
+@pytest.fixture(autouse=True)
+def _patch(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(narrator_mod, "_load_narrator_policy", _policy)
+    monkeypatch.setattr(narrator_mod, "build_prompt", lambda **__: "PROMPT")
+    monkeypatch.setattr(narrator_mod, "render_narrative", lambda *_: "")
+    monkeypatch.setattr(narrator_mod, "counter", lambda *_, **__: None)
+    monkeypatch.setattr(narrator_mod, "histogram", lambda *_, **__: None)
+    monkeypatch.setattr(cache_mod, "counter", lambda *_, **__: None)
+
+
+def _narrator(cache: _Cache, response: str) -> Narrator:
+    narrator = Narrator(model="dummy-model")
+    narrator.client = _Client(response)
+    narrator.llm_cache = NarrationCache(cache, _Policies(_POLICIES))
+    return narrator
+
+
+def _render(narrator: Narrator, question: str, valor: str = "10") -> Dict[str, Any]:
+    return narrator.render(
+        question=question,
+        facts={"rows": [{"valor": valor}], "ticker": "HGLG11"},
+        meta={"entity": "fiis_rankings", "intent": "fiis_rankings"},
+    )
+
+
+def test_ttl_is_bounded_by_entity_policy() -> None:
+    narr = NarrationCache(_Cache(), _Policies(_POLICIES))
+    assert narr.ttl_seconds("fiis_rankings", {"llm_cache_ttl_seconds": 3600}) == 300
+    assert narr.ttl_seconds("fiis_overview", {"llm_cache_ttl_seconds": 3600}) == 3600
+    assert narr.ttl_seconds("fiis_overview", {"llm_cache_ttl_seconds": 0}) == 0
+    assert narr.ttl_seconds("client_fiis_positions", {"llm_cache_ttl_seconds": 3600}) == 0
+    assert narr.ttl_seconds("fiis_news", {"llm_cache_ttl_seconds": 3600}) == 0
+    assert narr.ttl_seconds("unknown_entity", {"llm_cache_ttl_seconds": 3600}) == 0
+
+
+def test_fingerprint_ignores_row_order_of_keys_but_not_values_or_model() -> None:
+    base = dict(entity="fiis_rankings", intent="fiis_rankings", model="m1")
+    fp = narration_fingerprint(facts={"rows": [{"a": 1, "b": 2}]}, **base)
+    assert fp == narration_fingerprint(facts={"rows": [{"b": 2, "a": 1}]}, **base)
+    assert fp != narration_fingerprint(facts={"rows": [{"a": 1, "b": 3}]}, **base)
+    assert fp != narration_fingerprint(
+        facts={"rows": [{"a": 1, "b": 2}]}, **{**base, "model": "m2"}
+    )
+
+
+def test_repeat_facts_skip_the_llm_call() -> None:
+    cache = _Cache()
+    narrator = _narrator(cache, "O ranking segue liderado com 10.")
+
+    first = _render(narrator, "qual o ranking?")
+    second = _render(narrator, "me mostra o ranking de fiis")
+
+    assert narrator.client.calls == 1
+    assert first["text"] == second["text"] == "O ranking segue liderado com 10."
+    assert first["meta"]["narrator"]["cache"]["hit"] is False
+    assert second["meta"]["narrator"]["cache"]["hit"] is True
+    assert len(cache.writes) == 1
+    assert cache.writes[0]["ttl"] == 300
+    assert ":fiis_rankings:narr:" in cache.writes[0]["key"]
+    assert any(tag.endswith(":ticker:HGLG11") for tag in cache.writes[0]["tags"])
+
+    _render(narrator, "qual o ranking?", valor="11")
+    assert narrator.client.calls == 2
+
+
+def test_policy_violations_are_not_cached() -> None:
+    cache = _Cache()
+    narrator = _narrator(cache, "Valor alterado para 20")
+
+    out = _render(narrator, "qual o ranking?")
+
+    assert out["meta"]["narrator"]["strategy"] == "policy_violation"
+    assert cache.writes == []
@@ -0,0 +1,94 @@
+# tests/narrator/test_narrator_streaming.py
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+from typing import Any, Dict, Iterator, List
+
+import pytest
+
+import app.narrator.narrator as narrator_mod
+from app.narrator.narrator import Narrator
+
+
+def _policy() -> Dict[str, Any]:
+    return {
+        "llm_enabled": True,
+        "shadow": False,
+        "model": "dummy-model",
+        "rewrite_only": False,
+        "max_llm_rows": 5,
+        "policy_guards": {
+            "rewrite_only_default": True,
+            "fail_closed": {"on_violation": "return_baseline"},
+        },
+    }
+
+
+class StreamClient:
+    def __init__(self, chunks: List[str]):
+        self.chunks = chunks
+        self.timeout = 25.0
+        self.generate_calls = 0
+
+    def generate(self, *_: Any, **__: Any) -> str:
+        self.generate_calls += 1
+        return "".join(self.chunks)
+
+    def generate_stream(self, *_: Any, **__: Any) -> Iterator[str]:
+        yield from self.chunks
+
+
+@pytest.fixture(autouse=True)
+def _patch(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(narrator_mod, "_load_narrator_policy", _policy)
+    monkeypatch.setattr(narrator_mod, "build_prompt", lambda **__: "PROMPT")
+    monkeypatch.setattr(narrator_mod, "render_narrative", lambda *_: "")
+    monkeypatch.setattr(narrator_mod, "counter", lambda *_, **__: None)
+    monkeypatch.setattr(narrator_mod, "histogram", lambda *_, **__: None)
+
+
+def _render(narrator: Narrator, on_token=None) -> Dict[str, Any]:
+    return narrator.render(
+        question="qual o valor?",
+        facts={"rows": [{"valor": "10"}]},
+        meta={"entity": "fiis_financials_risk", "intent": "fiis_financials_risk"},
+        on_token=on_token,
+    )
+
+
+def test_tokens_are_forwarded_and_joined() -> None:
+    narrator = Narrator(model="dummy-model")
+    narrator.client = StreamClient(["O valor ", "segue em ", "10."])
+    seen: List[str] = []
+
+    out = _render(narrator, on_token=seen.append)
+
+    assert seen == ["O valor ", "segue em ", "10."]
+    assert out["text"] == "O valor segue em 10."
+    assert out["meta"]["narrator"]["strategy"] == "llm"
+    assert out["meta"]["narrator"]["streamed"] is True
+    assert narrator.client.generate_calls == 0
+
+
+def test_guards_run_on_final_streamed_text() -> None:
+    narrator = Narrator(model="dummy-model")
+    narrator.client = StreamClient(["Valor alterado ", "para 20"])
+    seen: List[str] = []
+
+    out = _render(narrator, on_token=seen.append)
+
+    # os tokens já saíram, mas a resposta final volta ao baseline
+    assert seen == ["Valor alterado ", "para 20"]
+    assert out["text"] == "- **valor**: 10"
+    assert out["meta"]["narrator"]["strategy"] == "policy_violation"
+
+
+def test_without_sink_uses_blocking_generate() -> None:
+    narrator = Narrator(model="dummy-model")
+    narrator.client = StreamClient(["O valor segue em 10."])
+
+    out = _render(narrator)
+
+    assert out["text"] == "O valor segue em 10."
+    assert narrator.client.generate_calls == 1
+    assert "streamed" not in out["meta"]["narrator"]
@@ -0,0 +1,73 @@
+import logging
+
+import pytest
+
+from app.observability import log_events
+from app.observability.log_events import EventSampling, load_event_sampling, log_event
+
+
+@pytest.fixture(autouse=True)
+def _reset_sampling():
+    yield
+    log_events.set_event_sampling(None)
+
+
+def _logger(level: int) -> logging.Logger:
+    logger = logging.getLogger("tests.log_events")
+    logger.setLevel(level)
+    return logger
+
+
+def test_payload_not_built_when_level_disabled() -> None:
+    calls = []
+
+    def build():
+        calls.append(1)
+        return {"planner_phase": "x"}
+
+    log_events.set_event_sampling(EventSampling())
+    assert log_event(_logger(logging.WARNING), "planner.x", build) is False
+    assert calls == []
+
+
+def test_emits_payload_when_enabled(caplog: pytest.LogCaptureFixture) -> None:
+    log_events.set_event_sampling(EventSampling())
+    with caplog.at_level(logging.INFO, logger="tests.log_events"):
+        assert log_event(_logger(logging.INFO), "planner.x", lambda: {"k": 1}) is True
+    assert caplog.records[-1].msg == {"k": 1}
+
+
+def test_sampling_rates_and_component_wildcard() -> None:
+    sampling = EventSampling(default=0.5, rates={"planner.*": 0.0, "planner.keep": 2})
+    assert sampling.rate("planner.drop") == 0.0
+    assert sampling.rate("planner.keep") == 1.0
+    assert sampling.rate("narrator.render") == 0.5
+
+    log_events.set_event_sampling(sampling)
+    calls = []
+    logger = _logger(logging.INFO)
+    assert log_event(logger, "planner.drop", lambda: calls.append(1) or {}) is False
+    assert calls == []
+
+
+def test_build_errors_are_swallowed() -> None:
+    log_events.set_event_sampling(EventSampling())
+    assert log_event(_logger(logging.INFO), "planner.x", lambda: 1 / 0) is False
+
+
+def test_loads_sampling_from_observability_yaml(tmp_path) -> None:
+    cfg = tmp_path / "observability.yaml"
+    cfg.write_text(
+        "logging:\n"
+        "  events:\n"
+        "    default_sample_rate: 0.2\n"
+        "    sample_rates:\n"
+        "      planner.ticker_resolve: 0.05\n",
+        encoding="utf-8",
+    )
+    sampling = load_event_sampling(str(cfg))
+    assert sampling.default == pytest.approx(0.2)
+    assert sampling.rate("planner.ticker_resolve") == pytest.approx(0.05)
+
+    repo_sampling = load_event_sampling("data/ops/observability.yaml")
+    assert repo_sampling.rate("planner.gate_decision") == 1.0
@@ -0,0 +1,256 @@
+import asyncio
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.common.effects import effect, run_async, run_sync
+from app.orchestrator import routing
+from app.observability import instrumentation
+
+from tests.orchestrator.test_routing_multi_ticker import (
+    _DummyBackend,
+    _plan_with_bucket,
+)
+
+
+class _AsyncExecutor:
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    async def query(self, sql, params):
+        self.calls.append((sql, params))
+        return list(self.rows)
+
+
+def _patch_builders(monkeypatch: pytest.MonkeyPatch, rag_calls: list) -> None:
+    def fake_build_select_for_entity(entity, identifiers, agg_params):
+        return "sql", {"ticker": identifiers.get("ticker")}, "result_key", ["ticker"]
+
+    def fake_rag(**kwargs):
+        rag_calls.append(("sync", kwargs["question"]))
+        return {"enabled": False}
+
+    async def fake_rag_async(**kwargs):
+        rag_calls.append(("async", kwargs["question"]))
+        return {"enabled": False}
+
+    monkeypatch.setattr(routing, "build_select_for_entity", fake_build_select_for_entity)
+    monkeypatch.setattr(routing, "build_rag_context", fake_rag)
+    monkeypatch.setattr(routing, "build_rag_context_async", fake_rag_async)
+
+
+@pytest.mark.asyncio
+async def test_route_question_async_uses_native_backends(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    instrumentation.set_backend(_DummyBackend())
+    rag_calls: list = []
+    _patch_builders(monkeypatch, rag_calls)
+
+    planner = MagicMock()
+    planner.explain.return_value = _plan_with_bucket(entity="fiis_quota_prices")
+    executor = MagicMock()
+    executor.query.side_effect = AssertionError("sync executor should not be used")
+    async_exec = _AsyncExecutor([{"ticker": "HGLG11"}])
+
+    orchestrator = routing.Orchestrator(planner=planner, executor=executor)
+    orchestrator.set_async_backends(executor=async_exec)
+
+    response = await orchestrator.route_question_async("preço do HGLG11")
+
+    assert async_exec.calls and async_exec.calls[0][1]["entity"] == "fiis_quota_prices"
+    assert response["results"]["result_key"] == [{"ticker": "HGLG11"}]
+    assert rag_calls == [("async", "preço do HGLG11")]
+
+
+def test_route_question_sync_and_async_share_the_same_payload(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    instrumentation.set_backend(_DummyBackend())
+    _patch_builders(monkeypatch, [])
+
+    planner = MagicMock()
+    planner.explain.return_value = _plan_with_bucket(entity="fiis_quota_prices")
+    executor = MagicMock()
+    executor.query.return_value = [{"ticker": "HGLG11"}]
+
+    orchestrator = routing.Orchestrator(planner=planner, executor=executor)
+    sync_payload = orchestrator.route_question("preço do HGLG11")
+
+    # sem backends async configurados, o driver async cai no threadpool
+    async_payload = asyncio.run(orchestrator.route_question_async("preço do HGLG11"))
+
+    for payload in (sync_payload, async_payload):
+        payload["meta"].pop("elapsed_ms", None)
+    assert sync_payload == async_payload
+    assert executor.query.call_count == 2
+
+
+def test_effect_errors_are_raised_inside_the_pipeline() -> None:
+    def boom():
+        raise RuntimeError("redis down")
+
+    async def aboom():
+        raise RuntimeError("redis down")
+
+    def steps():
+        try:
+            yield effect(boom, afn=aboom)
+        except RuntimeError as exc:
+            fallback = str(exc)
+        value = yield effect(lambda x: x * 2, 21)
+        return fallback, value
+
+    assert run_sync(steps()) == ("redis down", 42)
+    assert asyncio.run(run_async(steps())) == ("redis down", 42)
+
+
+class _SlowAsyncExecutor(_AsyncExecutor):
+    async def query(self, sql, params):
+        await asyncio.sleep(0.05)
+        return await super().query(sql, params)
+
+
+class _PlanCache:
+    """Fake sync+async do RedisCache: só o necessário para o plan-cache."""
+
+    lock_token = "token"
+
+    def __init__(self):
+        self.data = {}
+        self.ops = []
+
+    async def get_json(self, key):
+        self.ops.append(("get_json", key))
+        return self.data.get(key)
+
+    async def get_json_swr(self, key, stale_seconds):
+        self.ops.append(("get_json", key))
+        return self.data.get(key), False
+
+    async def set_json(self, key, value, ttl_seconds, stale_ttl_seconds=0, tags=None):
+        self.ops.append(("set_json", key))
+        self.data[key] = value
+
+    async def acquire_lock(self, key, ttl_ms):
+        self.ops.append(("acquire_lock", key))
+        return True
+
+    async def release_lock(self, key, value):
+        self.ops.append(("release_lock", key))
+
+    async def notify_key(self, key):
+        self.ops.append(("notify_key", key))
+
+    async def wait_for_key(self, key, max_wait_ms, step_ms):
+        raise AssertionError("lock always acquired in this test")
+
+
+@pytest.mark.asyncio
+async def test_duplicate_in_flight_requests_are_coalesced_locally(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    from app.cache.rt_cache import CachePolicies
+
+    instrumentation.set_backend(_DummyBackend())
+    _patch_builders(monkeypatch, [])
+
+    planner = MagicMock()
+    planner.explain.return_value = _plan_with_bucket(entity="fiis_quota_prices")
+    async_exec = _SlowAsyncExecutor([{"ticker": "HGLG11"}])
+    plan_cache = _PlanCache()
+
+    orchestrator = routing.Orchestrator(
+        planner=planner,
+        executor=MagicMock(),
+        cache=plan_cache,
+        cache_policies=CachePolicies(),
+    )
+    orchestrator.set_async_backends(cache=plan_cache, executor=async_exec)
+
+    responses = await asyncio.gather(
+        orchestrator.route_question_async("preço do HGLG11"),
+        orchestrator.route_question_async("preço do HGLG11"),
+    )
+    # a líder é quem chega primeiro ao plan-cache (prepare_plan roda no threadpool)
+    leader, follower = sorted(
+        responses, key=lambda r: bool(r["meta"]["compute"].get("plan_cache_coalesced"))
+    )
+
+    assert len(async_exec.calls) == 1
+    assert leader["meta"]["compute"]["plan_cache_written"] is True
+    follower_compute = follower["meta"]["compute"]
+    assert follower_compute["plan_cache_hit"] is True
+    assert follower_compute["plan_cache_coalesced"] is True
+    assert follower["results"] == leader["results"]
+    # a seguidora não tocou no Redis; a líder notificou os outros processos
+    assert [op for op, _ in plan_cache.ops].count("get_json") == 1
+    assert ("notify_key", leader["meta"]["compute"]["plan_cache_key"]) in plan_cache.ops
+
+
+class _StalePlanCache:
+    """Fake sync do RedisCache cujas leituras SWR sempre voltam stale."""
+
+    lock_token = "token"
+
+    def __init__(self):
+        self.data = {}
+        self.writes = []
+        self.refreshed = threading.Event()
+
+    def get_json(self, key):
+        return self.data.get(key)
+
+    def get_json_swr(self, key, stale_seconds):
+        return self.data.get(key), key in self.data
+
+    def set_json(self, key, value, ttl_seconds, stale_ttl_seconds=0, tags=None):
+        self.writes.append((key, ttl_seconds, stale_ttl_seconds))
+        self.data[key] = value
+        if len(self.writes) > 1:
+            self.refreshed.set()
+
+    def acquire_lock(self, key, ttl_ms):
+        return True
+
+    def release_lock(self, key, value):
+        pass
+
+    def notify_key(self, key):
+        pass
+
+
+def test_stale_plan_cache_hit_is_served_and_refreshed_in_background(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    from app.cache.rt_cache import CachePolicies
+
+    instrumentation.set_backend(_DummyBackend())
+    _patch_builders(monkeypatch, [])
+
+    planner = MagicMock()
+    planner.explain.return_value = _plan_with_bucket(entity="fiis_quota_prices")
+    executor = MagicMock()
+    executor.query.return_value = [{"ticker": "HGLG11"}]
+    plan_cache = _StalePlanCache()
+    orchestrator = routing.Orchestrator(
+        planner=planner,
+        executor=executor,
+        cache=plan_cache,
+        cache_policies=CachePolicies(),
+    )
+
+    first = orchestrator.route_question("preço do HGLG11")
+    key = first["meta"]["compute"]["plan_cache_key"]
+    assert plan_cache.writes == [(key, 86400, 3600)]
+
+    executor.query.return_value = [{"ticker": "HGLG11B"}]
+    stale = orchestrator.route_question("preço do HGLG11")
+    assert stale["meta"]["compute"]["plan_cache_stale"] is True
+    assert stale["results"] == first["results"]
+
+    assert plan_cache.refreshed.wait(2)
+    assert plan_cache.writes[-1] == (key, 86400, 3600)
+    assert plan_cache.data[key]["results"]["result_key"] == [{"ticker": "HGLG11B"}]
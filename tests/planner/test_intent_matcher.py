@@ -0,0 +1,145 @@
+import glob
+import json
+from typing import List
+
+import pytest
+
+from app.planner import planner as planner_mod
+from app.planner.intent_matcher import IntentMatcher
+from app.planner.ontology_loader import load_ontology
+
+ONTOLOGY_PATH = "data/ontology/entity.yaml"
+
+
+def _questions() -> List[str]:
+    questions: List[str] = []
+    for path in sorted(glob.glob("data/ops/quality/payloads/*.json")):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        for item in data.get("payloads") or []:
+            if isinstance(item, dict) and item.get("question"):
+                questions.append(str(item["question"]))
+    return questions
+
+
+# ---- referência: matching original do Planner.explain (antes do IntentMatcher)
+
+
+def _tokens_match_in_order(text_tokens: List[str], template_tokens: List[str]) -> bool:
+    pos = 0
+    for token in template_tokens:
+        try:
+            pos = text_tokens.index(token, pos) + 1
+        except ValueError:
+            return False
+    return True
+
+
+def _phrase_matches_with_placeholders(
+    norm_text: str,
+    raw_phrase: str,
+    *,
+    has_ticker: bool,
+    normalize_steps: List[str],
+    token_split: str,
+    text_tokens: List[str],
+) -> bool:
+    if not raw_phrase:
+        return False
+
+    contains_ticker = "<ticker>" in raw_phrase
+    contains_no_ticker = "(sem ticker)" in raw_phrase
+
+    if not contains_ticker and not contains_no_ticker:
+        normalized_phrase = planner_mod._normalize(raw_phrase, normalize_steps)
+        return bool(normalized_phrase) and normalized_phrase in norm_text
+
+    if contains_ticker and not has_ticker:
+        return False
+    if contains_no_ticker and has_ticker:
+        return False
+
+    template = raw_phrase.replace("<ticker>", " ").replace("(sem ticker)", " ")
+    normalized_template = planner_mod._normalize(template, normalize_steps)
+    template_tokens = planner_mod._tokenize(normalized_template, token_split)
+    return _tokens_match_in_order(text_tokens, template_tokens)
+
+
+def _any_in(text: str, candidates: List[str]) -> bool:
+    return any(c for c in candidates if c and c in text)
+
+
+def _legacy_hits(onto, it, norm: str, tokens: List[str], has_ticker: bool):
+    """Laço original do Planner.explain (referência de equivalência)."""
+    tokens_set = set(tokens)
+
+    def token_hits(candidates):
+        return [
+            t
+            for t in candidates
+            if (t == "<ticker>" and has_ticker)
+            or (t == "(sem ticker)" and not has_ticker)
+            or (t not in {"<ticker>", "(sem ticker)"} and (t in tokens_set))
+        ]
+
+    def phrase_hits(candidates):
+        return [
+            p
+            for p in candidates
+            if _phrase_matches_with_placeholders(
+                norm,
+                p,
+                has_ticker=has_ticker,
+                normalize_steps=onto.normalize,
+                token_split=onto.token_split,
+                text_tokens=tokens,
+            )
+        ]
+
+    return (
+        token_hits(it.tokens_include),
+        token_hits(it.tokens_exclude),
+        phrase_hits(it.phrases_include),
+        phrase_hits(it.phrases_exclude),
+    )
+
+
+@pytest.mark.parametrize("has_ticker", [True, False])
+def test_compiled_matcher_matches_legacy_scoring(has_ticker: bool) -> None:
+    onto = load_ontology(ONTOLOGY_PATH)
+    matcher = IntentMatcher(onto, planner_mod._normalize, planner_mod._tokenize)
+
+    questions = _questions()
+    # as próprias frases da ontologia exercitam todos os padrões
+    for it in onto.intents:
+        questions.extend(p.replace("<ticker>", "HGLG11") for p in it.phrases_include)
+    assert len(questions) > 100
+
+    for question in questions:
+        norm = planner_mod._normalize(question, onto.normalize)
+        tokens = planner_mod._tokenize(norm, onto.token_split)
+        hits, anti_groups = matcher.match(norm, tokens, has_ticker)
+
+        expected_anti = sum(
+            1
+            for toks in (onto.anti_tokens or {}).values()
+            if _any_in(norm, toks)
+        )
+        assert anti_groups == expected_anti, question
+        for it, got in zip(onto.intents, hits):
+            assert (
+                got.token_includes,
+                got.token_excludes,
+                got.phrase_includes,
+                got.phrase_excludes,
+            ) == _legacy_hits(onto, it, norm, tokens, has_ticker), (question, it.name)
+
+
+def test_planner_recompiles_matcher_on_reload() -> None:
+    planner = planner_mod.Planner(ONTOLOGY_PATH)
+    first = planner._intent_matcher()
+    assert planner._intent_matcher() is first
+
+    planner.reload()
+    assert planner._intent_matcher() is not first
+    assert planner._intent_matcher().onto is planner.onto
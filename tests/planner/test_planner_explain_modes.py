@@ -0,0 +1,29 @@
+import pytest
+
+from app.planner import planner as planner_mod
+from tests.planner.test_intent_matcher import ONTOLOGY_PATH, _questions
+
+
+def test_routing_mode_matches_full_explain(monkeypatch: pytest.MonkeyPatch) -> None:
+    def no_store(_path):
+        raise RuntimeError("rag offline")
+
+    monkeypatch.setattr(planner_mod, "cached_embedding_store", no_store)
+    planner = planner_mod.Planner(ONTOLOGY_PATH)
+
+    for question in _questions()[:80]:
+        full = planner.explain(question)
+        fast = planner.explain(question, detail=False)
+
+        assert fast["chosen"] == full["chosen"], question
+        assert fast["intent_scores"] == full["intent_scores"]
+        fast_scoring = fast["explain"]["scoring"]
+        full_scoring = full["explain"]["scoring"]
+        assert fast_scoring["thresholds_applied"] == full_scoring["thresholds_applied"]
+        assert fast_scoring["combined"] == full_scoring["combined"]
+        assert fast["explain"]["bucket"] == full["explain"]["bucket"]
+
+        assert fast["explain"]["mode"] == "routing"
+        assert "signals" not in fast["explain"] and "decision_path" not in fast["explain"]
+        assert fast["details"] == {}
+        assert "mode" not in full["explain"] and full["explain"]["decision_path"]
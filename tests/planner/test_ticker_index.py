@@ -0,0 +1,68 @@
+import re
+from typing import List
+
+from app.planner import ticker_index
+from app.planner.ticker_index import (
+    extract_tickers_from_text,
+    get_ticker_index,
+    resolve_ticker_from_text,
+    ticker_scan_scope,
+)
+from tests.planner.test_intent_matcher import _questions
+
+
+def _legacy_tokens(text: str) -> List[str]:
+    tokens: List[str] = []
+    for match in re.finditer(r"\w+", text or ""):
+        token = ticker_index._normalize_token(match.group(0))
+        if token:
+            tokens.append(token)
+    return tokens
+
+
+def _legacy_extract(question: str) -> List[str]:
+    """Laço original: tokeniza e resolve token a token (referência)."""
+    index = get_ticker_index()
+    seen = set()
+    results: List[str] = []
+    for token in _legacy_tokens(question):
+        resolved = index.resolve(token)
+        if resolved and resolved not in seen:
+            results.append(resolved)
+            seen.add(resolved)
+    return results
+
+
+def test_scan_matches_token_by_token_resolution() -> None:
+    questions = _questions() + [
+        "compare hglg11, MXRF11 e knri",
+        "HGLG11_X não é ticker; xhglg11 também não",
+        "cotação de ÁÇÃO hglg11/mxrf11-knri11",
+        "",
+    ]
+    for question in questions:
+        expected = _legacy_extract(question)
+        assert extract_tickers_from_text(question) == expected, question
+        assert resolve_ticker_from_text(question) == (expected[0] if expected else None)
+
+
+def test_scan_is_memoised_per_request_scope(monkeypatch) -> None:
+    index = get_ticker_index()
+    calls = []
+    original = index.scan
+
+    def counting_scan(text):
+        calls.append(text)
+        return original(text)
+
+    monkeypatch.setattr(index, "scan", counting_scan)
+    question = "compare HGLG11 com MXRF11"
+
+    with ticker_scan_scope():
+        with ticker_scan_scope():
+            assert resolve_ticker_from_text(question) == "HGLG11"
+        assert extract_tickers_from_text(question) == ["HGLG11", "MXRF11"]
+    assert calls == [question]
+
+    extract_tickers_from_text(question)
+    assert len(calls) == 2
@@ -0,0 +1,39 @@
+from app.presenter.presenter import present
+
+
+class _Narrator:
+    policy = {}
+    model = "dummy"
+
+    def __init__(self, events):
+        self.events = events
+
+    def get_effective_policy(self, entity):
+        return {"llm_enabled": True, "model": "dummy"}
+
+    def render(self, question, facts, meta, on_token=None):
+        self.events.append(("render", on_token is not None))
+        on_token("SIRIOS ")
+        return {"text": "SIRIOS em resumo.", "meta": {"narrator": {"strategy": "llm_shadow"}}}
+
+
+def test_baseline_is_emitted_before_narrator_and_tokens_forwarded():
+    events = []
+    plan = {"chosen": {"intent": "institutional_about", "entity": "institutional_about", "score": 0.95}}
+
+    result = present(
+        question="o que a sirios faz",
+        plan=plan,
+        orchestrator_results={"institutional_about": [{"content": "ok"}]},
+        meta={"result_key": "institutional_about", "planner_score": 0.95},
+        identifiers={},
+        aggregates={},
+        narrator=_Narrator(events),
+        on_baseline=lambda text: events.append(("baseline", text)),
+        on_token=lambda chunk: events.append(("token", chunk)),
+    )
+
+    assert events[0] == ("baseline", result.baseline_answer)
+    assert events[1:] == [("render", True), ("token", "SIRIOS ")]
+    # shadow: resposta final continua sendo o baseline
+    assert result.answer == result.baseline_answer
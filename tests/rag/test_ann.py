@@ -0,0 +1,125 @@
+# tests/rag/test_ann.py
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Dict
+
+import numpy as np
+import pytest
+
+from app.rag import ann, index_reader
+
+
+def _settings(backend: str, **overrides: Any) -> Dict[str, Any]:
+    policy = {"rag": {"index": {"backend": backend, "min_rows": 0, **overrides}}}
+    return ann.load_ann_settings(policy)
+
+
+def _clustered_matrix(n: int = 2000, dim: int = 32, seed: int = 3) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(40, dim))
+    points = centers[rng.integers(0, 40, size=n)] + rng.normal(scale=0.3, size=(n, dim))
+    points = points.astype(np.float32)
+    return points / np.linalg.norm(points, axis=1, keepdims=True)
+
+
+def _recall(backend: Any, matrix: np.ndarray, k: int = 10) -> float:
+    exact = ann.ExactBackend(matrix)
+    rng = np.random.default_rng(11)
+    hits = 0
+    queries = matrix[rng.choice(matrix.shape[0], size=50, replace=False)]
+    for q in queries:
+        truth, _ = exact.search(q, k)
+        got, _ = backend.search(q, k)
+        hits += len(set(truth.tolist()) & set(got.tolist()))
+    return hits / (k * len(queries))
+
+
+def test_load_ann_settings_defaults_and_invalid_backend() -> None:
+    assert ann.load_ann_settings({})["backend"] == "exact"
+    settings = _settings("faiss", ivf={"nprobe": 4})
+    assert settings["backend"] == "exact"
+    assert settings["ivf"]["nprobe"] == 4
+    assert settings["ivf"]["iterations"] == ann.DEFAULT_ANN_SETTINGS["ivf"]["iterations"]
+
+
+def test_ivf_backend_recall_against_exact(tmp_path: Path) -> None:
+    matrix = _clustered_matrix()
+    jsonl = tmp_path / "embeddings.jsonl"
+    meta = ann.build_ann_index(jsonl, matrix, "h1", _settings("ivf", ivf={"nprobe": 8}))
+    assert meta["backend"] == "ivf" and meta["ivf"]["nlist"] == 44
+
+    backend = ann.load_backend(jsonl, matrix, "h1", _settings("ivf", ivf={"nprobe": 8}))
+    assert isinstance(backend, ann.IVFBackend)
+    assert _recall(backend, matrix) >= 0.9
+
+    # nprobe == nlist sonda todas as listas: resultado idêntico ao exato
+    full = ann.load_backend(jsonl, matrix, "h1", _settings("ivf", ivf={"nprobe": 1000}))
+    q = matrix[5]
+    ids, scores = full.search(q, 10)
+    exact_ids, exact_scores = ann.ExactBackend(matrix).search(q, 10)
+    assert ids.tolist() == exact_ids.tolist()
+    assert np.allclose(scores, exact_scores)
+
+
+def test_load_backend_falls_back_to_exact_when_artifact_is_stale(tmp_path: Path) -> None:
+    matrix = _clustered_matrix(n=300)
+    jsonl = tmp_path / "embeddings.jsonl"
+    settings = _settings("ivf")
+
+    # sem artefato
+    assert isinstance(ann.load_backend(jsonl, matrix, "h1", settings), ann.ExactBackend)
+
+    ann.build_ann_index(jsonl, matrix, "h1", settings)
+    assert isinstance(ann.load_backend(jsonl, matrix, "h2", settings), ann.ExactBackend)
+    assert isinstance(
+        ann.load_backend(jsonl, matrix[:200], "h1", settings), ann.ExactBackend
+    )
+
+    # corpus abaixo de min_rows: o build grava "exact" e o runtime segue exato
+    meta = ann.build_ann_index(jsonl, matrix, "h1", _settings("ivf", min_rows=10000))
+    assert meta["backend"] == "exact"
+    assert isinstance(ann.load_backend(jsonl, matrix, "h1", settings), ann.ExactBackend)
+
+
+def test_embedding_store_uses_configured_ann_backend(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    for key in index_reader._EMB_CACHE:
+        index_reader._EMB_CACHE[key] = None
+    monkeypatch.setattr(index_reader, "get_manifest_hash", lambda manifest_path: "h1")
+    settings = _settings("ivf")
+    monkeypatch.setattr(ann, "load_ann_settings", lambda: settings)
+
+    matrix = _clustered_matrix(n=400, dim=8)
+    jsonl = tmp_path / "embeddings.jsonl"
+    jsonl.write_text(
+        "".join(
+            json.dumps({"id": f"row-{i}", "embedding": v.tolist()}) + "\n"
+            for i, v in enumerate(matrix)
+        ),
+        encoding="utf-8",
+    )
+    index_reader.write_vector_sidecar(jsonl, "h1")
+    sidecar = np.load(index_reader.sidecar_paths(jsonl)["vectors"])
+    ann.build_ann_index(jsonl, sidecar, "h1", settings)
+
+    store = index_reader.EmbeddingStore(str(jsonl))
+    assert isinstance(store._index.backend, ann.IVFBackend)
+    results = store.search_by_vector(matrix[17].tolist(), k=3, min_score=0.5)
+    assert results[0]["id"] == "row-17"
+    assert all(r["score"] >= 0.5 for r in results)
+
+
+def test_hnsw_backend_roundtrip(tmp_path: Path) -> None:
+    pytest.importorskip("hnswlib")
+    matrix = _clustered_matrix(n=1000)
+    jsonl = tmp_path / "embeddings.jsonl"
+    settings = _settings("hnsw")
+    ann.build_ann_index(jsonl, matrix, "h1", settings)
+
+    backend = ann.load_backend(jsonl, matrix, "h1", settings)
+    assert isinstance(backend, ann.HnswBackend)
+    assert _recall(backend, matrix) >= 0.9
@@ -0,0 +1,166 @@
+# tests/rag/test_embed_cache.py
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+
+from app.rag import embed_cache
+from app.rag.embed_cache import CachedEmbedder, QueryEmbeddingCache
+
+
+class _Client:
+    def __init__(self, model: str = "nomic-embed-text"):
+        self.model = model
+        self.calls: List[List[str]] = []
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        self.calls.append(list(texts))
+        return [[float(len(t)), 1.0] for t in texts]
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        return self.embed(texts)
+
+
+class _FakeRedis:
+    def __init__(self) -> None:
+        self.store: Dict[str, Any] = {}
+        self.ttls: Dict[str, int] = {}
+
+    def get_json(self, key: str) -> Any:
+        return self.store.get(key)
+
+    def set_json(self, key: str, value: Any, ttl_seconds: int) -> None:
+        self.store[key] = json.loads(json.dumps(value))
+        self.ttls[key] = ttl_seconds
+
+
+class _FakeAsyncRedis(_FakeRedis):
+    async def get_json(self, key: str) -> Any:  # type: ignore[override]
+        return _FakeRedis.get_json(self, key)
+
+    async def set_json(self, key: str, value: Any, ttl_seconds: int) -> None:  # type: ignore[override]
+        _FakeRedis.set_json(self, key, value, ttl_seconds)
+
+
+@pytest.fixture
+def manifest(tmp_path: Path) -> Path:
+    path = tmp_path / "manifest.json"
+    path.write_text(json.dumps({"tree": "v1"}), encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def cache(manifest: Path) -> QueryEmbeddingCache:
+    return QueryEmbeddingCache(
+        max_entries=2, ttl_seconds=60, index_path=str(manifest.parent / "embeddings.jsonl")
+    )
+
+
+@pytest.fixture
+def counters(monkeypatch: pytest.MonkeyPatch) -> List[Dict[str, Any]]:
+    seen: List[Dict[str, Any]] = []
+    monkeypatch.setattr(
+        embed_cache, "counter", lambda name, **labels: seen.append({"name": name, **labels})
+    )
+    return seen
+
+
+def test_l1_hits_on_normalised_text_and_respects_size_bound(
+    cache: QueryEmbeddingCache, counters: List[Dict[str, Any]]
+) -> None:
+    client = _Client()
+    embedder = CachedEmbedder(client, cache=cache)
+
+    first = embedder.embed(["Qual o dividend yield do HGLG11"])
+    again = embedder.embed(["  qual o DIVIDEND  yield do hglg11 "])
+
+    assert again == first
+    assert client.calls == [["Qual o dividend yield do HGLG11"]]
+    assert [c["outcome"] for c in counters if c["tier"] == "l1"] == ["miss", "hit"]
+
+    embedder.embed(["b", "c"])  # expulsa a entrada mais antiga (max_entries=2)
+    embedder.embed(["qual o dividend yield do hglg11"])
+    assert len(client.calls) == 3
+
+
+def test_batch_mixes_hits_and_deduplicated_misses(cache: QueryEmbeddingCache) -> None:
+    client = _Client()
+    embedder = CachedEmbedder(client, cache=cache)
+    embedder.embed(["aa"])
+
+    out = embedder.embed(["aa", "bbb", "BBB"])
+
+    assert out == [[2.0, 1.0], [3.0, 1.0], [3.0, 1.0]]
+    assert client.calls[-1] == ["bbb"]
+
+
+def test_redis_tier_shared_between_processes(
+    cache: QueryEmbeddingCache, manifest: Path, counters: List[Dict[str, Any]]
+) -> None:
+    redis = _FakeRedis()
+    cache.set_backends(cache=redis)
+    CachedEmbedder(_Client(), cache=cache).embed(["pergunta"])
+    assert list(redis.ttls.values()) == [60]
+
+    # outro processo: L1 vazio, mas o Redis responde
+    other = QueryEmbeddingCache(
+        max_entries=2, ttl_seconds=60, index_path=str(manifest.parent / "embeddings.jsonl")
+    )
+    other.set_backends(cache=redis)
+    client = _Client()
+    assert CachedEmbedder(client, cache=other).embed(["pergunta"]) == [[8.0, 1.0]]
+    assert client.calls == []
+    assert {"name": "sirios_rag_embed_cache_total", "tier": "redis", "outcome": "hit"} in counters
+
+
+def test_model_or_manifest_change_invalidates(
+    cache: QueryEmbeddingCache, manifest: Path
+) -> None:
+    redis = _FakeRedis()
+    cache.set_backends(cache=redis)
+    client = _Client()
+    CachedEmbedder(client, cache=cache).embed(["pergunta"])
+
+    other_model = _Client(model="bge-m3")
+    CachedEmbedder(other_model, cache=cache).embed(["pergunta"])
+    assert other_model.calls == [["pergunta"]]
+
+    manifest.write_text(json.dumps({"tree": "v2"}), encoding="utf-8")
+    os.utime(manifest, (1, 1))
+    CachedEmbedder(client, cache=cache).embed(["pergunta"])
+    assert client.calls == [["pergunta"], ["pergunta"]]
+    assert len(redis.store) == 3
+
+
+def test_async_path_uses_async_redis(cache: QueryEmbeddingCache) -> None:
+    aredis = _FakeAsyncRedis()
+    cache.set_backends(async_cache=aredis)
+    client = _Client()
+    embedder = CachedEmbedder(client, client, cache=cache)
+
+    first = asyncio.run(embedder.aembed(["pergunta"]))
+    cache.clear()
+    second = asyncio.run(embedder.aembed(["pergunta"]))
+
+    assert first == second
+    assert client.calls == [["pergunta"]]
+
+
+def test_clients_without_model_bypass_cache(cache: QueryEmbeddingCache) -> None:
+    class _Anon:
+        calls = 0
+
+        def embed(self, texts: List[str]) -> List[List[float]]:
+            _Anon.calls += 1
+            return [[1.0]]
+
+    embedder = CachedEmbedder(_Anon(), cache=cache)
+    embedder.embed(["x"])
+    embedder.embed(["x"])
+    assert _Anon.calls == 2
@@ -0,0 +1,104 @@
+import json
+
+import pytest
+import yaml
+
+from scripts.embeddings import embeddings_build as eb
+
+
+class _Client:
+    def __init__(self):
+        self.calls = []
+
+    def embed_batch(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(t)), 1.0] for t in texts]
+
+
+@pytest.fixture(autouse=True)
+def _no_sidecar(monkeypatch):
+    monkeypatch.setenv("EMBED_BACKOFF_S", "0")
+    monkeypatch.setattr(eb, "build_sidecar", lambda out_dir: {})
+    monkeypatch.setattr(eb, "build_ann", lambda out_dir: {})
+
+
+def _index(tmp_path, docs, model="nomic-embed-text"):
+    include = []
+    for doc_id, text in docs.items():
+        path = tmp_path / f"{doc_id}.md"
+        path.write_text(text, encoding="utf-8")
+        include.append({"id": doc_id, "path": str(path), "tags": []})
+    index = tmp_path / "index.yaml"
+    index.write_text(
+        yaml.safe_dump(
+            {
+                "embedding_model": model,
+                "chunk": {"max_chars": 10, "overlap_chars": 0},
+                "include": include,
+            }
+        ),
+        encoding="utf-8",
+    )
+    return str(index)
+
+
+def _records(out_dir):
+    lines = (out_dir / "embeddings.jsonl").read_text(encoding="utf-8").splitlines()
+    return [json.loads(line) for line in lines]
+
+
+def test_rebuild_reuses_unchanged_chunks(tmp_path):
+    out = tmp_path / "store"
+    client = _Client()
+    index = _index(tmp_path, {"a": "aaaaaaaaaabbbbbbbbbb", "b": "cccccccccc"})
+    first = eb.build_index(index, str(out), client)
+    assert (first["reused"], first["embedded"], first["deleted"]) == (0, 3, 0)
+    before = {r["sha"]: r["embedding"] for r in _records(out)}
+
+    client.calls.clear()
+    index = _index(tmp_path, {"a": "aaaaaaaaaaBBBBBBBBBB"})
+    second = eb.build_index(index, str(out), client)
+
+    assert client.calls == [["BBBBBBBBBB"]]
+    assert (second["reused"], second["embedded"], second["deleted"]) == (1, 1, 2)
+    records = _records(out)
+    assert [r["text"] for r in records] == ["aaaaaaaaaa", "BBBBBBBBBB"]
+    assert records[0]["embedding"] == before[records[0]["sha"]]
+    manifest = json.loads((out / "manifest.json").read_text(encoding="utf-8"))
+    assert manifest["incremental"]["reused"] == 1
+    assert not (out / "embeddings.jsonl.tmp").exists()
+
+
+def test_model_change_or_full_reembeds_everything(tmp_path):
+    out = tmp_path / "store"
+    client = _Client()
+    eb.build_index(_index(tmp_path, {"a": "aaaaaaaaaa"}), str(out), client)
+
+    client.calls.clear()
+    changed = eb.build_index(_index(tmp_path, {"a": "aaaaaaaaaa"}, model="other"), str(out), client)
+    assert (changed["reused"], changed["embedded"]) == (0, 1)
+
+    client.calls.clear()
+    full = eb.build_index(
+        _index(tmp_path, {"a": "aaaaaaaaaa"}, model="other"), str(out), client, incremental=False
+    )
+    assert client.calls == [["aaaaaaaaaa"]]
+    assert full["reused"] == 0
+
+
+def test_failed_embeddings_are_retried_next_run(tmp_path):
+    out = tmp_path / "store"
+
+    class _Failing(_Client):
+        def embed_batch(self, texts):
+            self.calls.append(list(texts))
+            raise RuntimeError("boom")
+
+    index = _index(tmp_path, {"a": "aaaaaaaaaa"})
+    eb.build_index(index, str(out), _Failing())
+    assert _records(out)[0]["embedding"] == []
+
+    client = _Client()
+    result = eb.build_index(index, str(out), client)
+    assert client.calls == [["aaaaaaaaaa"]]
+    assert result["embedded"] == 1
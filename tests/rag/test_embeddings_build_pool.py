@@ -0,0 +1,69 @@
+import threading
+import time
+
+from scripts.embeddings import embeddings_build as eb
+
+
+class _Client:
+    def __init__(self, max_batch=None, delay=0.0, broken=()):
+        self.max_batch = max_batch
+        self.delay = delay
+        self.broken = set(broken)
+        self.sizes = []
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def embed_batch(self, texts):
+        with self._lock:
+            self.sizes.append(len(texts))
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            if self.delay:
+                time.sleep(self.delay)
+            if self.max_batch is not None and len(texts) > self.max_batch:
+                raise RuntimeError("payload grande demais")
+            if any(t in self.broken for t in texts):
+                raise RuntimeError("texto rejeitado")
+            return [[float(t)] for t in texts]
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+def _run(client, n, **kwargs):
+    params = dict(workers=4, batch_size=2, max_batch_size=8, retries=0, backoff_s=0.0)
+    params.update(kwargs)
+    return eb._embed_concurrent(client, [str(i) for i in range(n)], **params)
+
+
+def test_vectors_come_back_in_input_order_with_parallel_requests():
+    client = _Client(delay=0.01)
+    vectors, report = _run(client, 40)
+
+    assert vectors == [[float(i)] for i in range(40)]
+    assert client.peak > 1
+    assert max(client.sizes) > 2  # lote cresceu
+    assert report["chunks"] == 40 and report["failed"] == 0
+    assert report["chunks_per_s"] > 0 and report["p95_ms"] >= report["p50_ms"]
+
+
+def test_failed_batches_are_split_and_shrink_batch_size():
+    client = _Client(max_batch=3)
+    vectors, report = _run(client, 30, workers=1, batch_size=4)
+
+    assert vectors == [[float(i)] for i in range(30)]
+    assert report["splits"] >= 1
+    assert report["final_batch_size"] <= 8
+
+
+def test_single_bad_item_gets_empty_vector():
+    client = _Client(broken={"5"})
+    vectors, report = _run(client, 10, retries=1)
+
+    assert vectors[5] == []
+    assert [v for i, v in enumerate(vectors) if i != 5] == [
+        [float(i)] for i in range(10) if i != 5
+    ]
+    assert report["failed"] == 1
@@ -7,6 +7,7 @@ from pathlib import Path
 from typing import Any, Dict, List
 
 import math
+import numpy as np
 import pytest
 
 from app.rag import index_reader
@@ -26,6 +27,7 @@ def reset_emb_cache() -> None:
     index_reader._EMB_CACHE["key"] = None
     index_reader._EMB_CACHE["rows"] = None
     index_reader._EMB_CACHE["mtime"] = None
+    index_reader._EMB_CACHE["index"] = None
 
 
 @pytest.fixture
@@ -182,3 +184,68 @@ def test_search_by_text_returns_empty_when_embedder_fails(
     embedder.return_empty = True
     results_empty = store.search_by_text("texto", embedder, k=5)
     assert results_empty == []
+
+
+def test_search_by_vector_matches_exhaustive_cosine(
+    embeddings_path: Path, monkeypatch: pytest.MonkeyPatch, reset_emb_cache: None
+) -> None:
+    """Top-k via matriz pré-normalizada deve coincidir com o cosseno exaustivo."""
+    import random
+
+    monkeypatch.setattr(
+        index_reader, "get_manifest_hash", lambda manifest_path: "dummy-hash"
+    )
+    rnd = random.Random(7)
+    rows = [
+        {"id": f"row-{i}", "embedding": [rnd.uniform(-1, 1) for _ in range(16)]}
+        for i in range(200)
+    ]
+    path = embeddings_path / "embeddings.jsonl"
+    path.write_text(
+        "".join(json.dumps(r) + "\n" for r in rows), encoding="utf-8"
+    )
+
+    def cos(a: List[float], b: List[float]) -> float:
+        dot = sum(x * y for x, y in zip(a, b))
+        return dot / (math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b)))
+
+    qvec = [rnd.uniform(-1, 1) for _ in range(16)]
+    expected = sorted(rows, key=lambda r: cos(qvec, r["embedding"]), reverse=True)[:7]
+
+    store = index_reader.EmbeddingStore(str(path))
+    results = store.search_by_vector(qvec, k=7)
+
+    assert [r["id"] for r in results] == [r["id"] for r in expected]
+    for got, exp in zip(results, expected):
+        assert math.isclose(got["score"], cos(qvec, exp["embedding"]), abs_tol=1e-5)
+
+    # a matriz é construída uma única vez por (path, manifest hash)
+    index = index_reader._EMB_CACHE["index"]
+    assert index_reader.EmbeddingStore(str(path))._index is index
+
+
+def test_store_uses_binary_sidecar_bound_to_manifest_hash(
+    embeddings_jsonl: Path,
+) -> None:
+    """Com sidecar válido a matriz vem de mmap e as linhas são lidas por offset."""
+    meta = index_reader.write_vector_sidecar(embeddings_jsonl, "dummy-hash")
+    assert meta["count"] == 2 and meta["dim"] == 2
+
+    store = index_reader.EmbeddingStore(str(embeddings_jsonl))
+    assert isinstance(store._index.matrix, np.memmap)
+    assert index_reader._EMB_CACHE["rows"] is None  # nenhum parse do JSONL
+
+    results = store.search_by_vector([0.0, 1.0], k=1)
+    assert results[0]["id"] == "row-2"
+    assert results[0]["text"] == "segundo chunk"
+    assert math.isclose(results[0]["score"], 1.0, rel_tol=1e-6)
+    assert {r["id"] for r in store.rows_with_vectors()} == {"row-1", "row-2"}
+
+
+def test_store_ignores_sidecar_from_other_manifest(embeddings_jsonl: Path) -> None:
+    index_reader.write_vector_sidecar(embeddings_jsonl, "old-hash")
+
+    store = index_reader.EmbeddingStore(str(embeddings_jsonl))
+
+    assert not isinstance(store._index.matrix, np.memmap)
+    assert store.search_by_vector([1.0, 0.0], k=1)[0]["id"] == "row-1"
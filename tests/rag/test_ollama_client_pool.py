@@ -0,0 +1,104 @@
+import httpx
+import pytest
+
+from app.rag import ollama_client as ollama_mod
+from app.rag.ollama_client import OllamaClient
+
+BASE = "http://ollama-pool:11434"
+
+
+@pytest.fixture
+def metrics(monkeypatch):
+    seen = []
+    monkeypatch.setattr(
+        ollama_mod,
+        "emit_histogram",
+        lambda name, value, **labels: seen.append((name, labels)),
+    )
+    monkeypatch.setattr(
+        ollama_mod, "emit_counter", lambda name, **labels: seen.append((name, labels))
+    )
+    return seen
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    seen = []
+    monkeypatch.setattr(ollama_mod.time, "sleep", seen.append)
+    return seen
+
+
+def _client(monkeypatch, handler, **kwargs) -> OllamaClient:
+    monkeypatch.setitem(
+        ollama_mod._SYNC_HTTP,
+        BASE,
+        httpx.Client(base_url=BASE, transport=httpx.MockTransport(handler)),
+    )
+    return OllamaClient(base_url=BASE, **kwargs)
+
+
+def test_session_is_shared_per_base_url(monkeypatch) -> None:
+    monkeypatch.setattr(ollama_mod, "_SYNC_HTTP", {})
+    monkeypatch.setenv("OLLAMA_POOL_SIZE", "3")
+
+    first = ollama_mod._http(BASE, 5.0)
+    assert ollama_mod._http(BASE, 5.0) is first
+    assert first._transport._pool._max_connections == 3
+
+    ollama_mod.close_clients()
+    assert first.is_closed
+    assert ollama_mod._http(BASE, 5.0) is not first
+    ollama_mod.close_clients()
+
+
+def test_backoff_is_exponential_with_jitter_and_capped(monkeypatch) -> None:
+    client = OllamaClient(base_url=BASE, backoff_s=1.0)
+    monkeypatch.setattr(ollama_mod.random, "random", lambda: 0.0)
+    assert [client._backoff_delay(a) for a in range(3)] == [0.5, 1.0, 2.0]
+
+    monkeypatch.setenv("OLLAMA_BACKOFF_MAX_S", "3")
+    monkeypatch.setattr(ollama_mod.random, "random", lambda: 0.999)
+    assert client._backoff_delay(5) == pytest.approx(3 * 1.499)
+
+
+def test_embed_retries_then_records_latency_per_endpoint(monkeypatch, metrics, sleeps) -> None:
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        if len(calls) == 1:
+            return httpx.Response(500, json={"error": "busy"})
+        return httpx.Response(200, json={"embeddings": [[1.0], [2.0]]})
+
+    client = _client(monkeypatch, handler, retries=2, backoff_s=0.1)
+
+    assert client.embed(["a", "b"]) == [[1.0], [2.0]]
+    assert calls == ["/api/embed", "/api/embed"]
+    assert len(sleeps) == 1 and 0.05 <= sleeps[0] < 0.15
+    assert metrics == [
+        ("sirios_ollama_request_seconds", {"endpoint": "embed", "outcome": "error"}),
+        ("sirios_ollama_retries_total", {"endpoint": "embed"}),
+        ("sirios_ollama_request_seconds", {"endpoint": "embed", "outcome": "ok"}),
+    ]
+
+
+def test_no_sleep_after_last_attempt(monkeypatch, metrics, sleeps) -> None:
+    client = _client(
+        monkeypatch, lambda request: httpx.Response(500, json={"error": "down"}), retries=1
+    )
+    with pytest.raises(RuntimeError):
+        client.embed(["a"])
+    assert len(sleeps) == 1
+
+
+def test_embed_batch_does_not_fall_back_per_item(monkeypatch, metrics, sleeps) -> None:
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        return httpx.Response(500, json={"error": "too large"})
+
+    client = _client(monkeypatch, handler, retries=0)
+    with pytest.raises(RuntimeError):
+        client.embed_batch(["a", "b", "c"])
+    assert calls == ["/api/embed"]
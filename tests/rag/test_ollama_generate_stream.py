@@ -0,0 +1,61 @@
+import json
+
+import httpx
+import pytest
+
+from app.rag import ollama_client as ollama_mod
+from app.rag.ollama_client import OllamaClient
+
+
+def _ndjson(*objs) -> bytes:
+    return b"".join(json.dumps(o).encode("utf-8") + b"\n" for o in objs)
+
+
+def _transport(monkeypatch, handler, base_url="http://ollama:11434") -> None:
+    monkeypatch.setitem(
+        ollama_mod._SYNC_HTTP,
+        base_url,
+        httpx.Client(base_url=base_url, transport=httpx.MockTransport(handler)),
+    )
+
+
+def test_generate_stream_yields_chunks_until_done(monkeypatch) -> None:
+    seen = {}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen["payload"] = json.loads(request.content)
+        seen["url"] = str(request.url)
+        return httpx.Response(
+            200,
+            content=_ndjson(
+                {"response": "Olá", "done": False},
+                {"response": ", mundo", "done": False},
+                {"response": "", "done": True},
+                {"response": "ignorado", "done": False},
+            ),
+        )
+
+    _transport(monkeypatch, handler)
+    client = OllamaClient(base_url="http://ollama:11434")
+
+    chunks = list(client.generate_stream("PROMPT", model="m", max_tokens=16))
+
+    assert chunks == ["Olá", ", mundo"]
+    assert seen["url"] == "http://ollama:11434/api/generate"
+    assert seen["payload"]["stream"] is True
+    assert seen["payload"]["options"] == {"num_predict": 16}
+
+
+def test_generate_stream_raises_on_error_line(monkeypatch) -> None:
+    _transport(
+        monkeypatch,
+        lambda request: httpx.Response(200, content=_ndjson({"error": "model not found"})),
+    )
+    with pytest.raises(RuntimeError, match="model not found"):
+        list(OllamaClient(base_url="http://ollama:11434").generate_stream("PROMPT"))
+
+
+def test_generate_stream_raises_on_http_error(monkeypatch) -> None:
+    _transport(monkeypatch, lambda request: httpx.Response(503, content=b"busy"))
+    with pytest.raises(RuntimeError, match="http 503"):
+        list(OllamaClient(base_url="http://ollama:11434").generate_stream("PROMPT"))
@@ -0,0 +1,112 @@
+import datetime as dt
+import json
+import math
+import zlib
+from decimal import Decimal
+
+import pytest
+
+from app.cache import codec as codec_mod
+from app.cache import rt_cache
+from app.cache.codec import MAGIC, CacheCodec
+from app.cache.rt_cache import RedisCache
+
+
+def _payload(rows=200):
+    return {
+        "results": {
+            "fiis_dividends": [
+                {"ticker": "HGLG11", "paid_at": dt.date(2025, 1, 15), "value": Decimal("1.10")}
+                for _ in range(rows)
+            ]
+        },
+        "meta": {"planner": {"explain": {"decision_path": [{"type": "intent"}] * 20}}},
+    }
+
+
+def _legacy(value):
+    return json.loads(json.dumps(value, ensure_ascii=False, default=str))
+
+
+@pytest.mark.parametrize("serializer", ["json", "orjson"])
+def test_round_trip_matches_legacy_json_semantics(serializer) -> None:
+    codec = CacheCodec(serializer=serializer, compression="zlib", min_compress_bytes=64)
+    value = _payload()
+    data, serialized_size = codec.encode(value)
+    assert data.startswith(MAGIC + b"jz")
+    assert len(data) < serialized_size / 5
+    assert codec.decode(data) == _legacy(value)
+
+
+def test_small_payloads_stay_plain_json() -> None:
+    codec = CacheCodec(compression="zlib", min_compress_bytes=1024)
+    data, size = codec.encode({"v": 1})
+    assert not data.startswith(MAGIC) and size == len(data)
+    assert json.loads(data) == {"v": 1}
+
+
+def test_legacy_text_keys_still_decode() -> None:
+    codec = CacheCodec(compression="zlib")
+    assert codec.decode('{"v": "ação"}') == {"v": "ação"}
+    assert codec.decode('{"v": "ação"}'.encode("utf-8")) == {"v": "ação"}
+    assert codec.decode(None) is None
+
+
+def test_legacy_nan_payloads_still_decode() -> None:
+    # json.dumps legado grava NaN/Infinity literais; orjson recusa
+    legacy = json.dumps({"v": float("nan"), "inf": float("inf")}).encode("utf-8")
+    codec = CacheCodec(serializer="json", compression="zlib", min_compress_bytes=0)
+    decoded = codec.decode(legacy)
+    assert math.isnan(decoded["v"]) and decoded["inf"] == float("inf")
+
+    marked, _ = codec.encode({"v": float("nan"), "pad": "x" * 64})
+    assert marked.startswith(MAGIC + b"jz")
+    assert math.isnan(codec.decode(marked)["v"])
+
+
+def test_unknown_marker_is_rejected() -> None:
+    with pytest.raises(ValueError):
+        CacheCodec().decode(MAGIC + b"j?" + zlib.compress(b"{}"))
+
+
+def test_missing_optional_packages_fall_back(monkeypatch) -> None:
+    monkeypatch.setattr(codec_mod, "msgpack", None)
+    monkeypatch.setattr(codec_mod, "zstandard", None)
+    codec = CacheCodec(serializer="msgpack", compression="zstd")
+    assert (codec.serializer, codec.compression) == ("json", "zlib")
+
+
+def test_redis_cache_stores_compressed_bytes_and_records_sizes(monkeypatch) -> None:
+    sizes = []
+    monkeypatch.setattr(rt_cache, "counter", lambda name, **labels: None)
+    monkeypatch.setattr(
+        rt_cache,
+        "histogram",
+        lambda name, value, **labels: sizes.append((name, value, labels))
+        if name == "sirios_cache_payload_bytes"
+        else None,
+    )
+    monkeypatch.setattr(codec_mod, "_codec", CacheCodec(min_compress_bytes=256))
+
+    class _FakeRedis:
+        def __init__(self):
+            self.data = {}
+
+        def set(self, key, value, ex=None):
+            self.data[key] = value
+
+        def execute_command(self, command, key, **options):
+            assert options, "payload deve ser lido sem decodificação"
+            return self.data.get(key)
+
+    cache = RedisCache("redis://unused:6379/0")
+    cache._cli = _FakeRedis()
+    key = "araquem:dev:cfg-x:pub:fiis_dividends:plan:abc"
+    value = _payload()
+    cache.set_json(key, value, ttl_seconds=60)
+
+    assert cache._cli.data[key].startswith(MAGIC)
+    assert cache.get_json(key) == _legacy(value)
+    forms = {labels["form"]: size for _, size, labels in sizes}
+    assert {labels["entity"] for _, _, labels in sizes} == {"fiis_dividends"}
+    assert forms["stored"] == len(cache._cli.data[key]) < forms["serialized"]
@@ -0,0 +1,156 @@
+import pytest
+
+from app.cache import rt_cache
+from app.cache.rt_cache import (
+    RedisCache,
+    make_cache_tags,
+    make_tag_key,
+    read_through,
+)
+
+
+@pytest.fixture(autouse=True)
+def _no_metrics(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(rt_cache, "counter", lambda name, **labels: None)
+    monkeypatch.setattr(rt_cache, "histogram", lambda name, value, **labels: None)
+
+
+class _FakePipeline:
+    def __init__(self, client):
+        self._client = client
+        self._ops = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self._ops.append((name, args, kwargs))
+
+        return queue
+
+    def execute(self):
+        self._client.round_trips += 1
+        return [getattr(self._client, name)(*a, **kw) for name, a, kw in self._ops]
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.data = {}
+        self.sets = {}
+        self.ttls = {}
+        self.round_trips = 0
+
+    def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.data:
+            return False
+        self.data[key] = value
+        return True
+
+    def execute_command(self, command, key, **options):
+        return self.data.get(key)
+
+    def zadd(self, key, mapping):
+        self.sets.setdefault(key, {}).update(mapping)
+
+    def zremrangebyscore(self, key, low, high):
+        members = self.sets.get(key) or {}
+        expired = [m for m, score in members.items() if score <= high]
+        for member in expired:
+            del members[member]
+        return len(expired)
+
+    def expire(self, key, seconds, nx=False, gt=False):
+        current = self.ttls.get(key)
+        if (nx and current is None) or (gt and current is not None and seconds > current):
+            self.ttls[key] = seconds
+
+    def zpopmin(self, key, count):
+        members = self.sets.get(key) or {}
+        out = sorted(members.items(), key=lambda item: item[1])[:count]
+        for member, _ in out:
+            del members[member]
+        return out
+
+    def delete(self, *keys):
+        return sum(1 for k in keys if self.data.pop(k, None) is not None)
+
+    def pipeline(self, transaction=False):
+        return _FakePipeline(self)
+
+    def scan_iter(self, pattern):
+        raise AssertionError("SCAN no caminho de leitura")
+
+
+class _Policies:
+    def get(self, entity):
+        return {
+            "ttl_seconds": 60,
+            "scope": "pub",
+            "legacy_cleanup_scan": "araquem:*:{ticker}*",
+        }
+
+    def is_private_entity(self, entity):
+        return False
+
+
+def _payload_keys(cache):
+    return [k for k in cache._cli.data if not k.endswith("_once")]
+
+
+def _cache() -> RedisCache:
+    cache = RedisCache("redis://unused:6379/0")
+    cache._cli = _FakeRedis()
+    return cache
+
+
+def test_cache_tags_cover_entity_scope_cfg_and_tickers() -> None:
+    tags = make_cache_tags("dev", "pub", "fiis_dividends", {"tickers": ["hglg11", "MXRF11"]})
+    assert tags[:2] == [
+        "araquem:tag:dev:entity:fiis_dividends",
+        "araquem:tag:dev:scope:pub",
+    ]
+    assert tags[2].startswith("araquem:tag:dev:cfg:cfg-")
+    assert tags[3:] == ["araquem:tag:dev:ticker:HGLG11", "araquem:tag:dev:ticker:MXRF11"]
+    with pytest.raises(ValueError):
+        make_tag_key("dev", "unknown", "x")
+
+
+def test_tagged_write_is_one_round_trip_and_extends_tag_ttl() -> None:
+    cache = _cache()
+    tag = make_tag_key("dev", "entity", "fiis_overview")
+    cache.set_json("k1", {"v": 1}, ttl_seconds=60, tags=[tag])
+    cache.set_json("k2", {"v": 2}, ttl_seconds=30, stale_ttl_seconds=60, tags=[tag])
+    assert cache._cli.round_trips == 2
+    assert set(cache._cli.sets[tag]) == {"k1", "k2"}
+    assert cache._cli.ttls[tag] == 90
+
+
+def test_expired_members_are_pruned_on_write(monkeypatch: pytest.MonkeyPatch) -> None:
+    cache = _cache()
+    tag = make_tag_key("dev", "scope", "pub")
+    now = [1_000.0]
+    monkeypatch.setattr(rt_cache.time, "time", lambda: now[0])
+
+    cache.set_json("k1", {"v": 1}, ttl_seconds=60, tags=[tag])
+    cache.set_json("k2", {"v": 2}, ttl_seconds=300, tags=[tag])
+    assert cache._cli.sets[tag] == {"k1": 1_060.0, "k2": 1_300.0}
+
+    now[0] = 1_061.0  # k1 já expirou no Redis
+    cache.set_json("k3", {"v": 3}, ttl_seconds=60, tags=[tag])
+    assert set(cache._cli.sets[tag]) == {"k2", "k3"}
+
+
+def test_read_through_tags_keys_without_scanning_and_busts_by_ticker() -> None:
+    cache = _cache()
+    policies = _Policies()
+    for ticker in ("HGLG11", "MXRF11"):
+        read_through(cache, policies, "fiis_overview", {"ticker": ticker}, lambda: [{"v": 1}])
+
+    ticker_tag = make_tag_key("dev", "ticker", "HGLG11")
+    assert len(cache._cli.sets[ticker_tag]) == 1
+    assert len(_payload_keys(cache)) == 2
+
+    assert cache.invalidate_tag(ticker_tag) == 1
+    assert len(_payload_keys(cache)) == 1
+    assert cache.invalidate_tag(make_tag_key("dev", "entity", "fiis_overview")) == 1
+    assert _payload_keys(cache) == []
+    # chaves já apagadas por outra tag não contam
+    assert cache.invalidate_tag(make_tag_key("dev", "scope", "pub")) == 0
@@ -0,0 +1,123 @@
+import datetime as dt
+
+import pytest
+
+from app.cache import warmer as warmer_mod
+from app.cache.rt_cache import CachePolicies
+from app.cache.warmer import CacheWarmer, WarmerConfig
+
+UTC = dt.timezone.utc
+
+
+@pytest.fixture(autouse=True)
+def events(monkeypatch: pytest.MonkeyPatch):
+    seen = []
+    monkeypatch.setattr(
+        warmer_mod, "counter", lambda name, **labels: seen.append({"name": name, **labels})
+    )
+    return seen
+
+
+class _Orchestrator:
+    def __init__(self, routes=None):
+        self.calls = []
+        self.routes = routes or {}
+
+    def route_question(self, question, cache_refresh=False):
+        assert cache_refresh is True
+        self.calls.append(question)
+        entity = self.routes.get(question, "fiis_quota_prices")
+        return {"meta": {"entity": entity, "compute": {"plan_cache_written": True}}}
+
+
+class _Locks:
+    def __init__(self):
+        self.held = set()
+
+    def acquire_lock(self, key, ttl_ms):
+        if key in self.held:
+            return False
+        self.held.add(key)
+        return True
+
+
+def _config(**kwargs):
+    base = dict(
+        delay_minutes=15,
+        top_n=3,
+        tickers=("HGLG11", "MXRF11", "KNRI11"),
+        question_templates={"fiis_quota_prices": "preço do {ticker}"},
+    )
+    base.update(kwargs)
+    return WarmerConfig(**base)
+
+
+def test_refresh_at_is_parsed_from_policies() -> None:
+    policies = CachePolicies()
+    assert policies.refresh_at("fiis_quota_prices") == dt.time(7, 0)
+    assert policies.refresh_at("client_fiis_positions") is None
+    assert policies.refresh_at("entity_without_policy") is None
+
+
+def test_entities_skip_private_and_without_refresh_at() -> None:
+    warmer = CacheWarmer(_Orchestrator(), CachePolicies(), config=_config())
+    entities = warmer.entities()
+    assert "fiis_quota_prices" in entities
+    assert not any(e.startswith("client_") for e in entities)
+
+
+def test_due_after_refresh_at_plus_delay_once_per_slot() -> None:
+    orchestrator = _Orchestrator()
+    warmer = CacheWarmer(
+        orchestrator,
+        CachePolicies(),
+        _Locks(),
+        config=_config(),
+        top_questions=lambda entity, window, limit: [],
+    )
+    # 07:10 em São Paulo (10:10 UTC): slot de hoje ainda não venceu
+    before = dt.datetime(2026, 3, 2, 10, 10, tzinfo=UTC)
+    after = dt.datetime(2026, 3, 2, 10, 20, tzinfo=UTC)
+    warmer._last_slot = {e: warmer.slot(e, before) for e in warmer.entities()}
+    assert warmer.due(before) == []
+
+    due = dict(warmer.due(after))
+    assert due["fiis_quota_prices"].hour == 7 and due["fiis_quota_prices"].minute == 15
+
+    report = warmer.run_once(after)
+    assert report["fiis_quota_prices"] == {"ok": 3, "skipped": 0, "mismatch": 0, "error": 0}
+    assert warmer.run_once(after) == {}
+
+
+def test_slot_lock_is_shared_between_processes() -> None:
+    locks = _Locks()
+    now = dt.datetime(2026, 3, 2, 12, 0, tzinfo=UTC)
+    kwargs = dict(config=_config(), top_questions=lambda entity, window, limit: [])
+    first = CacheWarmer(_Orchestrator(), CachePolicies(), locks, **kwargs)
+    second_orchestrator = _Orchestrator()
+    second = CacheWarmer(second_orchestrator, CachePolicies(), locks, **kwargs)
+
+    assert "fiis_quota_prices" in first.run_once(now)
+    assert second.run_once(now) == {}
+    assert second_orchestrator.calls == []
+
+
+def test_recent_traffic_first_then_ticker_fallback(events) -> None:
+    orchestrator = _Orchestrator(routes={"quanto vale o ABCP11": "fiis_overview"})
+    top = [("cotação HGLG11 hoje", 9), ("quanto vale o ABCP11", 4)]
+    warmer = CacheWarmer(
+        orchestrator,
+        CachePolicies(),
+        config=_config(),
+        top_questions=lambda entity, window, limit: top,
+    )
+
+    assert warmer.questions_for("fiis_quota_prices") == [
+        "cotação HGLG11 hoje",
+        "quanto vale o ABCP11",
+        "preço do HGLG11",
+    ]
+    stats = warmer.warm_entity("fiis_quota_prices")
+    assert stats == {"ok": 2, "skipped": 0, "mismatch": 1, "error": 0}
+    assert [e["outcome"] for e in events] == ["ok", "mismatch", "ok"]
+    assert warmer.questions_for("fiis_rankings") == [q for q, _ in top]
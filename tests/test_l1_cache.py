@@ -0,0 +1,194 @@
+import queue
+import time
+
+import pytest
+
+from app.cache import l1_cache as l1_mod
+from app.cache import rt_cache
+from app.cache.l1_cache import L1Cache
+from app.cache.rt_cache import CachePolicies, RedisCache, public_entity_admitter
+
+
+@pytest.fixture(autouse=True)
+def counters(monkeypatch: pytest.MonkeyPatch):
+    seen = []
+    monkeypatch.setattr(rt_cache, "counter", lambda name, **labels: None)
+    monkeypatch.setattr(rt_cache, "histogram", lambda name, value, **labels: None)
+    monkeypatch.setattr(
+        l1_mod, "counter", lambda name, **labels: seen.append({"name": name, **labels})
+    )
+    return seen
+
+
+class _FakeBroker:
+    def __init__(self):
+        self.queues = []
+
+    def publish(self, channel, message):
+        for q in self.queues:
+            q.put({"type": "message", "channel": channel, "data": message})
+        return len(self.queues)
+
+
+class _FakePubSub:
+    def __init__(self, broker):
+        self._queue = queue.Queue()
+        broker.queues.append(self._queue)
+
+    def subscribe(self, channel):
+        self.channel = channel
+
+    def listen(self):
+        while True:
+            yield self._queue.get()
+
+    def close(self):
+        pass
+
+
+class _FakePipeline:
+    def __init__(self, client):
+        self._client = client
+        self._ops = []
+
+    def execute_command(self, command, key, **options):
+        assert command == "GET"
+        self._ops.append(("get", key))
+
+    def pttl(self, key):
+        self._ops.append(("pttl", key))
+
+    def execute(self):
+        out = []
+        for op, key in self._ops:
+            self._client.calls.append(op)
+            if op == "get":
+                out.append(self._client.data.get(key, (None, 0))[0])
+            else:
+                out.append(self._client.data.get(key, (None, -2))[1] * 1000)
+        return out
+
+
+class _FakeRedis:
+    def __init__(self, broker, data=None):
+        self.broker = broker
+        self.data = data if data is not None else {}
+        self.calls = []
+
+    def execute_command(self, command, key, **options):
+        assert command == "GET"
+        self.calls.append("get")
+        return self.data.get(key, (None, 0))[0]
+
+    def set(self, key, value, ex=None):
+        self.calls.append("set")
+        self.data[key] = (value, ex)
+
+    def delete(self, key):
+        return 1 if self.data.pop(key, None) is not None else 0
+
+    def pipeline(self, transaction=False):
+        return _FakePipeline(self)
+
+    def publish(self, channel, message):
+        return self.broker.publish(channel, message)
+
+    def pubsub(self, ignore_subscribe_messages=True):
+        return _FakePubSub(self.broker)
+
+
+def _cache(broker, data, policies):
+    cache = RedisCache("redis://unused:6379/0")
+    cache._cli = _FakeRedis(broker, data)
+    l1 = L1Cache(admit=public_entity_admitter(policies), max_entries=8)
+    cache.enable_l1(l1)
+    l1.active()
+    deadline = time.time() + 2
+    while not l1.active() and time.time() < deadline:
+        time.sleep(0.01)
+    assert l1.active()
+    return cache
+
+
+def _key(entity, scope="pub"):
+    return f"araquem:dev:cfg-x:{scope}:{entity}:plan:abc"
+
+
+def test_admits_only_public_entities_with_policy() -> None:
+    admit = public_entity_admitter(CachePolicies())
+    assert admit(_key("fiis_overview"))
+    assert not admit(_key("client_fiis_positions", scope="prv"))
+    assert not admit(_key("client_fiis_positions"))  # private: true
+    assert not admit(_key("entity_without_policy"))
+    assert not admit("rag:qemb:deadbeef")
+
+
+def test_l1_serves_hot_keys_without_redis_and_returns_copies(counters) -> None:
+    broker, data = _FakeBroker(), {}
+    cache = _cache(broker, data, CachePolicies())
+    key = _key("fiis_overview")
+
+    cache.set_json(key, {"rows": [1, 2]}, ttl_seconds=60)
+    cache._cli.calls.clear()
+
+    first = cache.get_json(key)
+    first["rows"].append(3)
+    assert cache.get_json(key) == {"rows": [1, 2]}
+    assert cache._cli.calls == []
+    assert [c["outcome"] for c in counters] == ["store", "hit", "hit"]
+
+    private_key = _key("client_fiis_positions", scope="prv")
+    cache.set_json(private_key, {"rows": [1]}, ttl_seconds=60)
+    cache._cli.calls.clear()
+    cache.get_json(private_key)
+    assert cache._cli.calls == ["get"]
+
+
+def test_redis_hit_populates_l1_with_remaining_ttl(monkeypatch) -> None:
+    key = _key("fiis_rankings")
+    broker = _FakeBroker()
+    cache = _cache(broker, {key: ('{"v": 1}', 5)}, CachePolicies())
+
+    assert cache.get_json(key) == {"v": 1}
+    assert cache._cli.calls == ["get", "pttl"]
+    assert cache.get_json(key) == {"v": 1}
+    assert cache._cli.calls == ["get", "pttl"]
+
+    real_monotonic = time.monotonic
+    monkeypatch.setattr(l1_mod.time, "monotonic", lambda: real_monotonic() + 6)
+    cache.get_json(key)
+    assert cache._cli.calls[-2:] == ["get", "pttl"]
+
+
+def test_bust_invalidates_l1_in_every_process() -> None:
+    broker, data = _FakeBroker(), {}
+    policies = CachePolicies()
+    proc_a = _cache(broker, data, policies)
+    proc_b = _cache(broker, data, policies)
+    key = _key("fiis_overview")
+
+    proc_a.set_json(key, {"v": "old"}, ttl_seconds=60)
+    assert proc_b.get_json(key) == {"v": "old"}
+    assert len(proc_b.l1) == 1
+
+    assert proc_a.bust(key) == 1
+    deadline = time.time() + 2
+    while len(proc_b.l1) and time.time() < deadline:
+        time.sleep(0.01)
+    assert len(proc_b.l1) == 0
+    assert proc_b.get_json(key) is None
+
+
+def test_stale_read_does_not_repopulate_after_invalidation() -> None:
+    l1 = L1Cache(admit=lambda key: True, max_entries=4, max_ttl_seconds=60)
+    epoch = l1.epoch
+    l1.invalidate("k")
+    l1.put("k", "1", 30, epoch=epoch)
+    assert l1.get("k") is None
+
+
+def test_lru_is_bounded() -> None:
+    l1 = L1Cache(admit=lambda key: True, max_entries=2, max_ttl_seconds=60)
+    for key in ("a", "b", "c"):
+        l1.put(key, "1", 30)
+    assert len(l1) == 2 and l1.get("a") is None
@@ -0,0 +1,160 @@
+import asyncio
+import queue
+import threading
+import time
+
+import pytest
+
+from app.cache import rt_cache
+from app.cache.rt_cache import AsyncRedisCache, RedisCache
+from app.cache.single_flight import KeyNotifier, LocalFlights
+
+
+@pytest.fixture(autouse=True)
+def _no_metrics(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(rt_cache, "counter", lambda name, **labels: None)
+    monkeypatch.setattr(rt_cache, "histogram", lambda name, value, **labels: None)
+
+
+class _FakePubSub:
+    def __init__(self, broker):
+        self._queue = queue.Queue()
+        self._broker = broker
+
+    def psubscribe(self, pattern):
+        self._broker.subscribers.append((pattern.rstrip("*"), self._queue))
+
+    def listen(self):
+        while True:
+            yield self._queue.get()
+
+    def close(self):
+        pass
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.data = {}
+        self.gets = 0
+        self.subscribers = []
+
+    def execute_command(self, command, key, **options):
+        self.gets += 1
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def publish(self, channel, message):
+        for prefix, q in self.subscribers:
+            if channel.startswith(prefix):
+                q.put({"type": "pmessage", "channel": channel, "data": message})
+        return len(self.subscribers)
+
+    def pubsub(self, ignore_subscribe_messages=True):
+        return _FakePubSub(self)
+
+
+class _FakeAsyncRedis:
+    def __init__(self, sync: _FakeRedis):
+        self._sync = sync
+
+    async def execute_command(self, command, key, **options):
+        return self._sync.execute_command(command, key, **options)
+
+    async def publish(self, channel, message):
+        return self._sync.publish(channel, message)
+
+
+def _subscribed(cache: RedisCache) -> RedisCache:
+    deadline = time.time() + 2
+    while not cache.notifier.active() and time.time() < deadline:
+        time.sleep(0.01)
+    assert cache.notifier.active()
+    return cache
+
+
+def _cache() -> RedisCache:
+    cache = RedisCache("redis://unused:6379/0")
+    cache._cli = _FakeRedis()
+    cache._notifier = KeyNotifier(cache._cli)
+    return _subscribed(cache)
+
+
+def test_local_flights_share_one_result_as_copies() -> None:
+    flights = LocalFlights()
+    leader, fut = flights.begin("k")
+    assert leader
+    results = []
+
+    def follower():
+        is_leader, f = flights.begin("k")
+        assert not is_leader
+        results.append(flights.wait(f, 2000))
+
+    threads = [threading.Thread(target=follower) for _ in range(3)]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    flights.finish("k", {"rows": [1]})
+    for t in threads:
+        t.join()
+
+    assert results == [{"rows": [1]}] * 3
+    results[0]["rows"].append(2)
+    assert results[1] == {"rows": [1]}
+    assert len(flights) == 0
+
+
+def test_local_flights_failed_leader_and_timeout() -> None:
+    flights = LocalFlights()
+    flights.begin("k")
+    _, fut = flights.begin("k")
+    assert flights.wait(fut, 10) is None
+    flights.finish("k", None)
+    assert flights.wait(fut, 10) is None
+    assert flights.begin("k")[0] is True
+
+
+def test_wait_for_key_wakes_on_notify_without_polling() -> None:
+    cache = _cache()
+    key = "araquem:dev:cfg:pub:fiis_overview:plan:abc"
+
+    def leader():
+        time.sleep(0.05)
+        cache.set_json(key, {"v": 1}, ttl_seconds=60)
+        cache.notify_key(key)
+
+    threading.Thread(target=leader).start()
+    t0 = time.perf_counter()
+    assert cache.wait_for_key(key, max_wait_ms=2000, step_ms=500) == {"v": 1}
+    assert time.perf_counter() - t0 < 0.5
+    # uma releitura ao registrar + uma ao acordar
+    assert cache._cli.gets == 2
+
+
+def test_wait_for_key_falls_back_to_polling_without_subscription() -> None:
+    cache = RedisCache("redis://unused:6379/0")
+    cache._cli = _FakeRedis()
+    cache._notifier = KeyNotifier(None)
+    cache._cli.data["k"] = '{"v": 2}'
+    assert cache.wait_for_key("k", max_wait_ms=100, step_ms=10) == {"v": 2}
+
+
+@pytest.mark.asyncio
+async def test_async_wait_for_key_uses_shared_notifier() -> None:
+    sync = _cache()
+    acache = AsyncRedisCache("redis://unused:6379/0", notifier=sync.notifier)
+    acache._cli = _FakeAsyncRedis(sync._cli)
+    key = "k"
+
+    async def leader():
+        await asyncio.sleep(0.05)
+        sync._cli.data[key] = '{"v": 3}'
+        await acache.notify_key(key)
+
+    task = asyncio.create_task(leader())
+    t0 = time.perf_counter()
+    assert await acache.wait_for_key(key, max_wait_ms=2000, step_ms=500) == {"v": 3}
+    assert time.perf_counter() - t0 < 0.5
+    await task
@@ -0,0 +1,168 @@
+import threading
+import time
+
+import pytest
+
+from app.cache import rt_cache, swr
+from app.cache.rt_cache import RedisCache, read_through
+
+
+@pytest.fixture(autouse=True)
+def events(monkeypatch: pytest.MonkeyPatch):
+    seen = []
+    monkeypatch.setattr(rt_cache, "counter", lambda name, **labels: None)
+    monkeypatch.setattr(rt_cache, "histogram", lambda name, value, **labels: None)
+    monkeypatch.setattr(
+        swr, "counter", lambda name, **labels: seen.append({"name": name, **labels})
+    )
+    monkeypatch.setattr(
+        swr,
+        "histogram",
+        lambda name, value, **labels: seen.append({"name": name, **labels}),
+    )
+    return seen
+
+
+class _FakePipeline:
+    def __init__(self, client):
+        self._client = client
+        self._ops = []
+
+    def execute_command(self, command, key, **options):
+        self._ops.append(("get", key))
+
+    def pttl(self, key):
+        self._ops.append(("pttl", key))
+
+    def set(self, key, value, ex=None):
+        self._ops.append(("set", (key, value, ex)))
+
+    def zadd(self, key, mapping):
+        pass
+
+    def zremrangebyscore(self, key, low, high):
+        pass
+
+    def expire(self, key, seconds, **options):
+        pass
+
+    def execute(self):
+        out = []
+        for op, key in self._ops:
+            if op == "set":
+                out.append(self._client.set(*key))
+                continue
+            value, ttl = self._client.data.get(key, (None, None))
+            out.append(value if op == "get" else (ttl * 1000 if ttl else -2))
+        return out
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.data = {}
+        self.locks = set()
+
+    def execute_command(self, command, key, **options):
+        return self.data.get(key, (None, None))[0]
+
+    def set(self, key, value, ex=None, nx=False, px=None):
+        if nx:
+            if key in self.locks:
+                return False
+            self.locks.add(key)
+            return True
+        self.data[key] = (value, ex)
+        return True
+
+    def eval(self, script, numkeys, key, token):
+        self.locks.discard(key)
+        return 1
+
+    def pipeline(self, transaction=False):
+        return _FakePipeline(self)
+
+
+class _Policies:
+    def __init__(self, policy):
+        self._policy = policy
+
+    def get(self, entity):
+        return self._policy
+
+    def is_private_entity(self, entity):
+        return False
+
+
+def _cache() -> RedisCache:
+    cache = RedisCache("redis://unused:6379/0")
+    cache._cli = _FakeRedis()
+    return cache
+
+
+def _wait_idle(timeout=2.0):
+    deadline = time.time() + timeout
+    while swr._pending and time.time() < deadline:
+        time.sleep(0.01)
+    assert not swr._pending
+
+
+def test_is_stale_uses_remaining_ttl_window() -> None:
+    assert not swr.is_stale(5000, 0)
+    assert not swr.is_stale(-2, 10)
+    assert not swr.is_stale(20_000, 10)
+    assert swr.is_stale(10_000, 10)
+    assert swr.stale_ttl_seconds({"stale_ttl_seconds": "30"}) == 30
+    assert swr.stale_ttl_seconds({"stale_ttl_seconds": -1}) == 0
+    assert swr.stale_ttl_seconds(None) == 0
+
+
+def test_set_json_keeps_key_alive_for_stale_window() -> None:
+    cache = _cache()
+    cache.set_json("k", {"v": 1}, ttl_seconds=60, stale_ttl_seconds=30)
+    assert cache._cli.data["k"][1] == 90
+    assert cache.get_json_swr("k", 30) == ({"v": 1}, False)
+
+    cache._cli.data["k"] = (cache._cli.data["k"][0], 20)
+    assert cache.get_json_swr("k", 30) == ({"v": 1}, True)
+    assert cache.get_json_swr("missing", 30) == (None, False)
+
+
+def test_schedule_refresh_runs_once_per_key(events) -> None:
+    cache = _cache()
+    gate = threading.Event()
+    calls = []
+
+    def refresh():
+        calls.append(1)
+        gate.wait(2)
+
+    assert swr.schedule_refresh(cache, "k", refresh, layer="t")
+    assert not swr.schedule_refresh(cache, "k", refresh, layer="t")
+    gate.set()
+    _wait_idle()
+    assert calls == [1]
+    assert cache._cli.locks == set()
+    assert [e["outcome"] for e in events] == ["ok"]
+
+
+def test_read_through_serves_stale_and_refreshes_in_background(events) -> None:
+    cache = _cache()
+    policies = _Policies({"ttl_seconds": 60, "stale_ttl_seconds": 30, "scope": "pub"})
+    fetched = iter([[{"v": "old"}], [{"v": "new"}]])
+
+    first = read_through(cache, policies, "fiis_overview", {"ticker": "X"}, lambda: next(fetched))
+    assert first["cached"] is False
+    key = first["key"]
+    assert cache._cli.data[key][1] == 90
+
+    # TTL restante dentro da janela stale
+    cache._cli.data[key] = (cache._cli.data[key][0], 10)
+    second = read_through(cache, policies, "fiis_overview", {"ticker": "X"}, lambda: next(fetched))
+    assert second["stale"] is True and second["value"] == [{"v": "old"}]
+    _wait_idle()
+
+    assert cache.get_json(key) == [{"v": "new"}]
+    assert cache._cli.data[key][1] == 90
+    names = [e["name"] for e in events]
+    assert names == ["sirios_cache_stale_served_total", "sirios_cache_refresh_seconds"]
+    assert events[0]["layer"] == "read_through" and events[0]["entity"] == "fiis_overview"